@@ -0,0 +1,234 @@
+"""
+ALMACÉN DE AUDIOS POR CONTENIDO
+Cada grabación se guarda con el hash SHA-256 de su contenido como nombre,
+repartida en subcarpetas (blobs/ab/cd/abcd....wav) para que ninguna carpeta
+crezca sin límite. La tabla audio_catalogo relaciona (persona, sesión,
+ejercicio, intento) con el archivo: un reintento es un intento nuevo y nunca
+sobrescribe la grabación anterior; dos grabaciones idénticas comparten archivo.
+
+Uso (importar las grabaciones con el formato de nombres anterior):
+    python almacen_audio.py [--carpeta audio_registros] [--borrar-originales]
+"""
+import io
+import os
+import re
+import wave
+import hashlib
+import argparse
+from datetime import datetime
+from typing import Optional, Tuple
+
+from config import Config
+
+
+CARPETA_BLOBS = 'blobs'
+
+# {palabra}_{nivel}_sesion{n}_{fecha}[_{k}].wav  (formato anterior)
+PATRON_NOMBRE_SESION = re.compile(
+    r'^(?P<etiqueta>.+)_(?P<nivel>[A-ZÁÉÍÓÚÑ]+)_sesion(?P<numero>\d+)_'
+    r'(?P<fecha>\d{4}-\d{2}-\d{2})(?:_\d+)?\.wav$'
+)
+# ejercicio_{id}_{fecha}_{hora}.wav  (grabaciones sin datos de sesión)
+PATRON_NOMBRE_EJERCICIO = re.compile(
+    r'^ejercicio_(?P<exercise_id>\d+)_(?P<fecha>\d{4}-\d{2}-\d{2})_(?P<hora>\d{6})\.wav$'
+)
+
+
+def duracion_wav(datos: bytes) -> Optional[float]:
+    """Duración en segundos de un WAV PCM (None si no se puede leer)"""
+    try:
+        with wave.open(io.BytesIO(datos), 'rb') as archivo:
+            return archivo.getnframes() / float(archivo.getframerate())
+    except (wave.Error, EOFError, ZeroDivisionError):
+        return None
+
+
+def wav_desde_muestras(muestras, sample_rate: int) -> bytes:
+    """WAV PCM 16 bits mono a partir de un arreglo int16 (el que graba sounddevice)"""
+    salida = io.BytesIO()
+    with wave.open(salida, 'wb') as archivo:
+        archivo.setnchannels(1)
+        archivo.setsampwidth(2)
+        archivo.setframerate(sample_rate)
+        archivo.writeframes(muestras.tobytes())
+    return salida.getvalue()
+
+
+class AlmacenAudio:
+    """Guarda grabaciones por hash y las registra en audio_catalogo"""
+
+    def __init__(self, db, carpeta: str = None):
+        self.db = db
+        self.carpeta = carpeta or Config.AUDIO_FOLDER
+        self.carpeta_blobs = os.path.join(self.carpeta, CARPETA_BLOBS)
+        os.makedirs(self.carpeta_blobs, exist_ok=True)
+
+    def ruta_blob(self, sha256: str) -> str:
+        return os.path.join(self.carpeta_blobs, sha256[:2], sha256[2:4], f"{sha256}.wav")
+
+    def guardar_bytes(self, datos: bytes) -> Tuple[str, str]:
+        """
+        Guardar el contenido si todavía no existe
+
+        Returns:
+            (sha256, ruta del archivo)
+        """
+        sha256 = hashlib.sha256(datos).hexdigest()
+        ruta = self.ruta_blob(sha256)
+
+        if not os.path.exists(ruta):
+            os.makedirs(os.path.dirname(ruta), exist_ok=True)
+            # Escribir aparte y renombrar: nunca queda un archivo a medias
+            temporal = f"{ruta}.{os.getpid()}.tmp"
+            with open(temporal, 'wb') as f:
+                f.write(datos)
+            os.replace(temporal, ruta)
+
+        return sha256, ruta
+
+    def guardar(self, datos: bytes, person_id: int, numero_sesion: int, exercise_id: int,
+                etiqueta: str = None, fecha: str = None, origen: str = None) -> Optional[dict]:
+        """
+        Guardar un WAV como un intento nuevo del ejercicio
+
+        Returns:
+            Dict con audio_id, intento, sha256, ruta y duracion (None si falla)
+        """
+        sha256, ruta = self.guardar_bytes(datos)
+        duracion = duracion_wav(datos)
+        registro = self.db.registrar_audio(
+            person_id, numero_sesion or 0, exercise_id or 0, sha256,
+            duracion=duracion, tamano=len(datos),
+            etiqueta=etiqueta, fecha=fecha, origen=origen
+        )
+        if registro is None:
+            return None
+
+        registro.update({'sha256': sha256, 'ruta': ruta, 'duracion': duracion})
+        return registro
+
+    def guardar_grabacion(self, muestras, sample_rate: int, person_id: int,
+                          numero_sesion: int, exercise_id: int,
+                          etiqueta: str = None) -> Optional[dict]:
+        """Guardar una grabación de sounddevice (int16 mono)"""
+        return self.guardar(
+            wav_desde_muestras(muestras, sample_rate),
+            person_id, numero_sesion, exercise_id, etiqueta
+        )
+
+    # ========== IMPORTACIÓN DE GRABACIONES ANTERIORES ==========
+
+    def _interpretar_nombre(self, nombre: str, ejercicios: dict) -> Optional[dict]:
+        """Datos de sesión a partir del nombre de archivo del formato anterior"""
+        coincidencia = PATRON_NOMBRE_SESION.match(nombre)
+        if coincidencia:
+            etiqueta = coincidencia['etiqueta']
+            palabra = etiqueta[len('TEST_'):] if etiqueta.startswith('TEST_') else etiqueta
+            return {
+                'etiqueta': etiqueta,
+                'numero_sesion': int(coincidencia['numero']),
+                'exercise_id': ejercicios.get(palabra.replace('_', ' ').upper(), 0),
+                'fecha': f"{coincidencia['fecha']} 00:00:00",
+            }
+
+        coincidencia = PATRON_NOMBRE_EJERCICIO.match(nombre)
+        if coincidencia:
+            hora = coincidencia['hora']
+            return {
+                'etiqueta': None,
+                'numero_sesion': 0,
+                'exercise_id': int(coincidencia['exercise_id']),
+                'fecha': f"{coincidencia['fecha']} {hora[:2]}:{hora[2:4]}:{hora[4:]}",
+            }
+        return None
+
+    def importar_anteriores(self, borrar_originales: bool = False) -> dict:
+        """
+        Pasar al almacén las grabaciones guardadas como carpeta/{person_id}/*.wav
+
+        Se puede ejecutar varias veces: lo ya importado se omite. Las rutas en
+        resultado_ejercicio pasan a apuntar al archivo del almacén.
+
+        Returns:
+            Dict con importados, omitidos, no_reconocidos y resultados_actualizados
+        """
+        ejercicios = {e.word.upper(): e.exercise_id for e in self.db.obtener_todos_ejercicios()}
+        ya_importados = self.db.obtener_origenes_audio()
+        rutas_nuevas = {}
+        totales = {'importados': 0, 'omitidos': 0, 'no_reconocidos': 0}
+
+        for carpeta_persona in sorted(os.listdir(self.carpeta)):
+            ruta_carpeta = os.path.join(self.carpeta, carpeta_persona)
+            if not carpeta_persona.isdigit() or not os.path.isdir(ruta_carpeta):
+                continue
+
+            for nombre in sorted(os.listdir(ruta_carpeta)):
+                ruta = os.path.join(ruta_carpeta, nombre)
+                if ruta in ya_importados:
+                    totales['omitidos'] += 1
+                    continue
+
+                datos_nombre = self._interpretar_nombre(nombre, ejercicios)
+                if datos_nombre is None:
+                    totales['no_reconocidos'] += 1
+                    continue
+
+                with open(ruta, 'rb') as f:
+                    datos = f.read()
+
+                registro = self.guardar(
+                    datos, int(carpeta_persona), datos_nombre['numero_sesion'],
+                    datos_nombre['exercise_id'], etiqueta=datos_nombre['etiqueta'],
+                    fecha=datos_nombre['fecha'], origen=ruta
+                )
+                if registro is None:
+                    continue
+
+                rutas_nuevas[ruta] = registro['ruta']
+                totales['importados'] += 1
+
+        totales['resultados_actualizados'] = self.db.reemplazar_rutas_audio(rutas_nuevas)
+
+        # Solo cuando los resultados ya apuntan al almacén
+        if borrar_originales:
+            for ruta in rutas_nuevas:
+                os.remove(ruta)
+        return totales
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Importar grabaciones al almacén por contenido")
+    parser.add_argument('--carpeta', default=Config.AUDIO_FOLDER)
+    parser.add_argument('--db', default=Config.DATABASE_PATH)
+    parser.add_argument('--borrar-originales', action='store_true',
+                        help='Borrar cada archivo anterior después de importarlo')
+    args = parser.parse_args()
+
+    from database import Database
+
+    print("\n" + "="*70)
+    print("🎙️  IMPORTACIÓN DE GRABACIONES")
+    print("="*70 + "\n")
+
+    db = Database(args.db)
+    inicio = datetime.now()
+    try:
+        totales = AlmacenAudio(db, args.carpeta).importar_anteriores(args.borrar_originales)
+    except Exception as e:
+        print(f"❌ Error al importar grabaciones: {e}")
+        return
+    finally:
+        db.cerrar()
+
+    print(f"   ✅ Importadas: {totales['importados']:,}")
+    print(f"   ⏭️  Ya importadas: {totales['omitidos']:,}")
+    print(f"   ⚠️  Nombre no reconocido: {totales['no_reconocidos']:,}")
+    print(f"   🔗 Resultados actualizados: {totales['resultados_actualizados']:,}")
+
+    segundos = (datetime.now() - inicio).total_seconds()
+    print(f"\n⏱️  Tiempo total: {segundos:.2f} s")
+    print("="*70 + "\n")
+
+
+if __name__ == "__main__":
+    main()
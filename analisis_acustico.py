@@ -0,0 +1,276 @@
+"""
+ANÁLISIS ACÚSTICO DE GRABACIONES
+Características objetivas de cada intento grabado, calculadas con NumPy
+sobre todas las tramas a la vez (sin bucles por trama en Python):
+
+- duración y proporción de voz (tramas con energía sobre el umbral)
+- energía RMS de las tramas con voz (dB)
+- tono (F0) por autocorrelación: mediana y desviación
+- centroide y planitud espectral
+- relación nasal: energía 200-400 Hz frente a 400-1600 Hz (dB). En la
+  hipernasalidad crece la energía baja y se atenúa el primer formante oral;
+  sirve para ver tendencias de un mismo niño, no como medida clínica aislada
+
+Los WAV PCM de 16 bits (los que graba el robot) se leen mapeados en memoria;
+los demás formatos se leen con soundfile. El lote se reparte en procesos.
+
+Uso:
+    python analisis_acustico.py [--procesos N] [--db data.db]
+"""
+import os
+import struct
+import argparse
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+import soundfile as sf
+
+from config import Config
+
+
+# Cambiar si cambia el cálculo: los análisis de otra versión se rehacen
+VERSION_ANALISIS = 2
+
+FRECUENCIA_ANALISIS = 16000  # Hz: se reduce a esta frecuencia (o la más cercana por encima)
+DURACION_TRAMA = 0.040       # s (cubre períodos de hasta 75 Hz)
+DURACION_SALTO = 0.020       # s
+TONO_MINIMO = 75.0           # Hz
+TONO_MAXIMO = 500.0          # Hz (voces infantiles agudas)
+CLARIDAD_MINIMA_TONO = 0.30  # autocorrelación normalizada mínima para contar el tono
+RMS_MINIMO_VOZ = 0.005       # piso absoluto del umbral de voz (escala -1.0 a 1.0)
+BANDA_NASAL = (200.0, 400.0)
+BANDA_ORAL = (400.0, 1600.0)
+
+TAMANO_LOTE = 200
+
+
+# ========== LECTURA ==========
+
+def _ubicar_datos_pcm16(ruta: str) -> Optional[Tuple[int, int, int, int]]:
+    """
+    (offset, muestras, canales, frecuencia) del bloque 'data' de un WAV PCM 16
+
+    None si el archivo no es PCM de 16 bits sin comprimir.
+    """
+    with open(ruta, 'rb') as f:
+        cabecera = f.read(12)
+        if len(cabecera) < 12 or cabecera[:4] != b'RIFF' or cabecera[8:12] != b'WAVE':
+            return None
+
+        formato = None
+        while True:
+            bloque = f.read(8)
+            if len(bloque) < 8:
+                return None
+            nombre, tamano = bloque[:4], struct.unpack('<I', bloque[4:])[0]
+
+            if nombre == b'fmt ':
+                datos = f.read(tamano)
+                codigo, canales, frecuencia = struct.unpack('<HHI', datos[:8])
+                bits = struct.unpack('<H', datos[14:16])[0]
+                formato = (codigo, canales, frecuencia, bits)
+            elif nombre == b'data':
+                if formato is None or formato[0] != 1 or formato[3] != 16:
+                    return None
+                _, canales, frecuencia, _ = formato
+                return f.tell(), tamano // 2, canales, frecuencia
+            else:
+                f.seek(tamano + (tamano & 1), os.SEEK_CUR)
+
+
+def leer_audio(ruta: str) -> Tuple[np.ndarray, int]:
+    """Muestras float32 mono (-1.0 a 1.0) y frecuencia de muestreo"""
+    ubicacion = _ubicar_datos_pcm16(ruta)
+
+    if ubicacion is not None:
+        offset, muestras, canales, frecuencia = ubicacion
+        # El sistema operativo carga las páginas a medida que se leen
+        pcm = np.memmap(ruta, dtype='<i2', mode='r', offset=offset,
+                        shape=(muestras // canales, canales))
+        senal = pcm.mean(axis=1, dtype=np.float32) if canales > 1 else pcm[:, 0].astype(np.float32)
+        return senal / 32768.0, frecuencia
+
+    senal, frecuencia = sf.read(ruta, dtype='float32', always_2d=True)
+    return senal.mean(axis=1), frecuencia
+
+
+# ========== CARACTERÍSTICAS ==========
+
+def _tramas(senal: np.ndarray, largo: int, salto: int) -> np.ndarray:
+    """Vista (sin copiar) de la señal partida en tramas solapadas"""
+    if len(senal) < largo:
+        senal = np.pad(senal, (0, largo - len(senal)))
+    return np.lib.stride_tricks.sliding_window_view(senal, largo)[::salto]
+
+
+def extraer_caracteristicas(senal: np.ndarray, frecuencia: int) -> dict:
+    """Características acústicas de una grabación (ver el encabezado del módulo)"""
+    resultado = {
+        'duracion': len(senal) / frecuencia,
+        'proporcion_voz': 0.0, 'rms_db': None, 'tono_medio': None,
+        'tono_desviacion': None, 'centroide': None, 'planitud': None,
+        'relacion_nasal_db': None,
+    }
+
+    # Todo lo que se mide está por debajo de 8 kHz: reducir la frecuencia
+    # (promediando de a 'factor' muestras) abarata mucho las FFT
+    factor = max(1, int(frecuencia // FRECUENCIA_ANALISIS))
+    if factor > 1:
+        senal = senal[:len(senal) // factor * factor].reshape(-1, factor).mean(axis=1)
+        frecuencia = frecuencia / factor
+
+    largo = int(DURACION_TRAMA * frecuencia)
+    salto = int(DURACION_SALTO * frecuencia)
+    tramas = _tramas(senal, largo, salto)
+
+    # --- Voz / silencio ---
+    rms = np.sqrt(np.mean(np.square(tramas, dtype=np.float32), axis=1))
+    # Sobre el piso absoluto, el ruido de fondo y una fracción de lo más fuerte.
+    # p10 es ruido solo si hay silencio: en una vocal sostenida (voz en casi
+    # todas las tramas) es la voz misma, por eso no pasa de la mitad de p95
+    p10, p95 = np.percentile(rms, [10, 95])
+    umbral = max(RMS_MINIMO_VOZ, min(2.0 * float(p10), 0.5 * float(p95)), 0.1 * float(p95))
+    voz = rms > umbral
+    resultado['proporcion_voz'] = float(voz.mean())
+
+    if not voz.any():
+        return resultado
+
+    tramas_voz = tramas[voz]
+    resultado['rms_db'] = float(20 * np.log10(np.mean(rms[voz]) + 1e-12))
+
+    # --- Espectro de potencia de todas las tramas con voz ---
+    n_fft = 1 << (2 * largo - 1).bit_length()  # sin solapamiento circular en la autocorrelación
+    ventana = np.hanning(largo).astype(np.float32)
+    potencia = np.abs(np.fft.rfft(tramas_voz * ventana, n=n_fft, axis=1)) ** 2
+    frecuencias = np.fft.rfftfreq(n_fft, 1.0 / frecuencia)
+
+    # --- Tono por autocorrelación (Wiener-Khinchin: irfft del espectro) ---
+    autocorr = np.fft.irfft(potencia, n=n_fft, axis=1)
+    retardo_min = int(frecuencia / TONO_MAXIMO)
+    retardo_max = min(int(frecuencia / TONO_MINIMO), largo - 1)
+    ventana_retardos = autocorr[:, retardo_min:retardo_max]
+    mejor = np.argmax(ventana_retardos, axis=1)
+    claridad = ventana_retardos[np.arange(len(mejor)), mejor] / (autocorr[:, 0] + 1e-12)
+    # Un máximo en el borde del rango no es un período (ruido o tono fuera de rango)
+    validas = (claridad > CLARIDAD_MINIMA_TONO) & (mejor > 0) & (mejor < ventana_retardos.shape[1] - 1)
+    tonos = frecuencia / (mejor + retardo_min)[validas]
+    if len(tonos):
+        resultado['tono_medio'] = float(np.median(tonos))
+        resultado['tono_desviacion'] = float(np.std(tonos))
+
+    # --- Forma del espectro ---
+    total = potencia.sum(axis=1) + 1e-12
+    resultado['centroide'] = float(np.mean((potencia * frecuencias).sum(axis=1) / total))
+    resultado['planitud'] = float(np.mean(
+        np.exp(np.mean(np.log(potencia + 1e-12), axis=1)) / (np.mean(potencia, axis=1) + 1e-12)
+    ))
+
+    nasal = potencia[:, (frecuencias >= BANDA_NASAL[0]) & (frecuencias < BANDA_NASAL[1])].sum()
+    oral = potencia[:, (frecuencias >= BANDA_ORAL[0]) & (frecuencias < BANDA_ORAL[1])].sum()
+    resultado['relacion_nasal_db'] = float(10 * np.log10((nasal + 1e-12) / (oral + 1e-12)))
+
+    return resultado
+
+
+def analizar_archivo(ruta: str) -> dict:
+    """Características de un archivo; si falla, un dict con 'error'"""
+    try:
+        senal, frecuencia = leer_audio(ruta)
+        return extraer_caracteristicas(senal, frecuencia)
+    except Exception as e:
+        return {'error': f"{type(e).__name__}: {e}"}
+
+
+def analizar_archivos(rutas: Iterable[str], procesos: int = None) -> Iterator[Tuple[str, dict]]:
+    """
+    Analizar muchos archivos repartidos en procesos
+
+    Devuelve (ruta, características) en el mismo orden que las rutas.
+    Con procesos=1 se analiza en el proceso actual.
+    """
+    rutas = list(rutas)
+    procesos = procesos or os.cpu_count() or 1
+
+    if procesos == 1 or len(rutas) < 2:
+        for ruta in rutas:
+            yield ruta, analizar_archivo(ruta)
+        return
+
+    # Varios archivos por tarea: menos ida y vuelta entre procesos
+    por_tarea = max(1, min(16, len(rutas) // (procesos * 4)))
+    with ProcessPoolExecutor(max_workers=procesos) as executor:
+        yield from zip(rutas, executor.map(analizar_archivo, rutas, chunksize=por_tarea))
+
+
+# ========== CATÁLOGO ==========
+
+def analizar_catalogo(db, procesos: int = None, carpeta: str = None,
+                      tamano_lote: int = TAMANO_LOTE) -> dict:
+    """
+    Analizar las grabaciones del catálogo que todavía no tienen análisis
+
+    Los resultados se guardan por lotes; si se interrumpe, lo guardado se
+    conserva y la próxima ejecución sigue con lo que falta.
+
+    Returns:
+        Dict con analizados y errores
+    """
+    from almacen_audio import AlmacenAudio
+    almacen = AlmacenAudio(db, carpeta)
+    totales = {'analizados': 0, 'errores': 0}
+
+    while True:
+        pendientes = db.obtener_audios_sin_analisis(VERSION_ANALISIS, tamano_lote)
+        if not pendientes:
+            return totales
+
+        rutas = {almacen.ruta_blob(sha256): sha256 for sha256 in pendientes}
+        lote = []
+        for ruta, caracteristicas in analizar_archivos(rutas, procesos):
+            caracteristicas['sha256'] = rutas[ruta]
+            lote.append(caracteristicas)
+            totales['errores' if 'error' in caracteristicas else 'analizados'] += 1
+
+        # Los errores también se guardan para no reintentarlos en cada corrida
+        if db.guardar_analisis_acustico(VERSION_ANALISIS, lote) < len(lote):
+            return totales
+
+        print(f"   📊 {totales['analizados'] + totales['errores']:,} grabaciones procesadas")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analizar grabaciones del catálogo")
+    parser.add_argument('--procesos', type=int, default=None,
+                        help='Procesos en paralelo (por defecto, uno por núcleo)')
+    parser.add_argument('--db', default=Config.DATABASE_PATH)
+    parser.add_argument('--carpeta', default=Config.AUDIO_FOLDER)
+    args = parser.parse_args()
+
+    from database import Database
+
+    print("\n" + "="*70)
+    print("🔬 ANÁLISIS ACÚSTICO DE GRABACIONES")
+    print("="*70 + "\n")
+
+    db = Database(args.db)
+    inicio = datetime.now()
+    try:
+        totales = analizar_catalogo(db, args.procesos, args.carpeta)
+    except Exception as e:
+        print(f"❌ Error en el análisis: {e}")
+        return
+    finally:
+        db.cerrar()
+
+    segundos = (datetime.now() - inicio).total_seconds()
+    print(f"\n   ✅ Analizadas: {totales['analizados']:,}")
+    print(f"   ⚠️  Con error: {totales['errores']:,}")
+    print(f"\n⏱️  Tiempo total: {segundos:.2f} s")
+    print("="*70 + "\n")
+
+
+if __name__ == "__main__":
+    main()
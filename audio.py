@@ -12,6 +12,7 @@ import threading
 import subprocess
 import tempfile
 from config import Config
+from trazas import trazar, tramo
 
 # Imports para sounddevice
 import sounddevice as sd
@@ -32,6 +33,9 @@ class AudioSystemConInterfaz:
         # Referencia a la interfaz para mostrar eyes.gif cuando habla
         self.interfaz = interfaz
         
+        # Almacén por contenido para las grabaciones (ver set_almacen_audio)
+        self.almacen_audio = None
+        
         # Reconocimiento de voz
         self.recognizer = sr.Recognizer()
         self.recognizer.energy_threshold = Config.ENERGY_THRESHOLD
@@ -75,6 +79,10 @@ class AudioSystemConInterfaz:
         """Configurar la interfaz para notificaciones"""
         self.interfaz = interfaz
     
+    def set_almacen_audio(self, almacen_audio):
+        """Guardar las grabaciones en el almacén por contenido (AlmacenAudio)"""
+        self.almacen_audio = almacen_audio
+    
     def _verificar_sounddevice(self):
         """Verifica que sounddevice esté disponible"""
         try:
@@ -196,6 +204,7 @@ class AudioSystemConInterfaz:
     
     # ========== RECONOCIMIENTO DE VOZ ==========
     
+    @trazar(categoria='audio')
     def escuchar(self, timeout: int = 5, phrase_time_limit: int = 5) -> Optional[str]:
         """Escucha y retorna texto reconocido.
         
@@ -213,7 +222,7 @@ class AudioSystemConInterfaz:
                     print("⚠️ No se pudo adquirir el micrófono, está ocupado")
                     return None
                 try:
-                    with sr.Microphone() as source:
+                    with tramo('escucha.microfono', 'audio'), sr.Microphone() as source:
                         self.recognizer.adjust_for_ambient_noise(source, duration=0.1)
                         audio = self.recognizer.listen(source, timeout=timeout, phrase_time_limit=phrase_time_limit)
                 finally:
@@ -231,9 +240,10 @@ class AudioSystemConInterfaz:
                     except Exception as e:
                         error[0] = e
 
-                hilo = threading.Thread(target=reconocer, daemon=True)
-                hilo.start()
-                hilo.join(timeout=5)
+                with tramo('asr', 'audio'):
+                    hilo = threading.Thread(target=reconocer, daemon=True)
+                    hilo.start()
+                    hilo.join(timeout=5)
 
                 # 3. Verificar si Google respondió a tiempo
                 if hilo.is_alive():
@@ -267,6 +277,7 @@ class AudioSystemConInterfaz:
     
     # ========== SÍNTESIS DE VOZ CON NOTIFICACIÓN ==========
     
+    @trazar(categoria='audio')
     def hablar(self, texto: str, velocidad: float = 1.0):
         """
         Convierte texto a voz y MUESTRA EYES.GIF durante la reproducción
@@ -309,46 +320,48 @@ class AudioSystemConInterfaz:
     def _hablar_con_elevenlabs(self, texto: str, velocidad: float = 1.0) -> bool:
         """Hablar usando ElevenLabs API"""
         try:
-            audio_generator = self.elevenlabs_client.text_to_speech.convert(
-                voice_id="pNInz6obpgDQGcFmaJgB",
-                text=texto,
-                model_id="eleven_multilingual_v2"
-            )
-            
-            with tempfile.NamedTemporaryFile(suffix='.mp3', delete=False) as temp_file:
-                temp_filename = temp_file.name
+            with tramo('tts.sintesis', 'audio', motor='elevenlabs'):
+                audio_generator = self.elevenlabs_client.text_to_speech.convert(
+                    voice_id="pNInz6obpgDQGcFmaJgB",
+                    text=texto,
+                    model_id="eleven_multilingual_v2"
+                )
                 
-                for chunk in audio_generator:
-                    if chunk:
-                        temp_file.write(chunk)
+                with tempfile.NamedTemporaryFile(suffix='.mp3', delete=False) as temp_file:
+                    temp_filename = temp_file.name
+                    
+                    for chunk in audio_generator:
+                        if chunk:
+                            temp_file.write(chunk)
             
             reproduccion_exitosa = False
             
-            # Intentar con sox + mpg123
-            if velocidad != 1.0 and self.sox_disponible:
-                try:
-                    proceso_sox = subprocess.Popen(['sox', temp_filename, '-t', 'mp3', '-', 
-                                                   'tempo', str(velocidad)],
-                                                  stdout=subprocess.PIPE,
-                                                  stderr=subprocess.DEVNULL)
-                    subprocess.run(['mpg123', '-q', '-'], 
-                                 stdin=proceso_sox.stdout,
-                                 check=True,
-                                 stderr=subprocess.DEVNULL)
-                    proceso_sox.wait()
-                    reproduccion_exitosa = True
-                except:
-                    pass
-            
-            # Fallback a mpg123 solo
-            if not reproduccion_exitosa:
-                try:
-                    subprocess.run(['mpg123', '-q', temp_filename], 
-                                 check=True, 
-                                 stderr=subprocess.DEVNULL)
-                    reproduccion_exitosa = True
-                except:
-                    pass
+            with tramo('tts.reproduccion', 'audio', motor='elevenlabs'):
+                # Intentar con sox + mpg123
+                if velocidad != 1.0 and self.sox_disponible:
+                    try:
+                        proceso_sox = subprocess.Popen(['sox', temp_filename, '-t', 'mp3', '-', 
+                                                       'tempo', str(velocidad)],
+                                                      stdout=subprocess.PIPE,
+                                                      stderr=subprocess.DEVNULL)
+                        subprocess.run(['mpg123', '-q', '-'], 
+                                     stdin=proceso_sox.stdout,
+                                     check=True,
+                                     stderr=subprocess.DEVNULL)
+                        proceso_sox.wait()
+                        reproduccion_exitosa = True
+                    except:
+                        pass
+                
+                # Fallback a mpg123 solo
+                if not reproduccion_exitosa:
+                    try:
+                        subprocess.run(['mpg123', '-q', temp_filename], 
+                                     check=True, 
+                                     stderr=subprocess.DEVNULL)
+                        reproduccion_exitosa = True
+                    except:
+                        pass
             
             try:
                 os.remove(temp_filename)
@@ -380,9 +393,10 @@ class AudioSystemConInterfaz:
                 except Exception as e:
                     error_gtts[0] = e
 
-            hilo = threading.Thread(target=generar_audio, daemon=True)
-            hilo.start()
-            hilo.join(timeout=10)
+            with tramo('tts.sintesis', 'audio', motor='gtts'):
+                hilo = threading.Thread(target=generar_audio, daemon=True)
+                hilo.start()
+                hilo.join(timeout=10)
 
             if hilo.is_alive():
                 print("⚠️ gTTS sin respuesta, omitiendo audio...")
@@ -392,7 +406,8 @@ class AudioSystemConInterfaz:
                 print(f"⚠️ gTTS falló: {error_gtts[0]}")
                 return False
 
-            subprocess.run(['mpg123', '-q', temp_filename], check=True, timeout=20)
+            with tramo('tts.reproduccion', 'audio', motor='gtts'):
+                subprocess.run(['mpg123', '-q', temp_filename], check=True, timeout=20)
 
             try:
                 os.remove(temp_filename)
@@ -410,7 +425,8 @@ class AudioSystemConInterfaz:
         try:
             velocidad_espeak = int(Config.TTS_RATE * velocidad)
             comando = ['espeak', '-v', 'es', '-s', str(velocidad_espeak), texto]
-            subprocess.run(comando, check=True, timeout=10)
+            with tramo('tts.reproduccion', 'audio', motor='espeak'):
+                subprocess.run(comando, check=True, timeout=10)
             return True
             
         except subprocess.TimeoutExpired:
@@ -496,6 +512,30 @@ class AudioSystemConInterfaz:
             traceback.print_exc()
             return None
     
+    def _ruta_audio_sin_almacen(self, person_id: int, exercise_id: int,
+                                ejercicio_nombre: str = None, nivel_actual: str = None,
+                                numero_sesion: int = None) -> str:
+        """Ruta con el formato anterior, sin pisar un archivo existente"""
+        carpeta_usuario = os.path.join(Config.AUDIO_FOLDER, str(person_id))
+        os.makedirs(carpeta_usuario, exist_ok=True)
+        fecha = datetime.now().strftime('%Y-%m-%d')
+
+        if ejercicio_nombre and nivel_actual and numero_sesion is not None:
+            nombre_limpio = ejercicio_nombre.replace(' ', '_').replace('/', '_')
+            nivel_limpio = nivel_actual.replace(' ', '_')
+            base = f"{nombre_limpio}_{nivel_limpio}_sesion{numero_sesion}_{fecha}"
+        else:
+            timestamp = datetime.now().strftime('%H%M%S')
+            base = f"ejercicio_{exercise_id}_{fecha}_{timestamp}"
+
+        audio_path = os.path.join(carpeta_usuario, f"{base}.wav")
+        numero = 2
+        while os.path.exists(audio_path):
+            audio_path = os.path.join(carpeta_usuario, f"{base}_{numero}.wav")
+            numero += 1
+        return audio_path
+    
+    @trazar(categoria='audio')
     def grabar_y_escuchar(self, duracion: int, person_id: int, exercise_id: int,
                       ejercicio_nombre: str = None, nivel_actual: str = None,
                       numero_sesion: int = None) -> tuple:
@@ -526,33 +566,35 @@ class AudioSystemConInterfaz:
                 print("⚠️ No se pudo adquirir el micrófono, está ocupado")
                 return (None, None)
             try:
-                audio_data = sd.rec(
-                    int(duracion * sample_rate),
-                    samplerate=sample_rate,
-                    channels=1,
-                    dtype='int16',
-                    device=self.input_device_index
-                )
-                sd.wait()
+                with tramo('grabacion', 'audio'):
+                    audio_data = sd.rec(
+                        int(duracion * sample_rate),
+                        samplerate=sample_rate,
+                        channels=1,
+                        dtype='int16',
+                        device=self.input_device_index
+                    )
+                    sd.wait()
             finally:
                 self.mic_lock.release()
 
-            # 2. Guardar archivo .wav
-            carpeta_usuario = os.path.join(Config.AUDIO_FOLDER, str(person_id))
-            os.makedirs(carpeta_usuario, exist_ok=True)
-            fecha = datetime.now().strftime('%Y-%m-%d')
-
-            if ejercicio_nombre and nivel_actual and numero_sesion is not None:
-                nombre_limpio = ejercicio_nombre.replace(' ', '_').replace('/', '_')
-                nivel_limpio = nivel_actual.replace(' ', '_')
-                nombre_archivo = f"{nombre_limpio}_{nivel_limpio}_sesion{numero_sesion}_{fecha}.wav"
-            else:
-                timestamp = datetime.now().strftime('%H%M%S')
-                nombre_archivo = f"ejercicio_{exercise_id}_{fecha}_{timestamp}.wav"
-
-            audio_path = os.path.join(carpeta_usuario, nombre_archivo)
-            sf.write(audio_path, audio_data, sample_rate)
-            print(f"✅ Audio guardado: {nombre_archivo}")
+            # 2. Guardar archivo .wav (cada intento es un archivo propio)
+            with tramo('grabacion.guardar', 'audio'):
+                if self.almacen_audio is not None:
+                    registro = self.almacen_audio.guardar_grabacion(
+                        audio_data, sample_rate, person_id, numero_sesion, exercise_id,
+                        etiqueta=ejercicio_nombre
+                    )
+                    if registro:
+                        audio_path = registro['ruta']
+                        print(f"✅ Audio guardado: intento {registro['intento']} ({registro['sha256'][:12]})")
+
+                if audio_path is None:
+                    audio_path = self._ruta_audio_sin_almacen(
+                        person_id, exercise_id, ejercicio_nombre, nivel_actual, numero_sesion
+                    )
+                    sf.write(audio_path, audio_data, sample_rate)
+                    print(f"✅ Audio guardado: {os.path.basename(audio_path)}")
 
             # 3. Convertir el mismo array a sr.AudioData sin abrir el micrófono
             audio_bytes = audio_data.tobytes()
@@ -560,10 +602,11 @@ class AudioSystemConInterfaz:
 
             # 4. Transcribir desde el objeto AudioData
             try:
-                texto_reconocido = self.recognizer.recognize_google(
-                    audio_sr,
-                    language=Config.SPEECH_LANGUAGE
-                )
+                with tramo('asr', 'audio'):
+                    texto_reconocido = self.recognizer.recognize_google(
+                        audio_sr,
+                        language=Config.SPEECH_LANGUAGE
+                    )
                 print(f"✅ Texto reconocido: {texto_reconocido}")
             except sr.UnknownValueError:
                 print("⚠️ No se entendió el audio")
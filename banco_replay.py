@@ -0,0 +1,510 @@
+"""
+BANCO DE PRUEBAS CON GRABACIONES (REPLAY)
+Ejecuta sesiones de ejercicios completas sin niño, micrófono, pantalla ni
+servicios de red, para medir cambios de forma reproducible:
+
+- AudioReplay reemplaza a AudioSystemConInterfaz: "graba" sirviendo los WAV
+  de audio_registros/ (guardados con el AlmacenAudio real) y habla con
+  tiempos fijos según el largo del texto
+- ServidorIAReplay es un servidor HTTP local compatible con
+  /v1/chat/completions, con latencia configurable: chatopenai usa el cliente
+  OpenAI real apuntando a él (OPENAI_BASE_URL)
+- RobotService.realizar_sesion_ejercicios corre sin interfaz (o con
+  InterfazHeadless, --headless) sobre una copia de la base de datos en una
+  carpeta temporal (data.db no se modifica)
+
+Al final se informa el tiempo total y por fase (voz, grabación, IA, base de
+datos, pausas y el resto), a partir de los tramos de trazas.py, y se
+comprueba la evaluación: cada resultado guardado debe coincidir con lo que
+AudioReplay hizo "decir" al niño y la tasa de aciertos debe estar cerca de
+--acierto (si no, sale con código 1).
+
+Uso:
+    python banco_replay.py [--sesiones 3] [--latencia-ia 300] [--escala 1.0]
+                           [--acierto 0.7] [--semilla 7] [--headless]
+                           [--json resultado.json]
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import threading
+import unicodedata
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+from config import Config
+import trazas
+from trazas import trazar, tramo
+from ritmo import PERFILES_RITMO
+
+
+# Tiempos simulados de voz (segundos, antes de aplicar la escala)
+SINTESIS_TTS = 0.35            # generar el audio de una frase
+SEGUNDOS_POR_CARACTER = 0.06   # reproducción (~15 caracteres por segundo)
+LATENCIA_ASR = 0.40            # reconocimiento de una grabación
+SIN_TEXTO = 0.15               # grabaciones en que el reconocimiento no devuelve nada
+
+# Fases del informe: categoría de los tramos -> nombre
+FASES = {
+    'audio': 'Voz y grabación',
+    'ia': 'IA (chat completions)',
+    'db': 'Base de datos',
+    'ritmo': 'Pausas del ritmo',
+    'ui': 'Interfaz',
+    'sesion': 'Lógica de la sesión',
+}
+
+
+def _normalizar(texto: str) -> str:
+    sin_tildes = unicodedata.normalize('NFD', texto or '')
+    sin_tildes = ''.join(c for c in sin_tildes if unicodedata.category(c) != 'Mn')
+    return ' '.join(sin_tildes.upper().replace('_', ' ').split())
+
+
+# ========== AUDIO SIMULADO ==========
+
+class AudioReplay:
+    """
+    Misma interfaz que AudioSystemConInterfaz, sin dispositivos
+
+    Cada grabación sirve el WAV de la misma palabra si existe (si no, uno
+    de la lista, en orden). Con probabilidad SIN_TEXTO no se reconoce nada;
+    si se reconoce algo, es la palabra correcta con probabilidad 'acierto'.
+    """
+
+    def __init__(self, grabaciones: List[str], escala: float = 1.0,
+                 acierto: float = 0.7, semilla: int = 7):
+        self.interfaz = None
+        self.almacen_audio = None
+        self.escala = escala
+        self.acierto = acierto
+        self.rng = random.Random(semilla)
+        self.dichos: List[str] = []
+
+        self.grabaciones = grabaciones or [None]
+        self._siguiente = 0
+        self._por_palabra: Dict[str, List[str]] = {}
+        from almacen_audio import PATRON_NOMBRE_SESION
+        for ruta in grabaciones:
+            coincidencia = PATRON_NOMBRE_SESION.match(os.path.basename(ruta))
+            if coincidencia:
+                etiqueta = coincidencia.group('etiqueta')
+                if etiqueta.startswith('TEST_'):
+                    etiqueta = etiqueta[len('TEST_'):]
+                self._por_palabra.setdefault(_normalizar(etiqueta), []).append(ruta)
+
+    def set_interfaz(self, interfaz):
+        self.interfaz = interfaz
+
+    def set_almacen_audio(self, almacen_audio):
+        self.almacen_audio = almacen_audio
+
+    @trazar('AudioSystemConInterfaz.hablar', 'audio')
+    def hablar(self, texto: str, velocidad: float = 1.0):
+        self.dichos.append(texto)
+        if self.interfaz:
+            self.interfaz.mostrar_eyes()
+        with tramo('tts.sintesis', 'audio', motor='replay'):
+            time.sleep(SINTESIS_TTS * self.escala)
+        with tramo('tts.reproduccion', 'audio', motor='replay'):
+            time.sleep(len(texto or '') * SEGUNDOS_POR_CARACTER * self.escala / velocidad)
+
+    @trazar('AudioSystemConInterfaz.escuchar', 'audio')
+    def escuchar(self, timeout: int = 5, phrase_time_limit: int = 5) -> Optional[str]:
+        """Las preguntas abiertas de la sesión (¿seguimos?) se responden que sí"""
+        with tramo('escucha.microfono', 'audio'):
+            time.sleep(1.0 * self.escala)
+        return "sí"
+
+    def _wav_para(self, palabra: str) -> Optional[str]:
+        candidatas = self._por_palabra.get(_normalizar(palabra))
+        if candidatas:
+            return candidatas[self.rng.randrange(len(candidatas))]
+        ruta = self.grabaciones[self._siguiente % len(self.grabaciones)]
+        self._siguiente += 1
+        return ruta
+
+    @trazar('AudioSystemConInterfaz.grabar_y_escuchar', 'audio')
+    def grabar_y_escuchar(self, duracion: int, person_id: int, exercise_id: int,
+                          ejercicio_nombre: str = None, nivel_actual: str = None,
+                          numero_sesion: int = None) -> tuple:
+        with tramo('grabacion', 'audio'):
+            time.sleep(duracion * self.escala)
+
+        palabra = ejercicio_nombre or ''
+        if palabra.startswith('TEST_'):
+            palabra = palabra[len('TEST_'):]
+        ruta = self._wav_para(palabra)
+
+        audio_path = None
+        with tramo('grabacion.guardar', 'audio'):
+            if ruta is None:
+                from almacen_audio import wav_desde_muestras
+                from array import array
+                datos = wav_desde_muestras(array('h', bytes(32000)), 16000)
+            else:
+                with open(ruta, 'rb') as f:
+                    datos = f.read()
+            if self.almacen_audio is not None:
+                registro = self.almacen_audio.guardar(
+                    datos, person_id, numero_sesion, exercise_id, etiqueta=ejercicio_nombre
+                )
+                if registro:
+                    audio_path = registro['ruta']
+
+        with tramo('asr', 'audio'):
+            time.sleep(LATENCIA_ASR * self.escala)
+            if self.rng.random() < SIN_TEXTO:
+                texto = None
+            elif self.rng.random() < self.acierto:
+                texto = palabra.lower()
+            else:
+                texto = "mmm"
+        return texto, audio_path
+
+
+# ========== IA SIMULADA ==========
+
+class _ManejadorIA(BaseHTTPRequestHandler):
+    """POST .../chat/completions con la forma de respuesta de OpenAI"""
+
+    def do_POST(self):
+        largo = int(self.headers.get('Content-Length') or 0)
+        try:
+            pedido = json.loads(self.rfile.read(largo) or b'{}')
+        except ValueError:
+            pedido = {}
+
+        time.sleep(self.server.latencia)
+        contenido = self.server.responder(pedido.get('messages') or [])
+        with self.server.lock:
+            self.server.pedidos += 1
+            numero = self.server.pedidos
+
+        cuerpo = json.dumps({
+            'id': f"replay-{numero}", 'object': 'chat.completion', 'created': 0,
+            'model': pedido.get('model', 'replay'),
+            'choices': [{'index': 0, 'finish_reason': 'stop',
+                         'message': {'role': 'assistant', 'content': contenido}}],
+            'usage': {'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0},
+        }, ensure_ascii=False).encode('utf-8')
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def log_message(self, formato, *args):
+        pass
+
+
+class ServidorIAReplay(ThreadingHTTPServer):
+    """Servidor local de chat completions con respuestas deterministas"""
+
+    daemon_threads = True
+
+    def __init__(self, latencia_ms: float = 300.0, puerto: int = 0):
+        super().__init__(('127.0.0.1', puerto), _ManejadorIA)
+        self.latencia = latencia_ms / 1000.0
+        self.lock = threading.Lock()
+        self.pedidos = 0
+        self._hilo: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/v1"
+
+    @staticmethod
+    def responder(mensajes: List[dict]) -> str:
+        texto = mensajes[-1].get('content', '') if mensajes else ''
+        if 'Palabra esperada:' in texto:
+            esperada = dicha = ''
+            for linea in texto.splitlines():
+                if linea.startswith('Palabra esperada:'):
+                    esperada = linea.split(':', 1)[1].strip().strip('"')
+                elif linea.startswith('Palabra que dijo:'):
+                    dicha = linea.split(':', 1)[1].strip().strip('"')
+            if _normalizar(esperada) == _normalizar(dicha):
+                return "RESULTADO: correcto\nCONFIANZA: 0.9\nFEEDBACK: ¡Muy bien! Lo dijiste perfecto"
+            return "RESULTADO: incorrecto\nCONFIANZA: 0.8\nFEEDBACK: ¡Buen intento! Vamos otra vez"
+        return "¡Muy bien, sigamos!"
+
+    def iniciar(self) -> 'ServidorIAReplay':
+        self._hilo = threading.Thread(target=self.serve_forever, daemon=True)
+        self._hilo.start()
+        return self
+
+    def detener(self):
+        self.shutdown()
+        self.server_close()
+
+
+# ========== EVALUACIÓN ==========
+
+def resumen_evaluacion(db, person_id: int) -> dict:
+    """
+    Resultados guardados contra la verdad de la simulación
+
+    Un ejercicio evaluado (con texto reconocido) es correcto si el texto es
+    la palabra; 'discrepancias' son los que la sesión guardó al revés.
+    """
+    filas = db.conn.execute("""
+        SELECT r.respuesta, r.correcto, e.word
+        FROM resultado_ejercicio r
+        JOIN exercise e ON e.exerciseId = r.exerciseId
+        WHERE r.personId = ?
+    """, (person_id,)).fetchall()
+
+    evaluados = [(respuesta, bool(correcto), word) for respuesta, correcto, word in filas if respuesta]
+    correctos = sum(1 for _, correcto, _ in evaluados if correcto)
+    discrepancias = sum(
+        1 for respuesta, correcto, word in evaluados
+        if correcto != (_normalizar(respuesta) == _normalizar(word.replace('TEST_', '', 1)))
+    )
+    return {
+        'ejercicios': len(filas),
+        'evaluados': len(evaluados),
+        'correctos': correctos,
+        'tasa': correctos / len(evaluados) if evaluados else None,
+        'discrepancias': discrepancias,
+    }
+
+
+def verificar_evaluacion(resultado: dict) -> List[str]:
+    """Problemas de la evaluación (lista vacía si todo coincide)"""
+    evaluacion = resultado['evaluacion']
+    acierto = resultado['parametros']['acierto']
+    problemas = []
+
+    if evaluacion['discrepancias']:
+        problemas.append(f"{evaluacion['discrepancias']} de {evaluacion['evaluados']} ejercicios "
+                         f"se guardaron con el resultado contrario al simulado")
+
+    n = evaluacion['evaluados']
+    if n:
+        # Tres desvíos de una binomial (al menos 0.10) alrededor de 'acierto'
+        tolerancia = max(0.10, 3 * (acierto * (1 - acierto) / n) ** 0.5)
+        if abs(evaluacion['tasa'] - acierto) > tolerancia:
+            problemas.append(f"tasa de aciertos {evaluacion['tasa']:.2f} lejos de {acierto:.2f} "
+                             f"(tolerancia {tolerancia:.2f}, {n} evaluados)")
+    return problemas
+
+
+# ========== INFORME ==========
+
+def tiempo_propio_por_categoria(eventos: List[dict]) -> Dict[str, float]:
+    """
+    Segundos por categoría sin contar dos veces los tramos anidados
+
+    A cada tramo se le descuenta lo que duran sus tramos hijos (en el
+    mismo hilo), así la suma de categorías es el tiempo medido.
+    """
+    por_hilo: Dict[int, List[dict]] = {}
+    for evento in eventos:
+        if evento.get('ph') == 'X':
+            por_hilo.setdefault(evento['tid'], []).append(evento)
+
+    totales: Dict[str, float] = {}
+    for lista in por_hilo.values():
+        lista.sort(key=lambda e: (e['ts'], -e['dur']))
+        pila: List[list] = []  # [fin, categoría, tiempo propio]
+
+        def cerrar():
+            fin, categoria, propio = pila.pop()
+            totales[categoria] = totales.get(categoria, 0.0) + propio / 1e6
+
+        for evento in lista:
+            while pila and pila[-1][0] <= evento['ts']:
+                cerrar()
+            if pila:
+                pila[-1][2] -= evento['dur']
+            pila.append([evento['ts'] + evento['dur'], evento.get('cat') or 'otros', evento['dur']])
+        while pila:
+            cerrar()
+    return totales
+
+
+def _grabaciones_disponibles(carpeta: str) -> List[str]:
+    from procesamiento_incremental import recorrer_archivos
+    if not os.path.isdir(carpeta):
+        return []
+    return [os.path.join(carpeta, *ruta.split('/'))
+            for ruta in sorted(recorrer_archivos(carpeta, ('.wav',)))]
+
+
+# ========== EJECUCIÓN ==========
+
+def ejecutar_banco(sesiones: int = 3, latencia_ia_ms: float = 300.0, escala: float = 1.0,
+                   acierto: float = 0.7, semilla: int = 7, db_origen: str = None,
+                   carpeta_audios: str = None, perfil: str = None,
+                   headless: bool = False) -> dict:
+    """
+    Ejecutar sesiones simuladas y medir el tiempo por fase
+
+    Returns:
+        Dict con parámetros, total, duración de cada sesión, fases y tramos
+        (percentiles de trazas.estadisticas)
+    """
+    db_origen = os.path.abspath(db_origen or Config.DATABASE_PATH)
+    grabaciones = _grabaciones_disponibles(os.path.abspath(carpeta_audios or Config.AUDIO_FOLDER))
+    if perfil:
+        Config.PERFIL_RITMO = perfil
+
+    random.seed(semilla)
+    servidor = ServidorIAReplay(latencia_ia_ms).iniciar()
+    directorio_original = os.getcwd()
+    trabajo = tempfile.mkdtemp(prefix='banco_replay_')
+    activas_antes = trazas.activas()
+
+    try:
+        # Copia de la base de datos y carpetas de trabajo en el temporal
+        shutil.copy2(db_origen, os.path.join(trabajo, 'data.db'))
+        os.chdir(trabajo)
+
+        # chatopenai crea el cliente al importarse: antes apuntarlo al servidor local
+        os.environ['OPENAI_BASE_URL'] = servidor.url
+        os.environ['OPENAI_API_KEY'] = 'replay'
+        if 'chatopenai' in sys.modules:
+            sys.modules['chatopenai']._asistente_inteligente.client.base_url = servidor.url
+
+        from database import Database
+        from models import Persona, NivelTerapia
+        from services import RobotService
+
+        db = Database('data.db')
+        audio = AudioReplay(grabaciones, escala, acierto, semilla)
+        servicio = RobotService(db, audio)
+        interfaz = None
+        if headless:
+            from ui_headless import InterfazHeadless
+            interfaz = InterfazHeadless(escala_animaciones=escala)
+            servicio.set_interfaz(interfaz)
+        persona = Persona(name='Replay', age=7, apellido='Banco', nivel_actual=NivelTerapia.INICIAL)
+        persona.person_id = db.crear_persona(persona)
+
+        trazas.activar()
+        duraciones = []
+        eventos: List[dict] = []
+        for numero in range(1, sesiones + 1):
+            print(f"\n🔁 Sesión simulada {numero}/{sesiones}")
+            trazas.iniciar_sesion()
+            inicio = time.perf_counter()
+            with tramo('sesion', 'sesion'):
+                servicio.realizar_sesion_ejercicios(persona)
+            duraciones.append(time.perf_counter() - inicio)
+            ruta = trazas.terminar_sesion(os.path.join(trabajo, 'trazas'))
+            if ruta:
+                with open(ruta, 'r', encoding='utf-8') as f:
+                    eventos += json.load(f)['traceEvents']
+        evaluacion = resumen_evaluacion(db, persona.person_id)
+        db.cerrar()
+    finally:
+        trazas.activar(activas_antes)
+        os.chdir(directorio_original)
+        servidor.detener()
+        shutil.rmtree(trabajo, ignore_errors=True)
+
+    por_tramo: Dict[str, List[float]] = {}
+    for evento in eventos:
+        if evento.get('ph') == 'X':
+            por_tramo.setdefault(evento['name'], []).append(evento['dur'] / 1000)
+
+    return {
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'parametros': {
+            'sesiones': sesiones, 'latencia_ia_ms': latencia_ia_ms, 'escala': escala,
+            'acierto': acierto, 'semilla': semilla, 'perfil_ritmo': Config.PERFIL_RITMO,
+            'grabaciones': len(grabaciones), 'headless': headless,
+        },
+        'total': sum(duraciones),
+        'sesiones': duraciones,
+        'pedidos_ia': servidor.pedidos,
+        'evaluacion': evaluacion,
+        'interfaz': interfaz.resumen() if interfaz else None,
+        'fases': tiempo_propio_por_categoria(eventos),
+        'tramos': trazas.estadisticas(por_tramo),
+    }
+
+
+def imprimir_informe(resultado: dict):
+    p = resultado['parametros']
+    print("\n" + "="*70)
+    print("🧪 BANCO DE PRUEBAS CON GRABACIONES")
+    print("="*70)
+    print(f"   Sesiones: {p['sesiones']}   Latencia IA: {p['latencia_ia_ms']:.0f} ms   "
+          f"Escala: {p['escala']}   Ritmo: {p['perfil_ritmo']}")
+    print(f"   Grabaciones disponibles: {p['grabaciones']}   Pedidos a la IA: {resultado['pedidos_ia']}")
+
+    e = resultado['evaluacion']
+    tasa = f"{e['tasa']:.2f}" if e['tasa'] is not None else '-'
+    print(f"   Ejercicios: {e['ejercicios']}   Evaluados: {e['evaluados']}   "
+          f"Aciertos: {e['correctos']} ({tasa}, esperado {p['acierto']:.2f})   "
+          f"Discrepancias: {e['discrepancias']}")
+
+    total = resultado['total']
+    print(f"\n   ⏱️  Total: {total:.2f} s   "
+          f"(por sesión: {', '.join(f'{s:.2f}' for s in resultado['sesiones'])})\n")
+    print(f"   {'Fase':<26} {'Segundos':>9} {'%':>6}")
+    for categoria, segundos in sorted(resultado['fases'].items(), key=lambda x: -x[1]):
+        porcentaje = segundos / total * 100 if total else 0.0
+        print(f"   {FASES.get(categoria, categoria):<26} {segundos:>9.2f} {porcentaje:>5.1f}%")
+
+    if resultado['interfaz']:
+        print(f"\n   {'Estado de la interfaz':<26} {'Veces':>9} {'Segundos':>9}")
+        for evento, d in sorted(resultado['interfaz'].items(), key=lambda x: -x[1]['segundos']):
+            print(f"   {evento:<26} {d['veces']:>9} {d['segundos']:>9.2f}")
+
+    trazas.imprimir_estadisticas(resultado['tramos'], "TRAMOS")
+    print("="*70 + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Medir sesiones completas sin dispositivos ni red")
+    parser.add_argument('--sesiones', type=int, default=3)
+    parser.add_argument('--latencia-ia', type=float, default=300.0, help='ms por pedido a la IA')
+    parser.add_argument('--escala', type=float, default=1.0,
+                        help='Multiplica los tiempos simulados de voz y grabación')
+    parser.add_argument('--acierto', type=float, default=0.7,
+                        help='Probabilidad de que lo reconocido sea la palabra correcta')
+    parser.add_argument('--semilla', type=int, default=7)
+    parser.add_argument('--perfil', choices=sorted(PERFILES_RITMO), default=None,
+                        help='Perfil de ritmo (por defecto, Config.PERFIL_RITMO)')
+    parser.add_argument('--headless', action='store_true',
+                        help='Usar InterfazHeadless (mide también la interfaz)')
+    parser.add_argument('--db', default=Config.DATABASE_PATH)
+    parser.add_argument('--carpeta', default=Config.AUDIO_FOLDER)
+    parser.add_argument('--json', default=None, help='Guardar el resultado en este archivo')
+    args = parser.parse_args()
+
+    try:
+        resultado = ejecutar_banco(args.sesiones, args.latencia_ia, args.escala, args.acierto,
+                                   args.semilla, args.db, args.carpeta, args.perfil,
+                                   args.headless)
+    except Exception as e:
+        print(f"❌ Error en el banco de pruebas: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+    imprimir_informe(resultado)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(resultado, f, ensure_ascii=False, indent=2)
+        print(f"💾 Resultado guardado en {args.json}")
+
+    problemas = verificar_evaluacion(resultado)
+    for problema in problemas:
+        print(f"❌ Evaluación: {problema}")
+    if problemas:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,517 @@
+"""
+BENCHMARKS
+Microbenchmarks de los caminos calientes, con datos sintéticos y sin red ni
+micrófono:
+
+- Database._row_to_sesion y obtener_sesiones_por_persona sobre un historial
+  grande (NUM_SESIONES sesiones de una sola persona)
+- comparar_palabras con un cliente de OpenAI falso (solo prompt y parseo)
+- InterfazUnificada._cargar_gif y _cargar_imagen_ejercicio (necesitan
+  pantalla; sin ella se omiten y se mide solo la parte de PIL)
+- escritura del WAV de grabar_y_escuchar (wav_desde_muestras y
+  AlmacenAudio.guardar_grabacion)
+- utils.extraer_numero
+
+Cada benchmark se repite REPETICIONES veces con timeit y se guarda la
+mediana, mínimo, media y desviación por llamada en
+benchmarks/<commit>.json (<commit>-sucio.json con cambios sin commitear),
+para comparar entre commits:
+
+    python benchmarks.py                      # correr y guardar
+    python benchmarks.py --filtro db.         # solo los que contienen 'db.'
+    python benchmarks.py --comparar 3b51173   # sale con 1 si algo empeoró
+
+Correr desde la carpeta del proyecto (usa eyes.gif e imagenes/).
+"""
+import io
+import os
+import sys
+import json
+import random
+import sqlite3
+import platform
+import argparse
+import statistics
+import subprocess
+import tempfile
+import timeit
+import contextlib
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Optional
+
+# La instancia global de chatopenai crea el cliente al importarse; el
+# benchmark nunca llega a usarlo (se reemplaza por ClienteFalso)
+os.environ.setdefault('OPENAI_API_KEY', 'benchmark')
+
+import numpy as np
+
+import trazas
+from config import Config
+from database import Database
+from inicializar_bd_mejorado import crear_tablas
+from models import NivelTerapia
+
+
+NUM_SESIONES = 5_000
+RESULTADOS_POR_SESION = 8
+REPETICIONES = 7
+UMBRAL_REGRESION = 1.10      # mediana 10% más lenta que la referencia
+SEGUNDOS_GRABACION = 4       # como services.Config.RECORDING_DURATION
+SAMPLE_RATE = 44100          # como grabar_y_escuchar
+PANTALLA = (1920, 1080)      # para la parte de PIL sin pantalla real
+
+
+class BenchmarkOmitido(Exception):
+    """El benchmark no se puede correr en este entorno (motivo en el mensaje)"""
+
+
+# ========== REGISTRO ==========
+
+# nombre -> preparar(contexto) que devuelve la función a medir
+BENCHMARKS: Dict[str, Callable] = {}
+
+
+def benchmark(nombre: str):
+    """Decorador: registrar una función que prepara lo que se va a medir"""
+    def decorador(preparar: Callable) -> Callable:
+        BENCHMARKS[nombre] = preparar
+        return preparar
+    return decorador
+
+
+def _silencio():
+    return contextlib.redirect_stdout(io.StringIO())
+
+
+class Contexto:
+    """Datos compartidos entre benchmarks, creados la primera vez que se piden"""
+
+    def __init__(self, carpeta: str):
+        self.carpeta = carpeta
+        self._db: Optional[Database] = None
+        self._ventana = None
+        self.person_id: Optional[int] = None
+
+    def db(self) -> Database:
+        """Base sintética con una persona de NUM_SESIONES sesiones"""
+        if self._db is None:
+            db_path = os.path.join(self.carpeta, 'sintetica.db')
+            with _silencio():
+                crear_tablas(db_path)
+                Database(db_path).cerrar()  # aplica migraciones
+            self.person_id = poblar_historial(db_path)
+            with _silencio():
+                self._db = Database(db_path)
+        return self._db
+
+    def ventana(self):
+        """Ventana de Tk oculta (BenchmarkOmitido si no hay pantalla)"""
+        if self._ventana is None:
+            try:
+                import tkinter as tk
+                self._ventana = tk.Tk()
+            except ImportError as e:
+                raise BenchmarkOmitido(f"sin tkinter: {e}")
+            except Exception as e:
+                raise BenchmarkOmitido(f"sin pantalla: {e}")
+            self._ventana.withdraw()
+        return self._ventana
+
+    def cerrar(self):
+        with _silencio():
+            if self._db is not None:
+                self._db.cerrar()
+            if self._ventana is not None:
+                self._ventana.destroy()
+
+
+def poblar_historial(db_path: str, num_sesiones: int = NUM_SESIONES) -> int:
+    """Una persona con num_sesiones sesiones y sus resultados por ejercicio"""
+    rnd = random.Random(1234)
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+
+    cursor.executemany(
+        "INSERT INTO level (levelId, name, description) VALUES (?, ?, ?)",
+        [(n.value, n.name, '') for n in NivelTerapia]
+    )
+    cursor.executemany(
+        "INSERT INTO exercise (exerciseId, type, word, difficulty) VALUES (?, 'palabra', ?, ?)",
+        [(i, f"PALABRA{i}", (i - 1) // 12 + 1) for i in range(1, 49)]
+    )
+    cursor.execute(
+        """
+        INSERT INTO person (name, apellido, age, actual_level, register_date)
+        VALUES ('Benchmark', 'Historial', 8, 2, '2024-01-01 10:00:00')
+        """
+    )
+    person_id = cursor.lastrowid
+
+    inicio = datetime(2024, 1, 1)
+    for numero in range(1, num_sesiones + 1):
+        fecha = (inicio + timedelta(hours=numero * 5)).strftime('%Y-%m-%d %H:%M:%S')
+        correctos = rnd.randint(0, RESULTADOS_POR_SESION)
+        cursor.execute(
+            """
+            INSERT INTO sesion (personId, levelId, number, date, correct_exercise,
+                                failed_exercise, observation)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+            (person_id, rnd.randint(1, 4), numero, fecha, correctos,
+             RESULTADOS_POR_SESION - correctos, "Sesión sintética")
+        )
+        sesion_id = cursor.lastrowid
+        cursor.executemany(
+            """
+            INSERT INTO resultado_ejercicio (sesionId, personId, exerciseId, respuesta,
+                                             correcto, tiempo_respuesta, intentos, fecha)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            [(sesion_id, person_id, rnd.randint(1, 48), f"palabra{j}",
+              int(j < correctos), rnd.uniform(1.0, 6.0), rnd.randint(1, 3), fecha)
+             for j in range(RESULTADOS_POR_SESION)]
+        )
+
+    conn.commit()
+    conn.close()
+    return person_id
+
+
+# ========== BASE DE DATOS ==========
+
+@benchmark('db._row_to_sesion')
+def _bench_row_to_sesion(ctx: Contexto):
+    db = ctx.db()
+    filas = db.conn.execute(
+        "SELECT * FROM sesion WHERE personId = ? ORDER BY date ASC LIMIT 1000", (ctx.person_id,)
+    ).fetchall()
+
+    def medir():
+        for fila in filas:
+            db._row_to_sesion(fila, ctx.person_id)
+    return medir, f"{len(filas)} filas por llamada"
+
+
+@benchmark('db.obtener_sesiones_por_persona')
+def _bench_sesiones_por_persona(ctx: Contexto):
+    db = ctx.db()
+    if len(db.obtener_sesiones_por_persona(ctx.person_id)) != NUM_SESIONES:
+        raise BenchmarkOmitido("el historial sintético no se cargó completo")
+    return (lambda: db.obtener_sesiones_por_persona(ctx.person_id)), f"{NUM_SESIONES} sesiones"
+
+
+# ========== IA ==========
+
+class ClienteFalso:
+    """Lo mínimo de openai.OpenAI que usa comparar_palabras, sin red"""
+
+    RESPUESTA = "RESULTADO: correcto\nCONFIANZA: 0.9\nFEEDBACK: ¡Muy bien! Lo dijiste casi perfecto"
+
+    def __init__(self):
+        self.chat = self
+        self.completions = self
+
+    def create(self, **kwargs):
+        mensaje = SimpleNamespace(content=self.RESPUESTA)
+        return SimpleNamespace(choices=[SimpleNamespace(message=mensaje)])
+
+
+@benchmark('ia.comparar_palabras')
+def _bench_comparar_palabras(ctx: Contexto):
+    try:
+        with _silencio():
+            from chatopenai import AsistenteInteligente
+            asistente = AsistenteInteligente()
+    except ImportError as e:
+        raise BenchmarkOmitido(f"sin dependencias de chatopenai: {e}")
+    asistente.client = ClienteFalso()
+    return (lambda: asistente.comparar_palabras("MARIPOSA", "malipoza")), "cliente falso"
+
+
+# ========== INTERFAZ ==========
+
+def _interfaz(ctx: Contexto):
+    try:
+        import tkinter as tk
+        from ui import InterfazUnificada
+    except ImportError as e:
+        raise BenchmarkOmitido(f"sin dependencias de ui: {e}")
+    interfaz = InterfazUnificada()
+    interfaz.ventana = ctx.ventana()
+    interfaz.label_gif = tk.Label(interfaz.ventana)
+    interfaz.label_imagen_ejercicio = tk.Label(interfaz.ventana)
+    return interfaz
+
+
+def _imagen_ejercicio() -> str:
+    carpeta = 'imagenes'
+    if not os.path.isdir(carpeta):
+        raise BenchmarkOmitido("no se encontró la carpeta imagenes/")
+    imagenes = sorted(n for n in os.listdir(carpeta) if n.lower().endswith('.png'))
+    if not imagenes:
+        raise BenchmarkOmitido("no hay imágenes .png en imagenes/")
+    return os.path.join(carpeta, imagenes[0])
+
+
+@benchmark('ui._cargar_gif')
+def _bench_cargar_gif(ctx: Contexto):
+    if not os.path.exists('eyes.gif'):
+        raise BenchmarkOmitido("no se encontró eyes.gif")
+    interfaz = _interfaz(ctx)
+
+    def medir():
+        with _silencio():
+            interfaz._cargar_gif('eyes.gif')
+    return medir, "eyes.gif"
+
+
+@benchmark('ui._cargar_imagen_ejercicio')
+def _bench_cargar_imagen_ejercicio(ctx: Contexto):
+    ruta = _imagen_ejercicio()
+    interfaz = _interfaz(ctx)
+    return (lambda: interfaz._cargar_imagen_ejercicio(ruta)), os.path.basename(ruta)
+
+
+@benchmark('ui.miniatura_gif')
+def _bench_miniatura_gif(ctx: Contexto):
+    """La parte de PIL de _cargar_gif (todos los frames a 80% de PANTALLA)"""
+    try:
+        from PIL import Image
+    except ImportError as e:
+        raise BenchmarkOmitido(f"sin PIL: {e}")
+    if not os.path.exists('eyes.gif'):
+        raise BenchmarkOmitido("no se encontró eyes.gif")
+    tamano = (int(PANTALLA[0] * 0.8), int(PANTALLA[1] * 0.8))
+
+    def medir():
+        gif = Image.open('eyes.gif')
+        try:
+            while True:
+                frame = gif.copy()
+                frame.thumbnail(tamano, Image.Resampling.LANCZOS)
+                gif.seek(gif.tell() + 1)
+        except EOFError:
+            pass
+    return medir, f"eyes.gif a {tamano[0]}x{tamano[1]}"
+
+
+@benchmark('ui.miniatura_imagen_ejercicio')
+def _bench_miniatura_imagen(ctx: Contexto):
+    """La parte de PIL de _cargar_imagen_ejercicio (50% de PANTALLA)"""
+    try:
+        from PIL import Image
+    except ImportError as e:
+        raise BenchmarkOmitido(f"sin PIL: {e}")
+    ruta = _imagen_ejercicio()
+    tamano = (int(PANTALLA[0] * 0.5), int(PANTALLA[1] * 0.5))
+
+    def medir():
+        imagen = Image.open(ruta)
+        imagen.thumbnail(tamano, Image.Resampling.LANCZOS)
+    return medir, f"{os.path.basename(ruta)} a {tamano[0]}x{tamano[1]}"
+
+
+# ========== AUDIO ==========
+
+def _muestras_grabacion() -> np.ndarray:
+    """Ruido int16 mono con la duración de una grabación real"""
+    rnd = np.random.default_rng(1234)
+    return rnd.integers(-3000, 3000, SEGUNDOS_GRABACION * SAMPLE_RATE, dtype=np.int16)
+
+
+@benchmark('audio.wav_desde_muestras')
+def _bench_wav_desde_muestras(ctx: Contexto):
+    from almacen_audio import wav_desde_muestras
+    muestras = _muestras_grabacion()
+    return (lambda: wav_desde_muestras(muestras, SAMPLE_RATE)), f"{SEGUNDOS_GRABACION} s a {SAMPLE_RATE} Hz"
+
+
+@benchmark('audio.guardar_grabacion')
+def _bench_guardar_grabacion(ctx: Contexto):
+    from almacen_audio import AlmacenAudio
+    db = ctx.db()
+    almacen = AlmacenAudio(db, os.path.join(ctx.carpeta, 'audio'))
+    muestras = _muestras_grabacion()
+    contador = [0]
+
+    def medir():
+        # Cada llamada es un audio distinto: si no, el almacén no lo reescribe
+        contador[0] += 1
+        muestras[0] = contador[0] % 30000
+        muestras[1] = contador[0] // 30000
+        almacen.guardar_grabacion(muestras, SAMPLE_RATE, ctx.person_id, 1, 1, etiqueta='BENCHMARK')
+    return medir, "WAV + blob + audio_catalogo"
+
+
+# ========== UTILS ==========
+
+@benchmark('utils.extraer_numero')
+def _bench_extraer_numero(ctx: Contexto):
+    from utils import extraer_numero
+    textos = ["tengo 7 años", "tengo siete años", "creo que dieciocho", "doce", "no sé"]
+
+    def medir():
+        for texto in textos:
+            try:
+                extraer_numero(texto)
+            except ValueError:
+                pass
+    return medir, f"{len(textos)} textos por llamada (uno sin número)"
+
+
+# ========== EJECUCIÓN ==========
+
+def cronometrar(funcion: Callable, repeticiones: int = REPETICIONES) -> dict:
+    """Segundos por llamada: mediana, mínimo, media y desviación"""
+    temporizador = timeit.Timer(funcion)
+    llamadas, _ = temporizador.autorange()
+    tiempos = [t / llamadas for t in temporizador.repeat(repeticiones, llamadas)]
+    return {
+        'mediana': statistics.median(tiempos),
+        'minimo': min(tiempos),
+        'media': statistics.mean(tiempos),
+        'desviacion': statistics.stdev(tiempos) if len(tiempos) > 1 else 0.0,
+        'llamadas': llamadas,
+        'repeticiones': repeticiones,
+    }
+
+
+def ejecutar(filtro: str = '', repeticiones: int = REPETICIONES) -> Dict[str, dict]:
+    """Correr los benchmarks cuyo nombre contiene filtro"""
+    trazas.activar(False)  # medir el código, no las trazas
+    resultados: Dict[str, dict] = {}
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        ctx = Contexto(carpeta)
+        try:
+            for nombre, preparar in BENCHMARKS.items():
+                if filtro not in nombre:
+                    continue
+                try:
+                    funcion, detalle = preparar(ctx)
+                    resultado = cronometrar(funcion, repeticiones)
+                    resultado['detalle'] = detalle
+                    print(f"   ✅ {nombre:<34} {_formatear(resultado['mediana']):>10}  ({detalle})")
+                except BenchmarkOmitido as e:
+                    resultado = {'omitido': str(e)}
+                    print(f"   ⏭️  {nombre:<34} {'omitido':>10}  ({e})")
+                except Exception as e:
+                    resultado = {'error': f"{type(e).__name__}: {e}"}
+                    print(f"   ❌ Error en {nombre}: {e}")
+                resultados[nombre] = resultado
+        finally:
+            ctx.cerrar()
+
+    return resultados
+
+
+def _formatear(segundos: float) -> str:
+    if segundos >= 1:
+        return f"{segundos:.2f} s"
+    if segundos >= 1e-3:
+        return f"{segundos * 1e3:.2f} ms"
+    return f"{segundos * 1e6:.1f} µs"
+
+
+def _git(*args) -> str:
+    try:
+        return subprocess.run(['git', *args], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def guardar(resultados: Dict[str, dict], carpeta: str = None) -> str:
+    """Guardar en <carpeta>/<commit>.json (commit + '-sucio' si hay cambios sin guardar)"""
+    commit = _git('rev-parse', '--short', 'HEAD') or 'sin_git'
+    sucio = bool(_git('status', '--porcelain', '--untracked-files=no'))
+    carpeta = carpeta or Config.BENCHMARKS_FOLDER
+    os.makedirs(carpeta, exist_ok=True)
+    ruta = os.path.join(carpeta, f"{commit}{'-sucio' if sucio else ''}.json")
+    with open(ruta, 'w', encoding='utf-8') as f:
+        json.dump({
+            'commit': commit,
+            'sucio': sucio,
+            'fecha': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'plataforma': platform.platform(),
+            'unidad': 'segundos por llamada',
+            'resultados': resultados,
+        }, f, ensure_ascii=False, indent=2)
+    return ruta
+
+
+def cargar(referencia: str, carpeta: str = None) -> dict:
+    """Resultados guardados: ruta a un JSON o commit (completo o abreviado)"""
+    if os.path.isfile(referencia):
+        ruta = referencia
+    else:
+        carpeta = carpeta or Config.BENCHMARKS_FOLDER
+        commit = _git('rev-parse', '--short', referencia) or referencia
+        ruta = os.path.join(carpeta, f"{commit}.json")
+        if not os.path.exists(ruta):
+            ruta = os.path.join(carpeta, f"{commit}-sucio.json")
+    with open(ruta, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def comparar(actuales: Dict[str, dict], referencia: dict,
+             umbral: float = UMBRAL_REGRESION) -> List[str]:
+    """Imprimir la razón actual/referencia de cada benchmark y devolver los que empeoraron"""
+    regresiones = []
+    print(f"\n📊 Comparación con {referencia.get('commit', '?')} ({referencia.get('fecha', '?')})")
+    print(f"   {'Benchmark':<34} {'antes':>10} {'ahora':>10} {'razón':>7}")
+    for nombre, actual in actuales.items():
+        anterior = referencia.get('resultados', {}).get(nombre, {})
+        if 'mediana' not in actual or 'mediana' not in anterior:
+            continue
+        razon = actual['mediana'] / anterior['mediana'] if anterior['mediana'] else 1.0
+        marca = '❌' if razon > umbral else ('🚀' if razon < 1 / umbral else '  ')
+        print(f"   {nombre:<34} {_formatear(anterior['mediana']):>10} "
+              f"{_formatear(actual['mediana']):>10} {razon:>6.2f}x {marca}")
+        if razon > umbral:
+            regresiones.append(nombre)
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmarks de Robot DODO")
+    parser.add_argument('--filtro', default='', help="solo benchmarks cuyo nombre contiene este texto")
+    parser.add_argument('--repeticiones', type=int, default=REPETICIONES)
+    parser.add_argument('--comparar', metavar='REF',
+                        help="commit o archivo JSON con resultados anteriores")
+    parser.add_argument('--umbral', type=float, default=UMBRAL_REGRESION,
+                        help="razón de medianas a partir de la cual hay regresión")
+    parser.add_argument('--no-guardar', action='store_true')
+    args = parser.parse_args()
+
+    referencia = None
+    if args.comparar:
+        try:
+            referencia = cargar(args.comparar)
+        except (OSError, ValueError) as e:
+            print(f"❌ Error al cargar resultados de {args.comparar}: {e}")
+            sys.exit(2)
+
+    print("\n" + "="*70)
+    print("⏱️  BENCHMARKS")
+    print("="*70 + "\n")
+
+    resultados = ejecutar(args.filtro, args.repeticiones)
+
+    if not args.no_guardar:
+        print(f"\n💾 Resultados en {guardar(resultados)}")
+
+    if referencia is not None:
+        regresiones = comparar(resultados, referencia, args.umbral)
+        print()
+        if regresiones:
+            print(f"❌ {len(regresiones)} benchmark(s) más lentos que la referencia: "
+                  f"{', '.join(regresiones)}")
+            sys.exit(1)
+        print("✅ Sin regresiones")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,10 +8,13 @@ from dotenv import load_dotenv
 import os
 from typing import Tuple, Optional
 
+from trazas import trazar_clase
+
 # Cargar las variables del archivo .env
 load_dotenv()
 
 
+@trazar_clase(categoria='ia')
 class AsistenteInteligente:
     """Asistente con IA para interacción mejorada con niños"""
     
@@ -316,8 +319,14 @@ FEEDBACK: ¡Muy bien! Lo dijiste casi perfecto
             
             texto_respuesta = respuesta.choices[0].message.content
             
-            # Parsear respuesta
-            es_correcto = 'correcto' in texto_respuesta.lower().split('\n')[0]
+            # Parsear respuesta: la palabra exacta después de "RESULTADO:"
+            # ('correcto' también está dentro de 'incorrecto')
+            es_correcto = False
+            for linea in texto_respuesta.split('\n'):
+                if 'RESULTADO' in linea.upper() and ':' in linea:
+                    valor = linea.split(':', 1)[1].strip().strip('*.').lower()
+                    es_correcto = valor == 'correcto'
+                    break
             
             # Extraer confianza
             confianza = 0.5
@@ -2,6 +2,8 @@
 CONFIGURACIÓN DEL SISTEMA - VERSIÓN MEJORADA
 Configuración optimizada para interfaz infantil moderna
 """
+import os
+import socket
 from pathlib import Path
 
 
@@ -11,8 +13,46 @@ class Config:
     # === BASE DE DATOS ===
     DATABASE_PATH = "data.db"
     
+    # === ROBOT ===
+    # Identifica los datos de este robot al exportar o sincronizar
+    ROBOT_ID = os.environ.get("ROBOT_ID", socket.gethostname())
+    
+    # === EXPORTACIÓN ===
+    EXPORT_FOLDER = "exportaciones"
+
+    # === SINCRONIZACIÓN ===
+    # Carpeta compartida o URL http://... del almacén central
+    ALMACEN_CENTRAL = os.environ.get("ALMACEN_CENTRAL", "")
+    SYNC_KBPS = 256  # límite de subida (0 = sin límite)
+    # Exigido por el servidor central fuera de 127.0.0.1 (ver sincronizacion.py)
+    SYNC_TOKEN = os.environ.get("SYNC_TOKEN", "")
+
+    # === PLANIFICADOR DE EJERCICIOS ===
+    EJERCICIOS_POR_SESION = 8             # máximo por sesión
+    EJERCICIOS_MINIMOS_SESION = 4         # se completa con palabras no pendientes
+    # Probabilidad de acierto para dar una palabra por dominada. A propósito
+    # pide 3 aciertos seguidos en una palabra de dificultad 1 y 4 en una de
+    # dificultad 4 (ver planificador.aciertos_para_dominar), y la repetición
+    # espaciada los reparte en sesiones distintas: nadie sube de nivel antes
+    # de su tercera sesión en él aunque las dos primeras sean perfectas (con
+    # los 8 ejercicios de INICIAL de la base de ejemplo, en la cuarta)
+    DOMINIO_OBJETIVO = 0.80
+
+    # === RITMO DE LA SESIÓN ===
+    # Pausas mínimas entre turnos: 'normal', 'rapido' o 'anterior' (ver ritmo.py)
+    PERFIL_RITMO = os.environ.get("PERFIL_RITMO", "normal")
+    LINEAS_TIEMPO_FOLDER = "lineas_tiempo"
+
+    # === TRAZAS DE LATENCIA ===
+    # Tramos de cada sesión en formato Chrome trace-event (ver trazas.py)
+    TRAZAS = os.environ.get("TRAZAS", "") == "1"
+    TRAZAS_FOLDER = "trazas"
+    BENCHMARKS_FOLDER = "benchmarks"  # resultados de benchmarks.py por commit
+
     # === AUDIO ===
     AUDIO_FOLDER = "audio_registros"
+    CHECKPOINT_FOLDER = "checkpoints"  # Resultados de sesiones en curso
+    MINUTOS_REANUDAR_SESION = 30  # una sesión interrumpida se puede continuar hasta entonces
     AUDIO_TIMEOUT = 8
     AUDIO_PHRASE_LIMIT = 5
     ENERGY_THRESHOLD = 200
@@ -115,6 +155,7 @@ class Config:
     def crear_carpetas(cls):
         """Crear carpetas necesarias"""
         Path(cls.AUDIO_FOLDER).mkdir(exist_ok=True)
+        Path(cls.CHECKPOINT_FOLDER).mkdir(exist_ok=True)
     
     @classmethod
     def obtener_fuente_disponible(cls):
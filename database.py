@@ -2,70 +2,177 @@
 DATABASE MEJORADO - Gestión completa de base de datos
 Versión corregida que maneja correctamente sqlite3.Row
 """
+import os
+import re
+import json
+import difflib
 import sqlite3
+import unicodedata
+import weakref
+import threading
+from contextlib import contextmanager
 from typing import Optional, List, Dict, Any
-from models import Persona, Ejercicio, Sesion, NivelTerapia, ResultadoEjercicio
+from models import Persona, Ejercicio, Sesion, NivelTerapia, ResultadoEjercicio, DominioPalabra
+from migraciones import aplicar_migraciones, ULTIMAS_N_TASAS
+from config import Config
+from trazas import trazar, tramo
 from datetime import datetime
 
 
+class _ConexionHilo:
+    """Conexión de un hilo; al liberarse con el hilo, su finalizador la cierra"""
+    __slots__ = ('conexion', '__weakref__')
+    
+    def __init__(self, conexion: sqlite3.Connection):
+        self.conexion = conexion
+
+
+def _cerrar_conexion(conexiones: set, lock: threading.Lock, conexion: sqlite3.Connection):
+    """Finalizador: sacar la conexión del pool y cerrarla"""
+    with lock:
+        conexiones.discard(conexion)
+    try:
+        conexion.close()
+    except Exception:
+        pass
+
+
 class Database:
     """Gestor de base de datos con todas las operaciones"""
     
+    # Pragmas aplicados a cada conexión
+    # (WAL permite que el panel lea mientras una sesión escribe)
+    PRAGMAS = {
+        'synchronous': 'NORMAL',     # Seguro con WAL, evita fsync en cada commit
+        'cache_size': -8000,         # ~8 MB de caché de páginas
+        'mmap_size': 67108864,       # 64 MB de lectura mapeada en memoria
+        'temp_store': 'MEMORY',
+        'busy_timeout': 5000,        # ms de espera antes de "database is locked"
+    }
+    
+    # Cota superior de personId para la primera página de la lista
+    MAX_PERSON_ID = 2**63 - 1
+    
+    # Columnas de la lista de pacientes del panel (páginas y búsqueda)
+    COLUMNAS_LISTA = 'p.personId, p.name, p.apellido, p.sex, l.name as nivel'
+    
+    # Búsqueda de personas: pesos bm25 de (name, apellido, dni) y
+    # similitud mínima (difflib) para corregir errores de escritura
+    PESOS_BUSQUEDA = '10.0, 5.0, 1.0'
+    SIMILITUD_MINIMA_BUSQUEDA = 0.75
+    
     def __init__(self, db_path: str = 'data.db'):
         self.db_path = db_path
-        self.conn = None
+        self._local = threading.local()
+        self._conexiones = set()  # abiertas, para cerrarlas todas en cerrar()
+        self._lock_pool = threading.Lock()
+        # Un solo escritor a la vez; los lectores no se bloquean (WAL)
+        self._lock_escritura = threading.RLock()
+        # Aumenta con cada escritura confirmada (para invalidar cachés)
+        self.generacion = 0
         self.conectar()
     
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """Conexión del hilo actual (se crea la primera vez que se usa)"""
+        dueno = getattr(self._local, 'dueno', None)
+        if dueno is None:
+            return self._nueva_conexion()
+        return dueno.conexion
+    
+    def _nueva_conexion(self) -> sqlite3.Connection:
+        """
+        Abrir conexión para el hilo actual y registrarla en el pool
+        
+        La conexión pertenece a un objeto guardado solo en el threading.local
+        de este hilo: cuando el hilo termina Python lo libera y su finalizador
+        cierra la conexión, sin depender de ids de hilo (que se reutilizan).
+        """
+        conexion = sqlite3.connect(self.db_path, check_same_thread=False)
+        conexion.row_factory = sqlite3.Row
+        for pragma, valor in self.PRAGMAS.items():
+            conexion.execute(f"PRAGMA {pragma} = {valor}")
+        
+        with self._lock_pool:
+            self._conexiones.add(conexion)
+        
+        dueno = _ConexionHilo(conexion)
+        weakref.finalize(dueno, _cerrar_conexion, self._conexiones, self._lock_pool, conexion)
+        self._local.dueno = dueno
+        return conexion
+    
+    @contextmanager
+    def _escritura(self):
+        """
+        Transacción de escritura serializada (un único escritor).
+        Hace commit al salir o rollback si hay excepción.
+        """
+        with self._lock_escritura:
+            conexion = self.conn
+            cursor = conexion.cursor()
+            try:
+                yield cursor
+                with tramo('Database.commit', 'db'):
+                    conexion.commit()
+                self.generacion += 1
+            except Exception:
+                conexion.rollback()
+                raise
+    
     def conectar(self):
         """Conectar a la base de datos"""
         try:
-            self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
-            self.conn.row_factory = sqlite3.Row
-            print(f"✅ Conectado a BD: {self.db_path}")
+            conexion = self.conn
+            modo = conexion.execute("PRAGMA journal_mode = WAL").fetchone()[0]
+            print(f"✅ Conectado a BD: {self.db_path} (journal: {modo})")
+            aplicar_migraciones(conexion)
         except Exception as e:
             print(f"❌ Error al conectar BD: {e}")
     
     # ========== PERSONAS ==========
     
+    @trazar(categoria='db')
     def crear_persona(self, persona: Persona) -> int:
         """Crear nueva persona"""
         try:
-            cursor = self.conn.cursor()
-            nivel_id = persona.nivel_actual.value
-            cursor.execute('''
-                INSERT INTO person (name, apellido, age, dni, sex, diagnostic_level, actual_level, actual_therapy)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                persona.name,
-                persona.apellido,
-                persona.age,
-                persona.dni,
-                persona.sex,
-                nivel_id,
-                nivel_id,
-                1
-            ))
-            self.conn.commit()
+            with self._escritura() as cursor:
+                nivel_id = persona.nivel_actual.value
+                cursor.execute('''
+                    INSERT INTO person (name, apellido, age, dni, sex, diagnostic_level, actual_level, actual_therapy)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (
+                    persona.name,
+                    persona.apellido,
+                    persona.age,
+                    persona.dni,
+                    persona.sex,
+                    nivel_id,
+                    nivel_id,
+                    1
+                ))
             return cursor.lastrowid
         except Exception as e:
             print(f"❌ Error al crear persona: {e}")
             return None
     
     def buscar_persona_por_nombre(self, nombre: str) -> Optional[Persona]:
-        """Buscar persona por nombre"""
+        """Buscar persona por nombre (coincidencia exacta primero, usa índice)"""
         try:
             cursor = self.conn.cursor()
             cursor.execute('''
                 SELECT * FROM person 
-                WHERE name LIKE ? 
+                WHERE name = ? COLLATE NOCASE
                 ORDER BY register_date DESC 
                 LIMIT 1
-            ''', (f'%{nombre}%',))
+            ''', (nombre.strip(),))
             row = cursor.fetchone()
             
             if row:
                 return self._row_to_persona(row)
-            return None
+            
+            # Fallback: búsqueda de texto completo (prefijos y errores de escritura)
+            personas = self.buscar_personas(nombre, limite=1)
+            return personas[0] if personas else None
         except Exception as e:
             print(f"❌ Error al buscar persona: {e}")
             return None
@@ -75,32 +182,128 @@ class Database:
             cursor = self.conn.cursor()
             cursor.execute('''
                 SELECT * FROM person
-                WHERE name LIKE ? AND apellido LIKE ?
+                WHERE name = ? COLLATE NOCASE AND apellido = ? COLLATE NOCASE
                 ORDER BY register_date DESC
                 LIMIT 1
-            ''', (f'%{nombre}%', f'%{apellido}%'))
+            ''', (nombre.strip(), apellido.strip()))
             row = cursor.fetchone()
 
             if row:
                 return self._row_to_persona(row)
-            return None
+
+            # Fallback: búsqueda de texto completo (prefijos y errores de escritura)
+            personas = self.buscar_personas(f"{nombre} {apellido}", limite=1)
+            return personas[0] if personas else None
         except Exception as e:
             print(f"❌ Error al buscar persona: {e}")
             return None
     
+    def buscar_personas(self, texto: str, limite: int = 10) -> List[Persona]:
+        """
+        Búsqueda de personas por nombre, apellido o DNI ordenada por relevancia
+        
+        Ignora mayúsculas y tildes, acepta prefijos ("mar" encuentra "María")
+        y, si no hay coincidencias, corrige errores de escritura con el
+        vocabulario del índice ("Jaun" encuentra "Juan").
+        """
+        terminos = self._terminos_busqueda(texto)
+        if not terminos:
+            return []
+        
+        try:
+            # Cada término como prefijo; todos deben aparecer
+            expresion = ' AND '.join(f'"{t}"*' for t in terminos)
+            personas = self._consultar_fts(expresion, limite)
+            
+            if not personas:
+                expresion = self._expresion_tolerante(terminos)
+                if expresion:
+                    personas = self._consultar_fts(expresion, limite)
+            
+            return personas
+        except Exception as e:
+            print(f"❌ Error al buscar personas: {e}")
+            return []
+    
+    def buscar_personas_lista(self, texto: str, limite: int = 10) -> List[dict]:
+        """
+        buscar_personas con las mismas filas que obtener_personas_pagina
+        (nivel con el nombre de la tabla level), en orden de relevancia
+        """
+        ids = [persona.person_id for persona in self.buscar_personas(texto, limite)]
+        if not ids:
+            return []
+        
+        try:
+            cursor = self.conn.cursor()
+            marcadores = ', '.join('?' * len(ids))
+            cursor.execute(f'''
+                SELECT {self.COLUMNAS_LISTA}
+                FROM person p
+                LEFT JOIN level l ON p.actual_level = l.levelId
+                WHERE p.personId IN ({marcadores})
+            ''', ids)
+            filas = {row['personId']: dict(row) for row in cursor.fetchall()}
+            return [filas[person_id] for person_id in ids if person_id in filas]
+        except Exception as e:
+            print(f"❌ Error al buscar personas: {e}")
+            return []
+    
+    @staticmethod
+    def _terminos_busqueda(texto: str) -> List[str]:
+        """Separar el texto en términos sin tildes ni mayúsculas"""
+        sin_tildes = ''.join(
+            c for c in unicodedata.normalize('NFD', texto or '')
+            if unicodedata.category(c) != 'Mn'
+        )
+        return re.findall(r'\w+', sin_tildes.lower())
+    
+    def _consultar_fts(self, expresion: str, limite: int) -> List[Persona]:
+        cursor = self.conn.cursor()
+        cursor.execute(f'''
+            SELECT p.*
+            FROM person_fts
+            JOIN person p ON p.personId = person_fts.rowid
+            WHERE person_fts MATCH ?
+            ORDER BY bm25(person_fts, {self.PESOS_BUSQUEDA}), p.personId DESC
+            LIMIT ?
+        ''', (expresion, limite))
+        return [self._row_to_persona(row) for row in cursor.fetchall()]
+    
+    def _expresion_tolerante(self, terminos: List[str]) -> Optional[str]:
+        """
+        Reemplazar cada término por los términos parecidos del índice
+        (None si alguno no se parece a nada)
+        """
+        cursor = self.conn.cursor()
+        cursor.execute('SELECT term FROM person_fts_vocab')
+        vocabulario = [row[0] for row in cursor.fetchall()]
+        
+        grupos = []
+        for termino in terminos:
+            parecidos = difflib.get_close_matches(
+                termino, vocabulario, n=3, cutoff=self.SIMILITUD_MINIMA_BUSQUEDA
+            )
+            if not parecidos:
+                return None
+            grupos.append('(' + ' OR '.join(f'"{p}"' for p in parecidos) + ')')
+        
+        return ' AND '.join(grupos)
+    
+    @trazar(categoria='db')
     def actualizar_nivel_persona(self, person_id: int, nivel: NivelTerapia):
         """Actualizar nivel de la persona"""
         try:
-            cursor = self.conn.cursor()
-            cursor.execute('''
-                UPDATE person 
-                SET actual_level = ? 
-                WHERE personId = ?
-            ''', (nivel.value, person_id))
-            self.conn.commit()
+            with self._escritura() as cursor:
+                cursor.execute('''
+                    UPDATE person 
+                    SET actual_level = ? 
+                    WHERE personId = ?
+                ''', (nivel.value, person_id))
         except Exception as e:
             print(f"❌ Error al actualizar nivel: {e}")
         
+    @trazar(categoria='db')
     def actualizar_datos_persona(
         self, 
         person_id: int,
@@ -156,9 +359,8 @@ class Database:
                 WHERE personId = ?
             """
             
-            cursor = self.conn.cursor()
-            cursor.execute(query, valores)
-            self.conn.commit()
+            with self._escritura() as cursor:
+                cursor.execute(query, valores)
             
             print(f"✅ Datos actualizados para persona ID {person_id}")
             print(f"   Campos: {', '.join([c.split('=')[0].strip() for c in campos_actualizar])}")
@@ -218,6 +420,71 @@ class Database:
         except:
             return 0
     
+    def obtener_personas_pagina(self, despues_de_id: Optional[int] = None,
+                                limite: int = 50) -> List[dict]:
+        """
+        Página de personas ordenadas por personId descendente (keyset)
+        
+        Args:
+            despues_de_id: último personId de la página anterior (None = primera)
+            limite: cantidad máxima de filas
+            
+        Returns:
+            Lista de dicts con personId, name, apellido, sex y nivel
+        """
+        try:
+            cursor = self.conn.cursor()
+            
+            # Sin OFFSET: cada página es una búsqueda por clave primaria,
+            # igual de rápida al principio que al final de la lista
+            if despues_de_id is None:
+                despues_de_id = self.MAX_PERSON_ID
+            
+            cursor.execute(f'''
+                SELECT {self.COLUMNAS_LISTA}
+                FROM person p
+                LEFT JOIN level l ON p.actual_level = l.levelId
+                WHERE p.personId < ?
+                ORDER BY p.personId DESC
+                LIMIT ?
+            ''', (despues_de_id, limite))
+            
+            return [dict(row) for row in cursor.fetchall()]
+        except Exception as e:
+            print(f"❌ Error al obtener página de personas: {e}")
+            return []
+    
+    def obtener_personas_nuevas(self, despues_de_id: int = 0,
+                                limite: int = 500) -> List[dict]:
+        """
+        Personas con personId mayor a despues_de_id, en orden de registro
+        (para índices en memoria que se actualizan de forma incremental)
+        """
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute('''
+                SELECT personId, name, apellido
+                FROM person
+                WHERE personId > ?
+                ORDER BY personId
+                LIMIT ?
+            ''', (despues_de_id, limite))
+            return [dict(row) for row in cursor.fetchall()]
+        except Exception as e:
+            print(f"❌ Error al obtener personas nuevas: {e}")
+            return []
+    
+    def obtener_persona(self, person_id: int) -> Optional[Persona]:
+        """Obtener persona por ID"""
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute('SELECT * FROM person WHERE personId = ?', (person_id,))
+            row = cursor.fetchone()
+            return self._row_to_persona(row) if row else None
+        except Exception as e:
+            print(f"❌ Error al obtener persona: {e}")
+            return None
+    
     # ========== EJERCICIOS ==========
     
     def obtener_ejercicios_por_nivel(self, nivel: NivelTerapia) -> List[Ejercicio]:
@@ -340,36 +607,172 @@ class Database:
     
     # ========== SESIONES ==========
     
+    @trazar(categoria='db')
     def crear_sesion(self, sesion: Sesion) -> int:
-        """Crear nueva sesión"""
+        """
+        Crear nueva sesión junto con el resultado de cada ejercicio
+        Todo se escribe en una sola transacción
+        """
         try:
-            cursor = self.conn.cursor()
-            nivel_id = sesion.nivel.value
-            
-            cursor.execute('''
-                INSERT INTO sesion (
-                    personId, levelId, number, 
-                    correct_exercise, failed_exercise, 
-                    observation, observaciones_terapeuta
-                )
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                sesion.person_id,
-                nivel_id,
-                sesion.numero_sesion,
-                sesion.ejercicios_correctos,
-                sesion.ejercicios_fallidos,
-                sesion.observaciones,
-                sesion.observaciones_terapeuta
-            ))
-            self.conn.commit()
-            return cursor.lastrowid
+            with self._escritura() as cursor:
+                nivel_id = sesion.nivel.value
+                # La fecha de la sesión, no la de guardarla (una recuperada
+                # de su checkpoint puede guardarse días después)
+                fecha = sesion.fecha or datetime.now()
+                
+                cursor.execute('''
+                    INSERT INTO sesion (
+                        personId, levelId, number, date,
+                        correct_exercise, failed_exercise, 
+                        observation, observaciones_terapeuta
+                    )
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (
+                    sesion.person_id,
+                    nivel_id,
+                    sesion.numero_sesion,
+                    fecha.strftime('%Y-%m-%d %H:%M:%S'),
+                    sesion.ejercicios_correctos,
+                    sesion.ejercicios_fallidos,
+                    sesion.observaciones,
+                    sesion.observaciones_terapeuta
+                ))
+                sesion_id = cursor.lastrowid
+                
+                if sesion.ejercicios_completados:
+                    cursor.executemany('''
+                        INSERT INTO resultado_ejercicio (
+                            sesionId, personId, exerciseId, respuesta, correcto,
+                            tiempo_respuesta, intentos, audio_path, fecha
+                        )
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ''', [
+                        (
+                            sesion_id,
+                            sesion.person_id,
+                            r.ejercicio_id,
+                            r.respuesta,
+                            1 if r.correcto else 0,
+                            r.tiempo_respuesta,
+                            r.intentos,
+                            r.audio_path,
+                            r.timestamp.strftime('%Y-%m-%d %H:%M:%S')
+                        )
+                        for r in sesion.ejercicios_completados
+                    ])
+                
+                self._actualizar_progreso(cursor, sesion_id, sesion)
+            return sesion_id
         except Exception as e:
             print(f"❌ Error al crear sesión: {e}")
             import traceback
             traceback.print_exc()
             return None
     
+    def _actualizar_progreso(self, cursor, sesion_id: int, sesion: Sesion):
+        """
+        Sumar la sesión recién creada al resumen de progreso de la persona
+        (se llama dentro de la transacción de crear_sesion)
+        """
+        cursor.execute('SELECT date FROM sesion WHERE sesionId = ?', (sesion_id,))
+        fecha = cursor.fetchone()[0]
+        
+        cursor.execute('''
+            SELECT total_sesiones, suma_correctos, suma_fallidos, suma_tasas,
+                   ultimas_tasas, historial_niveles, ultima_fecha
+            FROM progreso_persona
+            WHERE personId = ?
+        ''', (sesion.person_id,))
+        row = cursor.fetchone()
+        
+        if row:
+            total, correctos, fallidos, suma_tasas = row[0], row[1], row[2], row[3]
+            tasas = json.loads(row[4])
+            niveles = json.loads(row[5])
+            ultima_fecha = max(row[6] or fecha, fecha)
+        else:
+            total, correctos, fallidos, suma_tasas = 0, 0, 0, 0.0
+            tasas, niveles = [], []
+            ultima_fecha = fecha
+        
+        # Una sesión recuperada puede ser anterior a las ya guardadas
+        tasa = sesion.tasa_exito
+        tasas = sorted(tasas + [[fecha, tasa]], key=lambda t: t[0])[-ULTIMAS_N_TASAS:]
+        if not niveles or niveles[-1][1] != sesion.nivel.value:
+            niveles.append([fecha, sesion.nivel.value])
+        
+        cursor.execute('''
+            INSERT OR REPLACE INTO progreso_persona (
+                personId, total_sesiones, suma_correctos, suma_fallidos,
+                suma_tasas, ultimas_tasas, historial_niveles, ultima_fecha
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (
+            sesion.person_id,
+            total + 1,
+            correctos + sesion.ejercicios_correctos,
+            fallidos + sesion.ejercicios_fallidos,
+            suma_tasas + tasa,
+            json.dumps(tasas),
+            json.dumps(niveles),
+            ultima_fecha
+        ))
+    
+    def obtener_progreso_persona(self, person_id: int) -> Optional[dict]:
+        """
+        Resumen de progreso precalculado (no recorre las sesiones)
+        
+        Returns:
+            Dict con total_sesiones, promedio, ultima_tasa,
+            ultimas_tasas [(datetime, tasa)], historial_niveles
+            [(datetime, NivelTerapia)], ejercicios_correctos y
+            ejercicios_fallidos; None si la persona no tiene sesiones
+        """
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute('''
+                SELECT * FROM progreso_persona WHERE personId = ?
+            ''', (person_id,))
+            row = cursor.fetchone()
+            
+            if not row or not row['total_sesiones']:
+                return None
+            
+            ultimas_tasas = [
+                (datetime.fromisoformat(fecha), tasa)
+                for fecha, tasa in json.loads(row['ultimas_tasas'])
+            ]
+            historial_niveles = [
+                (datetime.fromisoformat(fecha), NivelTerapia(nivel_id))
+                for fecha, nivel_id in json.loads(row['historial_niveles'])
+            ]
+            
+            return {
+                'total_sesiones': row['total_sesiones'],
+                'promedio': row['suma_tasas'] / row['total_sesiones'],
+                'ultima_tasa': ultimas_tasas[-1][1] if ultimas_tasas else 0.0,
+                'ultimas_tasas': ultimas_tasas,
+                'historial_niveles': historial_niveles,
+                'ejercicios_correctos': row['suma_correctos'],
+                'ejercicios_fallidos': row['suma_fallidos']
+            }
+        except Exception as e:
+            print(f"❌ Error al obtener progreso: {e}")
+            return None
+    
+    def contar_sesiones_persona(self, person_id: int) -> int:
+        """Cantidad de sesiones realizadas (desde el resumen de progreso)"""
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute('''
+                SELECT total_sesiones FROM progreso_persona WHERE personId = ?
+            ''', (person_id,))
+            row = cursor.fetchone()
+            return row[0] if row else 0
+        except Exception as e:
+            print(f"❌ Error al contar sesiones: {e}")
+            return 0
+    
     def obtener_ultima_sesion(self, person_id: int) -> Optional[Sesion]:
         """Obtener última sesión de una persona"""
         try:
@@ -422,6 +825,148 @@ class Database:
             print(f"❌ Error al obtener sesiones: {e}")
             return []
     
+    # ========== RESULTADOS POR EJERCICIO ==========
+    
+    def obtener_resultados_sesion(self, sesion_id: int) -> List[ResultadoEjercicio]:
+        """Obtener los resultados individuales de una sesión"""
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute('''
+                SELECT * FROM resultado_ejercicio
+                WHERE sesionId = ?
+                ORDER BY resultadoId
+            ''', (sesion_id,))
+            
+            resultados = []
+            for row in cursor.fetchall():
+                try:
+                    fecha = datetime.fromisoformat(row['fecha']) if row['fecha'] else datetime.now()
+                except ValueError:
+                    fecha = datetime.now()
+                resultados.append(ResultadoEjercicio(
+                    ejercicio_id=row['exerciseId'],
+                    respuesta=row['respuesta'] or '',
+                    correcto=bool(row['correcto']),
+                    tiempo_respuesta=row['tiempo_respuesta'] or 0.0,
+                    intentos=row['intentos'] or 1,
+                    audio_path=row['audio_path'],
+                    timestamp=fecha
+                ))
+            return resultados
+        except Exception as e:
+            print(f"❌ Error al obtener resultados: {e}")
+            return []
+    
+    def obtener_precision_por_palabra(self, person_id: int) -> List[dict]:
+        """
+        Precisión de cada palabra practicada por una persona
+        
+        Returns:
+            Lista de diccionarios ordenada de menor a mayor precisión
+        """
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute('''
+                SELECT r.exerciseId, e.word,
+                       COUNT(*) AS intentos,
+                       SUM(r.correcto) AS aciertos
+                FROM resultado_ejercicio r
+                LEFT JOIN exercise e ON e.exerciseId = r.exerciseId
+                WHERE r.personId = ?
+                GROUP BY r.exerciseId
+            ''', (person_id,))
+            
+            palabras = []
+            for row in cursor.fetchall():
+                palabras.append({
+                    'exercise_id': row['exerciseId'],
+                    'word': row['word'] or f"#{row['exerciseId']}",
+                    'intentos': row['intentos'],
+                    'aciertos': row['aciertos'] or 0,
+                    'precision': (row['aciertos'] or 0) / row['intentos']
+                })
+            
+            palabras.sort(key=lambda p: (p['precision'], -p['intentos']))
+            return palabras
+        except Exception as e:
+            print(f"❌ Error al obtener precisión por palabra: {e}")
+            return []
+    
+    # ========== DOMINIO POR PALABRA ==========
+
+    def obtener_dominio_palabras(self, person_id: int) -> Dict[int, DominioPalabra]:
+        """Estado de dominio de cada palabra practicada: exercise_id -> DominioPalabra"""
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute('''
+                SELECT * FROM dominio_palabra WHERE personId = ?
+            ''', (person_id,))
+            return {
+                row['exerciseId']: DominioPalabra(
+                    person_id=row['personId'],
+                    exercise_id=row['exerciseId'],
+                    rating=row['rating'],
+                    repeticiones=row['repeticiones'],
+                    aciertos=row['aciertos'],
+                    intervalo=row['intervalo'],
+                    proxima_sesion=row['proxima_sesion'],
+                    fecha=datetime.fromisoformat(row['fecha']) if row['fecha'] else None
+                )
+                for row in cursor.fetchall()
+            }
+        except Exception as e:
+            print(f"❌ Error al obtener dominio de palabras: {e}")
+            return {}
+
+    @trazar(categoria='db')
+    def guardar_dominio_palabras(self, estados: List[DominioPalabra]) -> bool:
+        """Guardar (o reemplazar) el dominio de varias palabras en una transacción"""
+        if not estados:
+            return True
+        try:
+            with self._escritura() as cursor:
+                cursor.executemany('''
+                    INSERT OR REPLACE INTO dominio_palabra
+                        (personId, exerciseId, rating, repeticiones, aciertos,
+                         intervalo, proxima_sesion, fecha)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ''', [
+                    (e.person_id, e.exercise_id, e.rating, e.repeticiones, e.aciertos,
+                     e.intervalo, e.proxima_sesion, e.fecha.isoformat() if e.fecha else None)
+                    for e in estados
+                ])
+            return True
+        except Exception as e:
+            print(f"❌ Error al guardar dominio de palabras: {e}")
+            return False
+
+    def obtener_historial_resultados(self, person_id: int) -> List[tuple]:
+        """
+        Resultados de una persona en orden, para reconstruir su dominio
+
+        Returns:
+            Lista de (número de sesión, exercise_id, correcto); el número es
+            el orden de la sesión entre las de la persona (1, 2, ...)
+        """
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute('''
+                SELECT sesionId, exerciseId, correcto
+                FROM resultado_ejercicio
+                WHERE personId = ?
+                ORDER BY sesionId, resultadoId
+            ''', (person_id,))
+
+            historial = []
+            sesiones = {}
+            for sesion_id, exercise_id, correcto in cursor.fetchall():
+                numero = sesiones.setdefault(sesion_id, len(sesiones) + 1)
+                historial.append((numero, exercise_id, bool(correcto)))
+            return historial
+        except Exception as e:
+            print(f"❌ Error al obtener historial de resultados: {e}")
+            return []
+
     # ========== NIVELES ==========
     
     def obtener_nivel_por_id(self, level_id: int) -> Optional[dict]:
@@ -477,6 +1022,7 @@ class Database:
             person_id=row['personId'],
             name=row['name'],
             age=row['age'],
+            apellido=row['apellido'] if 'apellido' in row.keys() else None,
             dni=row['dni'] if 'dni' in row.keys() else None,
             sex=row['sex'] if 'sex' in row.keys() else None,
             nivel_actual=nivel,
@@ -556,38 +1102,52 @@ class Database:
             print(f"❌ Error al verificar integridad: {e}")
             return {}
     
+    @trazar(categoria='db')
     def limpiar_datos(self):
         """Limpiar todos los datos (usar con cuidado)"""
         try:
-            cursor = self.conn.cursor()
-            cursor.execute('DELETE FROM therapy')
-            cursor.execute('DELETE FROM sesion')
-            cursor.execute('DELETE FROM person')
-            cursor.execute('DELETE FROM exercise')
-            cursor.execute('DELETE FROM level')
-            cursor.execute('DELETE FROM sqlite_sequence')
-            self.conn.commit()
+            with self._escritura() as cursor:
+                cursor.execute('DELETE FROM therapy')
+                cursor.execute('DELETE FROM resultado_ejercicio')
+                cursor.execute('DELETE FROM progreso_persona')
+                cursor.execute('DELETE FROM dominio_palabra')
+                cursor.execute('DELETE FROM audio_catalogo')
+                cursor.execute('DELETE FROM sesion')
+                cursor.execute('DELETE FROM person')
+                cursor.execute('DELETE FROM exercise')
+                cursor.execute('DELETE FROM level')
+                cursor.execute('DELETE FROM sqlite_sequence')
             print("✅ Datos limpiados")
         except Exception as e:
             print(f"❌ Error al limpiar datos: {e}")
     
     def cerrar(self):
-        """Cerrar conexión"""
-        if self.conn:
-            self.conn.close()
+        """Cerrar todas las conexiones del pool"""
+        with self._lock_pool:
+            conexiones = list(self._conexiones)
+            self._conexiones.clear()
+        
+        for conexion in conexiones:
+            try:
+                conexion.close()
+            except Exception:
+                pass
+        
+        self._local = threading.local()
+        if conexiones:
             print("🔒 Conexión a BD cerrada")
     
     # ========== OBSERVACIONES ==========
 
+    @trazar(categoria='db')
     def crear_observacion(self, person_id: int, observacion: str, terapeuta: str = None) -> int:
         """Crear nueva observación del terapeuta"""
         try:
-            cursor = self.conn.cursor()
-            cursor.execute('''
-                INSERT INTO observaciones (personId, observacion, terapeuta)
-                VALUES (?, ?, ?)
-            ''', (person_id, observacion, terapeuta))
-            self.conn.commit()
+            with self._escritura() as cursor:
+                cursor.execute('''
+                    INSERT INTO observaciones (personId, observacion, terapeuta)
+                    VALUES (?, ?, ?)
+                ''', (person_id, observacion, terapeuta))
             return cursor.lastrowid
         except Exception as e:
             print(f"❌ Error al crear observación: {e}")
@@ -619,17 +1179,450 @@ class Database:
             print(f"❌ Error al obtener observaciones: {e}")
             return []
 
+    @trazar(categoria='db')
     def actualizar_observaciones_sesion(self, sesion_id: int, observaciones: str):
         """Actualizar observaciones del terapeuta en una sesión"""
+        try:
+            with self._escritura() as cursor:
+                cursor.execute('''
+                    UPDATE sesion 
+                    SET observaciones_terapeuta = ?
+                    WHERE sesionId = ?
+                ''', (observaciones, sesion_id))
+            return True
+        except Exception as e:
+            print(f"❌ Error al actualizar observaciones: {e}")
+            return False
+
+    # ========== CATÁLOGO DE AUDIOS ==========
+
+    @trazar(categoria='db')
+    def registrar_audio(self, person_id: int, numero_sesion: int, exercise_id: int,
+                        sha256: str, duracion: float = None, tamano: int = None,
+                        etiqueta: str = None, fecha: str = None,
+                        origen: str = None) -> Optional[dict]:
+        """
+        Registrar una grabación como un intento nuevo
+
+        El número de intento se asigna dentro de la transacción de escritura,
+        así dos grabaciones del mismo ejercicio nunca comparten intento.
+
+        Returns:
+            Dict con audio_id e intento, o None si falla
+        """
+        try:
+            with self._escritura() as cursor:
+                cursor.execute('''
+                    SELECT COALESCE(MAX(intento), 0) + 1 FROM audio_catalogo
+                    WHERE personId = ? AND numeroSesion = ? AND exerciseId = ?
+                ''', (person_id, numero_sesion, exercise_id))
+                intento = cursor.fetchone()[0]
+
+                cursor.execute('''
+                    INSERT INTO audio_catalogo (
+                        personId, numeroSesion, exerciseId, intento, sha256,
+                        duracion, tamano, etiqueta, fecha, origen
+                    )
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP), ?)
+                ''', (person_id, numero_sesion, exercise_id, intento, sha256,
+                      duracion, tamano, etiqueta, fecha, origen))
+
+                return {'audio_id': cursor.lastrowid, 'intento': intento}
+        except Exception as e:
+            print(f"❌ Error al registrar audio: {e}")
+            return None
+
+    def _row_to_audio(self, row) -> dict:
+        return {
+            'audio_id': row['audioId'],
+            'person_id': row['personId'],
+            'numero_sesion': row['numeroSesion'],
+            'exercise_id': row['exerciseId'],
+            'intento': row['intento'],
+            'sha256': row['sha256'],
+            'duracion': row['duracion'],
+            'tamano': row['tamano'],
+            'etiqueta': row['etiqueta'],
+            'fecha': row['fecha'],
+            'palabra': row['palabra'] if 'palabra' in row.keys() else None,
+        }
+
+    def obtener_audios_persona(self, person_id: int, limite: int = 200) -> List[dict]:
+        """Grabaciones de una persona (con la palabra), de la más reciente a la más antigua"""
         try:
             cursor = self.conn.cursor()
             cursor.execute('''
-                UPDATE sesion 
-                SET observaciones_terapeuta = ?
-                WHERE sesionId = ?
-            ''', (observaciones, sesion_id))
-            self.conn.commit()
+                SELECT a.*, e.word AS palabra
+                FROM audio_catalogo a
+                LEFT JOIN exercise e ON e.exerciseId = a.exerciseId
+                WHERE a.personId = ?
+                ORDER BY a.fecha DESC
+                LIMIT ?
+            ''', (person_id, limite))
+            return [self._row_to_audio(row) for row in cursor.fetchall()]
+        except Exception as e:
+            print(f"❌ Error al obtener audios: {e}")
+            return []
+
+    def obtener_audios_sesion(self, person_id: int, numero_sesion: int) -> List[dict]:
+        """Grabaciones de una sesión (todos los intentos)"""
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute('''
+                SELECT * FROM audio_catalogo
+                WHERE personId = ? AND numeroSesion = ?
+                ORDER BY exerciseId, intento
+            ''', (person_id, numero_sesion))
+            return [self._row_to_audio(row) for row in cursor.fetchall()]
+        except Exception as e:
+            print(f"❌ Error al obtener audios de la sesión: {e}")
+            return []
+
+    def obtener_origenes_audio(self) -> set:
+        """Rutas originales de los audios ya importados al catálogo"""
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute('SELECT origen FROM audio_catalogo WHERE origen IS NOT NULL')
+            return {row[0] for row in cursor.fetchall()}
+        except Exception as e:
+            print(f"❌ Error al obtener audios importados: {e}")
+            return set()
+
+    @trazar(categoria='db')
+    def reemplazar_rutas_audio(self, rutas: dict) -> int:
+        """
+        Actualizar resultado_ejercicio.audio_path (ruta anterior -> ruta nueva)
+
+        Returns:
+            Cantidad de resultados actualizados
+        """
+        if not rutas:
+            return 0
+        try:
+            with self._escritura() as cursor:
+                # Una sola pasada por los resultados con audio
+                cursor.execute('''
+                    SELECT resultadoId, audio_path FROM resultado_ejercicio
+                    WHERE audio_path IS NOT NULL
+                ''')
+                cambios = [
+                    (rutas[ruta], resultado_id)
+                    for resultado_id, ruta in cursor.fetchall()
+                    if ruta in rutas
+                ]
+                cursor.executemany(
+                    'UPDATE resultado_ejercicio SET audio_path = ? WHERE resultadoId = ?',
+                    cambios
+                )
+                return len(cambios)
+        except Exception as e:
+            print(f"❌ Error al actualizar rutas de audio: {e}")
+            return 0
+
+    # ========== ANÁLISIS ACÚSTICO ==========
+
+    COLUMNAS_ANALISIS = ('duracion', 'proporcion_voz', 'rms_db', 'tono_medio',
+                         'tono_desviacion', 'centroide', 'planitud', 'relacion_nasal_db')
+
+    def obtener_audios_sin_analisis(self, version: int, limite: int = 500) -> List[str]:
+        """Hashes de grabaciones sin análisis (o analizadas con otra versión)"""
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute('''
+                SELECT DISTINCT a.sha256
+                FROM audio_catalogo a
+                LEFT JOIN analisis_acustico x ON x.sha256 = a.sha256
+                WHERE x.sha256 IS NULL OR x.version <> ?
+                LIMIT ?
+            ''', (version, limite))
+            return [row[0] for row in cursor.fetchall()]
+        except Exception as e:
+            print(f"❌ Error al buscar audios sin análisis: {e}")
+            return []
+
+    @trazar(categoria='db')
+    def guardar_analisis_acustico(self, version: int, analisis: List[dict]) -> int:
+        """
+        Guardar (o reemplazar) el análisis de varias grabaciones en una transacción
+
+        Cada dict lleva sha256, las columnas de COLUMNAS_ANALISIS y, si falló, error.
+        """
+        if not analisis:
+            return 0
+        try:
+            columnas = ', '.join(self.COLUMNAS_ANALISIS)
+            marcas = ', '.join('?' * len(self.COLUMNAS_ANALISIS))
+            with self._escritura() as cursor:
+                cursor.executemany(f'''
+                    INSERT OR REPLACE INTO analisis_acustico (sha256, version, {columnas}, error)
+                    VALUES (?, ?, {marcas}, ?)
+                ''', [
+                    (a['sha256'], version, *[a.get(c) for c in self.COLUMNAS_ANALISIS], a.get('error'))
+                    for a in analisis
+                ])
+            return len(analisis)
+        except Exception as e:
+            print(f"❌ Error al guardar análisis acústico: {e}")
+            return 0
+
+    def obtener_tendencia_acustica(self, person_id: int, exercise_id: int = None) -> List[dict]:
+        """Características de cada intento de una persona en orden cronológico"""
+        try:
+            filtro = 'AND a.exerciseId = ?' if exercise_id is not None else ''
+            parametros = (person_id, exercise_id) if exercise_id is not None else (person_id,)
+            cursor = self.conn.cursor()
+            cursor.execute(f'''
+                SELECT a.fecha, a.numeroSesion, a.exerciseId, a.intento, x.*
+                FROM audio_catalogo a
+                JOIN analisis_acustico x ON x.sha256 = a.sha256
+                WHERE a.personId = ? {filtro} AND x.error IS NULL
+                ORDER BY a.fecha
+            ''', parametros)
+            return [
+                {
+                    'fecha': row['fecha'],
+                    'numero_sesion': row['numeroSesion'],
+                    'exercise_id': row['exerciseId'],
+                    'intento': row['intento'],
+                    **{c: row[c] for c in self.COLUMNAS_ANALISIS},
+                }
+                for row in cursor.fetchall()
+            ]
+        except Exception as e:
+            print(f"❌ Error al obtener tendencia acústica: {e}")
+            return []
+
+    # ========== MANIFIESTO DE PROCESAMIENTO INCREMENTAL ==========
+
+    def obtener_manifiesto(self, analizador: str) -> Dict[str, tuple]:
+        """Archivos ya procesados: ruta -> (tamano, mtime_ns, sha256, version)"""
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute('''
+                SELECT ruta, tamano, mtime_ns, sha256, version
+                FROM manifiesto_archivos
+                WHERE analizador = ?
+            ''', (analizador,))
+            return {row[0]: tuple(row[1:]) for row in cursor.fetchall()}
+        except Exception as e:
+            print(f"❌ Error al obtener manifiesto: {e}")
+            return {}
+
+    @trazar(categoria='db')
+    def guardar_manifiesto(self, analizador: str, filas: List[tuple]) -> bool:
+        """
+        Registrar (o actualizar) archivos procesados en una transacción
+
+        Cada fila es (ruta, tamano, mtime_ns, sha256, version).
+        """
+        if not filas:
+            return True
+        try:
+            with self._escritura() as cursor:
+                cursor.executemany('''
+                    INSERT OR REPLACE INTO manifiesto_archivos
+                        (analizador, ruta, tamano, mtime_ns, sha256, version, fecha)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', [
+                    (analizador, *fila, datetime.now().isoformat()) for fila in filas
+                ])
             return True
         except Exception as e:
-            print(f"❌ Error al actualizar observaciones: {e}")
+            print(f"❌ Error al guardar manifiesto: {e}")
             return False
+
+    @trazar(categoria='db')
+    def eliminar_del_manifiesto(self, analizador: str, rutas: List[str]) -> int:
+        """Quitar del manifiesto archivos que ya no existen"""
+        if not rutas:
+            return 0
+        try:
+            with self._escritura() as cursor:
+                cursor.executemany(
+                    'DELETE FROM manifiesto_archivos WHERE analizador = ? AND ruta = ?',
+                    [(analizador, ruta) for ruta in rutas]
+                )
+            return len(rutas)
+        except Exception as e:
+            print(f"❌ Error al actualizar manifiesto: {e}")
+            return 0
+
+
+class BufferResultadosSesion:
+    """
+    Acumula los resultados de una sesión en memoria y los guarda todos en una
+    sola transacción al terminar (ver Database.crear_sesion).
+    
+    Cada resultado se agrega además a un checkpoint en disco (una línea JSON),
+    de modo que si el proceso se interrumpe la sesión se recupera al reiniciar
+    o se continúa con reanudar=True (ver maquina_sesion.py).
+    """
+    
+    def __init__(self, db: Database, person_id: int, numero_sesion: int,
+                 nivel: NivelTerapia, carpeta: str = None, reanudar: bool = False):
+        self.db = db
+        self.person_id = person_id
+        self.numero_sesion = numero_sesion
+        self.nivel = nivel
+        self.resultados: List[ResultadoEjercicio] = []
+        
+        carpeta = carpeta or Config.CHECKPOINT_FOLDER
+        os.makedirs(carpeta, exist_ok=True)
+        self.ruta_checkpoint = self.ruta_para(person_id, numero_sesion, carpeta)
+        
+        # Seguir agregando al checkpoint de la sesión interrumpida
+        if reanudar:
+            sesion = self.leer_checkpoint(self.ruta_checkpoint)
+            if sesion is not None:
+                self.resultados = sesion.ejercicios_completados
+                return
+        
+        # Cabecera del checkpoint (se sobrescribe si quedó uno viejo de esta sesión)
+        self._escribir_linea({
+            'person_id': person_id,
+            'numero_sesion': numero_sesion,
+            'nivel': nivel.value,
+            'fecha': datetime.now().isoformat()
+        }, modo='w')
+    
+    @staticmethod
+    def ruta_para(person_id: int, numero_sesion: int, carpeta: str = None) -> str:
+        """Ruta del checkpoint de una sesión"""
+        carpeta = carpeta or Config.CHECKPOINT_FOLDER
+        return os.path.join(carpeta, f"sesion_{person_id}_{numero_sesion}.jsonl")
+    
+    def _escribir_linea(self, datos: dict, modo: str = 'a'):
+        with open(self.ruta_checkpoint, modo, encoding='utf-8') as f:
+            f.write(json.dumps(datos, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+    
+    @trazar(categoria='db')
+    def agregar(self, resultado: ResultadoEjercicio):
+        """Agregar resultado (checkpoint incremental, sin tocar la BD)"""
+        self.resultados.append(resultado)
+        try:
+            self._escribir_linea(_resultado_a_dict(resultado))
+        except Exception as e:
+            print(f"⚠️ No se pudo guardar checkpoint: {e}")
+    
+    @trazar(categoria='db')
+    def guardar(self, sesion: Sesion) -> Optional[int]:
+        """Guardar sesión y resultados en una transacción y borrar el checkpoint"""
+        sesion.ejercicios_completados = list(self.resultados)
+        sesion_id = self.db.crear_sesion(sesion)
+        if sesion_id:
+            self.descartar()
+        return sesion_id
+    
+    def descartar(self):
+        """Eliminar el checkpoint (sesión guardada o sin resultados)"""
+        try:
+            os.remove(self.ruta_checkpoint)
+        except FileNotFoundError:
+            pass
+    
+    @staticmethod
+    def leer_checkpoint(ruta: str) -> Optional[Sesion]:
+        """Reconstruir una sesión desde su checkpoint (ignora líneas incompletas)"""
+        try:
+            with open(ruta, 'r', encoding='utf-8') as f:
+                lineas = f.read().splitlines()
+        except OSError:
+            return None
+        
+        registros = []
+        for linea in lineas:
+            try:
+                registros.append(json.loads(linea))
+            except ValueError:
+                continue  # última línea cortada por la interrupción
+        
+        if not registros or 'person_id' not in registros[0]:
+            return None
+        
+        cabecera = registros[0]
+        try:
+            nivel = NivelTerapia(cabecera.get('nivel', 1))
+        except ValueError:
+            nivel = NivelTerapia.INICIAL
+        
+        return Sesion(
+            person_id=cabecera['person_id'],
+            nivel=nivel,
+            fecha=datetime.fromisoformat(cabecera['fecha']),
+            numero_sesion=cabecera.get('numero_sesion', 1),
+            ejercicios_completados=[_dict_a_resultado(r) for r in registros[1:]],
+            observaciones="Sesión interrumpida (recuperada)"
+        )
+    
+    @classmethod
+    def recuperar_pendientes(cls, db: Database, carpeta: str = None,
+                             minutos_minimos: float = 0) -> List[int]:
+        """
+        Guardar las sesiones que quedaron a medias en checkpoints
+        
+        Args:
+            minutos_minimos: dejar los checkpoints más recientes que esto
+                (la sesión todavía se puede reanudar)
+        
+        Returns:
+            IDs de las sesiones recuperadas
+        """
+        carpeta = carpeta or Config.CHECKPOINT_FOLDER
+        if not os.path.isdir(carpeta):
+            return []
+        
+        limite = datetime.now().timestamp() - minutos_minimos * 60
+        recuperadas = []
+        for nombre in sorted(os.listdir(carpeta)):
+            if not (nombre.startswith('sesion_') and nombre.endswith('.jsonl')):
+                continue
+            
+            ruta = os.path.join(carpeta, nombre)
+            try:
+                if os.path.getmtime(ruta) > limite:
+                    continue
+            except OSError:
+                continue
+            
+            sesion = cls.leer_checkpoint(ruta)
+            
+            if sesion and sesion.ejercicios_completados:
+                sesion_id = db.crear_sesion(sesion)
+                if not sesion_id:
+                    continue  # se reintentará en el próximo arranque
+                recuperadas.append(sesion_id)
+                print(f"♻️ Sesión recuperada: persona {sesion.person_id}, "
+                      f"{len(sesion.ejercicios_completados)} ejercicios")
+            
+            try:
+                os.remove(ruta)
+            except OSError:
+                pass
+        
+        return recuperadas
+
+
+def _resultado_a_dict(resultado: ResultadoEjercicio) -> dict:
+    return {
+        'ejercicio_id': resultado.ejercicio_id,
+        'respuesta': resultado.respuesta,
+        'correcto': resultado.correcto,
+        'tiempo_respuesta': resultado.tiempo_respuesta,
+        'intentos': resultado.intentos,
+        'audio_path': resultado.audio_path,
+        'timestamp': resultado.timestamp.isoformat()
+    }
+
+
+def _dict_a_resultado(datos: dict) -> ResultadoEjercicio:
+    return ResultadoEjercicio(
+        ejercicio_id=datos['ejercicio_id'],
+        respuesta=datos.get('respuesta') or '',
+        correcto=bool(datos.get('correcto')),
+        tiempo_respuesta=datos.get('tiempo_respuesta') or 0.0,
+        intentos=datos.get('intentos') or 1,
+        audio_path=datos.get('audio_path'),
+        timestamp=datetime.fromisoformat(datos['timestamp'])
+    )
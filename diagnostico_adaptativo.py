@@ -0,0 +1,307 @@
+"""
+TEST DIAGNÓSTICO ADAPTATIVO
+En lugar de 6 ejercicios al azar, cada ejercicio se elige según lo que ya
+se sabe del niño (test adaptativo computarizado):
+
+- la habilidad se mide en la misma escala que exercise.difficulty (1 a 4):
+  con habilidad d acierta la mitad de los ejercicios de dificultad d. El
+  nivel asignado es el siguiente al último que maneja: < 1 INICIAL, < 2
+  BÁSICO, < 3 INTERMEDIO, el resto AVANZADO. Así los ejercicios de cada
+  dificultad caen justo en un corte, donde más informan
+- la probabilidad de acierto es logística en (habilidad - dificultad), con
+  un piso de acierto casual y un techo por errores del reconocimiento de voz
+- se mantiene la distribución de la habilidad sobre una grilla y tras cada
+  respuesta se actualiza (Bayes)
+- el próximo ejercicio es el de dificultad más cercana a la habilidad
+  estimada (el más informativo)
+- el prior está centrado en el corte del medio (2.0), así el primer
+  ejercicio parte en dos los niveles posibles
+- tras MINIMO_EJERCICIOS el test termina cuando un nivel concentra
+  CONFIANZA_OBJETIVO de la probabilidad (o al llegar a MAXIMO_EJERCICIOS).
+  Si la habilidad estimada está a MARGEN_CORTE o más de todo corte, también
+  termina cuando ninguna respuesta al próximo ejercicio cambiaría el nivel
+  y este tiene al menos CONFIANZA_MINIMA; cerca de un corte esa salida no
+  vale y el test sigue. Con los ejercicios de la base de ejemplo, los casos
+  claros terminan con unos 4,4 ejercicios y los cercanos a un corte con
+  unos 4,8 (nivel correcto: ~82% y ~65%, frente a ~67% y ~55% con 6 al azar)
+
+Simulación (compara con el test anterior de 6 ejercicios al azar, con su
+regla de tasa de éxito y con la misma estimación de este módulo, que es la
+comparación justa porque el nivel real se define con estos cortes):
+    python diagnostico_adaptativo.py [--ninos 2000] [--db data.db]
+"""
+import math
+import random
+import argparse
+from typing import List, Optional
+
+from models import Ejercicio, NivelTerapia
+
+
+HABILIDAD_MINIMA = -1.0
+HABILIDAD_MAXIMA = 5.0
+PUNTOS_GRILLA = 121
+PRIOR_MEDIA = 2.0
+PRIOR_DESVIACION = 1.2
+
+PENDIENTE = 3.0              # logits por unidad de dificultad
+ACIERTO_AZAR = 0.05          # acierta aunque la palabra le quede grande
+DESLIZ = 0.10                # falla (o el reconocimiento falla) aunque la domine
+
+CORTES_NIVEL = (1.0, 2.0, 3.0)
+CONFIANZA_OBJETIVO = 0.80
+CONFIANZA_MINIMA = 0.60
+MARGEN_CORTE = 0.4           # distancia a un corte para aceptar un nivel estable
+MINIMO_EJERCICIOS = 3
+MAXIMO_EJERCICIOS = 8
+
+NIVELES = list(NivelTerapia)
+
+
+def probabilidad_acierto(habilidad: float, dificultad: float) -> float:
+    """Probabilidad de acierto de un niño con esa habilidad en un ejercicio"""
+    logistica = 1.0 / (1.0 + math.exp(-PENDIENTE * (habilidad - dificultad)))
+    return ACIERTO_AZAR + (1.0 - ACIERTO_AZAR - DESLIZ) * logistica
+
+
+def nivel_de_habilidad(habilidad: float) -> NivelTerapia:
+    return NIVELES[sum(1 for corte in CORTES_NIVEL if habilidad >= corte)]
+
+
+class DiagnosticoAdaptativo:
+    """Elige los ejercicios del test y estima el nivel tras cada respuesta"""
+
+    def __init__(self, ejercicios: List[Ejercicio], minimo: int = MINIMO_EJERCICIOS,
+                 maximo: int = MAXIMO_EJERCICIOS, confianza: float = CONFIANZA_OBJETIVO):
+        self.disponibles = list(ejercicios)
+        self.minimo = minimo
+        self.maximo = maximo
+        self.confianza_objetivo = confianza
+        self.respuestas: List[tuple] = []
+
+        paso = (HABILIDAD_MAXIMA - HABILIDAD_MINIMA) / (PUNTOS_GRILLA - 1)
+        self._grilla = [HABILIDAD_MINIMA + i * paso for i in range(PUNTOS_GRILLA)]
+        self._niveles_grilla = [NIVELES.index(nivel_de_habilidad(h)) for h in self._grilla]
+        prior = [math.exp(-0.5 * ((h - PRIOR_MEDIA) / PRIOR_DESVIACION) ** 2) for h in self._grilla]
+        total = sum(prior)
+        self._posterior = [p / total for p in prior]
+
+    # ========== ESTIMACIÓN ==========
+
+    @property
+    def habilidad(self) -> float:
+        """Habilidad esperada según las respuestas hasta ahora"""
+        return sum(h * p for h, p in zip(self._grilla, self._posterior))
+
+    def probabilidad_niveles(self) -> List[float]:
+        """Probabilidad de cada nivel (en el orden de NivelTerapia)"""
+        probabilidades = [0.0] * len(NIVELES)
+        for indice, p in zip(self._niveles_grilla, self._posterior):
+            probabilidades[indice] += p
+        return probabilidades
+
+    @property
+    def nivel_estimado(self) -> NivelTerapia:
+        probabilidades = self.probabilidad_niveles()
+        return NIVELES[probabilidades.index(max(probabilidades))]
+
+    @property
+    def confianza(self) -> float:
+        """Probabilidad del nivel estimado"""
+        return max(self.probabilidad_niveles())
+
+    @property
+    def terminado(self) -> bool:
+        if len(self.respuestas) >= self.maximo or not self.disponibles:
+            return True
+        if len(self.respuestas) < self.minimo:
+            return False
+        confianza = self.confianza
+        if confianza >= self.confianza_objetivo:
+            return True
+        return (confianza >= CONFIANZA_MINIMA and not self._cerca_de_corte()
+                and self._nivel_estable())
+
+    def _cerca_de_corte(self) -> bool:
+        """La habilidad estimada está a menos de MARGEN_CORTE de un corte de nivel"""
+        habilidad = self.habilidad
+        return min(abs(habilidad - corte) for corte in CORTES_NIVEL) < MARGEN_CORTE
+
+    def _posterior_tras(self, dificultad: float, correcto: bool) -> List[float]:
+        """Posterior (sin normalizar) si respondiera un ejercicio de esa dificultad"""
+        verosimilitud = [probabilidad_acierto(h, dificultad) for h in self._grilla]
+        if not correcto:
+            verosimilitud = [1.0 - v for v in verosimilitud]
+        return [p * v for p, v in zip(self._posterior, verosimilitud)]
+
+    def _nivel_estable(self) -> bool:
+        """Ninguna respuesta al próximo ejercicio cambiaría el nivel estimado"""
+        actual = NIVELES.index(self.nivel_estimado)
+        dificultad = self._dificultad_siguiente()
+        for correcto in (True, False):
+            probabilidades = [0.0] * len(NIVELES)
+            for indice, p in zip(self._niveles_grilla, self._posterior_tras(dificultad, correcto)):
+                probabilidades[indice] += p
+            if probabilidades.index(max(probabilidades)) != actual:
+                return False
+        return True
+
+    # ========== FLUJO DEL TEST ==========
+
+    def _dificultad_siguiente(self) -> float:
+        """Dificultad disponible más cercana a la habilidad estimada"""
+        habilidad = self.habilidad
+        return min((e.dificultad for e in self.disponibles),
+                   key=lambda dificultad: abs(dificultad - habilidad))
+
+    def siguiente(self) -> Optional[Ejercicio]:
+        """Ejercicio más informativo para la estimación actual, o None si terminó"""
+        if self.terminado:
+            return None
+
+        dificultad = self._dificultad_siguiente()
+        candidatos = [e for e in self.disponibles if e.dificultad == dificultad]
+        elegido = random.choice(candidatos)
+        self.disponibles.remove(elegido)
+        return elegido
+
+    def registrar(self, ejercicio: Ejercicio, correcto: bool):
+        """Actualizar la estimación con una respuesta"""
+        self.respuestas.append((ejercicio, correcto))
+
+        posterior = self._posterior_tras(ejercicio.dificultad, correcto)
+        total = sum(posterior)
+        self._posterior = [p / total for p in posterior]
+
+
+# ========== SIMULACIÓN ==========
+
+def _nivel_test_anterior(tasa_exito: float) -> NivelTerapia:
+    """Clasificación del test de 6 ejercicios al azar (ver services.py antes del cambio)"""
+    if tasa_exito >= 0.9:
+        return NivelTerapia.AVANZADO
+    if tasa_exito >= 0.7:
+        return NivelTerapia.INTERMEDIO
+    if tasa_exito >= 0.5:
+        return NivelTerapia.BASICO
+    return NivelTerapia.INICIAL
+
+
+def _ejercicios_sinteticos() -> List[Ejercicio]:
+    """Mismas cantidades por dificultad que la base de datos de ejemplo"""
+    ejercicios = []
+    for dificultad, cantidad in ((1, 8), (2, 10), (3, 12), (4, 15)):
+        for _ in range(cantidad):
+            ejercicios.append(Ejercicio(
+                exercise_id=len(ejercicios) + 1, word=f"palabra{len(ejercicios) + 1}",
+                nivel=NIVELES[dificultad - 1], dificultad=dificultad
+            ))
+    return ejercicios
+
+
+def simular(ejercicios: List[Ejercicio], ninos: int = 2000, semilla: int = 7,
+            margen_dudoso: float = 0.3) -> dict:
+    """
+    Comparar el test anterior con el adaptativo sobre niños simulados
+
+    Cada niño tiene una habilidad al azar y responde según
+    probabilidad_acierto. Es dudoso si está a menos de margen_dudoso de un
+    corte de nivel. 'anterior' es el test de 6 ejercicios al azar con su
+    regla de tasa de éxito; 'azar' son los mismos 6 ejercicios estimados
+    como el adaptativo, y aísla lo que aporta elegir los ejercicios.
+
+    Returns:
+        {grupo: {metodo: {'ejercicios': promedio, 'acierto': proporción}}}
+    """
+    rng = random.Random(semilla)
+    random.seed(semilla)
+    resumen = {}
+
+    for _ in range(ninos):
+        habilidad = rng.uniform(0.0, 4.0)
+        real = nivel_de_habilidad(habilidad)
+        dudoso = min(abs(habilidad - corte) for corte in CORTES_NIVEL) < margen_dudoso
+        grupo = 'dudosos' if dudoso else 'claros'
+
+        def responder(ejercicio: Ejercicio) -> bool:
+            return rng.random() < probabilidad_acierto(habilidad, ejercicio.dificultad)
+
+        # Test anterior: 6 al azar, nivel por tasa de éxito
+        muestra = rng.sample(ejercicios, min(6, len(ejercicios)))
+        tasa = sum(responder(e) for e in muestra) / len(muestra)
+        anterior = (len(muestra), _nivel_test_anterior(tasa))
+
+        al_azar = DiagnosticoAdaptativo([])
+        for ejercicio in muestra:
+            al_azar.registrar(ejercicio, responder(ejercicio))
+        azar = (len(muestra), al_azar.nivel_estimado)
+
+        # Test adaptativo
+        diagnostico = DiagnosticoAdaptativo(ejercicios)
+        while (ejercicio := diagnostico.siguiente()) is not None:
+            diagnostico.registrar(ejercicio, responder(ejercicio))
+        adaptativo = (len(diagnostico.respuestas), diagnostico.nivel_estimado)
+
+        for g in (grupo, 'todos'):
+            for metodo, (cantidad, nivel) in (('anterior', anterior), ('azar', azar),
+                                            ('adaptativo', adaptativo)):
+                datos = resumen.setdefault(g, {}).setdefault(
+                    metodo, {'ninos': 0, 'ejercicios': 0, 'aciertos': 0}
+                )
+                datos['ninos'] += 1
+                datos['ejercicios'] += cantidad
+                datos['aciertos'] += nivel == real
+
+    return {
+        grupo: {
+            metodo: {
+                'ninos': d['ninos'],
+                'ejercicios': d['ejercicios'] / d['ninos'],
+                'acierto': d['aciertos'] / d['ninos'],
+            }
+            for metodo, d in metodos.items()
+        }
+        for grupo, metodos in resumen.items()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simular el test diagnóstico adaptativo")
+    parser.add_argument('--ninos', type=int, default=2000)
+    parser.add_argument('--semilla', type=int, default=7)
+    parser.add_argument('--db', default=None,
+                        help='Usar los ejercicios de esta base de datos (por defecto, sintéticos)')
+    args = parser.parse_args()
+
+    ejercicios = None
+    if args.db:
+        from database import Database
+        db = Database(args.db)
+        ejercicios = db.obtener_todos_ejercicios()
+        db.cerrar()
+    ejercicios = ejercicios or _ejercicios_sinteticos()
+
+    print("\n" + "="*70)
+    print("🧪 SIMULACIÓN DEL TEST DIAGNÓSTICO")
+    print("="*70)
+    print(f"   Niños simulados: {args.ninos:,}   Ejercicios disponibles: {len(ejercicios)}\n")
+
+    resumen = simular(ejercicios, args.ninos, args.semilla)
+    print(f"   {'Grupo':<10} {'Método':<12} {'Niños':>7} {'Ejercicios':>11} {'Nivel correcto':>15}")
+    for grupo in ('claros', 'dudosos', 'todos'):
+        for metodo in ('anterior', 'azar', 'adaptativo'):
+            d = resumen.get(grupo, {}).get(metodo)
+            if d:
+                print(f"   {grupo:<10} {metodo:<12} {d['ninos']:>7,} "
+                      f"{d['ejercicios']:>11.2f} {d['acierto']*100:>14.1f}%")
+
+    todos = resumen['todos']
+    print(f"\n   📊 Promedio general: {todos['adaptativo']['ejercicios']:.2f} ejercicios "
+          f"(test anterior: {todos['anterior']['ejercicios']:.0f}), nivel correcto "
+          f"{todos['adaptativo']['acierto']*100:.1f}% vs {todos['azar']['acierto']*100:.1f}% "
+          f"con 6 al azar")
+    print("="*70 + "\n")
+
+
+if __name__ == "__main__":
+    main()
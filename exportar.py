@@ -0,0 +1,346 @@
+"""
+EXPORTACIÓN MASIVA DE SESIONES Y RESULTADOS
+Vuelca sesiones, resultados por ejercicio y observaciones a CSV o Parquet
+leyendo la base de datos por lotes (la memoria no crece con el historial)
+
+Cada fila lleva el ROBOT_ID para poder juntar exportaciones de varios robots.
+Con --incremental solo se exporta lo nuevo desde la exportación anterior: la
+marca es la última clave primaria exportada de cada tabla, no la fecha (una
+sesión recuperada después de un corte o un resultado escrito al final de la
+sesión llevan una fecha anterior a la de filas ya exportadas).
+
+Uso:
+    python exportar.py [--formato csv|parquet] [--desde "2025-01-01 00:00:00"]
+                       [--incremental] [--carpeta exportaciones] [--db data.db]
+"""
+import os
+import csv
+import json
+import sqlite3
+import argparse
+from datetime import datetime
+
+from config import Config
+
+# Parquet es opcional
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PARQUET_DISPONIBLE = True
+except ImportError:
+    PARQUET_DISPONIBLE = False
+
+
+TAMANO_LOTE = 5000
+ARCHIVO_MARCA = '.marca_exportacion.json'
+
+
+# (nombre, tipo) de cada columna; tipo: 'int', 'float' o 'str'
+COLUMNAS_SESIONES = [
+    ('robot_id', 'str'), ('sesion_id', 'int'), ('person_id', 'int'),
+    ('nombre', 'str'), ('apellido', 'str'), ('nivel_id', 'int'),
+    ('numero_sesion', 'int'), ('fecha', 'str'), ('correctos', 'int'),
+    ('fallidos', 'int'), ('observacion', 'str'), ('observaciones_terapeuta', 'str'),
+]
+
+COLUMNAS_RESULTADOS = [
+    ('robot_id', 'str'), ('resultado_id', 'int'), ('sesion_id', 'int'),
+    ('person_id', 'int'), ('exercise_id', 'int'), ('palabra', 'str'),
+    ('respuesta', 'str'), ('correcto', 'int'), ('tiempo_respuesta', 'float'),
+    ('intentos', 'int'), ('audio_path', 'str'), ('fecha', 'str'),
+]
+
+COLUMNAS_OBSERVACIONES = [
+    ('robot_id', 'str'), ('observacion_id', 'int'), ('person_id', 'int'),
+    ('fecha', 'str'), ('observacion', 'str'), ('terapeuta', 'str'),
+]
+
+# tabla -> (columnas, SELECT ... FROM ..., columna de fecha, clave primaria)
+EXPORTACIONES = {
+    'sesiones': (
+        COLUMNAS_SESIONES,
+        """
+        SELECT ?, s.sesionId, s.personId, p.name, p.apellido, s.levelId,
+               s.number, s.date, s.correct_exercise, s.failed_exercise,
+               s.observation, s.observaciones_terapeuta
+        FROM sesion s
+        LEFT JOIN person p ON p.personId = s.personId
+        """,
+        's.date',
+        's.sesionId',
+    ),
+    'resultados': (
+        COLUMNAS_RESULTADOS,
+        """
+        SELECT ?, r.resultadoId, r.sesionId, r.personId, r.exerciseId, e.word,
+               r.respuesta, r.correcto, r.tiempo_respuesta, r.intentos,
+               r.audio_path, r.fecha
+        FROM resultado_ejercicio r
+        LEFT JOIN exercise e ON e.exerciseId = r.exerciseId
+        """,
+        'r.fecha',
+        'r.resultadoId',
+    ),
+    'observaciones': (
+        COLUMNAS_OBSERVACIONES,
+        """
+        SELECT ?, o.observacionId, o.personId, o.fecha, o.observacion, o.terapeuta
+        FROM observaciones o
+        """,
+        'o.fecha',
+        'o.observacionId',
+    ),
+}
+
+
+# ========== LECTURA POR LOTES ==========
+
+def iterar_lotes(conn, tabla: str, desde: str = None, robot_id: str = None,
+                 tamano_lote: int = TAMANO_LOTE, desde_id: int = None):
+    """
+    Generador de listas de filas (tuplas) de una exportación
+
+    Recorre la tabla por clave primaria; con 'desde_id' solo devuelve las
+    filas de clave mayor (exportación incremental). Con 'desde' (y sin
+    'desde_id') usa el índice de fecha y solo devuelve filas posteriores a
+    esa fecha.
+    """
+    _, consulta, columna_fecha, clave = EXPORTACIONES[tabla]
+    parametros = [robot_id or Config.ROBOT_ID]
+    condiciones = []
+
+    if desde_id is not None:
+        condiciones.append(f"{clave} > ?")
+        parametros.append(desde_id)
+    if desde:
+        condiciones.append(f"{columna_fecha} > ?")
+        parametros.append(desde)
+
+    if condiciones:
+        consulta += " WHERE " + " AND ".join(condiciones)
+    if desde and desde_id is None:
+        consulta += f" ORDER BY {columna_fecha}"
+    else:
+        consulta += f" ORDER BY {clave}"
+
+    cursor = conn.execute(consulta, parametros)
+    while True:
+        lote = cursor.fetchmany(tamano_lote)
+        if not lote:
+            break
+        yield lote
+
+
+# ========== ESCRITORES ==========
+
+class EscritorCSV:
+    extension = 'csv'
+
+    def __init__(self, ruta: str, columnas: list):
+        self._archivo = open(ruta, 'w', newline='', encoding='utf-8')
+        self._writer = csv.writer(self._archivo)
+        self._writer.writerow([nombre for nombre, _ in columnas])
+
+    def escribir(self, lote: list):
+        self._writer.writerows(lote)
+
+    def cerrar(self):
+        self._archivo.close()
+
+
+class EscritorParquet:
+    extension = 'parquet'
+
+    TIPOS = {
+        'int': lambda: pa.int64(),
+        'float': lambda: pa.float64(),
+        'str': lambda: pa.string(),
+    }
+
+    def __init__(self, ruta: str, columnas: list):
+        if not PARQUET_DISPONIBLE:
+            raise RuntimeError("Parquet requiere pyarrow (pip install pyarrow)")
+
+        # Esquema fijo: un lote con una columna toda NULL no cambia el tipo
+        self._schema = pa.schema([
+            (nombre, self.TIPOS[tipo]()) for nombre, tipo in columnas
+        ])
+        self._writer = pq.ParquetWriter(ruta, self._schema, compression='zstd')
+
+    def escribir(self, lote: list):
+        columnas = list(zip(*lote))
+        tabla = pa.Table.from_arrays(
+            [pa.array(valores, type=campo.type) for valores, campo in zip(columnas, self._schema)],
+            schema=self._schema
+        )
+        self._writer.write_table(tabla)
+
+    def cerrar(self):
+        self._writer.close()
+
+
+ESCRITORES = {
+    'csv': EscritorCSV,
+    'parquet': EscritorParquet,
+}
+
+
+# ========== MARCA DE EXPORTACIÓN (INCREMENTAL) ==========
+
+def leer_marca(carpeta: str) -> dict:
+    """tabla -> {'ultimo_id', 'ultima_fecha'} de la última exportación"""
+    ruta = os.path.join(carpeta, ARCHIVO_MARCA)
+    try:
+        with open(ruta, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def guardar_marca(carpeta: str, marca: dict):
+    ruta = os.path.join(carpeta, ARCHIVO_MARCA)
+    temporal = ruta + '.tmp'
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump(marca, f, indent=2)
+    os.replace(temporal, ruta)
+
+
+# ========== EXPORTACIÓN ==========
+
+def exportar_tabla(conn, tabla: str, carpeta: str, formato: str = 'csv',
+                   desde: str = None, robot_id: str = None, desde_id: int = None) -> dict:
+    """
+    Exportar una tabla a un archivo
+
+    Returns:
+        Dict con ruta, filas, ultimo_id y ultima_fecha (None si no hubo filas)
+    """
+    columnas = EXPORTACIONES[tabla][0]
+    indice_fecha = [nombre for nombre, _ in columnas].index('fecha')
+    indice_clave = 1  # después de robot_id va siempre la clave primaria
+    clase = ESCRITORES[formato]
+    robot_id = robot_id or Config.ROBOT_ID
+
+    sello = datetime.now().strftime('%Y%m%d_%H%M%S')
+    ruta = os.path.join(carpeta, f"{tabla}_{robot_id}_{sello}.{clase.extension}")
+    temporal = ruta + '.tmp'
+
+    filas = 0
+    ultimo_id = None
+    ultima_fecha = None
+    escritor = clase(temporal, columnas)
+    try:
+        for lote in iterar_lotes(conn, tabla, desde, robot_id, desde_id=desde_id):
+            escritor.escribir(lote)
+            filas += len(lote)
+            id_lote = max(fila[indice_clave] for fila in lote)
+            if ultimo_id is None or id_lote > ultimo_id:
+                ultimo_id = id_lote
+            fecha_lote = max((fila[indice_fecha] for fila in lote if fila[indice_fecha]), default=None)
+            if fecha_lote and (ultima_fecha is None or fecha_lote > ultima_fecha):
+                ultima_fecha = fecha_lote
+    except Exception:
+        escritor.cerrar()
+        os.remove(temporal)
+        raise
+
+    escritor.cerrar()
+
+    # Sin filas nuevas no se deja un archivo vacío
+    if filas == 0:
+        os.remove(temporal)
+        ruta = None
+    else:
+        os.replace(temporal, ruta)
+
+    return {'ruta': ruta, 'filas': filas, 'ultimo_id': ultimo_id, 'ultima_fecha': ultima_fecha}
+
+
+def exportar(db_path: str = None, formato: str = 'csv', carpeta: str = None,
+             desde: str = None, incremental: bool = False, tablas: list = None) -> dict:
+    """
+    Exportar sesiones, resultados y observaciones
+
+    Args:
+        desde: exportar solo filas con fecha posterior (misma para todas las tablas)
+        incremental: usar y actualizar la marca guardada en la carpeta (la
+            primera vez, sin marca, se usa 'desde')
+
+    Returns:
+        tabla -> {ruta, filas, ultimo_id, ultima_fecha}
+    """
+    db_path = db_path or Config.DATABASE_PATH
+    carpeta = carpeta or Config.EXPORT_FOLDER
+    os.makedirs(carpeta, exist_ok=True)
+
+    marca = leer_marca(carpeta) if incremental else {}
+
+    # Solo lectura: no interfiere con una sesión que esté escribiendo
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    resultados = {}
+
+    try:
+        for tabla in tablas or EXPORTACIONES:
+            desde_tabla, desde_id = desde, None
+            if incremental and tabla in marca:
+                anterior = marca[tabla]
+                if isinstance(anterior, dict):
+                    desde_tabla, desde_id = None, anterior['ultimo_id']
+                else:
+                    # Marca por fecha de una versión anterior: se usa una última vez
+                    desde_tabla = anterior
+
+            resultado = exportar_tabla(conn, tabla, carpeta, formato, desde_tabla,
+                                       desde_id=desde_id)
+            resultados[tabla] = resultado
+
+            if resultado['ultimo_id'] is not None:
+                marca[tabla] = {'ultimo_id': resultado['ultimo_id'],
+                                'ultima_fecha': resultado['ultima_fecha']}
+    finally:
+        conn.close()
+
+    if incremental:
+        guardar_marca(carpeta, marca)
+
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exportar sesiones y resultados")
+    parser.add_argument('--formato', choices=list(ESCRITORES), default='csv')
+    parser.add_argument('--desde', help='Fecha "AAAA-MM-DD HH:MM:SS": solo filas posteriores')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Continuar desde la exportación anterior')
+    parser.add_argument('--carpeta', default=Config.EXPORT_FOLDER)
+    parser.add_argument('--db', default=Config.DATABASE_PATH)
+    args = parser.parse_args()
+
+    print("\n" + "="*70)
+    print("📤 EXPORTACIÓN DE DATOS")
+    print("="*70 + "\n")
+
+    if args.formato == 'parquet' and not PARQUET_DISPONIBLE:
+        print("❌ Parquet requiere pyarrow (pip install pyarrow)")
+        return
+
+    inicio = datetime.now()
+    try:
+        resultados = exportar(args.db, args.formato, args.carpeta, args.desde, args.incremental)
+    except Exception as e:
+        print(f"❌ Error al exportar: {e}")
+        return
+
+    for tabla, resultado in resultados.items():
+        if resultado['ruta']:
+            print(f"   ✅ {tabla}: {resultado['filas']:,} filas -> {resultado['ruta']}")
+        else:
+            print(f"   ⏭️  {tabla}: sin filas nuevas")
+
+    segundos = (datetime.now() - inicio).total_seconds()
+    print(f"\n⏱️  Tiempo total: {segundos:.2f} s")
+    print("="*70 + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""
+ÍNDICE FONÉTICO DE PACIENTES
+Claves fonéticas adaptadas al español para identificar por voz aunque el
+reconocimiento escriba mal el nombre ("Martines", "Gonsales", "Bictor")
+"""
+import re
+import unicodedata
+from difflib import SequenceMatcher
+from typing import Dict, List, Optional, Set, Tuple
+
+
+VOCALES = 'aeiou'
+
+
+def _normalizar(texto: str) -> str:
+    """Minúsculas, sin tildes y solo letras (la ñ se conserva)"""
+    texto = (texto or '').lower().replace('ñ', '\x00')
+    sin_tildes = ''.join(
+        c for c in unicodedata.normalize('NFD', texto)
+        if unicodedata.category(c) != 'Mn'
+    )
+    return re.sub(r'[^a-z\x00 ]', ' ', sin_tildes).replace('\x00', 'ñ')
+
+
+def clave_fonetica(palabra: str) -> str:
+    """
+    Clave fonética de una palabra en español
+
+    Letras que suenan igual reciben el mismo código: b/v/w, s/z/c(e,i),
+    c/k/qu, g(e,i)/j, ll/y, h muda, ñ/n; las repetidas se reducen a una.
+    """
+    texto = _normalizar(palabra).replace(' ', '')
+    codigos = []
+    i = 0
+
+    while i < len(texto):
+        c = texto[i]
+        sig = texto[i + 1] if i + 1 < len(texto) else ''
+        sig2 = texto[i + 2] if i + 2 < len(texto) else ''
+        avance = 1
+
+        if c in VOCALES:
+            codigo = c.upper()
+        elif c == 'h':
+            codigo = ''
+        elif c == 'c':
+            if sig == 'h':
+                codigo, avance = 'X', 2
+            else:
+                codigo = 'S' if sig in ('e', 'i') else 'K'
+        elif c == 'q':
+            codigo = 'K'
+            if sig == 'u':
+                avance = 2
+        elif c == 'k':
+            codigo = 'K'
+        elif c == 'g':
+            if sig in ('e', 'i'):
+                codigo = 'J'
+            elif sig == 'u' and sig2 in ('e', 'i'):
+                codigo, avance = 'G', 2
+            else:
+                codigo = 'G'
+        elif c == 'j':
+            codigo = 'J'
+        elif c == 'l':
+            if sig == 'l':
+                codigo, avance = 'Y', 2
+            else:
+                codigo = 'L'
+        elif c == 'y':
+            codigo = 'Y' if sig and sig in VOCALES else 'I'
+        elif c in ('b', 'v', 'w'):
+            codigo = 'B'
+        elif c in ('s', 'z'):
+            codigo = 'S'
+        elif c == 'x':
+            # Ximena, Xavier al inicio; "ks" en el resto
+            codigo = 'J' if i == 0 else 'KS'
+        elif c == 'ñ':
+            codigo = 'N'
+        else:
+            codigo = c.upper()
+
+        for letra in codigo:
+            if not codigos or codigos[-1] != letra:
+                codigos.append(letra)
+        i += avance
+
+    return ''.join(codigos)
+
+
+def claves_texto(texto: str) -> Tuple[str, ...]:
+    """Claves fonéticas de cada palabra de un texto"""
+    return tuple(
+        clave for clave in (clave_fonetica(p) for p in _normalizar(texto).split())
+        if clave
+    )
+
+
+class IndiceFonetico:
+    """
+    Índice en memoria de pacientes por clave fonética
+
+    Se carga una vez desde la base de datos y se actualiza de forma
+    incremental con agregar() o sincronizar() al registrar pacientes.
+    """
+
+    def __init__(self):
+        self._claves: Dict[int, Tuple[str, ...]] = {}  # person_id -> claves
+        self._nombres: Dict[int, str] = {}              # person_id -> nombre completo
+        self._por_clave: Dict[str, Set[int]] = {}       # clave -> person_ids
+        self._ultimo_id = 0
+
+    @classmethod
+    def desde_db(cls, db) -> 'IndiceFonetico':
+        """Construir el índice con todos los pacientes registrados"""
+        indice = cls()
+        indice.sincronizar(db)
+        return indice
+
+    def __len__(self) -> int:
+        return len(self._claves)
+
+    def agregar(self, person_id: int, nombre: str, apellido: Optional[str] = None):
+        """Agregar (o reemplazar) un paciente"""
+        self.eliminar(person_id)
+
+        nombre_completo = f"{nombre or ''} {apellido or ''}".strip()
+        claves = claves_texto(nombre_completo)
+
+        self._claves[person_id] = claves
+        self._nombres[person_id] = nombre_completo
+        for clave in claves:
+            self._por_clave.setdefault(clave, set()).add(person_id)
+
+        self._ultimo_id = max(self._ultimo_id, person_id)
+
+    def eliminar(self, person_id: int):
+        """Quitar un paciente del índice"""
+        for clave in self._claves.pop(person_id, ()):
+            ids = self._por_clave.get(clave)
+            if ids:
+                ids.discard(person_id)
+                if not ids:
+                    del self._por_clave[clave]
+        self._nombres.pop(person_id, None)
+
+    def sincronizar(self, db, tamano_lote: int = 500) -> int:
+        """
+        Agregar los pacientes registrados después del último indexado
+
+        Returns:
+            Cantidad de pacientes agregados
+        """
+        agregados = 0
+        while True:
+            personas = db.obtener_personas_nuevas(self._ultimo_id, tamano_lote)
+            for persona in personas:
+                self.agregar(persona['personId'], persona['name'], persona['apellido'])
+            agregados += len(personas)
+            if len(personas) < tamano_lote:
+                return agregados
+
+    def nombre_completo(self, person_id: int) -> str:
+        return self._nombres.get(person_id, '')
+
+    def buscar(self, nombre: str, apellido: Optional[str] = None,
+               k: int = 3) -> List[Tuple[int, float]]:
+        """
+        Pacientes más parecidos fonéticamente
+
+        Cada palabra buscada se compara con la palabra más parecida del
+        paciente; el puntaje (0.0 - 1.0) es el promedio.
+
+        Returns:
+            Hasta k tuplas (person_id, puntaje) de mayor a menor puntaje
+        """
+        consulta = claves_texto(f"{nombre or ''} {apellido or ''}")
+        if not consulta or not self._claves:
+            return []
+
+        # Cada clave distinta se compara una sola vez por palabra buscada
+        # (muchos pacientes comparten nombre o apellido)
+        similitudes = []
+        for clave_buscada in consulta:
+            comparador = SequenceMatcher(None, b=clave_buscada)
+            por_clave = {}
+            for clave in self._por_clave:
+                comparador.set_seq1(clave)
+                por_clave[clave] = comparador.ratio()
+            similitudes.append(por_clave)
+
+        puntajes = []
+        for person_id, claves in self._claves.items():
+            if not claves:
+                continue
+            puntaje = sum(
+                max(por_clave[clave] for clave in claves)
+                for por_clave in similitudes
+            ) / len(similitudes)
+            puntajes.append((person_id, puntaje))
+
+        puntajes.sort(key=lambda x: (-x[1], -x[0]))
+        return puntajes[:k]
+
+
+if __name__ == "__main__":
+    for nombre in ("Martínez", "Martines", "González", "Gonsales",
+                   "Víctor", "Bictor", "Guillermo", "Giyermo", "Ximena", "Jimena"):
+        print(f"   {nombre:<12} -> {clave_fonetica(nombre)}")
@@ -1,13 +1,129 @@
 """
 GENERADOR DE IMÁGENES PLACEHOLDER
 Crea imágenes temporales para probar el sistema mientras descargas las reales
+Generación por lotes: fuentes cargadas una vez, pool de procesos y caché por hash
 """
 
 import os
+import json
+import hashlib
 import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from PIL import Image, ImageDraw, ImageFont
 
 
+# Versión del diseño: cambiarla invalida la caché de placeholders ya generados
+VERSION_PLACEHOLDER = 1
+
+# Tamaños generados por defecto (el primero usa la ruta configurada en la BD)
+TAMANOS_PLACEHOLDER = (400,)
+
+# Archivo donde se guarda, por placeholder generado, el hash de lo que
+# determina su contenido y el del archivo escrito
+ARCHIVO_CACHE = os.path.join('imagenes', '.placeholders_cache.json')
+
+FUENTES_POSIBLES = [
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
+    "/System/Library/Fonts/Helvetica.ttc",
+    "C:\\Windows\\Fonts\\arial.ttf",
+]
+
+# Colores alegres para niños
+COLORES_FONDO = [
+    (255, 182, 193),  # Rosa claro
+    (173, 216, 230),  # Azul claro
+    (144, 238, 144),  # Verde claro
+    (255, 218, 185),  # Durazno
+    (221, 160, 221),  # Púrpura claro
+    (255, 255, 153),  # Amarillo claro
+]
+
+
+@lru_cache(maxsize=1)
+def _ruta_fuente_disponible():
+    """Primera fuente TrueType disponible (se resuelve una sola vez)"""
+    for ruta_fuente in FUENTES_POSIBLES:
+        if os.path.exists(ruta_fuente):
+            return ruta_fuente
+    return None
+
+
+@lru_cache(maxsize=None)
+def _cargar_fuente(tamano_puntos):
+    """Cargar fuente por tamaño, reutilizándola entre imágenes"""
+    ruta_fuente = _ruta_fuente_disponible()
+    try:
+        if ruta_fuente:
+            return ImageFont.truetype(ruta_fuente, tamano_puntos)
+    except Exception:
+        pass
+    return ImageFont.load_default()
+
+
+def _color_para_palabra(palabra):
+    """
+    Color de fondo determinista para una palabra.
+    hash() de Python cambia entre ejecuciones (PYTHONHASHSEED), así que se usa md5.
+    """
+    digest = hashlib.md5(palabra.encode('utf-8')).digest()
+    return COLORES_FONDO[int.from_bytes(digest[:4], 'big') % len(COLORES_FONDO)]
+
+
+def _hash_contenido(palabra, tamano):
+    """Hash de todo lo que determina el contenido del placeholder"""
+    datos = json.dumps(
+        [VERSION_PLACEHOLDER, palabra, tamano, COLORES_FONDO, _ruta_fuente_disponible()],
+        ensure_ascii=False
+    )
+    return hashlib.sha256(datos.encode('utf-8')).hexdigest()
+
+
+def _hash_archivo(ruta):
+    """Hash de los bytes del archivo (None si no se puede leer)"""
+    try:
+        with open(ruta, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return None
+
+
+def _es_placeholder_propio(ruta, entrada):
+    """
+    El archivo en disco es el placeholder que se escribió (y no una imagen
+    real puesta después en la misma ruta)
+    """
+    if not isinstance(entrada, dict) or not entrada.get('archivo'):
+        return False  # entrada de una versión anterior: no se puede comprobar
+    return _hash_archivo(ruta) == entrada['archivo']
+
+
+def _ruta_para_tamano(ruta_base, tamano, tamano_principal):
+    """El tamaño principal usa la ruta original; el resto agrega sufijo _{tamano}"""
+    if tamano == tamano_principal:
+        return ruta_base
+    base, extension = os.path.splitext(ruta_base)
+    return f"{base}_{tamano}{extension or '.png'}"
+
+
+def _leer_cache(ruta_cache):
+    try:
+        with open(ruta_cache, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _guardar_cache(ruta_cache, cache):
+    carpeta = os.path.dirname(ruta_cache)
+    if carpeta:
+        os.makedirs(carpeta, exist_ok=True)
+    temporal = ruta_cache + '.tmp'
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, ensure_ascii=False, indent=1, sort_keys=True)
+    os.replace(temporal, ruta_cache)
+
+
 def generar_imagen_placeholder(palabra, ruta_salida, tamano=400):
     """
     Genera una imagen placeholder simple con la palabra escrita
@@ -17,27 +133,15 @@ def generar_imagen_placeholder(palabra, ruta_salida, tamano=400):
         ruta_salida: Donde guardar la imagen
         tamano: Tamaño de la imagen (cuadrada)
     """
-    
-    # Colores alegres para niños
-    colores_fondo = [
-        (255, 182, 193),  # Rosa claro
-        (173, 216, 230),  # Azul claro
-        (144, 238, 144),  # Verde claro
-        (255, 218, 185),  # Durazno
-        (221, 160, 221),  # Púrpura claro
-        (255, 255, 153),  # Amarillo claro
-    ]
-    
-    # Elegir color basado en hash de la palabra
-    idx_color = hash(palabra) % len(colores_fondo)
-    color_fondo = colores_fondo[idx_color]
+    # Escala relativa al diseño original de 400px
+    escala = tamano / 400
     
     # Crear imagen
-    img = Image.new('RGB', (tamano, tamano), color=color_fondo)
+    img = Image.new('RGB', (tamano, tamano), color=_color_para_palabra(palabra))
     draw = ImageDraw.Draw(img)
     
     # Dibujar borde
-    borde_grosor = 10
+    borde_grosor = max(1, round(10 * escala))
     draw.rectangle(
         [(borde_grosor, borde_grosor), 
          (tamano - borde_grosor, tamano - borde_grosor)],
@@ -45,25 +149,7 @@ def generar_imagen_placeholder(palabra, ruta_salida, tamano=400):
         width=borde_grosor
     )
     
-    # Intentar usar fuente
-    try:
-        # Buscar fuentes disponibles
-        fuentes_posibles = [
-            "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
-            "/System/Library/Fonts/Helvetica.ttc",
-            "C:\\Windows\\Fonts\\arial.ttf",
-        ]
-        
-        fuente = None
-        for ruta_fuente in fuentes_posibles:
-            if os.path.exists(ruta_fuente):
-                fuente = ImageFont.truetype(ruta_fuente, 60)
-                break
-        
-        if fuente is None:
-            fuente = ImageFont.load_default()
-    except:
-        fuente = ImageFont.load_default()
+    fuente = _cargar_fuente(max(8, round(60 * escala)))
     
     # Texto de la palabra
     texto = palabra.upper()
@@ -74,24 +160,22 @@ def generar_imagen_placeholder(palabra, ruta_salida, tamano=400):
     text_height = bbox[3] - bbox[1]
     
     x = (tamano - text_width) / 2
-    y = (tamano - text_height) / 2 - 30
+    y = (tamano - text_height) / 2 - 30 * escala
     
     # Dibujar texto con sombra
-    draw.text((x + 3, y + 3), texto, fill=(0, 0, 0), font=fuente)
+    sombra = max(1, round(3 * escala))
+    draw.text((x + sombra, y + sombra), texto, fill=(0, 0, 0), font=fuente)
     draw.text((x, y), texto, fill=(255, 255, 255), font=fuente)
     
     # Texto "PLACEHOLDER" pequeño
-    try:
-        fuente_pequena = ImageFont.truetype(fuentes_posibles[0], 20) if os.path.exists(fuentes_posibles[0]) else ImageFont.load_default()
-    except:
-        fuente_pequena = ImageFont.load_default()
+    fuente_pequena = _cargar_fuente(max(6, round(20 * escala)))
     
     texto_placeholder = "PLACEHOLDER - Descarga la imagen real"
     bbox_p = draw.textbbox((0, 0), texto_placeholder, font=fuente_pequena)
     text_width_p = bbox_p[2] - bbox_p[0]
     
     x_p = (tamano - text_width_p) / 2
-    y_p = tamano - 50
+    y_p = tamano - 50 * escala
     
     draw.text((x_p, y_p), texto_placeholder, fill=(100, 100, 100), font=fuente_pequena)
     
@@ -100,6 +184,95 @@ def generar_imagen_placeholder(palabra, ruta_salida, tamano=400):
     print(f"   ✅ Generada: {os.path.basename(ruta_salida)}")
 
 
+def _inicializar_worker():
+    """Precargar fuentes una vez por proceso del pool"""
+    _ruta_fuente_disponible()
+    for tamano_puntos in (20, 60):
+        _cargar_fuente(tamano_puntos)
+
+
+def _renderizar_trabajo(trabajo):
+    """Renderizar un placeholder (se ejecuta dentro del pool)"""
+    palabra, ruta, tamano = trabajo
+    try:
+        carpeta = os.path.dirname(ruta)
+        if carpeta:
+            os.makedirs(carpeta, exist_ok=True)
+        generar_imagen_placeholder(palabra, ruta, tamano)
+        return ruta, None
+    except Exception as e:
+        return ruta, str(e)
+
+
+def generar_placeholders_lote(ejercicios, tamanos=TAMANOS_PLACEHOLDER, procesos=None,
+                              ruta_cache=ARCHIVO_CACHE, forzar=False):
+    """
+    Genera placeholders para muchas palabras en una sola pasada
+    
+    Args:
+        ejercicios: Lista de (palabra, ruta_imagen)
+        tamanos: Tamaños a generar; el primero se guarda en la ruta original
+        procesos: Número de procesos del pool (None = todos los núcleos, 1 = secuencial)
+        ruta_cache: Archivo JSON con los hashes de cada placeholder generado
+        forzar: Regenerar aunque el hash no haya cambiado
+    
+    Nunca sobrescribe una imagen existente que no sea el placeholder
+    escrito por esta función: si no está en la caché, o sus bytes ya no
+    coinciden con el hash guardado, es una imagen real.
+    
+    Returns:
+        Diccionario con contadores: generadas, sin_cambios, existentes, errores
+    """
+    cache = _leer_cache(ruta_cache)
+    tamano_principal = tamanos[0]
+    
+    resumen = {'generadas': 0, 'sin_cambios': 0, 'existentes': 0, 'errores': 0}
+    trabajos = []
+    hashes = {}
+    
+    for palabra, ruta_base in ejercicios:
+        for tamano in tamanos:
+            ruta = _ruta_para_tamano(ruta_base, tamano, tamano_principal)
+            clave = os.path.normpath(ruta)
+            hash_actual = _hash_contenido(palabra, tamano)
+            
+            if os.path.exists(ruta):
+                entrada = cache.get(clave)
+                if not _es_placeholder_propio(ruta, entrada):
+                    resumen['existentes'] += 1
+                    continue
+                if entrada['contenido'] == hash_actual and not forzar:
+                    resumen['sin_cambios'] += 1
+                    continue
+            
+            trabajos.append((palabra, ruta, tamano))
+            hashes[clave] = hash_actual
+    
+    if not trabajos:
+        return resumen
+    
+    if procesos == 1 or len(trabajos) == 1:
+        _inicializar_worker()
+        resultados = [_renderizar_trabajo(trabajo) for trabajo in trabajos]
+    else:
+        num_procesos = procesos or os.cpu_count() or 1
+        chunksize = max(1, len(trabajos) // (num_procesos * 4))
+        with ProcessPoolExecutor(max_workers=num_procesos, initializer=_inicializar_worker) as pool:
+            resultados = list(pool.map(_renderizar_trabajo, trabajos, chunksize=chunksize))
+    
+    for ruta, error in resultados:
+        clave = os.path.normpath(ruta)
+        if error:
+            print(f"   ❌ Error generando {os.path.basename(ruta)}: {error}")
+            resumen['errores'] += 1
+        else:
+            cache[clave] = {'contenido': hashes[clave], 'archivo': _hash_archivo(ruta)}
+            resumen['generadas'] += 1
+    
+    _guardar_cache(ruta_cache, cache)
+    return resumen
+
+
 def generar_todas_faltantes():
     """Genera placeholders para todas las imágenes faltantes"""
     
@@ -132,29 +305,20 @@ def generar_todas_faltantes():
         ejercicios = cursor.fetchall()
         conn.close()
         
-        # Generar placeholders para las faltantes
-        generadas = 0
-        ya_existentes = 0
-        
-        for ej in ejercicios:
-            word = ej['word']
-            image_path = ej['image']
-            
-            if not os.path.exists(image_path):
-                # Crear directorio si no existe
-                os.makedirs(os.path.dirname(image_path), exist_ok=True)
-                
-                # Generar placeholder
-                generar_imagen_placeholder(word, image_path)
-                generadas += 1
-            else:
-                ya_existentes += 1
+        # Generar placeholders para las faltantes (en lote)
+        resumen = generar_placeholders_lote(
+            [(ej['word'], ej['image']) for ej in ejercicios]
+        )
+        generadas = resumen['generadas']
+        ya_existentes = resumen['existentes'] + resumen['sin_cambios']
         
         print(f"\n{'='*70}")
         print(f"📊 RESUMEN")
         print(f"{'='*70}")
         print(f"✅ Placeholders generadas: {generadas}")
         print(f"⏭️  Ya existentes: {ya_existentes}")
+        if resumen['errores']:
+            print(f"❌ Errores: {resumen['errores']}")
         print(f"📊 Total: {generadas + ya_existentes}")
         print(f"{'='*70}\n")
         
@@ -195,24 +359,8 @@ def generar_vocales_especiales():
         img = Image.new('RGB', (400, 400), color=(255, 255, 255))
         draw = ImageDraw.Draw(img)
         
-        # Fuente grande
-        try:
-            fuentes_posibles = [
-                "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
-                "/System/Library/Fonts/Helvetica.ttc",
-                "C:\\Windows\\Fonts\\arial.ttf",
-            ]
-            
-            fuente = None
-            for ruta_fuente in fuentes_posibles:
-                if os.path.exists(ruta_fuente):
-                    fuente = ImageFont.truetype(ruta_fuente, 250)
-                    break
-            
-            if fuente is None:
-                fuente = ImageFont.load_default()
-        except:
-            fuente = ImageFont.load_default()
+        # Fuente grande (cargada una sola vez para todas las vocales)
+        fuente = _cargar_fuente(250)
         
         # Centrar vocal
         bbox = draw.textbbox((0, 0), vocal, font=fuente)
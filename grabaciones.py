@@ -0,0 +1,134 @@
+"""
+MINIATURAS Y REPRODUCCIÓN DE GRABACIONES
+Formas de onda reducidas (mínimo/máximo por columna) para el panel de
+terapeuta, guardadas en disco por hash de contenido: cada grabación se
+decodifica una sola vez en la vida del archivo. La reproducción usa un
+stream de salida de sounddevice y no bloquea la ventana.
+"""
+import os
+import threading
+from typing import Optional, Tuple
+
+import numpy as np
+import soundfile as sf
+
+from config import Config
+
+# La reproducción es opcional (el panel funciona sin tarjeta de sonido)
+try:
+    import sounddevice as sd
+    REPRODUCCION_DISPONIBLE = True
+except (ImportError, OSError):
+    REPRODUCCION_DISPONIBLE = False
+
+
+COLUMNAS_MINIATURA = 240
+CARPETA_MINIATURAS = 'miniaturas'
+
+
+def leer_wav(ruta: str) -> Tuple[np.ndarray, int]:
+    """Muestras float32 mono (-1.0 a 1.0) y frecuencia de muestreo"""
+    muestras, sample_rate = sf.read(ruta, dtype='float32', always_2d=True)
+    return muestras.mean(axis=1), sample_rate
+
+
+def reducir_min_max(muestras: np.ndarray, columnas: int = COLUMNAS_MINIATURA) -> np.ndarray:
+    """
+    Forma de onda reducida a 'columnas' pares (mínimo, máximo)
+
+    Returns:
+        Arreglo float32 de forma (2, columnas): fila 0 mínimos, fila 1 máximos
+    """
+    if len(muestras) == 0:
+        return np.zeros((2, columnas), dtype=np.float32)
+
+    # Completar con el último valor para poder partir en bloques iguales
+    por_columna = -(-len(muestras) // columnas)
+    relleno = por_columna * columnas - len(muestras)
+    if relleno:
+        muestras = np.concatenate([muestras, np.full(relleno, muestras[-1], dtype=muestras.dtype)])
+
+    bloques = muestras.reshape(columnas, por_columna)
+    return np.stack([bloques.min(axis=1), bloques.max(axis=1)]).astype(np.float32)
+
+
+def _ruta_miniatura(sha256: str, columnas: int, carpeta: str = None) -> str:
+    carpeta = carpeta or os.path.join(Config.AUDIO_FOLDER, CARPETA_MINIATURAS)
+    return os.path.join(carpeta, sha256[:2], f"{sha256}_{columnas}.npy")
+
+
+def obtener_miniatura(ruta_audio: str, sha256: str, columnas: int = COLUMNAS_MINIATURA,
+                      carpeta: str = None) -> Optional[np.ndarray]:
+    """
+    Miniatura de una grabación desde la caché en disco, o calculándola
+
+    El nombre del archivo es el hash del contenido, así que una miniatura
+    guardada nunca queda desactualizada.
+    """
+    ruta = _ruta_miniatura(sha256, columnas, carpeta)
+    try:
+        return np.load(ruta)
+    except (FileNotFoundError, ValueError, OSError):
+        pass
+
+    try:
+        muestras, _ = leer_wav(ruta_audio)
+    except Exception as e:
+        print(f"⚠️ No se pudo leer la grabación {ruta_audio}: {e}")
+        return None
+
+    miniatura = reducir_min_max(muestras, columnas)
+
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    temporal = f"{ruta}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temporal, 'wb') as f:
+        np.save(f, miniatura)
+    os.replace(temporal, ruta)
+
+    return miniatura
+
+
+class ReproductorAudio:
+    """Reproduce una grabación por un stream de salida sin bloquear"""
+
+    def __init__(self):
+        self._stream = None
+        self._lock = threading.Lock()
+
+    @property
+    def reproduciendo(self) -> bool:
+        return self._stream is not None and self._stream.active
+
+    def reproducir(self, muestras: np.ndarray, sample_rate: int):
+        """Empezar a reproducir (detiene lo que estuviera sonando)"""
+        if not REPRODUCCION_DISPONIBLE:
+            print("⚠️ Reproducción no disponible (falta sounddevice)")
+            return
+
+        self.detener()
+        posicion = [0]
+
+        def callback(salida, frames, tiempo, estado):
+            inicio = posicion[0]
+            bloque = muestras[inicio:inicio + frames]
+            salida[:len(bloque), 0] = bloque
+            posicion[0] = inicio + len(bloque)
+            if len(bloque) < frames:
+                salida[len(bloque):] = 0
+                raise sd.CallbackStop
+
+        with self._lock:
+            self._stream = sd.OutputStream(
+                samplerate=sample_rate, channels=1, dtype='float32', callback=callback
+            )
+            self._stream.start()
+
+    def detener(self):
+        with self._lock:
+            if self._stream is not None:
+                try:
+                    self._stream.abort()
+                    self._stream.close()
+                except Exception as e:
+                    print(f"⚠️ Error al detener la reproducción: {e}")
+                self._stream = None
@@ -1,27 +1,34 @@
 """
 ROBOT DODO - Versión con Interfaz Unificada
 Una sola ventana que se mantiene abierta durante toda la ejecución
+
+Uso:
+    python main.py [--headless]
 """
 import sys
-import time
+import os
+import argparse
 import threading
 from datetime import datetime
 from chatopenai import consultar
 
 # Importar módulos
 from config import Config
-from database import Database
+from database import Database, BufferResultadosSesion
 from audio import AudioSystem
-from ui import InterfazUnificada
 from services import RobotService
+from maquina_sesion import MaquinaSesion
+from ritmo import pausa, iniciar_linea_tiempo, terminar_linea_tiempo
+import trazas
 from utils import imprimir_encabezado, imprimir_seccion
 
 
 class RobotDodoUnificado:
     """Controlador principal con interfaz unificada"""
     
-    def __init__(self):
+    def __init__(self, headless: bool = False):
         self.activo = True
+        self.headless = headless
         self.db = None
         self.audio = None
         self.service = None
@@ -40,8 +47,16 @@ class RobotDodoUnificado:
         Config.crear_carpetas()
         
         # PASO 1: Crear interfaz PRIMERO
-        print("🖥️  Creando interfaz unificada...")
-        self.interfaz = InterfazUnificada()
+        if self.headless:
+            # Sin pantalla: registra las transiciones en lugar de dibujar
+            from ui_headless import InterfazHeadless
+            self.interfaz = InterfazHeadless(
+                ruta_registro=os.path.join(Config.TRAZAS_FOLDER, 'interfaz_headless.jsonl')
+            )
+        else:
+            from ui import InterfazUnificada
+            print("🖥️  Creando interfaz unificada...")
+            self.interfaz = InterfazUnificada()
         self.interfaz.crear()
         # Interfaz empieza mostrando eyes.gif automáticamente
         
@@ -49,6 +64,12 @@ class RobotDodoUnificado:
         print("📊 Conectando a base de datos...")
         self.db = Database(Config.DATABASE_PATH)
         
+        # Guardar sesiones que quedaron interrumpidas (checkpoints); las
+        # recientes se dejan para que el niño las pueda continuar
+        BufferResultadosSesion.recuperar_pendientes(
+            self.db, minutos_minimos=Config.MINUTOS_REANUDAR_SESION
+        )
+        
         # PASO 3: Sistema de audio (con referencia a interfaz)
         print("🎤 Inicializando sistema de audio...")
         self.audio = AudioSystem(interfaz=self.interfaz)
@@ -103,7 +124,7 @@ class RobotDodoUnificado:
                             sleeping = False
                             
                             self.audio.hablar("Volviendo a modo normal. Di hola robot si me necesitas.")
-                            time_module.sleep(2)
+                            pausa('tras_hablar', anterior=2.0)
                             continue
                     
                     hora = datetime.now().strftime('%H:%M:%S')
@@ -188,32 +209,19 @@ class RobotDodoUnificado:
         print("║" + " "*25 + "ROBOT ACTIVADO" + " "*29 + "║")
         print("╚" + "═"*68 + "╝\n")
         
+        # Pausas y esperas de esta activación (ver ritmo.py) y, con
+        # TRAZAS=1, tramos de latencia en trazas/ (ver trazas.py)
+        iniciar_linea_tiempo()
+        trazas.iniciar_sesion()
+        
         # Saludo (mostrará eyes.gif)
         self.audio.hablar("Hola, aquí estoy.")
-        time.sleep(0.5)
+        pausa('tras_hablar', anterior=0.5)
         
         try:
-            # PASO 1: Identificación
-            persona = self.identificar_usuario()
-            
-            if persona:
-                # Calcular número de sesión
-                sesiones_previas = self.db.obtener_sesiones_por_persona(persona.person_id)
-                numero_sesion = len(sesiones_previas) + 1
-                
-                # ========== AHORA SÍ PREGUNTAR ESTADO (CON GRABACIÓN) ==========
-                self._preguntar_estado_animo(persona, numero_sesion)
-                # ================================================================
-                
-                # PASO 2: Ejercicios
-                self.service.realizar_sesion_ejercicios(persona)
-                
-                # ========== PREGUNTAR OPINIÓN (CON GRABACIÓN) ==========
-                self._preguntar_opinion_sesion(persona, numero_sesion)
-                # ========================================================
-                
-                # PASO 3: Despedida
-                self.despedida()
+            # Identificación, ánimo, ejercicios, opinión y despedida, con
+            # checkpoint después de cada paso (ver maquina_sesion.py)
+            MaquinaSesion(self).ejecutar()
         
         except Exception as e:
             print(f"\n❌ Error en modo activo: {e}")
@@ -228,7 +236,9 @@ class RobotDodoUnificado:
             print("\n" + "─"*70)
             print("  Volviendo al modo escucha...")
             print("─"*70 + "\n")
-            time.sleep(2)
+            pausa('cierre', anterior=2.0)
+            terminar_linea_tiempo()
+            trazas.terminar_sesion()
     
     def _preguntar_estado_animo(self, persona, numero_sesion):
         """Preguntar al niño cómo se encuentra y GRABAR su respuesta"""
@@ -287,14 +297,14 @@ class RobotDodoUnificado:
             
             # Dar la respuesta de ánimo
             self.audio.hablar(mensaje_animo)
-            time.sleep(0.2)
+            pausa('tras_hablar', anterior=0.2)
         else:
             print("⚠️ No se escuchó respuesta")
             if audio_path:
                 print(f"⚠️ Audio grabado pero sin texto reconocido: {audio_path}")
             # Mensaje genérico si no responde
             self.audio.hablar("Está bien. Vamos a empezar entonces.")
-            time.sleep(0.2)
+            pausa('tras_hablar', anterior=0.2)
         
         print()
     
@@ -353,14 +363,14 @@ class RobotDodoUnificado:
             
             # Dar la respuesta
             self.audio.hablar(mensaje_respuesta)
-            time.sleep(0.2)
+            pausa('tras_hablar', anterior=0.2)
         else:
             print("⚠️ No se escuchó respuesta")
             if audio_path:
                 print(f"⚠️ Audio grabado pero sin texto reconocido: {audio_path}")
             # Mensaje genérico si no responde
             self.audio.hablar("Está bien. Espero que hayas disfrutado la sesión.")
-            time.sleep(0.2)
+            pausa('tras_hablar', anterior=0.2)
         
         print()
         
@@ -404,6 +414,11 @@ class RobotDodoUnificado:
         """Abrir panel de administración del terapeuta"""
         print("\n🩺 === ABRIENDO PANEL DE TERAPEUTA ===\n")
         
+        if self.headless:
+            print("⚠️ Panel de terapeuta no disponible sin pantalla")
+            self.audio.hablar("El panel de terapeuta necesita una pantalla.")
+            return
+        
         # Activar modo administrador (bloquea proceso normal)
         self.modo_administrador = True
         
@@ -414,7 +429,9 @@ class RobotDodoUnificado:
             from panel_terapeuta import PanelTerapeuta
             
             # Crear panel con referencia al audio
-            self.panel_admin = PanelTerapeuta(self.db, self.audio)
+            self.panel_admin = PanelTerapeuta(
+                self.db, self.audio, indice_fonetico=self.service.indice_fonetico
+            )
             self.panel_admin.crear()
             
             print("✅ Panel de terapeuta abierto")
@@ -434,9 +451,9 @@ class RobotDodoUnificado:
         """Despedida después de completar sesión"""
         # Mostrará eyes.gif al hablar
         self.audio.hablar("Has completado todos los ejercicios. ¡Excelente trabajo!")
-        time.sleep(1)
+        pausa('tras_hablar', anterior=1.0)
         self.audio.hablar(f"Nos vemos pronto. Si me necesitas, di {Config.ACTIVATION_WORD}.")
-        time.sleep(2)
+        pausa('cierre', anterior=2.0)
     
     def apagar(self):
         """Apagar sistema de forma ordenada"""
@@ -446,7 +463,7 @@ class RobotDodoUnificado:
         
         # Despedida (mostrará eyes.gif)
         self.audio.hablar("Hasta luego. Adiós.")
-        time.sleep(0.5)
+        pausa('tras_hablar', anterior=0.5)
         
         if self.db:
             print(f"📊 Total personas en base de datos: {self.db.contar_personas()}")
@@ -490,6 +507,10 @@ class RobotDodoUnificado:
 
 def main():
     """Función principal"""
+    parser = argparse.ArgumentParser(description="Robot DODO")
+    parser.add_argument('--headless', action='store_true',
+                        help='Sin pantalla: registrar los cambios de la interfaz en lugar de dibujarlos')
+    args = parser.parse_args()
     
     print("\n" + "="*70)
     print("  🚀 ROBOT DODO - INTERFAZ UNIFICADA")
@@ -497,7 +518,7 @@ def main():
     print("="*70 + "\n")
     
     # Crear y ejecutar robot
-    robot = RobotDodoUnificado()
+    robot = RobotDodoUnificado(headless=args.headless)
     robot.ejecutar()
 
 
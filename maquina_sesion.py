@@ -0,0 +1,180 @@
+"""
+MÁQUINA DE ESTADOS DE LA SESIÓN
+El recorrido de modo_activo (identificación, ánimo, ejercicios, opinión y
+despedida) como pasos explícitos. Después de cada paso se guarda un
+checkpoint chico (checkpoints/flujo.json) con el paso siguiente, la persona
+y el número de sesión; los resultados de cada ejercicio ya quedan en el
+checkpoint incremental de BufferResultadosSesion.
+
+Si algo falla, o el niño pide parar antes de terminar los ejercicios, al
+activar de nuevo el robot e identificarse (dentro de
+Config.MINUTOS_REANUDAR_SESION) la sesión sigue en el paso donde quedó, con el
+mismo número de sesión y sin repetir ejercicios. Pasado ese plazo, lo hecho se
+guarda como sesión interrumpida.
+"""
+import os
+import json
+from enum import Enum
+from datetime import datetime
+from typing import Optional
+
+from config import Config
+from database import BufferResultadosSesion
+from trazas import tramo
+
+
+class EstadoSesion(Enum):
+    """Pasos del recorrido de una sesión, en orden"""
+    IDENTIFICACION = 'identificacion'
+    ANIMO = 'animo'
+    EJERCICIOS = 'ejercicios'
+    OPINION = 'opinion'
+    DESPEDIDA = 'despedida'
+    TERMINADA = 'terminada'
+
+
+class CheckpointFlujo:
+    """Paso en curso del recorrido, en un JSON chico escrito de forma atómica"""
+
+    NOMBRE_ARCHIVO = 'flujo.json'
+
+    def __init__(self, carpeta: str = None, minutos_validez: float = None):
+        carpeta = carpeta or Config.CHECKPOINT_FOLDER
+        os.makedirs(carpeta, exist_ok=True)
+        self.ruta = os.path.join(carpeta, self.NOMBRE_ARCHIVO)
+        self.minutos_validez = (Config.MINUTOS_REANUDAR_SESION
+                                if minutos_validez is None else minutos_validez)
+
+    def guardar(self, estado: EstadoSesion, person_id: int, numero_sesion: int):
+        datos = {
+            'estado': estado.value,
+            'person_id': person_id,
+            'numero_sesion': numero_sesion,
+            'actualizado': datetime.now().isoformat(),
+        }
+        temporal = f"{self.ruta}.tmp"
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump(datos, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporal, self.ruta)
+
+    def cargar(self) -> Optional[dict]:
+        """Checkpoint vigente (con 'estado' como EstadoSesion), o None si no hay o venció"""
+        try:
+            with open(self.ruta, 'r', encoding='utf-8') as f:
+                datos = json.load(f)
+            datos['estado'] = EstadoSesion(datos['estado'])
+            actualizado = datetime.fromisoformat(datos['actualizado'])
+        except (OSError, ValueError, KeyError):
+            return None
+
+        if (datetime.now() - actualizado).total_seconds() > self.minutos_validez * 60:
+            return None
+        return datos
+
+    def borrar(self):
+        try:
+            os.remove(self.ruta)
+        except FileNotFoundError:
+            pass
+
+
+class MaquinaSesion:
+    """
+    Ejecuta el recorrido de una sesión paso a paso
+
+    Cada paso es un método que devuelve el estado siguiente. Usa los
+    métodos del robot (main.RobotDodoUnificado) para hablar con el niño.
+    """
+
+    def __init__(self, robot, checkpoint: CheckpointFlujo = None):
+        self.robot = robot
+        self.db = robot.db
+        self.checkpoint = checkpoint or CheckpointFlujo()
+        self.persona = None
+        self.numero_sesion: Optional[int] = None
+        self.reanudando = False
+        self.pendiente: Optional[EstadoSesion] = None  # paso a retomar tras despedirse
+
+        self._pasos = {
+            EstadoSesion.IDENTIFICACION: self._identificar,
+            EstadoSesion.ANIMO: self._preguntar_animo,
+            EstadoSesion.EJERCICIOS: self._realizar_ejercicios,
+            EstadoSesion.OPINION: self._preguntar_opinion,
+            EstadoSesion.DESPEDIDA: self._despedir,
+        }
+
+    def ejecutar(self, estado: EstadoSesion = EstadoSesion.IDENTIFICACION):
+        """
+        Recorrer los pasos hasta terminar
+
+        Una excepción deja el checkpoint en el paso que falló, para
+        reanudarlo en la próxima activación.
+        """
+        while estado is not EstadoSesion.TERMINADA:
+            print(f"🔀 Paso de la sesión: {estado.name}")
+            with tramo(f"paso.{estado.value}", 'sesion'):
+                estado = self._pasos[estado]()
+            self._guardar_checkpoint(estado)
+
+    def _guardar_checkpoint(self, estado: EstadoSesion):
+        estado = self.pendiente or estado
+        if estado is EstadoSesion.TERMINADA:
+            self.checkpoint.borrar()
+        elif self.persona is not None:
+            try:
+                self.checkpoint.guardar(estado, self.persona.person_id, self.numero_sesion)
+            except OSError as e:
+                print(f"⚠️ No se pudo guardar el checkpoint de la sesión: {e}")
+
+    # ========== PASOS ==========
+
+    def _identificar(self) -> EstadoSesion:
+        persona = self.robot.identificar_usuario()
+        if persona is None:
+            return EstadoSesion.TERMINADA
+        self.persona = persona
+
+        pendiente = self.checkpoint.cargar()
+        if pendiente and pendiente.get('person_id') == persona.person_id:
+            self.numero_sesion = pendiente['numero_sesion']
+            self.reanudando = True
+            print(f"♻️ Reanudando sesión {self.numero_sesion} en el paso {pendiente['estado'].name}")
+            self.robot.audio.hablar("¡Qué bueno que volviste! Sigamos donde quedamos.")
+            return pendiente['estado']
+
+        # Sesión nueva: antes guardar lo que haya quedado a medias
+        BufferResultadosSesion.recuperar_pendientes(self.db)
+        self.numero_sesion = self.db.contar_sesiones_persona(persona.person_id) + 1
+        return EstadoSesion.ANIMO
+
+    def _preguntar_animo(self) -> EstadoSesion:
+        self.robot._preguntar_estado_animo(self.persona, self.numero_sesion)
+        return EstadoSesion.EJERCICIOS
+
+    def _realizar_ejercicios(self) -> EstadoSesion:
+        # Interrumpida justo después de guardar la sesión: no repetirla
+        checkpoint_resultados = BufferResultadosSesion.ruta_para(
+            self.persona.person_id, self.numero_sesion
+        )
+        if (self.reanudando and not os.path.exists(checkpoint_resultados)
+                and self.db.contar_sesiones_persona(self.persona.person_id) >= self.numero_sesion):
+            return EstadoSesion.OPINION
+
+        completa = self.robot.service.realizar_sesion_ejercicios(
+            self.persona, self.numero_sesion, reanudar=self.reanudando, reanudable=True
+        )
+        if not completa:
+            # Pidió parar: despedirse, pero dejar el checkpoint en los ejercicios
+            self.pendiente = EstadoSesion.EJERCICIOS
+            return EstadoSesion.DESPEDIDA
+        return EstadoSesion.OPINION
+
+    def _preguntar_opinion(self) -> EstadoSesion:
+        self.robot._preguntar_opinion_sesion(self.persona, self.numero_sesion)
+        return EstadoSesion.DESPEDIDA
+
+    def _despedir(self) -> EstadoSesion:
+        self.robot.despedida()
+        return EstadoSesion.TERMINADA
@@ -0,0 +1,486 @@
+"""
+MIGRACIONES VERSIONADAS DE BASE DE DATOS
+Cada migración se aplica una sola vez y queda registrada en PRAGMA user_version
+Database las aplica automáticamente al conectar; también se puede ejecutar a mano
+"""
+import json
+import sqlite3
+
+
+def _tabla_existe(cursor, tabla: str) -> bool:
+    cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+        (tabla,)
+    )
+    return cursor.fetchone() is not None
+
+
+def _columnas(cursor, tabla: str) -> list:
+    cursor.execute(f"PRAGMA table_info({tabla})")
+    return [col[1] for col in cursor.fetchall()]
+
+
+# ========== MIGRACIONES ==========
+
+def _migracion_1_esquema_base(cursor):
+    """Campos agregados por migrar_bd.py y agregar_apellido.py"""
+    if _tabla_existe(cursor, 'person'):
+        columnas_person = _columnas(cursor, 'person')
+        for columna in ('dni', 'sex', 'apellido'):
+            if columna not in columnas_person:
+                cursor.execute(f"ALTER TABLE person ADD COLUMN {columna} TEXT")
+
+    if _tabla_existe(cursor, 'sesion'):
+        columnas_sesion = _columnas(cursor, 'sesion')
+        if 'personId' not in columnas_sesion:
+            cursor.execute("ALTER TABLE sesion ADD COLUMN personId INTEGER")
+        if 'observaciones_terapeuta' not in columnas_sesion:
+            cursor.execute("ALTER TABLE sesion ADD COLUMN observaciones_terapeuta TEXT")
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS observaciones (
+            observacionId INTEGER PRIMARY KEY AUTOINCREMENT,
+            personId INTEGER NOT NULL,
+            fecha TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            observacion TEXT NOT NULL,
+            terapeuta TEXT,
+            FOREIGN KEY(personId) REFERENCES person(personId)
+        )
+    """)
+
+
+def _migracion_2_indices(cursor):
+    """Índices para las consultas frecuentes (evitan SCAN completos)"""
+    # obtener_sesiones_por_persona / obtener_ultima_sesion: filtro + orden por fecha
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_sesion_persona_fecha
+        ON sesion(personId, date)
+    """)
+    # buscar_persona_por_nombre(_apellido): comparación sin distinguir mayúsculas
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_person_nombre_apellido
+        ON person(name COLLATE NOCASE, apellido COLLATE NOCASE)
+    """)
+    # obtener_ejercicios_por_nivel: cubre filtro, orden y columna del JOIN
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_therapy_nivel
+        ON therapy(levelId, therapy_number, exerciseId)
+    """)
+    # obtener_observaciones_persona
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_observaciones_persona_fecha
+        ON observaciones(personId, fecha)
+    """)
+
+
+def _migracion_3_resultados(cursor):
+    """Resultado de cada ejercicio (antes solo se guardaban los totales)"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS resultado_ejercicio (
+            resultadoId INTEGER PRIMARY KEY AUTOINCREMENT,
+            sesionId INTEGER NOT NULL,
+            personId INTEGER NOT NULL,
+            exerciseId INTEGER NOT NULL,
+            respuesta TEXT,
+            correcto INTEGER NOT NULL,
+            tiempo_respuesta REAL,
+            intentos INTEGER DEFAULT 1,
+            audio_path TEXT,
+            fecha TIMESTAMP,
+            FOREIGN KEY(sesionId) REFERENCES sesion(sesionId),
+            FOREIGN KEY(personId) REFERENCES person(personId),
+            FOREIGN KEY(exerciseId) REFERENCES exercise(exerciseId)
+        )
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_resultado_sesion
+        ON resultado_ejercicio(sesionId)
+    """)
+    # Cubre la precisión por palabra sin leer la tabla
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_resultado_persona_ejercicio
+        ON resultado_ejercicio(personId, exerciseId, correcto)
+    """)
+
+
+# Sesiones recientes guardadas en progreso_persona.ultimas_tasas
+ULTIMAS_N_TASAS = 10
+
+
+def _migracion_4_progreso(cursor):
+    """Resumen de progreso por persona, mantenido por Database.crear_sesion"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS progreso_persona (
+            personId INTEGER PRIMARY KEY,
+            total_sesiones INTEGER NOT NULL DEFAULT 0,
+            suma_correctos INTEGER NOT NULL DEFAULT 0,
+            suma_fallidos INTEGER NOT NULL DEFAULT 0,
+            suma_tasas REAL NOT NULL DEFAULT 0,
+            ultimas_tasas TEXT NOT NULL DEFAULT '[]',
+            historial_niveles TEXT NOT NULL DEFAULT '[]',
+            ultima_fecha TIMESTAMP,
+            FOREIGN KEY(personId) REFERENCES person(personId)
+        )
+    """)
+
+    if not _tabla_existe(cursor, 'sesion'):
+        return
+
+    # Calcular el resumen de las sesiones ya existentes
+    cursor.execute("""
+        SELECT personId, date, levelId, correct_exercise, failed_exercise
+        FROM sesion
+        WHERE personId IS NOT NULL
+        ORDER BY personId, date
+    """)
+
+    resumenes = {}
+    for person_id, fecha, nivel_id, correctos, fallidos in cursor.fetchall():
+        r = resumenes.setdefault(person_id, {
+            'total': 0, 'correctos': 0, 'fallidos': 0, 'suma_tasas': 0.0,
+            'tasas': [], 'niveles': [], 'fecha': None
+        })
+        correctos = correctos or 0
+        fallidos = fallidos or 0
+        total = correctos + fallidos
+        tasa = correctos / total if total else 0.0
+
+        r['total'] += 1
+        r['correctos'] += correctos
+        r['fallidos'] += fallidos
+        r['suma_tasas'] += tasa
+        r['tasas'] = (r['tasas'] + [[fecha, tasa]])[-ULTIMAS_N_TASAS:]
+        if not r['niveles'] or r['niveles'][-1][1] != nivel_id:
+            r['niveles'].append([fecha, nivel_id])
+        r['fecha'] = fecha
+
+    cursor.executemany("""
+        INSERT OR REPLACE INTO progreso_persona (
+            personId, total_sesiones, suma_correctos, suma_fallidos,
+            suma_tasas, ultimas_tasas, historial_niveles, ultima_fecha
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """, [
+        (person_id, r['total'], r['correctos'], r['fallidos'], r['suma_tasas'],
+         json.dumps(r['tasas']), json.dumps(r['niveles']), r['fecha'])
+        for person_id, r in resumenes.items()
+    ])
+
+
+def _migracion_5_busqueda_personas(cursor):
+    """Índice de texto completo sobre nombre, apellido y DNI"""
+    # Tabla de contenido externo: el texto vive en person, aquí solo el índice.
+    # remove_diacritics permite encontrar "Jose" al buscar "José" y viceversa
+    cursor.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS person_fts USING fts5(
+            name, apellido, dni,
+            content='person',
+            content_rowid='personId',
+            tokenize='unicode61 remove_diacritics 2',
+            prefix='1 2 3'
+        )
+    """)
+    # Vocabulario del índice (términos para tolerar errores de escritura)
+    cursor.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS person_fts_vocab
+        USING fts5vocab(person_fts, row)
+    """)
+
+    # Mantener el índice sincronizado con person
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS person_fts_insert AFTER INSERT ON person
+        BEGIN
+            INSERT INTO person_fts(rowid, name, apellido, dni)
+            VALUES (new.personId, new.name, new.apellido, new.dni);
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS person_fts_delete AFTER DELETE ON person
+        BEGIN
+            INSERT INTO person_fts(person_fts, rowid, name, apellido, dni)
+            VALUES ('delete', old.personId, old.name, old.apellido, old.dni);
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS person_fts_update
+        AFTER UPDATE OF name, apellido, dni ON person
+        BEGIN
+            INSERT INTO person_fts(person_fts, rowid, name, apellido, dni)
+            VALUES ('delete', old.personId, old.name, old.apellido, old.dni);
+            INSERT INTO person_fts(rowid, name, apellido, dni)
+            VALUES (new.personId, new.name, new.apellido, new.dni);
+        END
+    """)
+
+    # Indexar las personas existentes
+    cursor.execute("INSERT INTO person_fts(person_fts) VALUES ('rebuild')")
+
+
+def _migracion_6_indices_fecha(cursor):
+    """Índices por fecha para exportaciones incrementales (exportar.py --desde)"""
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_sesion_fecha ON sesion(date)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_resultado_fecha ON resultado_ejercicio(fecha)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_observaciones_fecha ON observaciones(fecha)")
+
+
+# tabla -> columna de clave primaria (tablas que se envían al almacén central)
+TABLAS_SINCRONIZADAS = {
+    'person': 'personId',
+    'sesion': 'sesionId',
+    'resultado_ejercicio': 'resultadoId',
+    'observaciones': 'observacionId',
+}
+
+
+def _migracion_7_registro_cambios(cursor):
+    """Registro de cambios (solo se agrega) para sincronizar con el almacén central"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS registro_cambios (
+            cambioId INTEGER PRIMARY KEY AUTOINCREMENT,
+            tabla TEXT NOT NULL,
+            filaId INTEGER NOT NULL,
+            operacion TEXT NOT NULL,
+            fecha TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    # Estado de la sincronización (último cambio confirmado por el almacén, ...)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS sincronizacion_estado (
+            clave TEXT PRIMARY KEY,
+            valor TEXT
+        )
+    """)
+    # Audios ya subidos (ruta local -> hash del contenido)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS audio_subido (
+            ruta TEXT PRIMARY KEY,
+            sha256 TEXT NOT NULL,
+            tamano INTEGER NOT NULL
+        )
+    """)
+    # Identidad global (canónica) de cada persona local
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS persona_global (
+            globalId TEXT PRIMARY KEY,
+            personId INTEGER NOT NULL,
+            FOREIGN KEY(personId) REFERENCES person(personId)
+        )
+    """)
+
+    for tabla, clave in TABLAS_SINCRONIZADAS.items():
+        if not _tabla_existe(cursor, tabla):
+            continue
+
+        for operacion, fila in (('INSERT', 'new'), ('UPDATE', 'new'), ('DELETE', 'old')):
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS cambios_{tabla}_{operacion.lower()}
+                AFTER {operacion} ON {tabla}
+                BEGIN
+                    INSERT INTO registro_cambios (tabla, filaId, operacion)
+                    VALUES ('{tabla}', {fila}.{clave}, '{operacion}');
+                END
+            """)
+
+        # Lo que ya existía también debe llegar al almacén central
+        cursor.execute(f"""
+            INSERT INTO registro_cambios (tabla, filaId, operacion)
+            SELECT '{tabla}', {clave}, 'INSERT' FROM {tabla} ORDER BY {clave}
+        """)
+
+
+def _migracion_8_catalogo_audio(cursor):
+    """Catálogo de grabaciones guardadas por hash de contenido (almacen_audio.py)"""
+    # Cada intento es una fila propia: un reintento nunca pisa al anterior
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS audio_catalogo (
+            audioId INTEGER PRIMARY KEY AUTOINCREMENT,
+            personId INTEGER NOT NULL,
+            numeroSesion INTEGER NOT NULL,
+            exerciseId INTEGER NOT NULL,
+            intento INTEGER NOT NULL,
+            sha256 TEXT NOT NULL,
+            duracion REAL,
+            tamano INTEGER,
+            etiqueta TEXT,
+            fecha TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            origen TEXT,
+            UNIQUE(personId, numeroSesion, exerciseId, intento),
+            FOREIGN KEY(personId) REFERENCES person(personId)
+        )
+    """)
+    # Grabaciones de un paciente en el panel, de la más reciente a la más antigua
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_audio_persona_fecha
+        ON audio_catalogo(personId, fecha)
+    """)
+    # Saber si un archivo todavía está referenciado
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_audio_sha256
+        ON audio_catalogo(sha256)
+    """)
+
+
+def _migracion_9_analisis_acustico(cursor):
+    """Características acústicas por grabación (analisis_acustico.py)"""
+    # Por hash de contenido: una grabación idéntica se analiza una sola vez
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS analisis_acustico (
+            sha256 TEXT PRIMARY KEY,
+            version INTEGER NOT NULL,
+            duracion REAL,
+            proporcion_voz REAL,
+            rms_db REAL,
+            tono_medio REAL,
+            tono_desviacion REAL,
+            centroide REAL,
+            planitud REAL,
+            relacion_nasal_db REAL,
+            error TEXT,
+            fecha TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+def _migracion_10_manifiesto_archivos(cursor):
+    """Manifiesto del procesamiento incremental (procesamiento_incremental.py)"""
+    # Por analizador y ruta: tamaño y fecha de modificación detectan cambios
+    # sin leer el archivo; el hash evita repetir contenido ya procesado
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS manifiesto_archivos (
+            analizador TEXT NOT NULL,
+            ruta TEXT NOT NULL,
+            tamano INTEGER NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            sha256 TEXT NOT NULL,
+            version INTEGER NOT NULL,
+            fecha TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (analizador, ruta)
+        )
+    """)
+
+
+def _migracion_11_dominio_palabra(cursor):
+    """Dominio por persona y palabra para el planificador (planificador.py)"""
+    # Se completa desde el historial la primera vez que se planifica
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS dominio_palabra (
+            personId INTEGER NOT NULL,
+            exerciseId INTEGER NOT NULL,
+            rating REAL NOT NULL DEFAULT 0,
+            repeticiones INTEGER NOT NULL DEFAULT 0,
+            aciertos INTEGER NOT NULL DEFAULT 0,
+            intervalo INTEGER NOT NULL DEFAULT 0,
+            proxima_sesion INTEGER NOT NULL DEFAULT 0,
+            fecha TIMESTAMP,
+            PRIMARY KEY (personId, exerciseId),
+            FOREIGN KEY(personId) REFERENCES person(personId),
+            FOREIGN KEY(exerciseId) REFERENCES exercise(exerciseId)
+        )
+    """)
+
+
+def _migracion_12_copias_persona(cursor):
+    """Marca qué personas locales son copias recibidas de otro robot (sincronizacion.py)"""
+    if _tabla_existe(cursor, 'persona_global') and 'copia' not in _columnas(cursor, 'persona_global'):
+        cursor.execute("ALTER TABLE persona_global ADD COLUMN copia INTEGER NOT NULL DEFAULT 0")
+
+
+# (versión, descripción, función) - SOLO agregar al final, nunca reordenar
+MIGRACIONES = [
+    (1, "Esquema base: dni, sexo, apellido, personId en sesión y observaciones", _migracion_1_esquema_base),
+    (2, "Índices para sesiones, personas, terapias y observaciones", _migracion_2_indices),
+    (3, "Tabla resultado_ejercicio", _migracion_3_resultados),
+    (4, "Resumen de progreso por persona", _migracion_4_progreso),
+    (5, "Búsqueda de texto completo de personas (FTS5)", _migracion_5_busqueda_personas),
+    (6, "Índices por fecha para exportación incremental", _migracion_6_indices_fecha),
+    (7, "Registro de cambios para sincronización entre robots", _migracion_7_registro_cambios),
+    (8, "Catálogo de audios por hash de contenido", _migracion_8_catalogo_audio),
+    (9, "Características acústicas por grabación", _migracion_9_analisis_acustico),
+    (10, "Manifiesto de archivos procesados", _migracion_10_manifiesto_archivos),
+    (11, "Dominio por persona y palabra", _migracion_11_dominio_palabra),
+    (12, "Copias de personas de otros robots", _migracion_12_copias_persona),
+]
+
+
+# ========== APLICACIÓN ==========
+
+def version_actual(conn) -> int:
+    """Versión de esquema registrada en la base de datos"""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def aplicar_migraciones(conn, verbose: bool = True) -> int:
+    """
+    Aplicar las migraciones pendientes, cada una en su propia transacción
+
+    Returns:
+        Versión del esquema después de aplicar
+    """
+    version = version_actual(conn)
+
+    for numero, descripcion, migracion in MIGRACIONES:
+        if numero <= version:
+            continue
+
+        cursor = conn.cursor()
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            migracion(cursor)
+            cursor.execute(f"PRAGMA user_version = {numero}")
+            cursor.execute("COMMIT")
+            version = numero
+            if verbose:
+                print(f"   ✅ Migración {numero} aplicada: {descripcion}")
+        except Exception as e:
+            cursor.execute("ROLLBACK")
+            print(f"❌ Error en migración {numero} ({descripcion}): {e}")
+            break
+
+    return version
+
+
+def migrar(db_path='data.db'):
+    """Aplicar migraciones pendientes mostrando el resultado"""
+
+    print("\n" + "="*70)
+    print("🔄 MIGRACIONES VERSIONADAS")
+    print("="*70 + "\n")
+
+    conn = sqlite3.connect(db_path)
+
+    try:
+        inicial = version_actual(conn)
+        print(f"📌 Versión actual del esquema: {inicial}")
+
+        final = aplicar_migraciones(conn)
+
+        if final == inicial:
+            print("   ⏭️  No hay migraciones pendientes")
+
+        print(f"\n📌 Versión final del esquema: {final}")
+
+        print("\n📊 ÍNDICES:\n")
+        cursor = conn.execute("""
+            SELECT name, tbl_name FROM sqlite_master
+            WHERE type = 'index' AND name LIKE 'idx_%'
+            ORDER BY tbl_name, name
+        """)
+        for nombre, tabla in cursor.fetchall():
+            print(f"   - {tabla}: {nombre}")
+
+        print("\n" + "="*70 + "\n")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    print("\n⚠️  IMPORTANTE: Este script modificará la base de datos.")
+    print("   Se recomienda hacer un backup antes de continuar.\n")
+
+    respuesta = input("¿Continuar con la migración? (s/n): ")
+
+    if respuesta.lower() == 's':
+        migrar()
+        print("✅ ¡Migración exitosa!\n")
+    else:
+        print("❌ Migración cancelada\n")
@@ -3,6 +3,7 @@ MODELOS - Entidades del dominio
 Todas las clases de datos en un solo archivo
 ACTUALIZADO: Con DNI, sexo y personId en sesiones
 """
+import math
 from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Optional, List
@@ -135,4 +136,22 @@ class Observacion:
     person_id: int
     fecha: datetime
     observacion: str
-    terapeuta: Optional[str] = None
\ No newline at end of file
+    terapeuta: Optional[str] = None
+
+
+@dataclass
+class DominioPalabra:
+    """Dominio de una palabra por una persona (ver planificador.py)"""
+    person_id: int
+    exercise_id: int
+    rating: float = 0.0          # escala logit: dominio = probabilidad de acierto
+    repeticiones: int = 0
+    aciertos: int = 0
+    intervalo: int = 0           # sesiones hasta volver a practicarla
+    proxima_sesion: int = 0      # número de sesión en que vuelve a tocar
+    fecha: Optional[datetime] = None
+
+    @property
+    def dominio(self) -> float:
+        """Probabilidad estimada de acierto (0.0 - 1.0)"""
+        return 1.0 / (1.0 + math.exp(-self.rating))
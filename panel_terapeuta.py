@@ -4,24 +4,52 @@ Interfaz de administración con diseño moderno usando pestañas
 Optimizado para resolución 1024x600
 Diseño profesional, amigable y con colores modernos
 """
+import os
+import threading
 import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext
 from datetime import datetime
 from typing import List, Optional
-import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from matplotlib.figure import Figure
 
+import exportar
+import grabaciones
+from almacen_audio import AlmacenAudio
+from config import Config
 from database import Database
+from repositorio_panel import RepositorioPanel
 from models import NivelTerapia, Persona
 
 
 class PanelTerapeuta:
     """Panel de administración moderno con diseño de pestañas"""
     
-    def __init__(self, db: Database, audio_system=None):
+    # Lista de pacientes paginada
+    TAMANO_PAGINA_USUARIOS = 50
+    UMBRAL_SIGUIENTE_PAGINA = 0.9  # fracción desplazada que dispara la carga
+    
+    # Búsqueda: espera tras la última tecla y máximo de resultados
+    ESPERA_BUSQUEDA_MS = 120
+    MAX_RESULTADOS_BUSQUEDA = 50
+    
+    # Gráfico de progreso
+    SESIONES_GRAFICO = 10
+    
+    # Datos de pacientes guardados en caché (persona, observaciones, progreso...)
+    MAX_ENTRADAS_CACHE = 200
+    
+    # Grabaciones: cuántas se listan y cuántas formas de onda se dibujan
+    # a la vez (las de la palabra elegida, nunca todas al abrir el paciente)
+    MAX_GRABACIONES = 500
+    MAX_FORMAS_ONDA = 8
+    ALTO_FORMA_ONDA = 56
+    
+    def __init__(self, db: Database, audio_system=None, indice_fonetico=None):
         self.db = db
         self.audio = audio_system
+        # Índice de identificación por voz del robot: se actualiza al editar nombres
+        self.indice_fonetico = indice_fonetico
         self.ventana = None
         self.persona_seleccionada = None
         self.modo_admin_activo = True
@@ -64,11 +92,33 @@ class PanelTerapeuta:
         
         # Widgets principales
         self.tree_usuarios = None
+        self._scrollbar_usuarios = None
+        self._ultimo_person_id = None
+        self._hay_mas_usuarios = True
+        self._cargando_pagina = False
+        self.var_busqueda = None
+        self._busqueda_pendiente = None
         self.notebook = None  # Pestañas principales
         
         # Widgets por pestaña
         self.tabs = {}
         self.widgets = {}
+        self._mensajes_iniciales = []
+        self._grafico = None
+        
+        # Pestañas ya cargadas para el paciente seleccionado y caché por
+        # paciente: (person_id, tipo) -> (generación de la BD, datos)
+        self._tabs_cargados = set()
+        self._cache_paciente = {}
+        
+        # Consultas a la BD en segundo plano (se crea junto con la ventana)
+        self.repositorio = None
+        
+        # Grabaciones: item del árbol -> audio, y miniaturas ya calculadas
+        self.almacen_audio = None
+        self.reproductor = grabaciones.ReproductorAudio()
+        self._grabaciones = {}
+        self._miniaturas = {}
     
     def crear(self):
         """Crear ventana del panel moderno"""
@@ -90,9 +140,11 @@ class PanelTerapeuta:
         # Evento de cierre
         self.ventana.protocol("WM_DELETE_WINDOW", self.cerrar)
         
+        self.repositorio = RepositorioPanel(self.ventana)
+        self.almacen_audio = AlmacenAudio(self.db)
+        
         # Iniciar escucha por voz si hay audio
         if self.audio:
-            import threading
             self._detener_escucha = threading.Event()
             self.hilo_escucha_admin = threading.Thread(
                 target=self._escuchar_comandos_voz,
@@ -174,18 +226,37 @@ class PanelTerapeuta:
         )
         label_titulo.pack(side='left', pady=15)
         
-        # Información compacta del sistema
-        info_db = self.db.verificar_integridad()
-        texto_info = f"👥 {info_db.get('personas', 0)} Pacientes  •  📊 {info_db.get('sesiones', 0)} Sesiones"
-        
+        # Información compacta del sistema (los totales llegan en segundo plano)
         label_info = tk.Label(
             container,
-            text=texto_info,
+            text="👥 …  •  📊 …",
             font=('Segoe UI', 10),
             bg=self.colores['bg_header'],
             fg=self.colores['text_light']
         )
         label_info.pack(side='right', pady=15)
+        
+        def mostrar_totales(info_db):
+            label_info.config(
+                text=f"👥 {info_db.get('personas', 0)} Pacientes  •  📊 {info_db.get('sesiones', 0)} Sesiones"
+            )
+        
+        self.repositorio.ejecutar(self.db.verificar_integridad, al_terminar=mostrar_totales)
+        
+        # Exportar todos los datos (CSV, y Parquet si está pyarrow)
+        self.widgets['btn_exportar'] = tk.Button(
+            container,
+            text="📤 Exportar",
+            font=('Segoe UI', 10, 'bold'),
+            bg=self.colores['bg_header'],
+            fg=self.colores['text_white'],
+            activebackground=self.colores['primary'],
+            relief='flat',
+            bd=0,
+            cursor='hand2',
+            command=self.exportar_datos
+        )
+        self.widgets['btn_exportar'].pack(side='right', padx=15, pady=15)
     
     def _crear_layout_principal(self):
         """Crear layout principal con lista y pestañas"""
@@ -243,6 +314,29 @@ class PanelTerapeuta:
         )
         btn_refresh.pack(side='right')
         
+        # Búsqueda mientras se escribe
+        frame_busqueda = tk.Frame(card, bg=self.colores['bg_card'])
+        frame_busqueda.pack(fill='x', padx=15, pady=(0, 10))
+        
+        tk.Label(
+            frame_busqueda,
+            text="🔍",
+            font=('Segoe UI', 10),
+            bg=self.colores['bg_card'],
+            fg=self.colores['text_medium']
+        ).pack(side='left')
+        
+        self.var_busqueda = tk.StringVar()
+        entry_busqueda = tk.Entry(
+            frame_busqueda,
+            textvariable=self.var_busqueda,
+            font=('Segoe UI', 10),
+            relief='solid',
+            bd=1
+        )
+        entry_busqueda.pack(side='left', fill='x', expand=True, padx=(5, 0))
+        entry_busqueda.bind('<KeyRelease>', self._on_escribir_busqueda)
+        
         # Frame para Treeview
         frame_tree = tk.Frame(card, bg=self.colores['bg_card'])
         frame_tree.pack(fill='both', expand=True, padx=15, pady=(0, 15))
@@ -250,6 +344,7 @@ class PanelTerapeuta:
         # Scrollbar
         scrollbar = ttk.Scrollbar(frame_tree)
         scrollbar.pack(side='right', fill='y')
+        self._scrollbar_usuarios = scrollbar
         
         # Treeview con estilo moderno
         style = ttk.Style()
@@ -270,7 +365,7 @@ class PanelTerapeuta:
             frame_tree,
             columns=columnas,
             show='headings',
-            yscrollcommand=scrollbar.set,
+            yscrollcommand=self._on_scroll_usuarios,
             selectmode='browse',
             height=16
         )
@@ -316,12 +411,14 @@ class PanelTerapeuta:
         # Crear Notebook
         self.notebook = ttk.Notebook(frame_pestanas, style='Modern.TNotebook')
         self.notebook.pack(fill='both', expand=True)
+        self.notebook.bind('<<NotebookTabChanged>>', self._on_cambiar_tab)
         
-        # 🎨 Crear 4 pestañas
+        # 🎨 Crear 5 pestañas
         self._crear_tab_informacion()
         self._crear_tab_terapia()
         self._crear_tab_progreso()
         self._crear_tab_historial()
+        self._crear_tab_grabaciones()
         
         # Mostrar mensaje inicial
         self._mostrar_mensaje_inicial()
@@ -586,6 +683,9 @@ class PanelTerapeuta:
         
         # Gráfico
         self._crear_card_grafico(frame_contenido)
+        
+        # Precisión por palabra
+        self._crear_card_palabras(frame_contenido)
     
     def _crear_estadisticas_rapidas(self, parent):
         """Crear cards de estadísticas rápidas"""
@@ -602,6 +702,97 @@ class PanelTerapeuta:
         
         self.widgets['frame_grafico'] = tk.Frame(card, bg=self.colores['bg_card'])
         self.widgets['frame_grafico'].pack(fill='both', expand=True, padx=20, pady=20)
+        
+        self._crear_figura_progreso(self.widgets['frame_grafico'])
+    
+    def _crear_figura_progreso(self, parent):
+        """
+        Crear la figura una sola vez; al cambiar de paciente solo se
+        actualizan los datos de la línea y las fechas (blit)
+        """
+        fig = Figure(figsize=(5, 3), dpi=90)
+        ax = fig.add_subplot(111)
+        
+        # Parte fija (queda en el fondo guardado)
+        ax.axhline(y=80, color=self.colores['success'], linestyle='--', alpha=0.7, label='Meta 80%')
+        ax.axhline(y=70, color=self.colores['warning'], linestyle='--', alpha=0.7, label='Mínimo 70%')
+        
+        ax.set_xlim(-0.5, self.SESIONES_GRAFICO - 0.5)
+        ax.set_ylim(0, 105)
+        ax.set_xticks(range(self.SESIONES_GRAFICO))
+        ax.set_xticklabels([])
+        ax.set_xlabel('Fecha', fontsize=9, labelpad=30)
+        ax.set_ylabel('Tasa de Éxito (%)', fontsize=9)
+        ax.set_title(f'Evolución (últimas {self.SESIONES_GRAFICO} sesiones)', fontsize=10, fontweight='bold')
+        ax.grid(True, alpha=0.2)
+        ax.legend(fontsize=8)
+        ax.tick_params(axis='y', labelsize=8)
+        
+        # Parte que cambia con cada paciente (animated: no entra en el fondo)
+        linea, = ax.plot(
+            [], [],
+            marker='o', linewidth=2, markersize=6,
+            color=self.colores['primary'],
+            animated=True
+        )
+        fechas = [
+            ax.text(
+                i, -0.03, '',
+                transform=ax.get_xaxis_transform(),
+                rotation=45, ha='right', va='top', fontsize=8,
+                animated=True
+            )
+            for i in range(self.SESIONES_GRAFICO)
+        ]
+        
+        fig.subplots_adjust(left=0.13, right=0.97, top=0.9, bottom=0.3)
+        
+        canvas = FigureCanvasTkAgg(fig, parent)
+        canvas.get_tk_widget().pack(fill='both', expand=True)
+        canvas.mpl_connect('draw_event', self._on_dibujar_grafico)
+        
+        self._grafico = {
+            'figura': fig,
+            'ax': ax,
+            'linea': linea,
+            'fechas': fechas,
+            'canvas': canvas,
+            'fondo': None
+        }
+        canvas.draw()
+    
+    def _on_dibujar_grafico(self, event):
+        """Después de un dibujo completo (inicio, cambio de tamaño): guardar fondo"""
+        grafico = self._grafico
+        grafico['fondo'] = grafico['canvas'].copy_from_bbox(grafico['figura'].bbox)
+        self._dibujar_partes_animadas()
+    
+    def _dibujar_partes_animadas(self):
+        grafico = self._grafico
+        for artista in [grafico['linea']] + grafico['fechas']:
+            grafico['ax'].draw_artist(artista)
+    
+    def _crear_card_palabras(self, parent):
+        """Crear card con la precisión de cada palabra practicada"""
+        card = self._crear_card(parent, "Precisión por Palabra")
+        
+        columnas = ('Palabra', 'Intentos', 'Precisión')
+        tree = ttk.Treeview(card, columns=columnas, show='headings', height=6)
+        
+        tree.heading('Palabra', text='Palabra')
+        tree.heading('Intentos', text='Intentos')
+        tree.heading('Precisión', text='% Precisión')
+        
+        tree.column('Palabra', width=160)
+        tree.column('Intentos', width=80, anchor='center')
+        tree.column('Precisión', width=100, anchor='center')
+        
+        tree.tag_configure('exito', background='#d4edda')
+        tree.tag_configure('medio', background='#fff3cd')
+        tree.tag_configure('bajo', background='#f8d7da')
+        
+        tree.pack(fill='both', expand=True, padx=20, pady=(0, 20))
+        self.widgets['tree_palabras'] = tree
     
     def _crear_tab_historial(self):
         """Tab 4: Historial de Sesiones"""
@@ -636,8 +827,75 @@ class PanelTerapeuta:
         self.widgets['tree_historial'].column('Fallidos', width=80, anchor='center')
         self.widgets['tree_historial'].column('Éxito %', width=80, anchor='center')
         
+        # Colores
+        self.widgets['tree_historial'].tag_configure('exito', background='#d4edda')
+        self.widgets['tree_historial'].tag_configure('medio', background='#fff3cd')
+        self.widgets['tree_historial'].tag_configure('bajo', background='#f8d7da')
+        
         self.widgets['tree_historial'].pack(fill='both', expand=True, padx=20, pady=20)
     
+    def _crear_tab_grabaciones(self):
+        """Tab 5: Grabaciones por palabra con forma de onda y reproducción"""
+        tab = tk.Frame(self.notebook, bg=self.colores['bg_main'])
+        self.notebook.add(tab, text='🎙️ Grabaciones')
+        self.tabs['grabaciones'] = tab
+        
+        frame_contenido = tk.Frame(tab, bg=self.colores['bg_main'])
+        frame_contenido.pack(fill='both', expand=True, padx=10, pady=10)
+        
+        # Lista por palabra (izquierda)
+        card_lista = self._crear_card(frame_contenido, "Grabaciones por palabra")
+        card_lista.master.pack_configure(side='left', fill='both', expand=True, padx=(0, 8))
+        
+        columnas = ('Fecha', 'Sesión', 'Intento', 'Duración')
+        tree = ttk.Treeview(card_lista, columns=columnas, show='tree headings', height=12)
+        tree.heading('#0', text='Palabra')
+        tree.column('#0', width=150)
+        for columna, ancho in zip(columnas, (120, 60, 60, 70)):
+            tree.heading(columna, text=columna)
+            tree.column(columna, width=ancho, anchor='center')
+        tree.pack(fill='both', expand=True, padx=15, pady=(0, 10))
+        tree.bind('<<TreeviewSelect>>', self._on_seleccionar_grabacion)
+        tree.bind('<Double-1>', lambda e: self.reproducir_grabacion())
+        self.widgets['tree_grabaciones'] = tree
+        
+        botones = tk.Frame(card_lista, bg=self.colores['bg_card'])
+        botones.pack(fill='x', padx=15, pady=(0, 15))
+        
+        for texto, comando, color in (
+            ("▶️ Reproducir", self.reproducir_grabacion, self.colores['success']),
+            ("⏹️ Detener", self.reproductor.detener, self.colores['text_medium']),
+        ):
+            tk.Button(
+                botones,
+                text=texto,
+                command=comando,
+                font=('Segoe UI', 10, 'bold'),
+                bg=color,
+                fg=self.colores['text_white'],
+                relief='flat',
+                cursor='hand2',
+                padx=12,
+                pady=4
+            ).pack(side='left', padx=(0, 8))
+        
+        if not grabaciones.REPRODUCCION_DISPONIBLE:
+            tk.Label(
+                botones,
+                text="Sin salida de audio",
+                font=('Segoe UI', 9),
+                bg=self.colores['bg_card'],
+                fg=self.colores['text_light']
+            ).pack(side='left')
+        
+        # Formas de onda de los intentos de la palabra elegida (derecha)
+        card_ondas = self._crear_card(frame_contenido, "Evolución de la palabra")
+        card_ondas.master.pack_configure(side='right', fill='both', expand=True)
+        
+        canvas = tk.Canvas(card_ondas, bg=self.colores['bg_card'], highlightthickness=0)
+        canvas.pack(fill='both', expand=True, padx=15, pady=(0, 15))
+        self.widgets['canvas_ondas'] = canvas
+    
     def _crear_card(self, parent, titulo):
         """Helper: Crear card moderno con sombra sutil"""
         # Frame externo para sombra
@@ -703,13 +961,8 @@ class PanelTerapeuta:
         return card
     
     def _mostrar_mensaje_inicial(self):
-        """Mostrar mensaje cuando no hay usuario seleccionado"""
-        for tab_name, tab_frame in self.tabs.items():
-            # Limpiar contenido
-            for widget in tab_frame.winfo_children():
-                widget.destroy()
-            
-            # Mensaje
+        """Cubrir cada pestaña con un mensaje hasta que se elija un paciente"""
+        for tab_frame in self.tabs.values():
             label = tk.Label(
                 tab_frame,
                 text="👈 Selecciona un paciente\nde la lista",
@@ -718,57 +971,140 @@ class PanelTerapeuta:
                 fg=self.colores['text_light'],
                 justify='center'
             )
-            label.place(relx=0.5, rely=0.5, anchor='center')
+            label.place(relx=0, rely=0, relwidth=1, relheight=1)
+            self._mensajes_iniciales.append(label)
+    
+    def _ocultar_mensaje_inicial(self):
+        for label in self._mensajes_iniciales:
+            label.destroy()
+        self._mensajes_iniciales = []
     
     # ========== CARGA DE DATOS ==========
     
     def cargar_usuarios(self):
-        """Cargar lista de usuarios"""
+        """Cargar lista de usuarios (primera página; el resto al desplazarse)"""
+        self.repositorio.cancelar('lista')
+        
         for item in self.tree_usuarios.get_children():
             self.tree_usuarios.delete(item)
         
-        try:
-            conn = self.db.conn
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                SELECT 
-                    p.personId,
-                    p.name,
-                    p.apellido,
-                    p.sex,
-                    l.name as nivel
-                FROM person p
-                LEFT JOIN level l ON p.actual_level = l.levelId
-                ORDER BY p.personId DESC
-            """)
-            
-            personas = cursor.fetchall()
-            
-            for persona in personas:
-                sexo_icono = "👦" if persona['sex'] == 'M' else "👧" if persona['sex'] == 'F' else "👤"
-                
-                nombre_completo = persona['name']
-                if persona['apellido']:
-                    nombre_completo += f" {persona['apellido']}"
-                
-                # Agregar con ID oculto
-                item_id = self.tree_usuarios.insert(
-                    '',
-                    'end',
-                    values=(
-                        f"{sexo_icono} {nombre_completo}",
-                        persona['nivel'] or 'N/A'
-                    )
-                )
-                # Guardar ID en tags para recuperarlo después
-                self.tree_usuarios.item(item_id, tags=(str(persona['personId']),))
-            
-            print(f"✅ Cargados {len(personas)} pacientes")
-            
-        except Exception as e:
-            print(f"❌ Error al cargar usuarios: {e}")
-            messagebox.showerror("Error", f"No se pudieron cargar los usuarios:\n{e}", parent=self.ventana)
+        if self.var_busqueda is not None and self.var_busqueda.get():
+            self.var_busqueda.set('')
+        
+        self._ultimo_person_id = None
+        self._hay_mas_usuarios = True
+        self._cargando_pagina = False
+        self._cargar_pagina_usuarios()
+    
+    def _cargar_pagina_usuarios(self):
+        """Pedir la siguiente página de pacientes"""
+        if not self._hay_mas_usuarios or self._cargando_pagina:
+            return
+        
+        self._cargando_pagina = True
+        self.repositorio.ejecutar(
+            self.db.obtener_personas_pagina,
+            self._ultimo_person_id,
+            self.TAMANO_PAGINA_USUARIOS,
+            al_terminar=self._agregar_pagina_usuarios,
+            al_fallar=self._error_cargar_usuarios,
+            grupo='lista'
+        )
+    
+    def _agregar_pagina_usuarios(self, personas):
+        """Agregar la página recibida al final de la lista"""
+        self._cargando_pagina = False
+        
+        for persona in personas:
+            self._insertar_fila_usuario(
+                persona['personId'],
+                persona['name'],
+                persona['apellido'],
+                persona['sex'],
+                persona['nivel']
+            )
+        
+        if personas:
+            self._ultimo_person_id = personas[-1]['personId']
+        self._hay_mas_usuarios = len(personas) == self.TAMANO_PAGINA_USUARIOS
+    
+    def _error_cargar_usuarios(self, e):
+        self._cargando_pagina = False
+        print(f"❌ Error al cargar usuarios: {e}")
+        messagebox.showerror("Error", f"No se pudieron cargar los usuarios:\n{e}", parent=self.ventana)
+    
+    def _insertar_fila_usuario(self, person_id, nombre, apellido, sexo, nivel):
+        """Agregar un paciente al final de la lista"""
+        sexo_icono = "👦" if sexo == 'M' else "👧" if sexo == 'F' else "👤"
+        
+        nombre_completo = nombre
+        if apellido:
+            nombre_completo += f" {apellido}"
+        
+        # Agregar con ID oculto
+        item_id = self.tree_usuarios.insert(
+            '',
+            'end',
+            values=(
+                f"{sexo_icono} {nombre_completo}",
+                nivel or 'N/A'
+            )
+        )
+        # Guardar ID en tags para recuperarlo después
+        self.tree_usuarios.item(item_id, tags=(str(person_id),))
+    
+    def _on_escribir_busqueda(self, event=None):
+        """Reprogramar la búsqueda en cada tecla (solo corre la última)"""
+        if self._busqueda_pendiente:
+            self.ventana.after_cancel(self._busqueda_pendiente)
+        self._busqueda_pendiente = self.ventana.after(
+            self.ESPERA_BUSQUEDA_MS,
+            self._ejecutar_busqueda
+        )
+    
+    def _ejecutar_busqueda(self):
+        """Mostrar los pacientes que coinciden con el texto, por relevancia"""
+        self._busqueda_pendiente = None
+        texto = self.var_busqueda.get().strip()
+        
+        if not texto:
+            self.cargar_usuarios()
+            return
+        
+        # Los resultados no se paginan
+        self.repositorio.cancelar('lista')
+        self._hay_mas_usuarios = False
+        self._cargando_pagina = False
+        
+        self.repositorio.ejecutar(
+            self.db.buscar_personas_lista,
+            texto,
+            self.MAX_RESULTADOS_BUSQUEDA,
+            al_terminar=self._mostrar_resultados_busqueda,
+            grupo='lista'
+        )
+    
+    def _mostrar_resultados_busqueda(self, personas):
+        for item in self.tree_usuarios.get_children():
+            self.tree_usuarios.delete(item)
+        
+        # Mismas filas que la lista paginada (nivel según la tabla level)
+        for persona in personas:
+            self._insertar_fila_usuario(
+                persona['personId'],
+                persona['name'],
+                persona['apellido'],
+                persona['sex'],
+                persona['nivel']
+            )
+    
+    def _on_scroll_usuarios(self, primero, ultimo):
+        """Actualizar scrollbar y pedir otra página al acercarse al final"""
+        self._scrollbar_usuarios.set(primero, ultimo)
+        
+        if self._hay_mas_usuarios and float(ultimo) >= self.UMBRAL_SIGUIENTE_PAGINA:
+            # Fuera del callback de scroll para no insertar mientras se dibuja
+            self.ventana.after_idle(self._cargar_pagina_usuarios)
     
     def on_seleccionar_usuario(self, event):
         """Evento cuando se selecciona un usuario"""
@@ -784,133 +1120,115 @@ class PanelTerapeuta:
             self.cargar_detalles_usuario(person_id)
     
     def cargar_detalles_usuario(self, person_id: int):
-        """Cargar detalles completos de un usuario"""
+        """Seleccionar un usuario y cargar solo la pestaña visible"""
+        # Lo que quedaba pendiente del paciente anterior ya no se muestra
+        self.repositorio.cancelar('paciente')
+        self.repositorio.cancelar('formas_onda')
+        
+        self._obtener_cacheado(
+            person_id, 'persona',
+            lambda: self._consultar_persona(person_id),
+            self._mostrar_detalles_usuario
+        )
+    
+    def _mostrar_detalles_usuario(self, persona: Optional[dict]):
+        if not persona:
+            return
+        
         try:
-            conn = self.db.conn
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                SELECT p.*, l.name as nivel_nombre
-                FROM person p
-                LEFT JOIN level l ON p.actual_level = l.levelId
-                WHERE p.personId = ?
-            """, (person_id,))
+            # Guardar persona seleccionada (copia: cambiar_nivel la modifica)
+            self.persona_seleccionada = dict(persona)
+            self._tabs_cargados = set()
             
-            persona_row = cursor.fetchone()
+            self._ocultar_mensaje_inicial()
+            self._cargar_tab_visible()
             
-            if not persona_row:
-                return
-            
-            # Guardar persona seleccionada
-            self.persona_seleccionada = {
-                'person_id': persona_row['personId'],
-                'name': persona_row['name'],
-                'apellido': persona_row['apellido'] if 'apellido' in persona_row.keys() else None,
-                'age': persona_row['age'],
-                'dni': persona_row['dni'] if 'dni' in persona_row.keys() else None,
-                'sex': persona_row['sex'] if 'sex' in persona_row.keys() else None,
-                'nivel_id': persona_row['actual_level'],
-                'nivel_nombre': persona_row['nivel_nombre'],
-                'fecha_registro': persona_row['register_date']
-            }
-            
-            # Recrear pestañas con contenido
-            self._recrear_tabs_con_contenido()
-            
-            # Cargar datos en cada tab
-            self._cargar_tab_informacion()
-            self._cargar_tab_terapia()
-            self._cargar_tab_progreso()
-            self._cargar_tab_historial()
-            
-            print(f"✅ Detalles cargados para: {persona_row['name']}")
+            print(f"✅ Detalles cargados para: {persona['name']}")
             
         except Exception as e:
             print(f"❌ Error al cargar detalles: {e}")
             import traceback
             traceback.print_exc()
     
-    def _recrear_tabs_con_contenido(self):
-        """Recrear pestañas con contenido real"""
-        # Limpiar mensaje inicial de todos los tabs
-        for tab_frame in self.tabs.values():
-            for widget in tab_frame.winfo_children():
-                widget.destroy()
-        
-        # Recrear estructura de cada tab
-        # Tab Info
-        tab_info = self.tabs['info']
-        canvas = tk.Canvas(tab_info, bg=self.colores['bg_main'], highlightthickness=0)
-        scrollbar = ttk.Scrollbar(tab_info, orient='vertical', command=canvas.yview)
-        frame_contenido = tk.Frame(canvas, bg=self.colores['bg_main'])
-        
-        frame_contenido.bind('<Configure>', lambda e: canvas.configure(scrollregion=canvas.bbox('all')))
-        canvas.create_window((0, 0), window=frame_contenido, anchor='nw')
-        canvas.configure(yscrollcommand=scrollbar.set)
-        
-        canvas.pack(side='left', fill='both', expand=True, padx=10, pady=10)
-        scrollbar.pack(side='right', fill='y')
-        
-        self.widgets['frame_info'] = frame_contenido
-        self._crear_card_informacion(frame_contenido)
-        
-        # Tab Terapia
-        tab_terapia = self.tabs['terapia']
-        canvas = tk.Canvas(tab_terapia, bg=self.colores['bg_main'], highlightthickness=0)
-        scrollbar = ttk.Scrollbar(tab_terapia, orient='vertical', command=canvas.yview)
-        frame_contenido = tk.Frame(canvas, bg=self.colores['bg_main'])
-        
-        frame_contenido.bind('<Configure>', lambda e: canvas.configure(scrollregion=canvas.bbox('all')))
-        canvas.create_window((0, 0), window=frame_contenido, anchor='nw')
-        canvas.configure(yscrollcommand=scrollbar.set)
-        
-        canvas.pack(side='left', fill='both', expand=True, padx=10, pady=10)
-        scrollbar.pack(side='right', fill='y')
-        
-        self.widgets['frame_terapia'] = frame_contenido
-        self._crear_card_nivel(frame_contenido)
-        self._crear_card_observaciones(frame_contenido)
-        
-        # Tab Progreso
-        tab_progreso = self.tabs['progreso']
-        canvas = tk.Canvas(tab_progreso, bg=self.colores['bg_main'], highlightthickness=0)
-        scrollbar = ttk.Scrollbar(tab_progreso, orient='vertical', command=canvas.yview)
-        frame_contenido = tk.Frame(canvas, bg=self.colores['bg_main'])
-        
-        frame_contenido.bind('<Configure>', lambda e: canvas.configure(scrollregion=canvas.bbox('all')))
-        canvas.create_window((0, 0), window=frame_contenido, anchor='nw')
-        canvas.configure(yscrollcommand=scrollbar.set)
-        
-        canvas.pack(side='left', fill='both', expand=True, padx=10, pady=10)
-        scrollbar.pack(side='right', fill='y')
-        
-        self.widgets['frame_progreso'] = frame_contenido
-        self._crear_estadisticas_rapidas(frame_contenido)
-        self._crear_card_grafico(frame_contenido)
-        
-        # Tab Historial
-        tab_historial = self.tabs['historial']
-        frame_contenido = tk.Frame(tab_historial, bg=self.colores['bg_main'])
-        frame_contenido.pack(fill='both', expand=True, padx=10, pady=10)
-        
-        card = self._crear_card(frame_contenido, "Historial de Sesiones")
+    def _consultar_persona(self, person_id: int) -> Optional[dict]:
+        cursor = self.db.conn.cursor()
+        cursor.execute("""
+            SELECT p.*, l.name as nivel_nombre
+            FROM person p
+            LEFT JOIN level l ON p.actual_level = l.levelId
+            WHERE p.personId = ?
+        """, (person_id,))
+        
+        persona_row = cursor.fetchone()
+        
+        if not persona_row:
+            return None
+        
+        return {
+            'person_id': persona_row['personId'],
+            'name': persona_row['name'],
+            'apellido': persona_row['apellido'] if 'apellido' in persona_row.keys() else None,
+            'age': persona_row['age'],
+            'dni': persona_row['dni'] if 'dni' in persona_row.keys() else None,
+            'sex': persona_row['sex'] if 'sex' in persona_row.keys() else None,
+            'nivel_id': persona_row['actual_level'],
+            'nivel_nombre': persona_row['nivel_nombre'],
+            'fecha_registro': persona_row['register_date']
+        }
+    
+    def _obtener_cacheado(self, person_id: int, tipo: str, cargar, al_terminar):
+        """
+        Entregar a al_terminar los datos de un paciente: desde la caché si no
+        hubo escrituras en la BD desde que se guardaron, si no consultando
+        en segundo plano
+        """
+        clave = (person_id, tipo)
+        generacion = self.db.generacion
+        guardado = self._cache_paciente.get(clave)
+        if guardado and guardado[0] == generacion:
+            al_terminar(guardado[1])
+            return
         
-        columnas = ('Fecha', 'Nivel', 'Correctos', 'Fallidos', 'Éxito %')
-        self.widgets['tree_historial'] = ttk.Treeview(card, columns=columnas, show='headings', height=12)
+        def guardar_y_mostrar(datos):
+            self._guardar_en_cache(clave, generacion, datos)
+            al_terminar(datos)
         
-        self.widgets['tree_historial'].heading('Fecha', text='Fecha')
-        self.widgets['tree_historial'].heading('Nivel', text='Nivel')
-        self.widgets['tree_historial'].heading('Correctos', text='✓ Correctos')
-        self.widgets['tree_historial'].heading('Fallidos', text='✗ Fallidos')
-        self.widgets['tree_historial'].heading('Éxito %', text='% Éxito')
+        self.repositorio.ejecutar(cargar, al_terminar=guardar_y_mostrar, grupo='paciente')
+    
+    def _guardar_en_cache(self, clave, generacion: int, datos):
+        self._cache_paciente.pop(clave, None)
+        self._cache_paciente[clave] = (generacion, datos)
+        if len(self._cache_paciente) > self.MAX_ENTRADAS_CACHE:
+            # El más antiguo (los dict conservan el orden de inserción)
+            del self._cache_paciente[next(iter(self._cache_paciente))]
+    
+    def _on_cambiar_tab(self, event=None):
+        self._cargar_tab_visible()
+    
+    def _cargar_tab_visible(self):
+        """Cargar la pestaña visible si todavía no se cargó para este paciente"""
+        if not self.persona_seleccionada:
+            return
         
-        self.widgets['tree_historial'].column('Fecha', width=140)
-        self.widgets['tree_historial'].column('Nivel', width=100)
-        self.widgets['tree_historial'].column('Correctos', width=80, anchor='center')
-        self.widgets['tree_historial'].column('Fallidos', width=80, anchor='center')
-        self.widgets['tree_historial'].column('Éxito %', width=80, anchor='center')
+        seleccionada = self.notebook.select()
+        for nombre, tab_frame in self.tabs.items():
+            if str(tab_frame) == seleccionada:
+                break
+        else:
+            return
         
-        self.widgets['tree_historial'].pack(fill='both', expand=True, padx=20, pady=20)
+        if nombre in self._tabs_cargados:
+            return
+        self._tabs_cargados.add(nombre)
+        
+        cargadores = {
+            'info': self._cargar_tab_informacion,
+            'terapia': self._cargar_tab_terapia,
+            'progreso': self._cargar_tab_progreso,
+            'historial': self._cargar_tab_historial,
+            'grabaciones': self._cargar_tab_grabaciones,
+        }
+        cargadores[nombre]()
     
     def _cargar_tab_informacion(self):
         """Cargar datos en tab de información"""
@@ -949,26 +1267,44 @@ class PanelTerapeuta:
         # Cargar observaciones
         self.widgets['text_observaciones'].delete("1.0", "end")
         
-        try:
-            observaciones = self.db.obtener_observaciones_persona(self.persona_seleccionada['person_id'])
-            if observaciones:
-                self.widgets['text_observaciones'].insert("1.0", observaciones[0]['observacion'])
-        except:
-            pass
+        person_id = self.persona_seleccionada['person_id']
+        self._obtener_cacheado(
+            person_id, 'observaciones',
+            lambda: self.db.obtener_observaciones_persona(person_id),
+            self._mostrar_observaciones
+        )
+    
+    def _mostrar_observaciones(self, observaciones):
+        if observaciones:
+            self.widgets['text_observaciones'].delete("1.0", "end")
+            self.widgets['text_observaciones'].insert("1.0", observaciones[0]['observacion'])
     
     def _cargar_tab_progreso(self):
-        """Cargar datos en tab de progreso"""
+        """Cargar datos en tab de progreso (en segundo plano)"""
         if not self.persona_seleccionada:
             return
         
+        person_id = self.persona_seleccionada['person_id']
+        self._obtener_cacheado(
+            person_id, 'progreso',
+            lambda: self._consultar_progreso(person_id),
+            lambda datos: self._mostrar_progreso(*datos)
+        )
+    
+    def _consultar_progreso(self, person_id: int):
+        return (
+            self.db.obtener_progreso_persona(person_id),
+            self.db.obtener_precision_por_palabra(person_id)
+        )
+    
+    def _mostrar_progreso(self, progreso, palabras):
+        """Actualizar estadísticas, gráfico y precisión por palabra"""
         try:
-            sesiones = self.db.obtener_sesiones_por_persona(self.persona_seleccionada['person_id'])
-            
             # Limpiar frame de stats
             for widget in self.widgets['frame_stats'].winfo_children():
                 widget.destroy()
             
-            if not sesiones:
+            if not progreso:
                 label = tk.Label(
                     self.widgets['frame_stats'],
                     text="Sin sesiones registradas",
@@ -977,12 +1313,13 @@ class PanelTerapeuta:
                     fg=self.colores['text_light']
                 )
                 label.pack(expand=True)
+                self._actualizar_grafico_progreso([])
+                self._cargar_precision_palabras(palabras)
                 return
             
             # Estadísticas
-            total = len(sesiones)
-            ultima = sesiones[-1]
-            promedio = sum(s.tasa_exito for s in sesiones) / total * 100
+            total = progreso['total_sesiones']
+            promedio = progreso['promedio'] * 100
             
             self._crear_stat_card(
                 self.widgets['frame_stats'],
@@ -993,7 +1330,7 @@ class PanelTerapeuta:
             self._crear_stat_card(
                 self.widgets['frame_stats'],
                 "Última Tasa",
-                f"{ultima.tasa_exito * 100:.0f}%",
+                f"{progreso['ultima_tasa'] * 100:.0f}%",
                 self.colores['success']
             )
             self._crear_stat_card(
@@ -1004,63 +1341,73 @@ class PanelTerapeuta:
             )
             
             # Gráfico
-            self._crear_grafico_progreso(sesiones)
+            self._actualizar_grafico_progreso(progreso['ultimas_tasas'])
+            
+            # Precisión por palabra (desde resultado_ejercicio)
+            self._cargar_precision_palabras(palabras)
             
         except Exception as e:
             print(f"❌ Error al cargar progreso: {e}")
     
-    def _crear_grafico_progreso(self, sesiones):
-        """Crear gráfico de progreso"""
-        # Limpiar frame
-        for widget in self.widgets['frame_grafico'].winfo_children():
-            widget.destroy()
-        
+    def _actualizar_grafico_progreso(self, puntos):
+        """Actualizar la línea y las fechas del gráfico a partir de [(fecha, tasa)]"""
         try:
-            # Preparar datos (últimas 10 sesiones)
-            fechas = [s.fecha.strftime('%d/%m') for s in sesiones[-10:]]
-            tasas = [s.tasa_exito * 100 for s in sesiones[-10:]]
-            
-            # Crear figura
-            fig = Figure(figsize=(5, 3), dpi=90)
-            ax = fig.add_subplot(111)
-            
-            # Gráfico
-            ax.plot(fechas, tasas, marker='o', linewidth=2, markersize=6, color=self.colores['primary'])
-            ax.axhline(y=80, color=self.colores['success'], linestyle='--', alpha=0.7, label='Meta 80%')
-            ax.axhline(y=70, color=self.colores['warning'], linestyle='--', alpha=0.7, label='Mínimo 70%')
+            grafico = self._grafico
+            puntos = puntos[-self.SESIONES_GRAFICO:]
             
-            ax.set_xlabel('Fecha', fontsize=9)
-            ax.set_ylabel('Tasa de Éxito (%)', fontsize=9)
-            ax.set_title('Evolución (últimas 10 sesiones)', fontsize=10, fontweight='bold')
-            ax.grid(True, alpha=0.2)
-            ax.legend(fontsize=8)
-            ax.set_ylim(0, 105)
-            
-            plt.setp(ax.xaxis.get_majorticklabels(), rotation=45, ha='right', fontsize=8)
-            ax.tick_params(axis='y', labelsize=8)
+            grafico['linea'].set_data(
+                list(range(len(puntos))),
+                [tasa * 100 for _, tasa in puntos]
+            )
+            for i, texto in enumerate(grafico['fechas']):
+                texto.set_text(puntos[i][0].strftime('%d/%m') if i < len(puntos) else '')
             
-            fig.tight_layout()
+            if grafico['fondo'] is None:
+                # Todavía no se dibujó: el draw_event pinta las partes animadas
+                grafico['canvas'].draw_idle()
+                return
             
-            # Agregar a tkinter
-            canvas = FigureCanvasTkAgg(fig, self.widgets['frame_grafico'])
-            canvas.draw()
-            canvas.get_tk_widget().pack(fill='both', expand=True)
+            grafico['canvas'].restore_region(grafico['fondo'])
+            self._dibujar_partes_animadas()
+            grafico['canvas'].blit(grafico['figura'].bbox)
             
         except Exception as e:
             print(f"❌ Error al crear gráfico: {e}")
     
+    def _cargar_precision_palabras(self, palabras):
+        """Llenar tabla de precisión por palabra"""
+        tree = self.widgets['tree_palabras']
+        for item in tree.get_children():
+            tree.delete(item)
+        
+        for palabra in palabras:
+            precision = palabra['precision']
+            tag = 'exito' if precision >= 0.8 else 'medio' if precision >= 0.5 else 'bajo'
+            tree.insert(
+                '',
+                'end',
+                values=(palabra['word'], palabra['intentos'], f"{precision * 100:.0f}%"),
+                tags=(tag,)
+            )
+    
     def _cargar_tab_historial(self):
         """Cargar datos en tab de historial"""
         if not self.persona_seleccionada:
             return
         
+        person_id = self.persona_seleccionada['person_id']
+        self._obtener_cacheado(
+            person_id, 'historial',
+            lambda: self.db.obtener_sesiones_por_persona(person_id),
+            self._mostrar_historial
+        )
+    
+    def _mostrar_historial(self, sesiones):
         # Limpiar tree
         for item in self.widgets['tree_historial'].get_children():
             self.widgets['tree_historial'].delete(item)
         
         try:
-            sesiones = self.db.obtener_sesiones_por_persona(self.persona_seleccionada['person_id'])
-            
             for sesion in sesiones:
                 fecha = sesion.fecha.strftime('%d/%m/%Y %H:%M')
                 tasa = f"{sesion.tasa_exito * 100:.0f}%"
@@ -1074,14 +1421,162 @@ class PanelTerapeuta:
                     tags=(tag,)
                 )
             
-            # Colores
-            self.widgets['tree_historial'].tag_configure('exito', background='#d4edda')
-            self.widgets['tree_historial'].tag_configure('medio', background='#fff3cd')
-            self.widgets['tree_historial'].tag_configure('bajo', background='#f8d7da')
-            
         except Exception as e:
             print(f"❌ Error al cargar historial: {e}")
     
+    def _cargar_tab_grabaciones(self):
+        """Listar grabaciones (solo el catálogo: ningún audio se lee aquí)"""
+        if not self.persona_seleccionada:
+            return
+        
+        person_id = self.persona_seleccionada['person_id']
+        self._obtener_cacheado(
+            person_id, 'grabaciones',
+            lambda: self.db.obtener_audios_persona(person_id, self.MAX_GRABACIONES),
+            self._mostrar_grabaciones
+        )
+    
+    def _mostrar_grabaciones(self, audios):
+        tree = self.widgets['tree_grabaciones']
+        tree.delete(*tree.get_children())
+        self.widgets['canvas_ondas'].delete('all')
+        self._grabaciones = {}
+        
+        # Agrupar por palabra, primero la practicada más recientemente
+        por_palabra = {}
+        for audio in audios:
+            palabra = audio['palabra'] or audio['etiqueta'] or f"Ejercicio {audio['exercise_id']}"
+            por_palabra.setdefault(palabra, []).append(audio)
+        
+        for palabra, intentos in por_palabra.items():
+            padre = tree.insert('', 'end', text=f"{palabra} ({len(intentos)})", open=False)
+            for audio in intentos:
+                duracion = f"{audio['duracion']:.1f} s" if audio['duracion'] else "-"
+                item = tree.insert(padre, 'end', text='', values=(
+                    str(audio['fecha'])[:16], audio['numero_sesion'], audio['intento'], duracion
+                ))
+                self._grabaciones[item] = audio
+    
+    def _on_seleccionar_grabacion(self, event=None):
+        """Dibujar los intentos de la palabra elegida (del más antiguo al más nuevo)"""
+        tree = self.widgets['tree_grabaciones']
+        seleccion = tree.selection()
+        if not seleccion:
+            return
+        
+        item = seleccion[0]
+        padre = tree.parent(item) or item
+        intentos = [self._grabaciones[i] for i in tree.get_children(padre)]
+        intentos = list(reversed(intentos[:self.MAX_FORMAS_ONDA]))
+        
+        self._mostrar_formas_onda(intentos, self._grabaciones.get(item))
+    
+    def _mostrar_formas_onda(self, intentos, seleccionado):
+        canvas = self.widgets['canvas_ondas']
+        canvas.delete('all')
+        self.repositorio.cancelar('formas_onda')
+        
+        ancho = max(canvas.winfo_width(), 200)
+        alto = self.ALTO_FORMA_ONDA
+        
+        for fila, audio in enumerate(intentos):
+            y = fila * (alto + 18)
+            color = self.colores['primary'] if audio is seleccionado else self.colores['border_medium']
+            canvas.create_text(
+                0, y, anchor='nw', font=('Segoe UI', 8),
+                fill=self.colores['text_medium'],
+                text=f"Sesión {audio['numero_sesion']} · intento {audio['intento']} · {str(audio['fecha'])[:10]}"
+            )
+            canvas.create_rectangle(0, y + 14, ancho, y + 14 + alto, outline=color)
+            
+            area = (0, y + 14, ancho, alto)
+            miniatura = self._miniaturas.get(audio['sha256'])
+            if miniatura is not None:
+                self._dibujar_forma_onda(area, miniatura)
+                continue
+            
+            # Se lee y reduce en segundo plano (y se guarda en disco para la próxima)
+            self.repositorio.ejecutar(
+                grabaciones.obtener_miniatura,
+                self.almacen_audio.ruta_blob(audio['sha256']), audio['sha256'],
+                al_terminar=lambda m, area=area, sha=audio['sha256']: self._guardar_y_dibujar_miniatura(sha, area, m),
+                grupo='formas_onda'
+            )
+    
+    def _guardar_y_dibujar_miniatura(self, sha256, area, miniatura):
+        if miniatura is None:
+            return
+        self._miniaturas[sha256] = miniatura
+        self._dibujar_forma_onda(area, miniatura)
+    
+    def _dibujar_forma_onda(self, area, miniatura):
+        """Un solo polígono por grabación: máximos de ida y mínimos de vuelta"""
+        x0, y0, ancho, alto = area
+        columnas = miniatura.shape[1]
+        centro = y0 + alto / 2
+        escala = alto / 2
+        paso = ancho / max(columnas - 1, 1)
+        
+        puntos = []
+        for i, valor in enumerate(miniatura[1]):
+            puntos.extend((x0 + i * paso, centro - float(valor) * escala))
+        for i in range(columnas - 1, -1, -1):
+            puntos.extend((x0 + i * paso, centro - float(miniatura[0][i]) * escala))
+        
+        self.widgets['canvas_ondas'].create_polygon(
+            puntos, fill=self.colores['info'], outline=self.colores['primary_dark']
+        )
+    
+    def reproducir_grabacion(self):
+        """Reproducir el intento seleccionado sin bloquear la ventana"""
+        seleccion = self.widgets['tree_grabaciones'].selection()
+        audio = self._grabaciones.get(seleccion[0]) if seleccion else None
+        if not audio:
+            return
+        
+        ruta = self.almacen_audio.ruta_blob(audio['sha256'])
+        self.repositorio.ejecutar(
+            grabaciones.leer_wav, ruta,
+            al_terminar=lambda datos: self.reproductor.reproducir(*datos),
+            al_fallar=lambda e: messagebox.showerror("Error", f"No se pudo abrir la grabación:\n{e}")
+        )
+    
+    # ========== EXPORTACIÓN ==========
+    
+    def exportar_datos(self):
+        """Exportar sesiones, resultados y observaciones de todos los pacientes"""
+        formatos = ['csv'] + (['parquet'] if exportar.PARQUET_DISPONIBLE else [])
+        boton = self.widgets['btn_exportar']
+        boton.config(state='disabled', text="📤 Exportando...")
+        
+        def exportar_formatos():
+            return {
+                formato: exportar.exportar(self.db.db_path, formato)
+                for formato in formatos
+            }
+        
+        def al_terminar(resultados):
+            boton.config(state='normal', text="📤 Exportar")
+            
+            lineas = []
+            for formato, tablas in resultados.items():
+                for tabla, resultado in tablas.items():
+                    if resultado['ruta']:
+                        lineas.append(f"{tabla} ({formato}): {resultado['filas']} filas")
+            
+            carpeta = os.path.abspath(Config.EXPORT_FOLDER)
+            messagebox.showinfo(
+                "Exportación completa",
+                "\n".join(lineas or ["No hay datos para exportar"]) + f"\n\nCarpeta: {carpeta}",
+                parent=self.ventana
+            )
+        
+        def al_fallar(e):
+            boton.config(state='normal', text="📤 Exportar")
+            messagebox.showerror("Error", f"No se pudo exportar:\n{e}", parent=self.ventana)
+        
+        self.repositorio.ejecutar(exportar_formatos, al_terminar=al_terminar, al_fallar=al_fallar)
+    
     # ========== FUNCIONES DE MODIFICACIÓN ==========
     
     def cambiar_nivel(self):
@@ -1115,17 +1610,31 @@ class PanelTerapeuta:
             if not nuevo_nivel:
                 raise ValueError("Nivel no válido")
             
-            self.db.actualizar_nivel_persona(self.persona_seleccionada['person_id'], nuevo_nivel)
-            
-            self.widgets['label_nivel'].config(text=nuevo_nivel_nombre)
-            self.persona_seleccionada['nivel_nombre'] = nuevo_nivel_nombre
+        except Exception as e:
+            messagebox.showerror("Error", f"No se pudo cambiar el nivel:\n{e}", parent=self.ventana)
+            return
+        
+        persona = self.persona_seleccionada
+        
+        def al_terminar(_):
+            persona['nivel_nombre'] = nuevo_nivel_nombre
+            if persona is self.persona_seleccionada:
+                self.widgets['label_nivel'].config(text=nuevo_nivel_nombre)
             
             self.cargar_usuarios()
             
             messagebox.showinfo("Éxito", f"Nivel actualizado a {nuevo_nivel_nombre}", parent=self.ventana)
-            
-        except Exception as e:
+        
+        def al_fallar(e):
             messagebox.showerror("Error", f"No se pudo cambiar el nivel:\n{e}", parent=self.ventana)
+        
+        self.repositorio.ejecutar(
+            self.db.actualizar_nivel_persona,
+            persona['person_id'],
+            nuevo_nivel,
+            al_terminar=al_terminar,
+            al_fallar=al_fallar
+        )
     
     def guardar_observaciones(self):
         """Guardar observaciones del terapeuta"""
@@ -1139,20 +1648,23 @@ class PanelTerapeuta:
             messagebox.showwarning("Advertencia", "No hay observaciones para guardar", parent=self.ventana)
             return
         
-        try:
-            obs_id = self.db.crear_observacion(
-                person_id=self.persona_seleccionada['person_id'],
-                observacion=observaciones,
-                terapeuta="Sistema"
-            )
-            
+        def al_terminar(obs_id):
             if obs_id:
                 messagebox.showinfo("Éxito", "Observaciones guardadas correctamente", parent=self.ventana)
             else:
-                raise Exception("No se pudo guardar")
-            
-        except Exception as e:
+                al_fallar(Exception("No se pudo guardar"))
+        
+        def al_fallar(e):
             messagebox.showerror("Error", f"No se pudieron guardar las observaciones:\n{e}", parent=self.ventana)
+        
+        self.repositorio.ejecutar(
+            self.db.crear_observacion,
+            self.persona_seleccionada['person_id'],
+            observaciones,
+            "Sistema",
+            al_terminar=al_terminar,
+            al_fallar=al_fallar
+        )
     
     def abrir_ventana_edicion(self):
         """Abrir ventana modal para editar información"""
@@ -1272,25 +1784,42 @@ class PanelTerapeuta:
             sexo_texto = var_sexo.get()
             
             sexo = 'M' if sexo_texto == 'Masculino' else 'F' if sexo_texto == 'Femenino' else None
+            person_id = self.persona_seleccionada['person_id']
             
-            exito = self.db.actualizar_datos_persona(
-                person_id=self.persona_seleccionada['person_id'],
-                name=nombre,
-                apellido=apellido if apellido else None,
-                dni=dni if dni else None,
-                age=edad,
-                sex=sexo
-            )
+            def al_terminar(exito):
+                if exito:
+                    messagebox.showinfo("Éxito", "Información actualizada", parent=self.ventana)
+                    if ventana_modal.winfo_exists():
+                        ventana_modal.destroy()
+                    self.ventana.lift()
+                    self.ventana.focus_set()
+                    self.cargar_detalles_usuario(person_id)
+                    self.cargar_usuarios()
+                else:
+                    messagebox.showerror("Error", "No se pudo actualizar", parent=self.ventana)
+                    if btn_guardar.winfo_exists():
+                        btn_guardar.config(state='normal')
             
-            if exito:
-                messagebox.showinfo("Éxito", "Información actualizada", parent=self.ventana)
-                ventana_modal.destroy()
-                self.ventana.lift()
-                self.ventana.focus_set()
-                self.cargar_detalles_usuario(self.persona_seleccionada['person_id'])
-                self.cargar_usuarios()
-            else:
-                messagebox.showerror("Error", "No se pudo actualizar", parent=self.ventana)
+            # Evitar un segundo guardado mientras se escribe
+            btn_guardar.config(state='disabled')
+            
+            def actualizar():
+                exito = self.db.actualizar_datos_persona(
+                    person_id=person_id,
+                    name=nombre,
+                    apellido=apellido if apellido else None,
+                    dni=dni if dni else None,
+                    age=edad,
+                    sex=sexo
+                )
+                # El índice solo trae personas nuevas: la editada se reemplaza aquí
+                if exito and self.indice_fonetico is not None:
+                    persona = self.db.obtener_persona(person_id)
+                    if persona:
+                        self.indice_fonetico.agregar(person_id, persona.name, persona.apellido)
+                return exito
+            
+            self.repositorio.ejecutar(actualizar, al_terminar=al_terminar)
         
         btn_guardar = tk.Button(
             frame_botones,
@@ -1326,6 +1855,11 @@ class PanelTerapeuta:
         print("\n🚪 Cerrando panel de administrador...")
         self.modo_admin_activo = False
 
+        # Descartar consultas pendientes del panel
+        if self.repositorio:
+            self.repositorio.cerrar()
+        self.reproductor.detener()
+
         # 1. Señalizar al hilo que debe detenerse
         if hasattr(self, '_detener_escucha'):
             self._detener_escucha.set()
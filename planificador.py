@@ -0,0 +1,177 @@
+"""
+PLANIFICADOR DE EJERCICIOS POR DOMINIO
+Cada persona tiene un estado por palabra (tabla dominio_palabra):
+
+- rating tipo Elo en escala logit: dominio = probabilidad de acierto. Tras
+  cada resultado se corrige según lo esperado (un acierto en una palabra
+  difícil sube más que uno en una palabra ya dominada); el paso se achica
+  con las repeticiones
+- repetición espaciada por sesiones: un acierto duplica el intervalo hasta
+  la próxima práctica, un error la vuelve a pedir en la sesión siguiente
+
+La sesión sale de un heap con prioridad (pendiente, dominio, azar): primero
+las palabras que tocan y peor se dominan, luego las nuevas; cada elección
+cuesta O(log n). Una palabra fallada se repite una vez al final de la sesión.
+"""
+import heapq
+import random
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from config import Config
+from models import Ejercicio, ResultadoEjercicio, DominioPalabra
+
+
+K_INICIAL = 2.0              # paso de la primera actualización
+K_MINIMO = 0.4               # paso con muchas repeticiones
+DIFICULTAD_LOGIT = 0.25      # rating inicial = -DIFICULTAD_LOGIT * (dificultad - 1)
+INTERVALO_MAXIMO = 16        # sesiones
+REPETICIONES_EN_SESION = 1   # veces que se repite una palabra fallada
+
+# Grupos del heap (el menor sale primero)
+GRUPO_PENDIENTE = 0
+GRUPO_REPETICION = 1
+GRUPO_NO_PENDIENTE = 2
+
+
+def estado_inicial(person_id: int, ejercicio: Ejercicio) -> DominioPalabra:
+    """Estado de una palabra nunca practicada (más difícil, menor dominio)"""
+    return DominioPalabra(
+        person_id=person_id,
+        exercise_id=ejercicio.exercise_id,
+        rating=-DIFICULTAD_LOGIT * (max(ejercicio.dificultad or 1, 1) - 1)
+    )
+
+
+def actualizar_dominio(estado: DominioPalabra, correcto: bool, numero_sesion: int,
+                       fecha: datetime = None) -> DominioPalabra:
+    """Aplicar un resultado al estado de la palabra (modifica y devuelve el estado)"""
+    esperado = estado.dominio
+    paso = K_MINIMO + (K_INICIAL - K_MINIMO) / (1 + estado.repeticiones)
+    estado.rating += paso * ((1.0 if correcto else 0.0) - esperado)
+
+    estado.repeticiones += 1
+    if correcto:
+        estado.aciertos += 1
+        estado.intervalo = min(max(1, estado.intervalo * 2), INTERVALO_MAXIMO)
+    else:
+        estado.intervalo = 1
+    estado.proxima_sesion = numero_sesion + estado.intervalo
+    estado.fecha = fecha or datetime.now()
+    return estado
+
+
+def aciertos_para_dominar(dificultad: int = 1) -> int:
+    """Aciertos seguidos que lleva una palabra nueva hasta Config.DOMINIO_OBJETIVO"""
+    estado = estado_inicial(0, Ejercicio(exercise_id=0, word='', dificultad=dificultad))
+    while estado.dominio < Config.DOMINIO_OBJETIVO:
+        actualizar_dominio(estado, True, estado.proxima_sesion)
+    return estado.aciertos
+
+
+def reconstruir_dominio(db, person_id: int, ejercicios: Dict[int, Ejercicio]) -> Dict[int, DominioPalabra]:
+    """Calcular el dominio desde el historial de resultados (personas anteriores al planificador)"""
+    estados = {}
+    for numero_sesion, exercise_id, correcto in db.obtener_historial_resultados(person_id):
+        estado = estados.get(exercise_id)
+        if estado is None:
+            ejercicio = ejercicios.get(exercise_id) or Ejercicio(exercise_id=exercise_id, word='')
+            estado = estados[exercise_id] = estado_inicial(person_id, ejercicio)
+        actualizar_dominio(estado, correcto, numero_sesion)
+
+    if estados:
+        db.guardar_dominio_palabras(list(estados.values()))
+    return estados
+
+
+class Planificador:
+    """
+    Elige los ejercicios de una sesión y actualiza el dominio tras cada resultado
+
+    Al reanudar una sesión, hechos son los exercise_id de los resultados ya
+    registrados en ella: no se vuelven a elegir y cuentan para el máximo.
+    """
+
+    def __init__(self, db, person_id: int, numero_sesion: int, ejercicios: List[Ejercicio],
+                 maximo: int = None, minimo: int = None, hechos: List[int] = None):
+        self.db = db
+        self.person_id = person_id
+        self.numero_sesion = numero_sesion
+        self.ejercicios = {e.exercise_id: e for e in ejercicios}
+        self.maximo = maximo or Config.EJERCICIOS_POR_SESION
+        self.minimo = min(minimo or Config.EJERCICIOS_MINIMOS_SESION, self.maximo)
+        hechos = list(hechos or ())
+        self.entregados = len(hechos)
+        self._repeticiones: Dict[int, int] = {}
+
+        self.estados = db.obtener_dominio_palabras(person_id)
+        if not self.estados:
+            self.estados = reconstruir_dominio(db, person_id, self.ejercicios)
+
+        # Heap de (grupo, dominio, azar, exercise_id): heapify O(n), cada elección O(log n)
+        hechos = set(hechos)
+        self._cola = [self._entrada(e) for e in self.ejercicios.values()
+                      if e.exercise_id not in hechos]
+        heapq.heapify(self._cola)
+
+    def _estado(self, ejercicio: Ejercicio) -> DominioPalabra:
+        estado = self.estados.get(ejercicio.exercise_id)
+        if estado is None:
+            estado = self.estados[ejercicio.exercise_id] = estado_inicial(self.person_id, ejercicio)
+        return estado
+
+    def _entrada(self, ejercicio: Ejercicio, grupo: int = None) -> tuple:
+        estado = self._estado(ejercicio)
+        if grupo is None:
+            pendiente = estado.proxima_sesion <= self.numero_sesion
+            grupo = GRUPO_PENDIENTE if pendiente else GRUPO_NO_PENDIENTE
+        return (grupo, estado.dominio, random.random(), ejercicio.exercise_id)
+
+    @property
+    def total_estimado(self) -> int:
+        """Ejercicios que tendrá la sesión si no hay repeticiones"""
+        pendientes = sum(1 for entrada in self._cola if entrada[0] != GRUPO_NO_PENDIENTE)
+        return min(self.maximo, max(self.minimo, self.entregados + pendientes),
+                   self.entregados + len(self._cola))
+
+    def siguiente(self) -> Optional[Ejercicio]:
+        """Próximo ejercicio, o None si la sesión terminó"""
+        if self.entregados >= self.maximo or not self._cola:
+            return None
+        # Las palabras que no tocan solo completan una sesión demasiado corta
+        if self._cola[0][0] == GRUPO_NO_PENDIENTE and self.entregados >= self.minimo:
+            return None
+
+        _, _, _, exercise_id = heapq.heappop(self._cola)
+        self.entregados += 1
+        return self.ejercicios[exercise_id]
+
+    def registrar(self, resultado: ResultadoEjercicio) -> Optional[DominioPalabra]:
+        """Actualizar y guardar el dominio de la palabra con un resultado"""
+        ejercicio = self.ejercicios.get(resultado.ejercicio_id)
+        if ejercicio is None:
+            return None
+
+        estado = actualizar_dominio(
+            self._estado(ejercicio), resultado.correcto, self.numero_sesion, resultado.timestamp
+        )
+        self.db.guardar_dominio_palabras([estado])
+
+        # Una palabra fallada vuelve a salir más adelante en la misma sesión
+        if not resultado.correcto:
+            veces = self._repeticiones.get(ejercicio.exercise_id, 0)
+            if veces < REPETICIONES_EN_SESION:
+                self._repeticiones[ejercicio.exercise_id] = veces + 1
+                heapq.heappush(self._cola, self._entrada(ejercicio, GRUPO_REPETICION))
+
+        return estado
+
+    def proporcion_dominada(self) -> float:
+        """Fracción de las palabras del nivel con dominio >= Config.DOMINIO_OBJETIVO"""
+        if not self.ejercicios:
+            return 0.0
+        dominadas = sum(
+            1 for e in self.ejercicios.values()
+            if self._estado(e).dominio >= Config.DOMINIO_OBJETIVO
+        )
+        return dominadas / len(self.ejercicios)
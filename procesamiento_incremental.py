@@ -0,0 +1,282 @@
+"""
+PROCESAMIENTO INCREMENTAL DE GRABACIONES
+Aplica un analizador a todos los archivos de audio_registros/ procesando solo
+lo nuevo o modificado. El manifiesto (tabla manifiesto_archivos) guarda por
+archivo su tamaño, fecha de modificación, hash y la versión del analizador:
+
+- tamaño y fecha iguales, misma versión  -> se omite sin abrir el archivo
+- tamaño o fecha distintos               -> se recalcula el hash; si el
+                                            contenido no cambió solo se
+                                            actualiza el manifiesto
+- contenido ya procesado en otra ruta    -> se reutiliza, no se analiza
+- versión del analizador distinta        -> se vuelve a analizar
+
+Los resultados y el manifiesto se guardan por lotes: si el proceso se
+interrumpe, la próxima ejecución retoma desde el último lote guardado.
+El hash y el análisis se reparten entre procesos.
+
+Uso:
+    python procesamiento_incremental.py [--analizador acustico] [--procesos N]
+"""
+import os
+import hashlib
+import argparse
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Tuple
+
+from config import Config
+
+
+TAMANO_LOTE = 200
+TAMANO_BLOQUE_HASH = 1024 * 1024
+CARPETAS_EXCLUIDAS = {'miniaturas'}
+
+
+class Analizador:
+    """
+    Un análisis aplicable a cada archivo
+
+    analizar recibe una ruta y devuelve un dict (debe ser una función de
+    módulo para poder enviarla a otros procesos); guardar recibe la base de
+    datos, la versión y una lista de (sha256, resultado) y devuelve True si
+    quedó guardado.
+    """
+
+    def __init__(self, nombre: str, version: int, analizar: Callable[[str], dict],
+                 guardar: Callable, extensiones: Tuple[str, ...] = ('.wav',)):
+        self.nombre = nombre
+        self.version = version
+        self.analizar = analizar
+        self.guardar = guardar
+        self.extensiones = extensiones
+
+
+def _guardar_acustico(db, version: int, resultados: List[Tuple[str, dict]]) -> bool:
+    lote = [dict(resultado, sha256=sha256) for sha256, resultado in resultados]
+    return db.guardar_analisis_acustico(version, lote) == len(lote)
+
+
+def _analizador_acustico() -> Analizador:
+    # Importación diferida: numpy solo se carga si se usa este analizador
+    import analisis_acustico
+    return Analizador('acustico', analisis_acustico.VERSION_ANALISIS,
+                      analisis_acustico.analizar_archivo, _guardar_acustico)
+
+
+ANALIZADORES: Dict[str, Callable[[], Analizador]] = {
+    'acustico': _analizador_acustico,
+}
+
+
+def hash_archivo(ruta: str) -> str:
+    """SHA-256 del contenido, leyendo por bloques"""
+    sha = hashlib.sha256()
+    with open(ruta, 'rb') as f:
+        for bloque in iter(lambda: f.read(TAMANO_BLOQUE_HASH), b''):
+            sha.update(bloque)
+    return sha.hexdigest()
+
+
+def _hash_o_error(ruta: str):
+    try:
+        return hash_archivo(ruta)
+    except OSError as e:
+        print(f"⚠️ No se pudo leer {ruta}: {e}")
+        return None
+
+
+def recorrer_archivos(carpeta: str, extensiones: Tuple[str, ...]) -> Dict[str, Tuple[int, int]]:
+    """Archivos bajo la carpeta: ruta relativa -> (tamano, mtime_ns)"""
+    archivos = {}
+    pendientes = [carpeta]
+
+    while pendientes:
+        actual = pendientes.pop()
+        try:
+            entradas = list(os.scandir(actual))
+        except OSError as e:
+            print(f"⚠️ No se pudo recorrer {actual}: {e}")
+            continue
+
+        for entrada in entradas:
+            if entrada.is_dir(follow_symlinks=False):
+                if entrada.name not in CARPETAS_EXCLUIDAS:
+                    pendientes.append(entrada.path)
+            elif entrada.name.lower().endswith(extensiones):
+                estado = entrada.stat()
+                ruta = os.path.relpath(entrada.path, carpeta).replace(os.sep, '/')
+                archivos[ruta] = (estado.st_size, estado.st_mtime_ns)
+
+    return archivos
+
+
+class ProcesadorIncremental:
+    """Aplica un analizador a los archivos nuevos o modificados de una carpeta"""
+
+    def __init__(self, db, analizador: Analizador, carpeta: str = None,
+                 procesos: int = None, tamano_lote: int = TAMANO_LOTE):
+        self.db = db
+        self.analizador = analizador
+        self.carpeta = carpeta or Config.AUDIO_FOLDER
+        self.procesos = procesos or os.cpu_count() or 1
+        self.tamano_lote = tamano_lote
+
+    def _ruta_absoluta(self, ruta: str) -> str:
+        return os.path.join(self.carpeta, *ruta.split('/'))
+
+    def planificar(self) -> dict:
+        """
+        Comparar la carpeta con el manifiesto
+
+        Returns:
+            Dict con pendientes [(ruta, tamano, mtime_ns, sha256 o None)],
+            eliminados, sin_cambios y manifiesto
+        """
+        version = self.analizador.version
+        manifiesto = self.db.obtener_manifiesto(self.analizador.nombre)
+        archivos = recorrer_archivos(self.carpeta, self.analizador.extensiones)
+
+        pendientes = []
+        sin_cambios = 0
+        for ruta, (tamano, mtime_ns) in sorted(archivos.items()):
+            anterior = manifiesto.get(ruta)
+            if anterior is not None and anterior[:2] == (tamano, mtime_ns):
+                if anterior[3] == version:
+                    sin_cambios += 1
+                    continue
+                # Solo cambió el analizador: el hash guardado sigue valiendo
+                pendientes.append((ruta, tamano, mtime_ns, anterior[2]))
+            else:
+                pendientes.append((ruta, tamano, mtime_ns, None))
+
+        return {
+            'pendientes': pendientes,
+            'eliminados': [ruta for ruta in manifiesto if ruta not in archivos],
+            'sin_cambios': sin_cambios,
+            'manifiesto': manifiesto,
+        }
+
+    def procesar(self) -> dict:
+        """
+        Procesar lo pendiente y actualizar el manifiesto
+
+        Returns:
+            Dict con sin_cambios, analizados, reutilizados, errores y eliminados
+        """
+        nombre, version = self.analizador.nombre, self.analizador.version
+        plan = self.planificar()
+        pendientes = plan['pendientes']
+        totales = {
+            'sin_cambios': plan['sin_cambios'], 'analizados': 0, 'reutilizados': 0,
+            'errores': 0, 'eliminados': self.db.eliminar_del_manifiesto(nombre, plan['eliminados']),
+        }
+
+        # Contenido ya procesado con esta versión (en cualquier ruta)
+        procesados = {
+            sha256 for (_, _, sha256, v) in plan['manifiesto'].values() if v == version
+        }
+
+        if not pendientes:
+            return totales
+
+        executor = ProcessPoolExecutor(max_workers=self.procesos) if self.procesos > 1 else None
+        mapear = executor.map if executor else map
+        try:
+            for inicio in range(0, len(pendientes), self.tamano_lote):
+                lote = pendientes[inicio:inicio + self.tamano_lote]
+                if not self._procesar_lote(lote, procesados, mapear, totales):
+                    print("❌ No se pudo guardar el lote; se retomará en la próxima ejecución")
+                    break
+                print(f"   📊 {inicio + len(lote):,}/{len(pendientes):,} archivos pendientes procesados")
+        finally:
+            if executor:
+                executor.shutdown(cancel_futures=True)
+
+        return totales
+
+    def _procesar_lote(self, lote: List[tuple], procesados: set, mapear, totales: dict) -> bool:
+        """Hash, análisis y guardado de un lote (resultados antes que manifiesto)"""
+        por_tarea = max(1, len(lote) // (self.procesos * 4))
+        kwargs = {'chunksize': por_tarea} if mapear is not map else {}
+
+        # 1. Hash de los archivos modificados o nuevos
+        sin_hash = [fila[0] for fila in lote if fila[3] is None]
+        hashes = dict(zip(sin_hash, mapear(
+            _hash_o_error, [self._ruta_absoluta(r) for r in sin_hash], **kwargs
+        )))
+
+        # 2. Analizar una sola vez cada contenido que no esté procesado
+        filas_manifiesto = []
+        a_analizar = {}
+        for ruta, tamano, mtime_ns, sha256 in lote:
+            sha256 = sha256 or hashes.get(ruta)
+            if sha256 is None:
+                totales['errores'] += 1
+                continue
+            filas_manifiesto.append((ruta, tamano, mtime_ns, sha256, self.analizador.version))
+            if sha256 in procesados or sha256 in a_analizar:
+                totales['reutilizados'] += 1
+            else:
+                a_analizar[sha256] = ruta
+
+        resultados = list(zip(a_analizar, mapear(
+            self.analizador.analizar,
+            [self._ruta_absoluta(r) for r in a_analizar.values()], **kwargs
+        )))
+        for _, resultado in resultados:
+            totales['errores' if 'error' in resultado else 'analizados'] += 1
+
+        # 3. Guardar: si se corta entre ambos pasos, el lote se repite
+        #    (guardar reemplaza, así que repetirlo no duplica nada)
+        if resultados and not self.analizador.guardar(self.db, self.analizador.version, resultados):
+            return False
+        if not self.db.guardar_manifiesto(self.analizador.nombre, filas_manifiesto):
+            return False
+
+        procesados.update(a_analizar)
+        return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Procesar grabaciones nuevas o modificadas")
+    parser.add_argument('--analizador', choices=sorted(ANALIZADORES), default='acustico')
+    parser.add_argument('--procesos', type=int, default=None,
+                        help='Procesos en paralelo (por defecto, uno por núcleo)')
+    parser.add_argument('--carpeta', default=Config.AUDIO_FOLDER)
+    parser.add_argument('--db', default=Config.DATABASE_PATH)
+    parser.add_argument('--tamano-lote', type=int, default=TAMANO_LOTE)
+    args = parser.parse_args()
+
+    from database import Database
+
+    print("\n" + "="*70)
+    print("🔁 PROCESAMIENTO INCREMENTAL DE GRABACIONES")
+    print("="*70 + "\n")
+
+    db = Database(args.db)
+    inicio = datetime.now()
+    try:
+        procesador = ProcesadorIncremental(
+            db, ANALIZADORES[args.analizador](), args.carpeta, args.procesos, args.tamano_lote
+        )
+        totales = procesador.procesar()
+    except Exception as e:
+        print(f"❌ Error en el procesamiento: {e}")
+        return
+    finally:
+        db.cerrar()
+
+    print(f"\n   ⏭️  Sin cambios: {totales['sin_cambios']:,}")
+    print(f"   ✅ Analizados: {totales['analizados']:,}")
+    print(f"   ♻️  Contenido ya procesado: {totales['reutilizados']:,}")
+    print(f"   ⚠️  Con error: {totales['errores']:,}")
+    print(f"   🗑️  Quitados del manifiesto: {totales['eliminados']:,}")
+
+    segundos = (datetime.now() - inicio).total_seconds()
+    print(f"\n⏱️  Tiempo total: {segundos:.2f} s")
+    print("="*70 + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+REPOSITORIO ASÍNCRONO DEL PANEL
+Ejecuta las consultas del panel de terapeuta en hilos de trabajo y entrega
+los resultados al hilo de Tk con after(), para que la ventana no se congele
+mientras SQLite trabaja (por ejemplo, mientras una sesión está escribiendo)
+"""
+import queue
+from concurrent.futures import ThreadPoolExecutor
+
+
+class RepositorioPanel:
+    """
+    Cola de tareas de base de datos para una ventana Tk
+
+    Las funciones corren en un ThreadPoolExecutor (cada hilo usa su propia
+    conexión de Database) y los callbacks al_terminar / al_fallar se llaman
+    siempre en el hilo de Tk. Las tareas pueden agruparse para cancelarlas
+    juntas: al elegir otro paciente se descartan las cargas del anterior.
+    """
+
+    MAX_HILOS = 2
+    INTERVALO_MS = 20  # cada cuánto se revisan los resultados mientras hay tareas
+
+    def __init__(self, ventana, max_hilos: int = None):
+        self.ventana = ventana
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_hilos or self.MAX_HILOS,
+            thread_name_prefix='panel-bd'
+        )
+        self._resultados = queue.Queue()
+        self._pendientes = 0
+        self._generacion_grupo = {}  # grupo -> generación vigente
+        self._revisando = False
+        self._cerrado = False
+
+    def ejecutar(self, funcion, *args, al_terminar=None, al_fallar=None, grupo: str = None):
+        """
+        Ejecutar funcion(*args) en segundo plano
+
+        Args:
+            al_terminar: callback(resultado) en el hilo de Tk
+            al_fallar: callback(excepción) en el hilo de Tk (si no, se imprime)
+            grupo: nombre del grupo para cancelar() (None = no se cancela)
+        """
+        if self._cerrado:
+            return
+
+        generacion = self._generacion_grupo.get(grupo, 0)
+        tarea = (grupo, generacion, al_terminar, al_fallar)
+
+        def trabajo():
+            # Cancelada mientras esperaba su turno
+            if not self._vigente(grupo, generacion):
+                self._resultados.put((tarea, None, None, True))
+                return
+            try:
+                self._resultados.put((tarea, funcion(*args), None, False))
+            except Exception as e:
+                self._resultados.put((tarea, None, e, False))
+
+        self._pendientes += 1
+        self._executor.submit(trabajo)
+
+        if not self._revisando:
+            self._revisando = True
+            self.ventana.after(self.INTERVALO_MS, self._revisar_resultados)
+
+    def cancelar(self, grupo: str):
+        """Descartar los resultados de las tareas del grupo ya enviadas"""
+        self._generacion_grupo[grupo] = self._generacion_grupo.get(grupo, 0) + 1
+
+    def _vigente(self, grupo, generacion) -> bool:
+        return grupo is None or self._generacion_grupo.get(grupo, 0) == generacion
+
+    def _revisar_resultados(self):
+        """Entregar los resultados listos (en el hilo de Tk)"""
+        if self._cerrado:
+            return
+
+        while True:
+            try:
+                tarea, resultado, error, cancelada = self._resultados.get_nowait()
+            except queue.Empty:
+                break
+
+            self._pendientes -= 1
+            grupo, generacion, al_terminar, al_fallar = tarea
+
+            if cancelada or not self._vigente(grupo, generacion):
+                continue
+
+            try:
+                if error is not None:
+                    if al_fallar:
+                        al_fallar(error)
+                    else:
+                        print(f"❌ Error en consulta del panel: {error}")
+                elif al_terminar:
+                    al_terminar(resultado)
+            except Exception as e:
+                print(f"❌ Error al mostrar resultado en el panel: {e}")
+
+        # Solo se sigue revisando mientras haya tareas en curso
+        if self._pendientes > 0:
+            self.ventana.after(self.INTERVALO_MS, self._revisar_resultados)
+        else:
+            self._revisando = False
+
+    def cerrar(self):
+        """Descartar lo pendiente y liberar los hilos"""
+        self._cerrado = True
+        self._executor.shutdown(wait=False, cancel_futures=True)
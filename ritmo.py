@@ -0,0 +1,197 @@
+"""
+RITMO DE LA SESIÓN
+Los turnos avanzan cuando termina lo que se estaba esperando, no después
+de un time.sleep fijo:
+
+- hablar() vuelve cuando termina la reproducción
+- grabar_y_escuchar() vuelve con el archivo ya escrito
+- la celebración avisa con un evento (InterfazUnificada.celebracion_terminada)
+  cuando termina la animación
+
+Lo único fijo son las pausas mínimas del perfil elegido en
+Config.PERFIL_RITMO (por ejemplo, que el niño alcance a leer su nombre en
+pantalla). El perfil 'anterior' reproduce las pausas fijas de antes, para
+comparar: cada llamada pasa en 'anterior' los segundos exactos del
+time.sleep que reemplazó (un mismo nombre de pausa reemplazó sleeps de
+distinta duración).
+
+Cada sesión lleva una línea de tiempo con las pausas y esperas: al terminar
+se imprime el resumen y se agrega a lineas_tiempo/sesiones.jsonl. Comparar:
+    PERFIL_RITMO=anterior python main.py   vs   python main.py
+"""
+import os
+import json
+import time
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from config import Config
+from trazas import tramo
+
+
+# Segundos por pausa. En 'celebracion', None = esperar el evento de la
+# interfaz; un número = pausa fija (como antes). En 'anterior' manda el valor
+# que pasa cada llamada; estos son solo para las que no lo pasan
+PERFILES_RITMO: Dict[str, Dict[str, Optional[float]]] = {
+    'anterior': {
+        'ver_texto': 1.5,          # nombre o edad en pantalla
+        'tras_hablar': 0.2,
+        'antes_de_grabar': 0.2,
+        'ver_feedback': 0.3,       # cambio de color de la palabra
+        'celebracion': 2.5,
+        'tras_feedback': 0.5,
+        'entre_ejercicios': 0.2,
+        'cierre': 2.0,             # subida de nivel y vuelta al modo escucha
+    },
+    'normal': {
+        'ver_texto': 1.0,
+        'tras_hablar': 0.0,
+        'antes_de_grabar': 0.1,    # que el micrófono no tome el final de la voz
+        'ver_feedback': 0.3,
+        'celebracion': None,
+        'tras_feedback': 0.0,
+        'entre_ejercicios': 0.0,
+        'cierre': 0.0,
+    },
+    'rapido': {
+        'ver_texto': 0.5,
+        'tras_hablar': 0.0,
+        'antes_de_grabar': 0.0,
+        'ver_feedback': 0.15,
+        'celebracion': None,
+        'tras_feedback': 0.0,
+        'entre_ejercicios': 0.0,
+        'cierre': 0.0,
+    },
+}
+
+# Tope de una espera por evento (por si la interfaz nunca avisa)
+ESPERA_MAXIMA = 5.0
+
+
+def perfil_actual() -> Dict[str, Optional[float]]:
+    return PERFILES_RITMO.get(Config.PERFIL_RITMO, PERFILES_RITMO['normal'])
+
+
+def _segundos(nombre: str, anterior: Optional[float]) -> Optional[float]:
+    """Duración de la pausa en el perfil actual (None = esperar el evento)"""
+    perfil = perfil_actual()
+    if anterior is not None and perfil is PERFILES_RITMO['anterior']:
+        return anterior
+    return perfil.get(nombre)
+
+
+# ========== LÍNEA DE TIEMPO ==========
+
+class LineaTiempo:
+    """Pausas y esperas de una sesión, con su momento y duración"""
+
+    def __init__(self):
+        self.fecha = datetime.now()
+        self.inicio = time.perf_counter()
+        self.fin: Optional[float] = None
+        self.eventos: List[tuple] = []  # (segundo, tipo, nombre, duracion)
+
+    def registrar(self, tipo: str, nombre: str, inicio: float, duracion: float):
+        self.eventos.append((inicio - self.inicio, tipo, nombre, duracion))
+
+    def terminar(self):
+        self.fin = time.perf_counter()
+
+    def resumen(self) -> dict:
+        duracion = (self.fin or time.perf_counter()) - self.inicio
+        por_nombre: Dict[str, float] = {}
+        totales = {'pausa': 0.0, 'espera': 0.0}
+        for _, tipo, nombre, segundos in self.eventos:
+            totales[tipo] = totales.get(tipo, 0.0) + segundos
+            por_nombre[nombre] = por_nombre.get(nombre, 0.0) + segundos
+        return {
+            'fecha': self.fecha.isoformat(timespec='seconds'),
+            'perfil': Config.PERFIL_RITMO,
+            'duracion': round(duracion, 3),
+            'pausas': round(totales['pausa'], 3),
+            'esperas': round(totales['espera'], 3),
+            'por_nombre': {nombre: round(s, 3) for nombre, s in por_nombre.items()},
+        }
+
+    def imprimir_resumen(self):
+        r = self.resumen()
+        muerto = r['pausas'] + r['esperas']
+        porcentaje = muerto / r['duracion'] * 100 if r['duracion'] else 0.0
+        print(f"\n⏱️  Ritmo '{r['perfil']}': sesión de {r['duracion']:.1f} s, "
+              f"{muerto:.1f} s de pausas y esperas ({porcentaje:.0f}%)")
+        for nombre, segundos in sorted(r['por_nombre'].items(), key=lambda x: -x[1]):
+            if segundos > 0:
+                print(f"   {nombre:<18} {segundos:6.1f} s")
+
+    def guardar(self, carpeta: str = None):
+        """Agregar el resumen a sesiones.jsonl"""
+        carpeta = carpeta or Config.LINEAS_TIEMPO_FOLDER
+        try:
+            os.makedirs(carpeta, exist_ok=True)
+            with open(os.path.join(carpeta, 'sesiones.jsonl'), 'a', encoding='utf-8') as f:
+                f.write(json.dumps(self.resumen(), ensure_ascii=False) + '\n')
+        except OSError as e:
+            print(f"⚠️ No se pudo guardar la línea de tiempo: {e}")
+
+
+_linea_actual: Optional[LineaTiempo] = None
+
+
+def iniciar_linea_tiempo() -> LineaTiempo:
+    global _linea_actual
+    _linea_actual = LineaTiempo()
+    return _linea_actual
+
+
+def terminar_linea_tiempo() -> Optional[LineaTiempo]:
+    """Cerrar la línea de tiempo en curso, imprimir y guardar su resumen"""
+    global _linea_actual
+    linea, _linea_actual = _linea_actual, None
+    if linea is not None:
+        linea.terminar()
+        linea.imprimir_resumen()
+        linea.guardar()
+    return linea
+
+
+# ========== PAUSAS Y ESPERAS ==========
+
+def pausa(nombre: str, anterior: Optional[float] = None):
+    """
+    Pausa mínima del perfil (0 = seguir de inmediato)
+
+    Args:
+        anterior: segundos del time.sleep que esta llamada reemplazó
+            (los usa el perfil 'anterior')
+    """
+    segundos = _segundos(nombre, anterior) or 0.0
+    inicio = time.perf_counter()
+    if segundos > 0:
+        with tramo(f"pausa.{nombre}", 'ritmo'):
+            time.sleep(segundos)
+    if _linea_actual is not None:
+        _linea_actual.registrar('pausa', nombre, inicio, time.perf_counter() - inicio)
+
+
+def esperar(nombre: str, evento: Optional[threading.Event], maximo: float = ESPERA_MAXIMA,
+            anterior: Optional[float] = None) -> bool:
+    """
+    Esperar a que se complete un evento (o la pausa fija del perfil, si tiene)
+
+    Returns:
+        False si se llegó al máximo sin que el evento se completara
+    """
+    if _segundos(nombre, anterior) is not None:
+        pausa(nombre, anterior)
+        return True
+
+    inicio = time.perf_counter()
+    with tramo(f"espera.{nombre}", 'ritmo'):
+        completado = evento.wait(maximo) if evento is not None else True
+    if _linea_actual is not None:
+        _linea_actual.registrar('espera', nombre, inicio, time.perf_counter() - inicio)
+    if not completado:
+        print(f"⚠️ '{nombre}' no terminó en {maximo:.1f} s, se continúa")
+    return completado
@@ -5,11 +5,15 @@ Graba automáticamente los audios de cada ejercicio de forma organizada
 VERSIÓN LIMPIA: Solo usa métodos válidos de InterfazUnificada
 """
 import time
-import random
 from typing import Optional, List, Tuple
 from datetime import datetime
 from models import Persona, Ejercicio, Sesion, ResultadoEjercicio, NivelTerapia
-from database import Database
+from database import Database, BufferResultadosSesion
+from fonetica import IndiceFonetico
+from almacen_audio import AlmacenAudio
+from planificador import Planificador, aciertos_para_dominar
+from diagnostico_adaptativo import DiagnosticoAdaptativo
+from ritmo import pausa, esperar
 
 # Importar sistema de IA
 from chatopenai import (
@@ -30,6 +34,12 @@ class Config:
     MAX_AGE = 18
     RECORDING_DURATION = 4
     LEVEL_UP_THRESHOLD = 0.80
+    PROPORCION_DOMINADAS_SUBIR_NIVEL = 0.70  # palabras del nivel con dominio >= DOMINIO_OBJETIVO
+    
+    # Identificación por voz (índice fonético)
+    PUNTAJE_MINIMO_IDENTIFICACION = 0.75  # por debajo se considera desconocido
+    PUNTAJE_IDENTIFICACION_AUTOMATICA = 0.95  # con apellido, se acepta sin preguntar
+    MARGEN_CONFIRMACION = 0.10            # candidatos más cercanos se confirman
 
 
 class RobotServiceInterfazUnificada:
@@ -41,6 +51,10 @@ class RobotServiceInterfazUnificada:
         self.interfaz = None
         self.estrellas_sesion = 0
         self.numero_sesion_actual = 0
+        self.indice_fonetico = IndiceFonetico.desde_db(db)
+        if self.audio and hasattr(self.audio, 'set_almacen_audio'):
+            self.audio.set_almacen_audio(AlmacenAudio(db))
+        print(f"🔤 Índice fonético: {len(self.indice_fonetico)} pacientes")
         print("✅ RobotService inicializado con interfaz unificada y grabación de audio")
     
     def set_interfaz(self, interfaz):
@@ -88,7 +102,7 @@ class RobotServiceInterfazUnificada:
         # Saludo personalizado
         saludo = consultar("Di un saludo corto para un niño nuevo que viene a terapia de habla")
         self.audio.hablar(saludo)
-        time.sleep(0.1)
+        pausa('tras_hablar', anterior=0.1)
         
         # === NOMBRE ===
         nombre = pedir_nombre_con_reintentos(
@@ -105,11 +119,11 @@ class RobotServiceInterfazUnificada:
         # MOSTRAR EL NOMBRE EN LA INTERFAZ
         if self.interfaz:
             self.interfaz.mostrar_nombre(nombre)
-            time.sleep(1.5)
+            pausa('ver_texto', anterior=1.5)
         
         # Confirmar nombre
         self.audio.hablar(f"Mucho gusto, {nombre}.")
-        time.sleep(0.1)
+        pausa('tras_hablar', anterior=0.1)
         
         # === APELLIDO ===
         def validador_apellido(respuesta: str):
@@ -141,7 +155,7 @@ class RobotServiceInterfazUnificada:
         # MOSTRAR NOMBRE COMPLETO
         if self.interfaz:
             self.interfaz.mostrar_nombre(nombre_completo)
-            time.sleep(2)
+            pausa('ver_texto', anterior=2.0)
         
         # === EDAD ===
         edad = pedir_edad_con_reintentos(
@@ -158,7 +172,7 @@ class RobotServiceInterfazUnificada:
         # MOSTRAR EDAD
         if self.interfaz:
             self.interfaz.mostrar_nombre(f"{edad} años")
-            time.sleep(1)
+            pausa('ver_texto', anterior=1.0)
         
         # === SEXO ===
         if self.interfaz:
@@ -224,7 +238,7 @@ class RobotServiceInterfazUnificada:
         
         apellido_texto = apellido if apellido else ""
         self.audio.hablar(f"Tu nombre es {nombre} {apellido_texto} y tienes {edad} años.")
-        time.sleep(0.5)
+        pausa('tras_hablar', anterior=0.5)
         
         # === GUARDAR EN BASE DE DATOS ===
         self.audio.hablar("Perfecto. Guardando tus datos.")
@@ -240,6 +254,8 @@ class RobotServiceInterfazUnificada:
         persona.person_id = person_id
         
         if person_id:
+            self.indice_fonetico.agregar(person_id, nombre, apellido)
+            
             mensaje_exito = feedback_motivador("exito")
             self.audio.hablar(mensaje_exito)
             
@@ -254,32 +270,25 @@ class RobotServiceInterfazUnificada:
         print("\n🎯 === TEST DIAGNÓSTICO ===")
         
         self.audio.hablar(f"Hola {persona.name}. Vamos a hacer un pequeño test.")
-        time.sleep(0.1)
+        pausa('tras_hablar', anterior=0.1)
         
         # Obtener TODOS los ejercicios de TODOS los niveles
         print("🔍 Obteniendo ejercicios de todos los niveles para el test...")
         ejercicios_disponibles = self.db.obtener_todos_ejercicios()
 
-        # Verificar que hay al menos 6 ejercicios
-        if len(ejercicios_disponibles) < 6:
-            print(f"⚠️ Solo hay {len(ejercicios_disponibles)} ejercicios disponibles")
-            ejercicios_test = ejercicios_disponibles
-        else:
-            # Seleccionar 6 ejercicios ALEATORIOS sin repetición
-            ejercicios_test = random.sample(ejercicios_disponibles, 6)
-
-        print(f"🔀 Test con {len(ejercicios_test)} ejercicios aleatorios")
-        print("📝 Ejercicios seleccionados:")
-        for ej in ejercicios_test:
-            print(f"   • {ej.word} (Nivel: {ej.nivel.name})")
-        print()
+        # Cada ejercicio se elige según las respuestas anteriores y el test
+        # termina cuando el nivel es claro
+        diagnostico = DiagnosticoAdaptativo(ejercicios_disponibles)
+        print(f"🧭 Test adaptativo: entre {diagnostico.minimo} y {diagnostico.maximo} ejercicios")
         
         aciertos = 0
         totalConfianza = 0
-        total = len(ejercicios_test)
+        total = 0
         
-        for i, ejercicio_actual in enumerate(ejercicios_test, 1):
-            print(f"\n--- Test {i}/{total}: {ejercicio_actual.word} (Nivel: {ejercicio_actual.nivel.name}) ---")
+        while (ejercicio_actual := diagnostico.siguiente()) is not None:
+            total += 1
+            print(f"\n--- Test {total} (habilidad estimada {diagnostico.habilidad:.1f}): "
+                  f"{ejercicio_actual.word} (Nivel: {ejercicio_actual.nivel.name}) ---")
             
             # Dar instrucción (mostrará eyes.gif automáticamente)
             self.audio.hablar(f"Repite: {ejercicio_actual.word}")
@@ -292,7 +301,7 @@ class RobotServiceInterfazUnificada:
                     ruta_imagen=ruta_imagen
                 )
             
-            time.sleep(0.3)
+            pausa('antes_de_grabar', anterior=0.3)
             
             # === GRABAR Y EVALUAR SIMULTÁNEAMENTE ===
             print(f"🎙️ Grabando audio del test: {ejercicio_actual.word}")
@@ -321,7 +330,7 @@ class RobotServiceInterfazUnificada:
                         ruta_imagen=ruta_imagen
                     )
                 
-                time.sleep(0.3)
+                pausa('antes_de_grabar', anterior=0.3)
                 
                 # Segundo intento
                 respuesta, audio_path_2 = self.audio.grabar_y_escuchar(
@@ -353,28 +362,23 @@ class RobotServiceInterfazUnificada:
             
             if correcto:
                 aciertos += 1
+            diagnostico.registrar(ejercicio_actual, correcto)
             
             # Dar feedback verbal (mostrará eyes.gif)
             self.audio.hablar(feedback_ia)
-            time.sleep(1)
+            pausa('tras_feedback', anterior=1.0)
         
         # Volver a eyes.gif
         if self.interfaz:
             self.interfaz.mostrar_eyes()
         
         # Clasificación
-        tasa_exito = aciertos / total
-        print(f"\n📊 Resultado test: {aciertos}/{total} ({tasa_exito*100:.0f}%)")
-        print(f"Confianza promedio: {(totalConfianza/total):.2f}")
-        
-        if tasa_exito >= 0.9:
-            nivel = NivelTerapia.AVANZADO
-        elif tasa_exito >= 0.7:
-            nivel = NivelTerapia.INTERMEDIO
-        elif tasa_exito >= 0.5:
-            nivel = NivelTerapia.BASICO
-        else:
-            nivel = NivelTerapia.INICIAL
+        nivel = diagnostico.nivel_estimado
+        if total:
+            print(f"\n📊 Resultado test: {aciertos}/{total} ({aciertos/total*100:.0f}%)")
+            print(f"Confianza promedio: {(totalConfianza/total):.2f}")
+        print(f"🧭 Habilidad estimada: {diagnostico.habilidad:.2f} "
+              f"(certeza del nivel: {diagnostico.confianza*100:.0f}%)")
         
         # Almacenar nivel
         self.db.actualizar_nivel_persona(persona.person_id, nivel)
@@ -383,7 +387,7 @@ class RobotServiceInterfazUnificada:
         self.audio.hablar(f"Muy bien. Tu nivel es: {nivel.name}")
         
         # Mensaje motivador del nivel
-        time.sleep(0.5)
+        pausa('tras_hablar', anterior=0.5)
         mensaje_motivador = consultar(
             f"El niño {persona.name} está en el nivel {nivel.name}. "
             f"Explícale brevemente qué tipo de ejercicios hará en este nivel y motívalo a comenzar. "
@@ -393,7 +397,7 @@ class RobotServiceInterfazUnificada:
         
         print(f"💬 Mensaje motivador: {mensaje_motivador}")
         self.audio.hablar(mensaje_motivador)
-        time.sleep(0.5)
+        pausa('tras_hablar', anterior=0.5)
         
         print(f"✅ Nivel asignado: {nivel.name}")
         print(f"🎙️ Audios del test grabados en: audio_registros/{persona.person_id}/\n")
@@ -446,20 +450,23 @@ class RobotServiceInterfazUnificada:
         print(f"🔍 Buscando: {nombre} {apellido or ''}")
 
         # === BÚSQUEDA ===
-        persona = None
+        # Fonética: tolera errores del reconocimiento de voz ("Martines")
+        self.indice_fonetico.sincronizar(self.db)
+        candidatos = self.indice_fonetico.buscar(nombre, apellido, k=3)
+        for person_id, puntaje in candidatos:
+            print(f"   🔤 {self.indice_fonetico.nombre_completo(person_id)}: {puntaje:.2f}")
 
-        # Búsqueda precisa: nombre + apellido
-        if apellido:
-            persona = self.db.buscar_persona_por_nombre_apellido(nombre, apellido)
-            if persona:
-                print(f"✅ Encontrado por nombre + apellido")
+        persona = self._elegir_candidato(candidatos, con_apellido=bool(apellido))
+        hubo_candidatos = bool(candidatos) and candidatos[0][1] >= Config.PUNTAJE_MINIMO_IDENTIFICACION
 
-        # Fallback: solo por nombre si no encontró con apellido
-        if not persona:
-            print("⚠️ No encontrado por nombre+apellido, buscando solo por nombre...")
-            persona = self.db.buscar_persona_por_nombre(nombre)
-            if persona:
-                print(f"✅ Encontrado solo por nombre")
+        # Fallback: búsqueda de texto completo, siempre confirmada
+        if not persona and not hubo_candidatos:
+            print("⚠️ Sin coincidencia fonética, buscando por texto...")
+            resultados = self.db.buscar_personas(f"{nombre} {apellido or ''}", limite=1)
+            if resultados:
+                nombre_completo = f"{resultados[0].name} {resultados[0].apellido or ''}".strip()
+                if confirmar_con_usuario(self.audio, f"¿Eres {nombre_completo}?"):
+                    persona = resultados[0]
 
         # === RESULTADO ===
         if persona:
@@ -470,7 +477,7 @@ class RobotServiceInterfazUnificada:
             if self.interfaz:
                 nombre_mostrar = f"{persona.name} {persona.apellido or ''}".strip()
                 self.interfaz.mostrar_nombre(nombre_mostrar)
-                time.sleep(2)
+                pausa('ver_texto', anterior=2.0)
 
             saludo = consultar(
                 f"Di un saludo corto de bienvenida para {persona.name}, un niño que regresa a terapia",
@@ -485,24 +492,76 @@ class RobotServiceInterfazUnificada:
             print("❌ Usuario no encontrado\n")
             return None
     
+    def _elegir_candidato(self, candidatos: List[Tuple[int, float]],
+                          con_apellido: bool = False) -> Optional[Persona]:
+        """
+        Elegir entre los candidatos de la búsqueda fonética
+        
+        Solo se acepta sin preguntar una coincidencia casi exacta de nombre
+        y apellido (PUNTAJE_IDENTIFICACION_AUTOMATICA) sin otro candidato a
+        menos de MARGEN_CONFIRMACION; en cualquier otro caso se pregunta por
+        cada candidato cercano ("Mario" no es "María", ni "Juana" es "Juan").
+        El margen se mira antes que el mínimo: un segundo candidato apenas
+        por debajo de PUNTAJE_MINIMO_IDENTIFICACION también se pregunta.
+        """
+        if not candidatos or candidatos[0][1] < Config.PUNTAJE_MINIMO_IDENTIFICACION:
+            return None
+        
+        mejor_puntaje = candidatos[0][1]
+        cercanos = [
+            person_id for person_id, puntaje in candidatos
+            if mejor_puntaje - puntaje < Config.MARGEN_CONFIRMACION
+        ]
+        
+        if (len(cercanos) == 1 and con_apellido
+                and mejor_puntaje >= Config.PUNTAJE_IDENTIFICACION_AUTOMATICA):
+            print(f"✅ Encontrado por coincidencia fonética")
+            return self.db.obtener_persona(cercanos[0])
+        
+        print(f"⚠️ {len(cercanos)} candidato(s) posibles, pidiendo confirmación")
+        for person_id in cercanos:
+            nombre_completo = self.indice_fonetico.nombre_completo(person_id)
+            if confirmar_con_usuario(self.audio, f"¿Eres {nombre_completo}?"):
+                return self.db.obtener_persona(person_id)
+        
+        return None
+    
     # ========== RF2: ASIGNACIÓN Y EJECUCIÓN DE TERAPIAS ==========
     
-    def realizar_sesion_ejercicios(self, persona: Persona):
-        """RF2: Sesión completa - Muestra ejercicios con imágenes y GRABA AUDIOS"""
+    def realizar_sesion_ejercicios(self, persona: Persona, numero_sesion: Optional[int] = None,
+                                   reanudar: bool = False, reanudable: bool = False) -> bool:
+        """
+        RF2: Sesión completa - Muestra ejercicios con imágenes y GRABA AUDIOS
+        
+        Con reanudar=True continúa la sesión interrumpida con ese número: los
+        resultados ya guardados en su checkpoint se conservan y sus ejercicios
+        no se repiten.
+        
+        Con reanudable=True, si el niño corta antes de terminar el plan la
+        sesión no se guarda: queda en su checkpoint para seguirla más tarde
+        (ver maquina_sesion.py). Sin él se guarda con lo que se haya hecho.
+        
+        Returns:
+            False si la sesión quedó a medias en el checkpoint, True si no
+        """
         print("\n🎯 === SESIÓN DE EJERCICIOS ===")
         
-        # Calcular número de sesión
-        sesiones_previas = self.db.obtener_sesiones_por_persona(persona.person_id)
-        self.numero_sesion_actual = len(sesiones_previas) + 1
+        # Número de sesión (lo calcula quien llama si la sesión se puede reanudar)
+        if numero_sesion is None:
+            numero_sesion = self.db.contar_sesiones_persona(persona.person_id) + 1
+        self.numero_sesion_actual = numero_sesion
         print(f"📊 Sesión número: {self.numero_sesion_actual}")
         
         # Mensaje inicial
-        intro = consultar(
-            "Di una frase muy corta motivando a un niño a hacer ejercicios de habla",
-            contexto="Debe ser entusiasta y positivo"
-        )
-        self.audio.hablar(intro)
-        time.sleep(0.2)
+        if reanudar:
+            self.audio.hablar("Sigamos con los ejercicios.")
+        else:
+            intro = consultar(
+                "Di una frase muy corta motivando a un niño a hacer ejercicios de habla",
+                contexto="Debe ser entusiasta y positivo"
+            )
+            self.audio.hablar(intro)
+        pausa('tras_hablar', anterior=0.2)
         
         # Obtener ejercicios del nivel
         ejercicios = self.db.obtener_ejercicios_por_nivel(persona.nivel_actual)
@@ -512,13 +571,24 @@ class RobotServiceInterfazUnificada:
             ejercicios = self.db.obtener_todos_ejercicios()
             if not ejercicios:
                 self.audio.hablar("No hay ejercicios disponibles ahora.")
-                return
+                return True
         
         print(f"📋 Total ejercicios: {len(ejercicios)}")
         
-        # ALEATORIZAR EJERCICIOS
-        random.shuffle(ejercicios)
-        print("🔀 Ejercicios aleatorizados")
+        # Resultados en memoria + checkpoint en disco; se guardan juntos al final
+        buffer = BufferResultadosSesion(
+            self.db, persona.person_id, self.numero_sesion_actual, persona.nivel_actual,
+            reanudar=reanudar
+        )
+        if buffer.resultados:
+            print(f"♻️ Reanudando con {len(buffer.resultados)} ejercicios ya hechos")
+        
+        # Sesión corta: primero las palabras que tocan y menos domina
+        planificador = Planificador(
+            self.db, persona.person_id, self.numero_sesion_actual, ejercicios,
+            hechos=[r.ejercicio_id for r in buffer.resultados]
+        )
+        print(f"🧭 Ejercicios planificados: {planificador.total_estimado}")
         
         # Crear sesión
         sesion = Sesion(
@@ -526,46 +596,63 @@ class RobotServiceInterfazUnificada:
             nivel=persona.nivel_actual,
             fecha=datetime.now(),
             numero_sesion=self.numero_sesion_actual,
-            ejercicios_completados=[]
+            ejercicios_completados=list(buffer.resultados)
         )
         
-        self.estrellas_sesion = 0
+        # Una estrella por acierto, contando los de antes de la interrupción
+        self.estrellas_sesion = sesion.ejercicios_correctos
         
         # Ejecutar cada ejercicio
-        for i, ejercicio in enumerate(ejercicios, 1):
+        i = len(buffer.resultados)
+        cortada = False
+        while (ejercicio := planificador.siguiente()) is not None:
+            i += 1
+            total = planificador.total_estimado
             print(f"\n{'='*60}")
-            print(f"Ejercicio {i}/{len(ejercicios)}: {ejercicio.word}")
+            print(f"Ejercicio {i}/{total}: {ejercicio.word}")
             print('='*60)
             
             # Verificar si quiere continuar
             if not manejar_frustracion(self.audio, sesion, None):
                 print("ℹ️ Sesión terminada por el usuario")
+                cortada = True
                 break
             
             # Ejecutar ejercicio CON IMAGEN Y GRABACIÓN DE AUDIO
             resultado = self._ejecutar_ejercicio_con_ia_y_grabacion(
-                ejercicio, persona, i, len(ejercicios)
+                ejercicio, persona, i, total
             )
             
             if resultado:
                 sesion.ejercicios_completados.append(resultado)
+                buffer.agregar(resultado)
+                planificador.registrar(resultado)
             else:
                 print("ℹ️ Usuario decidió terminar")
+                cortada = True
                 break
             
-            time.sleep(0.2)
+            pausa('entre_ejercicios', anterior=0.2)
         
         # Volver a eyes.gif
         if self.interfaz:
             self.interfaz.mostrar_eyes()
         
-        # RF4.1: Registrar sesión
+        # Cortada a pedido del niño: queda en el checkpoint para reanudarla
+        if cortada and reanudable:
+            print(f"⏸️ Sesión {self.numero_sesion_actual} en pausa: "
+                  f"{sesion.total_ejercicios} ejercicios en el checkpoint")
+            return False
+        
+        # RF4.1: Registrar sesión (con el resultado de cada ejercicio)
         if sesion.total_ejercicios > 0:
-            sesion_id = self.db.crear_sesion(sesion)
+            sesion_id = buffer.guardar(sesion)
             sesion.sesion_id = sesion_id
             
             # RF4.3: Evaluar progreso
-            self._evaluar_progreso_con_ia(persona, sesion)
+            self._evaluar_progreso_con_ia(persona, sesion, planificador)
+        else:
+            buffer.descartar()
         
         print(f"\n{'='*60}")
         print(f"✅ Sesión finalizada")
@@ -574,6 +661,7 @@ class RobotServiceInterfazUnificada:
         print(f"⭐ Estrellas: {self.estrellas_sesion}")
         print(f"🎙️ Audios grabados en: audio_registros/{persona.person_id}/")
         print('='*60 + "\n")
+        return True
     
     def _ejecutar_ejercicio_con_ia_y_grabacion(
         self, ejercicio: Ejercicio, persona: Persona, 
@@ -592,7 +680,7 @@ class RobotServiceInterfazUnificada:
                 ruta_imagen=ruta_imagen
             )
         
-        time.sleep(0.2)
+        pausa('antes_de_grabar', anterior=0.2)
         
         # === GRABAR Y EVALUAR SIMULTÁNEAMENTE ===
         inicio = time.time()
@@ -630,7 +718,7 @@ class RobotServiceInterfazUnificada:
                     ruta_imagen=ruta_imagen
                 )
             
-            time.sleep(0.5)
+            pausa('antes_de_grabar', anterior=0.5)
             
             # Segundo intento
             respuesta, audio_path_2 = self.audio.grabar_y_escuchar(
@@ -665,7 +753,7 @@ class RobotServiceInterfazUnificada:
             if self.interfaz:
                 # 1. Mostrar feedback visual en el ejercicio (cambio de color)
                 self.interfaz.mostrar_feedback_ejercicio(correcto)
-                time.sleep(0.3)  # Breve pausa para ver el cambio de color
+                pausa('ver_feedback', anterior=0.3)  # Breve pausa para ver el cambio de color
                 
                 if confianza > 0.7:
                     self.interfaz.mostrar_celebracion(duracion_segundos=2)
@@ -676,8 +764,9 @@ class RobotServiceInterfazUnificada:
             # 3. Dar feedback verbal MIENTRAS se muestra la celebración
             self.audio.hablar(feedback_ia)
             
-            # 4. Esperar a que termine el GIF (ya programado en mostrar_celebracion)
-            time.sleep(2.5)  # GIF (2s) + pausa (0.5s)
+            # 4. Esperar a que termine el GIF (si la voz terminó antes)
+            esperar('celebracion', self.interfaz.celebracion_terminada if self.interfaz else None,
+                    anterior=2.5)
             
         else:
             # Si está incorrecto, solo mostrar feedback visual
@@ -686,7 +775,7 @@ class RobotServiceInterfazUnificada:
             
             # Dar feedback verbal
             self.audio.hablar(feedback_ia)
-            time.sleep(0.5)
+            pausa('tras_feedback', anterior=0.5)
         
         # Crear resultado con la ruta del audio
         return ResultadoEjercicio(
@@ -698,7 +787,8 @@ class RobotServiceInterfazUnificada:
             audio_path=audio_path
         )
     
-    def _evaluar_progreso_con_ia(self, persona: Persona, sesion: Sesion):
+    def _evaluar_progreso_con_ia(self, persona: Persona, sesion: Sesion,
+                                 planificador: Optional[Planificador] = None):
         """RF4.3 y RF4.4: Evaluar progreso con celebración"""
         
         if not sesion.fue_exitosa():
@@ -709,6 +799,14 @@ class RobotServiceInterfazUnificada:
             print("ℹ️ No alcanzó umbral para subir de nivel")
             return
         
+        # Además de la sesión, tiene que dominar la mayoría de las palabras del nivel
+        if planificador is not None:
+            dominadas = planificador.proporcion_dominada()
+            if dominadas < Config.PROPORCION_DOMINADAS_SUBIR_NIVEL:
+                print(f"ℹ️ Domina {dominadas*100:.0f}% de las palabras del nivel, aún no sube "
+                      f"(cada una pide {aciertos_para_dominar()} aciertos en sesiones distintas)")
+                return
+        
         # Subir de nivel
         niveles = list(NivelTerapia)
         indice_actual = niveles.index(persona.nivel_actual)
@@ -728,7 +826,7 @@ class RobotServiceInterfazUnificada:
             self.audio.hablar(mensaje)
             
             print(f"🎉 ¡SUBIÓ DE NIVEL! → {nuevo_nivel.name}")
-            time.sleep(2)
+            pausa('cierre', anterior=2.0)
 
 
 # Alias para compatibilidad
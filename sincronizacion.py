@@ -0,0 +1,1085 @@
+"""
+SINCRONIZACIÓN ENTRE ROBOTS
+Envía a un almacén central los cambios de la base de datos de cada robot
+(tabla registro_cambios) y sus audios, y trae de vuelta las personas
+registradas en otros robots: un niño conserva su identidad y su historial
+aunque lo atiendan en robots distintos.
+
+- Los cambios viajan en lotes limitados por cantidad y por bytes; cada lote
+  confirmado queda anotado, así que si la conexión se corta la siguiente
+  sincronización continúa desde ahí. Los audios se suben por fragmentos y
+  también se retoman donde quedaron.
+- Un límite de bytes por segundo evita saturar la red del centro.
+- Cada fila tiene un identificador global "robot_id:id_local", por lo que
+  las sesiones de dos robots nunca chocan. Dos registros se unen como el
+  mismo niño solo si tienen el mismo DNI o si hay un vínculo confirmado
+  (la copia que un robot recibió de otro, o vincular() a mano): el nombre
+  solo no basta, hay muchos homónimos. La canónica es la registrada primero
+  y el resultado no depende del orden en que sincronicen los robots.
+- La edad, el nivel y la fecha de registro de una persona existente solo
+  cambian con los cambios de su propio registro (la canónica), nunca con
+  los de otro registro unido a ella.
+- El servidor escucha solo en 127.0.0.1; para publicarlo en la red hace
+  falta un token compartido (Config.SYNC_TOKEN), que los robots envían en
+  cada pedido.
+
+Uso:
+    python sincronizacion.py --central carpeta_o_url [--db data.db] [--kbps 256]
+    python sincronizacion.py --servidor carpeta [--puerto 8765] [--host 0.0.0.0 --token ...]
+    python sincronizacion.py --central carpeta --vincular robotA:12 robotB:7
+"""
+import os
+import gzip
+import hmac
+import json
+import time
+import hashlib
+import ipaddress
+import sqlite3
+import argparse
+import threading
+import unicodedata
+import urllib.request
+from abc import ABC, abstractmethod
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional, Tuple
+from urllib.parse import urlparse, parse_qs
+
+from config import Config
+from migraciones import aplicar_migraciones, TABLAS_SINCRONIZADAS
+
+
+TAMANO_LOTE = 500                   # cambios por lote
+MAX_BYTES_LOTE = 256 * 1024         # tamaño máximo de un lote (JSON)
+TAMANO_FRAGMENTO_AUDIO = 64 * 1024
+PUERTO_SERVIDOR = 8765
+
+# Columnas de person que se comparten entre robots
+CAMPOS_PERSONA = ('name', 'apellido', 'age', 'dni', 'sex',
+                  'diagnostic_level', 'actual_level', 'register_date')
+# Solo los cambia el propio registro del niño, nunca otro unido a él
+CAMPOS_PROTEGIDOS = ('age', 'diagnostic_level', 'actual_level', 'register_date')
+
+
+# ========== IDENTIDADES ==========
+
+def id_global(robot_id: str, id_local) -> str:
+    """Identificador de una fila en el almacén central"""
+    return f"{robot_id}:{id_local}"
+
+
+def _normalizar(texto) -> str:
+    texto = str(texto or '').lower()
+    sin_tildes = ''.join(
+        c for c in unicodedata.normalize('NFD', texto)
+        if unicodedata.category(c) != 'Mn'
+    )
+    return ' '.join(sin_tildes.split())
+
+
+def clave_identidad(persona: dict, global_id: str) -> str:
+    """
+    Clave con la que el almacén reconoce al mismo niño en varios robots
+
+    Con DNI basta el DNI. Sin DNI cada registro es su propio niño: unir por
+    nombre mezclaría el historial de homónimos. Para unirlos hace falta un
+    vínculo (ver AlmacenCentralLocal.vincular).
+    """
+    dni = ''.join(c for c in str(persona.get('dni') or '') if c.isalnum()).upper()
+    if dni:
+        return f"dni:{dni}"
+    return f"id:{global_id}"
+
+
+# ========== LÍMITE DE ANCHO DE BANDA ==========
+
+class LimitadorAncho:
+    """Cubeta de fichas: consumir() espera lo necesario para no pasar el límite"""
+
+    def __init__(self, bytes_por_segundo: Optional[int] = None):
+        self.bytes_por_segundo = bytes_por_segundo or 0
+        self._disponibles = float(self.bytes_por_segundo)
+        self._ultimo = time.monotonic()
+
+    def consumir(self, cantidad: int):
+        if not self.bytes_por_segundo:
+            return
+
+        ahora = time.monotonic()
+        self._disponibles = min(
+            self.bytes_por_segundo,
+            self._disponibles + (ahora - self._ultimo) * self.bytes_por_segundo
+        )
+        self._ultimo = ahora
+        self._disponibles -= cantidad
+
+        if self._disponibles < 0:
+            time.sleep(-self._disponibles / self.bytes_por_segundo)
+
+
+# ========== ALMACÉN CENTRAL ==========
+
+class AlmacenCentral(ABC):
+    """
+    Interfaz del almacén central
+
+    AlmacenCentralLocal guarda todo en una carpeta (SQLite + audios) y
+    AlmacenCentralHTTP habla con un servidor que publica esa misma carpeta.
+    Todas las operaciones se pueden repetir sin efectos duplicados.
+    """
+
+    @abstractmethod
+    def enviar_cambios(self, robot_id: str, cambios: List[dict]) -> int:
+        """Aplicar un lote de cambios; devuelve cuántos se aplicaron"""
+
+    @abstractmethod
+    def personas_desde(self, secuencia: int, limite: int = TAMANO_LOTE) -> Tuple[List[dict], int]:
+        """Personas canónicas modificadas después de 'secuencia' y la nueva secuencia"""
+
+    @abstractmethod
+    def bytes_audio(self, sha256: str) -> int:
+        """Bytes ya recibidos de un audio (para retomar una subida)"""
+
+    @abstractmethod
+    def subir_fragmento_audio(self, sha256: str, offset: int, datos: bytes):
+        """Agregar un fragmento al audio en curso, a partir de offset"""
+
+    @abstractmethod
+    def completar_audio(self, sha256: str, tamano: int, robot_id: str, ruta: str) -> bool:
+        """Verificar el audio recibido y asociarlo a la ruta del robot"""
+
+
+class AlmacenCentralLocal(AlmacenCentral):
+    """
+    Almacén central en una carpeta (local o compartida en red)
+
+    central.db guarda la última versión de cada fila de cada robot;
+    audios/ guarda los audios por hash de contenido (un audio repetido
+    se guarda una sola vez).
+    """
+
+    def __init__(self, carpeta: str):
+        self.carpeta = carpeta
+        self.carpeta_audios = os.path.join(carpeta, 'audios')
+        os.makedirs(self.carpeta_audios, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            os.path.join(carpeta, 'central.db'),
+            check_same_thread=False,
+            isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._crear_tablas()
+
+    def _crear_tablas(self):
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS personas (
+                globalId TEXT PRIMARY KEY,
+                robotId TEXT NOT NULL,
+                claveIdentidad TEXT NOT NULL,
+                datos TEXT,
+                version INTEGER NOT NULL,
+                fechaCambio TIMESTAMP,
+                eliminado INTEGER NOT NULL DEFAULT 0,
+                secuencia INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_personas_clave ON personas(claveIdentidad);
+            CREATE INDEX IF NOT EXISTS idx_personas_secuencia ON personas(secuencia);
+
+            -- Uniones confirmadas: copias entre robots y vincular()
+            CREATE TABLE IF NOT EXISTS vinculos (
+                globalId TEXT PRIMARY KEY,
+                claveIdentidad TEXT NOT NULL
+            );
+
+            CREATE TABLE IF NOT EXISTS registros (
+                tabla TEXT NOT NULL,
+                globalId TEXT NOT NULL,
+                robotId TEXT NOT NULL,
+                personaGlobalId TEXT,
+                datos TEXT,
+                version INTEGER NOT NULL,
+                fechaCambio TIMESTAMP,
+                eliminado INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (tabla, globalId)
+            );
+            CREATE INDEX IF NOT EXISTS idx_registros_persona ON registros(personaGlobalId, tabla);
+
+            CREATE TABLE IF NOT EXISTS audios (
+                sha256 TEXT PRIMARY KEY,
+                tamano INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS audio_origen (
+                robotId TEXT NOT NULL,
+                ruta TEXT NOT NULL,
+                sha256 TEXT NOT NULL,
+                PRIMARY KEY (robotId, ruta)
+            );
+        """)
+
+    def cerrar(self):
+        self._conn.close()
+
+    # ----- cambios -----
+
+    def enviar_cambios(self, robot_id: str, cambios: List[dict]) -> int:
+        aplicados = 0
+        with self._lock:
+            cursor = self._conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                for cambio in cambios:
+                    if cambio['tabla'] == 'person':
+                        aplicado = self._aplicar_persona(cursor, robot_id, cambio)
+                    else:
+                        aplicado = self._aplicar_registro(cursor, robot_id, cambio)
+                    aplicados += aplicado
+
+                cursor.execute("COMMIT")
+            except Exception:
+                cursor.execute("ROLLBACK")
+                raise
+
+        return aplicados
+
+    @staticmethod
+    def _siguiente_secuencia(cursor) -> int:
+        """
+        Secuencia nueva para un grupo de identidad que cambió
+
+        Cada grupo recibe la suya: si dos grupos compartieran secuencia,
+        personas_desde podría cortar una página entre ellos y el siguiente
+        pedido (secuencia > última) saltearía el resto.
+        """
+        cursor.execute("SELECT COALESCE(MAX(secuencia), 0) + 1 FROM personas")
+        return cursor.fetchone()[0]
+
+    def _aplicar_persona(self, cursor, robot_id: str, cambio: dict) -> bool:
+        global_id = id_global(robot_id, cambio['id'])
+        cursor.execute(
+            "SELECT version, claveIdentidad, datos FROM personas WHERE globalId = ?",
+            (global_id,)
+        )
+        actual = cursor.fetchone()
+
+        # Versión vieja o repetida (lote reenviado): no se aplica
+        if actual and actual[0] >= cambio['version']:
+            return False
+
+        datos = cambio['datos']
+        if datos is None:
+            if not actual:
+                return False
+            # Se conservan los datos para que los registros sigan teniendo dueño
+            datos = json.loads(actual[2]) if actual[2] else {}
+
+        clave = self._clave(cursor, global_id, datos, cambio.get('copia_de'))
+        secuencia = self._siguiente_secuencia(cursor)
+        cursor.execute("""
+            INSERT INTO personas (globalId, robotId, claveIdentidad, datos, version,
+                                  fechaCambio, eliminado, secuencia)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(globalId) DO UPDATE SET
+                claveIdentidad = excluded.claveIdentidad,
+                datos = excluded.datos,
+                version = excluded.version,
+                fechaCambio = excluded.fechaCambio,
+                eliminado = excluded.eliminado,
+                secuencia = excluded.secuencia
+        """, (global_id, robot_id, clave, json.dumps(datos), cambio['version'],
+              cambio['fecha'], int(cambio['datos'] is None), secuencia))
+
+        # Si cambió la clave, el grupo anterior también cambió de forma
+        if actual and actual[1] != clave:
+            cursor.execute(
+                "UPDATE personas SET secuencia = ? WHERE claveIdentidad = ?",
+                (self._siguiente_secuencia(cursor), actual[1])
+            )
+        return True
+
+    @staticmethod
+    def _clave(cursor, global_id: str, datos: dict, copia_de: Optional[str]) -> str:
+        """Clave de identidad: la del vínculo si lo hay, si no la de los datos"""
+        cursor.execute("SELECT claveIdentidad FROM vinculos WHERE globalId = ?", (global_id,))
+        fila = cursor.fetchone()
+        if fila:
+            return fila[0]
+
+        # Copia recibida de otro robot: el mismo niño que su original
+        if copia_de:
+            cursor.execute("SELECT claveIdentidad FROM personas WHERE globalId = ?", (copia_de,))
+            fila = cursor.fetchone()
+            if fila:
+                cursor.execute(
+                    "INSERT OR REPLACE INTO vinculos (globalId, claveIdentidad) VALUES (?, ?)",
+                    (global_id, fila[0])
+                )
+                return fila[0]
+
+        return clave_identidad(datos, global_id)
+
+    def vincular(self, global_id: str, otro_global_id: str) -> str:
+        """
+        Confirmar que dos registros son el mismo niño
+
+        Une los dos grupos completos bajo una misma clave (la del DNI si
+        alguno lo tiene) y devuelve esa clave.
+        """
+        with self._lock:
+            cursor = self._conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                claves = []
+                for gid in (global_id, otro_global_id):
+                    cursor.execute("SELECT claveIdentidad FROM personas WHERE globalId = ?", (gid,))
+                    fila = cursor.fetchone()
+                    if fila is None:
+                        raise ValueError(f"Persona desconocida en el almacén: {gid}")
+                    claves.append(fila[0])
+
+                clave = min(claves, key=lambda c: (not c.startswith('dni:'), c))
+                secuencia = self._siguiente_secuencia(cursor)
+                cursor.execute("""
+                    INSERT OR REPLACE INTO vinculos (globalId, claveIdentidad)
+                    SELECT globalId, ? FROM personas WHERE claveIdentidad IN (?, ?)
+                """, (clave, *claves))
+                cursor.execute("""
+                    UPDATE personas SET claveIdentidad = ?, secuencia = ?
+                    WHERE claveIdentidad IN (?, ?)
+                """, (clave, secuencia, *claves))
+                cursor.execute("COMMIT")
+            except Exception:
+                cursor.execute("ROLLBACK")
+                raise
+        return clave
+
+    def _aplicar_registro(self, cursor, robot_id: str, cambio: dict) -> bool:
+        global_id = id_global(robot_id, cambio['id'])
+        cursor.execute(
+            "SELECT version FROM registros WHERE tabla = ? AND globalId = ?",
+            (cambio['tabla'], global_id)
+        )
+        actual = cursor.fetchone()
+        if actual and actual[0] >= cambio['version']:
+            return False
+
+        datos = cambio['datos']
+        persona = None
+        if datos and datos.get('personId') is not None:
+            persona = id_global(robot_id, datos['personId'])
+
+        cursor.execute("""
+            INSERT INTO registros (tabla, globalId, robotId, personaGlobalId, datos,
+                                   version, fechaCambio, eliminado)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(tabla, globalId) DO UPDATE SET
+                personaGlobalId = COALESCE(excluded.personaGlobalId, registros.personaGlobalId),
+                datos = COALESCE(excluded.datos, registros.datos),
+                version = excluded.version,
+                fechaCambio = excluded.fechaCambio,
+                eliminado = excluded.eliminado
+        """, (cambio['tabla'], global_id, robot_id, persona,
+              json.dumps(datos) if datos is not None else None,
+              cambio['version'], cambio['fecha'], int(datos is None)))
+        return True
+
+    # ----- personas -----
+
+    def personas_desde(self, secuencia: int, limite: int = TAMANO_LOTE) -> Tuple[List[dict], int]:
+        with self._lock:
+            grupos = self._conn.execute("""
+                SELECT claveIdentidad, MAX(secuencia) AS ultima
+                FROM personas
+                WHERE secuencia > ?
+                GROUP BY claveIdentidad
+                ORDER BY ultima
+                LIMIT ?
+            """, (secuencia, limite)).fetchall()
+
+            personas = []
+            for clave, ultima in grupos:
+                filas = self._conn.execute("""
+                    SELECT globalId, datos, fechaCambio FROM personas
+                    WHERE claveIdentidad = ? AND eliminado = 0
+                """, (clave,)).fetchall()
+                if filas:
+                    personas.append(self._persona_canonica(filas))
+                secuencia = ultima
+
+        return personas, secuencia
+
+    @staticmethod
+    def _persona_canonica(filas: list) -> dict:
+        """
+        Unir las identidades de un mismo niño
+
+        La canónica es la registrada primero (empate: menor globalId). Nombre,
+        DNI y sexo son los del último cambio (empate: mayor globalId); edad,
+        nivel y fecha de registro son siempre los de la canónica. Así dos
+        robots con los mismos datos llegan siempre al mismo resultado.
+        """
+        registros = [(global_id, json.loads(datos), fecha) for global_id, datos, fecha in filas]
+
+        canonica = min(registros, key=lambda r: (r[1].get('register_date') or '', r[0]))
+        ultima = max(registros, key=lambda r: (r[2] or '', r[0]))
+
+        return {
+            'globalId': canonica[0],
+            'alias': sorted(r[0] for r in registros),
+            'origen': ultima[0],
+            'datos': {
+                campo: (canonica if campo in CAMPOS_PROTEGIDOS else ultima)[1].get(campo)
+                for campo in CAMPOS_PERSONA
+            },
+        }
+
+    def identidades(self, global_id: str) -> List[str]:
+        """Todos los globalId que corresponden al mismo niño"""
+        with self._lock:
+            return [fila[0] for fila in self._conn.execute("""
+                SELECT globalId FROM personas
+                WHERE claveIdentidad = (SELECT claveIdentidad FROM personas WHERE globalId = ?)
+                ORDER BY globalId
+            """, (global_id,))]
+
+    def sesiones_persona(self, global_id: str) -> List[dict]:
+        """Historial unido de sesiones de un niño en todos los robots"""
+        ids = self.identidades(global_id) or [global_id]
+        marcas = ','.join('?' * len(ids))
+        with self._lock:
+            filas = self._conn.execute(f"""
+                SELECT globalId, robotId, datos FROM registros
+                WHERE personaGlobalId IN ({marcas}) AND tabla = 'sesion' AND eliminado = 0
+            """, ids).fetchall()
+
+        sesiones = []
+        for sesion_global, robot_id, datos in filas:
+            sesion = json.loads(datos)
+            sesion['globalId'] = sesion_global
+            sesion['robotId'] = robot_id
+            sesiones.append(sesion)
+        sesiones.sort(key=lambda s: (s.get('date') or '', s['globalId']))
+        return sesiones
+
+    # ----- audios -----
+
+    def _ruta_audio(self, sha256: str) -> str:
+        if len(sha256) != 64 or any(c not in '0123456789abcdef' for c in sha256):
+            raise ValueError(f"Hash de audio inválido: {sha256}")
+        return os.path.join(self.carpeta_audios, sha256[:2], sha256)
+
+    def bytes_audio(self, sha256: str) -> int:
+        ruta = self._ruta_audio(sha256)
+        for candidata in (ruta, ruta + '.parcial'):
+            if os.path.exists(candidata):
+                return os.path.getsize(candidata)
+        return 0
+
+    def subir_fragmento_audio(self, sha256: str, offset: int, datos: bytes):
+        ruta = self._ruta_audio(sha256)
+        if os.path.exists(ruta):
+            return
+
+        parcial = ruta + '.parcial'
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        with self._lock:
+            recibidos = os.path.getsize(parcial) if os.path.exists(parcial) else 0
+            if offset != recibidos:
+                raise ValueError(f"Fragmento fuera de orden: {offset} (recibidos {recibidos})")
+            with open(parcial, 'ab') as f:
+                f.write(datos)
+
+    def completar_audio(self, sha256: str, tamano: int, robot_id: str, ruta: str) -> bool:
+        destino = self._ruta_audio(sha256)
+        parcial = destino + '.parcial'
+
+        with self._lock:
+            if not os.path.exists(destino):
+                if not os.path.exists(parcial):
+                    return False
+                # Un audio que no coincide con su hash se descarta y se vuelve a subir
+                if os.path.getsize(parcial) != tamano or _hash_archivo(parcial) != sha256:
+                    os.remove(parcial)
+                    return False
+                os.replace(parcial, destino)
+
+            self._conn.execute(
+                "INSERT OR IGNORE INTO audios (sha256, tamano) VALUES (?, ?)",
+                (sha256, tamano)
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO audio_origen (robotId, ruta, sha256) VALUES (?, ?, ?)",
+                (robot_id, ruta, sha256)
+            )
+        return True
+
+
+class AlmacenCentralHTTP(AlmacenCentral):
+    """Cliente del servidor central (ver crear_servidor)"""
+
+    def __init__(self, url: str, timeout: float = 30, token: str = None):
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+        self.token = token
+
+    def _pedir(self, metodo: str, ruta: str, cuerpo: bytes = None,
+               tipo: str = 'application/json', comprimido: bool = False):
+        encabezados = {'Content-Type': tipo}
+        if self.token:
+            encabezados['Authorization'] = f"Bearer {self.token}"
+        if comprimido:
+            encabezados['Content-Encoding'] = 'gzip'
+
+        solicitud = urllib.request.Request(
+            self.url + ruta, data=cuerpo, method=metodo, headers=encabezados
+        )
+        with urllib.request.urlopen(solicitud, timeout=self.timeout) as respuesta:
+            return json.loads(respuesta.read() or b'null')
+
+    def _enviar_json(self, ruta: str, datos) -> dict:
+        # Los lotes de cambios son JSON muy repetitivo: gzip reduce mucho el envío
+        cuerpo = gzip.compress(json.dumps(datos).encode('utf-8'))
+        return self._pedir('POST', ruta, cuerpo, comprimido=True)
+
+    def enviar_cambios(self, robot_id: str, cambios: List[dict]) -> int:
+        return self._enviar_json('/cambios', {'robot_id': robot_id, 'cambios': cambios})['aplicados']
+
+    def personas_desde(self, secuencia: int, limite: int = TAMANO_LOTE) -> Tuple[List[dict], int]:
+        respuesta = self._pedir('GET', f'/personas?desde={secuencia}&limite={limite}')
+        return respuesta['personas'], respuesta['secuencia']
+
+    def bytes_audio(self, sha256: str) -> int:
+        return self._pedir('GET', f'/audio/{sha256}')['bytes']
+
+    def subir_fragmento_audio(self, sha256: str, offset: int, datos: bytes):
+        self._pedir('PUT', f'/audio/{sha256}?offset={offset}', datos,
+                    tipo='application/octet-stream')
+
+    def completar_audio(self, sha256: str, tamano: int, robot_id: str, ruta: str) -> bool:
+        return self._enviar_json(f'/audio/{sha256}/completar', {
+            'tamano': tamano, 'robot_id': robot_id, 'ruta': ruta
+        })['ok']
+
+
+def abrir_almacen(destino: str, token: str = None) -> AlmacenCentral:
+    """Almacén central a partir de una URL http(s):// o una carpeta"""
+    if destino.startswith(('http://', 'https://')):
+        return AlmacenCentralHTTP(destino, token=token or Config.SYNC_TOKEN or None)
+    return AlmacenCentralLocal(destino)
+
+
+# ========== SERVIDOR CENTRAL (HTTP) ==========
+
+class _ManejadorCentral(BaseHTTPRequestHandler):
+    """Publica un AlmacenCentralLocal por HTTP"""
+
+    almacen: AlmacenCentralLocal = None
+    token: Optional[str] = None
+
+    def log_message(self, formato, *args):
+        pass
+
+    def _responder(self, datos, codigo: int = 200):
+        cuerpo = json.dumps(datos).encode('utf-8')
+        self.send_response(codigo)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def _leer_cuerpo(self) -> bytes:
+        cuerpo = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if self.headers.get('Content-Encoding') == 'gzip':
+            cuerpo = gzip.decompress(cuerpo)
+        return cuerpo
+
+    def _autorizado(self) -> bool:
+        if not self.token:
+            return True
+        encabezado = self.headers.get('Authorization', '')
+        return hmac.compare_digest(encabezado.encode('utf-8'),
+                                   f"Bearer {self.token}".encode('utf-8'))
+
+    def _atender(self, metodo: str):
+        if not self._autorizado():
+            self._responder({'error': 'token inválido'}, 401)
+            return
+
+        url = urlparse(self.path)
+        partes = [p for p in url.path.split('/') if p]
+        parametros = {k: v[0] for k, v in parse_qs(url.query).items()}
+
+        try:
+            if metodo == 'POST' and partes == ['cambios']:
+                datos = json.loads(self._leer_cuerpo())
+                aplicados = self.almacen.enviar_cambios(datos['robot_id'], datos['cambios'])
+                self._responder({'aplicados': aplicados})
+
+            elif metodo == 'GET' and partes == ['personas']:
+                personas, secuencia = self.almacen.personas_desde(
+                    int(parametros.get('desde', 0)),
+                    int(parametros.get('limite', TAMANO_LOTE))
+                )
+                self._responder({'personas': personas, 'secuencia': secuencia})
+
+            elif metodo == 'GET' and len(partes) == 2 and partes[0] == 'audio':
+                self._responder({'bytes': self.almacen.bytes_audio(partes[1])})
+
+            elif metodo == 'PUT' and len(partes) == 2 and partes[0] == 'audio':
+                self.almacen.subir_fragmento_audio(
+                    partes[1], int(parametros.get('offset', 0)), self._leer_cuerpo()
+                )
+                self._responder({'ok': True})
+
+            elif metodo == 'POST' and len(partes) == 3 and partes[0] == 'audio' and partes[2] == 'completar':
+                datos = json.loads(self._leer_cuerpo())
+                ok = self.almacen.completar_audio(
+                    partes[1], datos['tamano'], datos['robot_id'], datos['ruta']
+                )
+                self._responder({'ok': ok})
+
+            else:
+                self._responder({'error': 'ruta desconocida'}, 404)
+
+        except ValueError as e:
+            self._responder({'error': str(e)}, 400)
+        except Exception as e:
+            print(f"❌ Error en servidor central: {e}")
+            self._responder({'error': str(e)}, 500)
+
+    def do_GET(self):
+        self._atender('GET')
+
+    def do_POST(self):
+        self._atender('POST')
+
+    def do_PUT(self):
+        self._atender('PUT')
+
+
+def _es_local(host: str) -> bool:
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def crear_servidor(carpeta: str, puerto: int = PUERTO_SERVIDOR, host: str = '127.0.0.1',
+                   token: str = None) -> ThreadingHTTPServer:
+    """
+    Servidor HTTP del almacén central (puerto 0 = uno libre cualquiera)
+
+    Publica nombres y DNI de niños: fuera de 127.0.0.1 exige un token, que
+    los robots envían como "Authorization: Bearer <token>".
+    """
+    token = token or None
+    if token is None and not _es_local(host):
+        raise ValueError(f"Para escuchar en {host} hace falta un token (--token o SYNC_TOKEN)")
+
+    manejador = type('ManejadorCentral', (_ManejadorCentral,), {
+        'almacen': AlmacenCentralLocal(carpeta),
+        'token': token,
+    })
+    return ThreadingHTTPServer((host, puerto), manejador)
+
+
+# ========== SINCRONIZADOR (LADO ROBOT) ==========
+
+def _hash_archivo(ruta: str) -> str:
+    sha = hashlib.sha256()
+    with open(ruta, 'rb') as f:
+        for bloque in iter(lambda: f.read(1024 * 1024), b''):
+            sha.update(bloque)
+    return sha.hexdigest()
+
+
+class Sincronizador:
+    """
+    Sincroniza la base de datos de un robot con el almacén central
+
+    Usa su propia conexión a SQLite (WAL permite hacerlo mientras el robot
+    atiende una sesión) y guarda su avance en sincronizacion_estado.
+    """
+
+    def __init__(self, almacen: AlmacenCentral, db_path: str = None, robot_id: str = None,
+                 bytes_por_segundo: int = None, tamano_lote: int = TAMANO_LOTE,
+                 max_bytes_lote: int = MAX_BYTES_LOTE):
+        self.almacen = almacen
+        self.robot_id = robot_id or Config.ROBOT_ID
+        self.tamano_lote = tamano_lote
+        self.max_bytes_lote = max_bytes_lote
+        self.limitador = LimitadorAncho(bytes_por_segundo)
+
+        self.conn = sqlite3.connect(db_path or Config.DATABASE_PATH, timeout=30,
+                                    isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        aplicar_migraciones(self.conn, verbose=False)
+
+    def cerrar(self):
+        self.conn.close()
+
+    # ----- estado -----
+
+    def _leer_estado(self, clave: str, defecto=0) -> int:
+        fila = self.conn.execute(
+            "SELECT valor FROM sincronizacion_estado WHERE clave = ?", (clave,)
+        ).fetchone()
+        return int(fila[0]) if fila else defecto
+
+    def _guardar_estado(self, clave: str, valor):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO sincronizacion_estado (clave, valor) VALUES (?, ?)",
+            (clave, str(valor))
+        )
+
+    # ----- envío de cambios -----
+
+    def _leer_filas(self, tabla: str, ids: list) -> dict:
+        clave = TABLAS_SINCRONIZADAS[tabla]
+        marcas = ','.join('?' * len(ids))
+        filas = self.conn.execute(
+            f"SELECT * FROM {tabla} WHERE {clave} IN ({marcas})", ids
+        ).fetchall()
+        return {fila[clave]: dict(fila) for fila in filas}
+
+    def _armar_lote(self, entradas: list) -> Tuple[List[dict], int]:
+        """
+        Convertir entradas de registro_cambios en cambios para el almacén
+
+        Varias entradas de la misma fila se reducen a una con su estado
+        actual (si ya no existe, se envía como eliminada). El lote se corta
+        al llegar a max_bytes_lote.
+
+        Returns:
+            (cambios, último cambioId cubierto por el lote)
+        """
+        ultimas = {}
+        for entrada in entradas:
+            ultimas[(entrada['tabla'], entrada['filaId'])] = entrada
+
+        por_tabla = {}
+        for tabla, fila_id in ultimas:
+            por_tabla.setdefault(tabla, []).append(fila_id)
+        filas = {tabla: self._leer_filas(tabla, ids) for tabla, ids in por_tabla.items()}
+
+        copias = {}
+        if 'person' in por_tabla:
+            marcas = ','.join('?' * len(por_tabla['person']))
+            copias = dict(self.conn.execute(
+                f"SELECT personId, globalId FROM persona_global WHERE copia = 1 AND personId IN ({marcas})",
+                por_tabla['person']
+            ).fetchall())
+
+        cambios = []
+        bytes_lote = 0
+        ultimo = entradas[-1]['cambioId']
+
+        for entrada in sorted(ultimas.values(), key=lambda e: e['cambioId']):
+            datos = filas[entrada['tabla']].get(entrada['filaId'])
+            cambio = {
+                'tabla': entrada['tabla'],
+                'id': entrada['filaId'],
+                'version': entrada['cambioId'],
+                'fecha': entrada['fecha'],
+                'operacion': 'guardar' if datos is not None else 'eliminar',
+                'datos': datos,
+            }
+            # Persona recibida de otro robot: el almacén la une a su original
+            if entrada['tabla'] == 'person' and entrada['filaId'] in copias:
+                cambio['copia_de'] = copias[entrada['filaId']]
+            tamano = len(json.dumps(cambio))
+
+            # Las entradas posteriores al corte se releen en el próximo lote
+            if cambios and bytes_lote + tamano > self.max_bytes_lote:
+                ultimo = cambios[-1]['version']
+                break
+
+            cambios.append(cambio)
+            bytes_lote += tamano
+
+        return cambios, ultimo
+
+    def enviar_cambios(self) -> int:
+        """Enviar los cambios pendientes por lotes; devuelve cuántos se enviaron"""
+        enviados = 0
+        while True:
+            confirmado = self._leer_estado('ultimo_cambio_enviado')
+            entradas = self.conn.execute("""
+                SELECT cambioId, tabla, filaId, fecha FROM registro_cambios
+                WHERE cambioId > ?
+                ORDER BY cambioId
+                LIMIT ?
+            """, (confirmado, self.tamano_lote)).fetchall()
+
+            if not entradas:
+                return enviados
+
+            cambios, ultimo = self._armar_lote(entradas)
+            self.limitador.consumir(len(json.dumps(cambios)))
+            self.almacen.enviar_cambios(self.robot_id, cambios)
+
+            # Solo después de la confirmación del almacén se avanza la marca
+            self._guardar_estado('ultimo_cambio_enviado', ultimo)
+            enviados += len(cambios)
+
+    def compactar_registro(self) -> int:
+        """Borrar del registro los cambios ya confirmados por el almacén"""
+        confirmado = self._leer_estado('ultimo_cambio_enviado')
+        cursor = self.conn.execute(
+            "DELETE FROM registro_cambios WHERE cambioId <= ?", (confirmado,)
+        )
+        return cursor.rowcount
+
+    # ----- audios -----
+
+    def _subir_audio(self, ruta: str) -> bool:
+        tamano = os.path.getsize(ruta)
+        sha256 = _hash_archivo(ruta)
+
+        # Retomar desde lo que el almacén ya tiene
+        recibidos = self.almacen.bytes_audio(sha256)
+        if recibidos < tamano:
+            with open(ruta, 'rb') as f:
+                f.seek(recibidos)
+                while recibidos < tamano:
+                    datos = f.read(TAMANO_FRAGMENTO_AUDIO)
+                    self.limitador.consumir(len(datos))
+                    self.almacen.subir_fragmento_audio(sha256, recibidos, datos)
+                    recibidos += len(datos)
+
+        if not self.almacen.completar_audio(sha256, tamano, self.robot_id, ruta):
+            return False
+
+        self.conn.execute(
+            "INSERT OR REPLACE INTO audio_subido (ruta, sha256, tamano) VALUES (?, ?, ?)",
+            (ruta, sha256, tamano)
+        )
+        return True
+
+    def subir_audios(self) -> int:
+        """Subir los audios de los resultados nuevos; devuelve cuántos se subieron"""
+        subidos = 0
+        while True:
+            ultimo = self._leer_estado('ultimo_resultado_audio')
+            filas = self.conn.execute("""
+                SELECT r.resultadoId, r.audio_path
+                FROM resultado_ejercicio r
+                LEFT JOIN audio_subido a ON a.ruta = r.audio_path
+                WHERE r.resultadoId > ? AND r.audio_path IS NOT NULL AND a.ruta IS NULL
+                ORDER BY r.resultadoId
+                LIMIT ?
+            """, (ultimo, self.tamano_lote)).fetchall()
+
+            if not filas:
+                return subidos
+
+            for resultado_id, ruta in filas:
+                if not os.path.exists(ruta):
+                    print(f"   ⚠️  Audio no encontrado, se omite: {ruta}")
+                elif self._subir_audio(ruta):
+                    subidos += 1
+                else:
+                    # Se reintenta desde este audio la próxima vez
+                    print(f"   ⚠️  El almacén rechazó el audio (hash distinto): {ruta}")
+                    return subidos
+                self._guardar_estado('ultimo_resultado_audio', resultado_id)
+
+    # ----- personas de otros robots -----
+
+    def _persona_local(self, persona: dict) -> Optional[int]:
+        """
+        personId local de una persona canónica, si este robot ya la conoce
+
+        Primero la que ya quedó asociada en una sincronización anterior; si
+        no, el registro propio más antiguo (menor personId).
+        """
+        marcas = ','.join('?' * (len(persona['alias']) + 1))
+        fila = self.conn.execute(
+            f"""SELECT personId FROM persona_global WHERE globalId IN ({marcas})
+                ORDER BY globalId = ? DESC, personId LIMIT 1""",
+            [persona['globalId']] + persona['alias'] + [persona['globalId']]
+        ).fetchone()
+        if fila:
+            return fila[0]
+
+        propios = [
+            int(alias.rsplit(':', 1)[1]) for alias in persona['alias']
+            if alias.rsplit(':', 1)[0] == self.robot_id
+        ]
+        return min(propios) if propios else None
+
+    def _aplicar_persona(self, persona: dict) -> str:
+        """
+        Crear o actualizar la persona local; devuelve 'nueva', 'actualizada' o ''
+
+        Solo se actualiza si el último cambio vino de otro robot: así dos
+        registros duplicados del mismo niño en este robot no se pisan. Edad,
+        nivel y fecha de registro solo se actualizan en una copia de la
+        canónica; un registro propio unido a otro (por DNI o vínculo) los
+        conserva.
+        """
+        datos = persona['datos']
+        person_id = self._persona_local(persona)
+        resultado = ''
+        copia = False
+
+        if person_id is None:
+            columnas = ', '.join(CAMPOS_PERSONA)
+            marcas = ', '.join('?' * len(CAMPOS_PERSONA))
+            cursor = self.conn.execute(
+                f"INSERT INTO person ({columnas}) VALUES ({marcas})",
+                [datos.get(campo) for campo in CAMPOS_PERSONA]
+            )
+            person_id = cursor.lastrowid
+            resultado = 'nueva'
+            copia = True
+        else:
+            copia = self.conn.execute(
+                "SELECT 1 FROM persona_global WHERE personId = ? AND globalId = ? AND copia = 1",
+                (person_id, persona['globalId'])
+            ).fetchone() is not None
+
+            if persona['origen'].rsplit(':', 1)[0] != self.robot_id:
+                actual = self.conn.execute(
+                    "SELECT * FROM person WHERE personId = ?", (person_id,)
+                ).fetchone()
+                campos = CAMPOS_PERSONA if copia else [
+                    campo for campo in CAMPOS_PERSONA if campo not in CAMPOS_PROTEGIDOS
+                ]
+                # Solo se escribe si algo cambió (si no, los robots se reenviarían
+                # la misma persona sin fin)
+                distintos = [
+                    campo for campo in campos
+                    if actual is not None and actual[campo] != datos.get(campo)
+                ]
+                if distintos:
+                    asignaciones = ', '.join(f"{campo} = ?" for campo in distintos)
+                    self.conn.execute(
+                        f"UPDATE person SET {asignaciones} WHERE personId = ?",
+                        [datos.get(campo) for campo in distintos] + [person_id]
+                    )
+                    resultado = 'actualizada'
+
+        self.conn.execute(
+            "INSERT OR REPLACE INTO persona_global (globalId, personId, copia) VALUES (?, ?, ?)",
+            (persona['globalId'], person_id, int(copia))
+        )
+        return resultado
+
+    def recibir_personas(self) -> dict:
+        """Traer personas nuevas o modificadas en otros robots"""
+        totales = {'nueva': 0, 'actualizada': 0}
+        while True:
+            secuencia = self._leer_estado('secuencia_personas')
+            personas, nueva_secuencia = self.almacen.personas_desde(secuencia, self.tamano_lote)
+            if not personas and nueva_secuencia == secuencia:
+                return totales
+
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                for persona in personas:
+                    resultado = self._aplicar_persona(persona)
+                    if resultado:
+                        totales[resultado] += 1
+                self._guardar_estado('secuencia_personas', nueva_secuencia)
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    # ----- todo junto -----
+
+    def sincronizar(self) -> dict:
+        """Enviar cambios y audios, y traer personas de otros robots"""
+        resumen = {'cambios': 0, 'compactados': 0, 'audios': 0, 'personas_nuevas': 0,
+                   'personas_actualizadas': 0, 'error': None}
+        try:
+            resumen['cambios'] = self.enviar_cambios()
+            resumen['compactados'] = self.compactar_registro()
+            resumen['audios'] = self.subir_audios()
+            personas = self.recibir_personas()
+            resumen['personas_nuevas'] = personas['nueva']
+            resumen['personas_actualizadas'] = personas['actualizada']
+        except Exception as e:
+            # Lo confirmado queda guardado: la próxima vez se continúa desde ahí
+            print(f"❌ Error al sincronizar: {e}")
+            resumen['error'] = str(e)
+        return resumen
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sincronizar el robot con el almacén central")
+    parser.add_argument('--central', default=Config.ALMACEN_CENTRAL,
+                        help='Carpeta o URL http://... del almacén central')
+    parser.add_argument('--db', default=Config.DATABASE_PATH)
+    parser.add_argument('--kbps', type=int, default=Config.SYNC_KBPS,
+                        help='Límite de subida en KB/s (0 = sin límite)')
+    parser.add_argument('--servidor', metavar='CARPETA',
+                        help='Iniciar el servidor central sobre esta carpeta')
+    parser.add_argument('--puerto', type=int, default=PUERTO_SERVIDOR)
+    parser.add_argument('--host', default='127.0.0.1',
+                        help='Dirección del servidor (fuera de 127.0.0.1 exige --token)')
+    parser.add_argument('--token', default=Config.SYNC_TOKEN,
+                        help='Token compartido entre el servidor y los robots')
+    parser.add_argument('--vincular', nargs=2, metavar='GLOBAL_ID',
+                        help='Confirmar que dos registros (robot:id) son el mismo niño')
+    args = parser.parse_args()
+
+    if args.servidor:
+        try:
+            servidor = crear_servidor(args.servidor, args.puerto, args.host, args.token)
+        except ValueError as e:
+            print(f"❌ {e}")
+            return
+        print(f"🌐 Almacén central en http://{args.host}:{args.puerto} ({args.servidor})"
+              f"{' con token' if args.token else ''}")
+        try:
+            servidor.serve_forever()
+        except KeyboardInterrupt:
+            print("\n👋 Servidor detenido")
+        return
+
+    if not args.central:
+        print("❌ Indica el almacén con --central o la variable ALMACEN_CENTRAL")
+        return
+
+    if args.vincular:
+        almacen = abrir_almacen(args.central)
+        if not isinstance(almacen, AlmacenCentralLocal):
+            print("❌ Los vínculos se confirman sobre la carpeta del almacén, no por HTTP")
+            return
+        try:
+            clave = almacen.vincular(*args.vincular)
+            print(f"🔗 {args.vincular[0]} y {args.vincular[1]} unidos ({clave})")
+        except ValueError as e:
+            print(f"❌ {e}")
+        finally:
+            almacen.cerrar()
+        return
+
+    print("\n" + "="*70)
+    print(f"🔄 SINCRONIZACIÓN - robot {Config.ROBOT_ID}")
+    print("="*70 + "\n")
+
+    inicio = time.monotonic()
+    sincronizador = Sincronizador(abrir_almacen(args.central, args.token), args.db,
+                                  bytes_por_segundo=args.kbps * 1024)
+    try:
+        resumen = sincronizador.sincronizar()
+    finally:
+        sincronizador.cerrar()
+
+    print(f"   📤 Cambios enviados: {resumen['cambios']:,}"
+          f" (compactados del registro: {resumen['compactados']:,})")
+    print(f"   🎙️  Audios subidos: {resumen['audios']:,}")
+    print(f"   📥 Personas nuevas: {resumen['personas_nuevas']:,}"
+          f" (actualizadas: {resumen['personas_actualizadas']:,})")
+    print(f"\n⏱️  Tiempo total: {time.monotonic() - inicio:.2f} s")
+    print("="*70 + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,8 @@ Funciones helper para manejar audio, reintentos y validación con IA
 import time
 from typing import Optional, Tuple, Callable, Any
 
+from ritmo import pausa
+
 
 class ConfigReintentos:
     """Configuración del sistema de reintentos"""
@@ -415,7 +417,7 @@ def manejar_frustracion(
         
         mensaje = feedback_motivador("frustracion")
         audio_system.hablar(mensaje)
-        time.sleep(1)
+        pausa('tras_hablar', anterior=1.0)
         audio_system.hablar("¿Quieres seguir o prefieres descansar?")
         
         if interfaz:
@@ -442,6 +444,6 @@ def manejar_frustracion(
         if interfaz:
             interfaz.robot_hablando(False)
         
-        time.sleep(0.5)
+        pausa('tras_hablar', anterior=0.5)
     
     return True
@@ -0,0 +1,280 @@
+"""
+TRAZAS DE LATENCIA
+Tramos (spans) medidos con perf_counter_ns alrededor de lo que tarda en una
+sesión: síntesis y reproducción de voz, grabación, reconocimiento, consultas
+a la IA, escrituras en la base de datos y pausas del ritmo.
+
+- tramo('nombre') es un context manager; @trazar() decora funciones y
+  métodos; @trazar_clase() decora todos los métodos públicos de una clase
+- cada sesión (iniciar_sesion / terminar_sesion) se guarda en
+  trazas/sesion_<fecha>.json en formato Chrome trace-event: se abre en
+  chrome://tracing o https://ui.perfetto.dev
+- al terminar una sesión se imprimen p50/p95 por tramo; resumen() acumula
+  las últimas MUESTRAS_POR_TRAMO mediciones de cada tramo del proceso
+
+Se activan con Config.TRAZAS (variable de entorno TRAZAS=1) o activar().
+Desactivadas, tramo() devuelve un contexto vacío compartido y los
+decoradores solo comprueban un booleano antes de llamar a la función.
+
+Percentiles de trazas ya guardadas:
+    python trazas.py [trazas/sesion_*.json ...]
+"""
+import os
+import sys
+import json
+import time
+import inspect
+import threading
+import functools
+from collections import deque
+from datetime import datetime
+from typing import Callable, Deque, Dict, List, Optional
+
+from config import Config
+
+
+MUESTRAS_POR_TRAMO = 2000
+
+_activas = Config.TRAZAS
+_lock = threading.Lock()
+_eventos: List[dict] = []                       # tramos de la sesión en curso
+_hilos: Dict[int, str] = {}                     # tid -> nombre del hilo
+_duraciones: Dict[str, Deque[float]] = {}       # ms por tramo (todas las sesiones)
+_inicio_sesion: Optional[datetime] = None
+_PID = os.getpid()
+
+
+def activar(activas: bool = True):
+    global _activas
+    _activas = activas
+
+
+def activas() -> bool:
+    return _activas
+
+
+# ========== TRAMOS ==========
+
+class _TramoVacio:
+    """Contexto que no mide nada (trazas desactivadas)"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excepcion):
+        return False
+
+
+_VACIO = _TramoVacio()
+
+
+class _Tramo:
+    __slots__ = ('nombre', 'categoria', 'args', 'inicio')
+
+    def __init__(self, nombre: str, categoria: str, args: Optional[dict]):
+        self.nombre = nombre
+        self.categoria = categoria
+        self.args = args
+
+    def __enter__(self):
+        self.inicio = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, tipo, valor, traza):
+        duracion = time.perf_counter_ns() - self.inicio
+        if tipo is not None:
+            self.args = dict(self.args or {}, error=tipo.__name__)
+        _registrar(self.nombre, self.categoria, self.inicio, duracion, self.args)
+        return False
+
+
+def tramo(nombre: str, categoria: str = '', **args):
+    """Medir un bloque: with tramo('asr', 'audio'): ..."""
+    if not _activas:
+        return _VACIO
+    return _Tramo(nombre, categoria, args or None)
+
+
+def _registrar(nombre: str, categoria: str, inicio_ns: int, duracion_ns: int,
+               args: Optional[dict]):
+    duracion_ms = duracion_ns / 1e6
+    with _lock:
+        muestras = _duraciones.get(nombre)
+        if muestras is None:
+            muestras = _duraciones[nombre] = deque(maxlen=MUESTRAS_POR_TRAMO)
+        muestras.append(duracion_ms)
+
+        # Fuera de una sesión solo cuentan para los percentiles
+        if _inicio_sesion is None:
+            return
+        tid = threading.get_ident()
+        if tid not in _hilos:
+            _hilos[tid] = threading.current_thread().name
+        evento = {
+            'name': nombre, 'cat': categoria, 'ph': 'X', 'pid': _PID, 'tid': tid,
+            'ts': inicio_ns / 1000, 'dur': duracion_ns / 1000,  # microsegundos
+        }
+        if args:
+            evento['args'] = args
+        _eventos.append(evento)
+
+
+def trazar(nombre: str = None, categoria: str = ''):
+    """Decorador: medir cada llamada (por defecto con el nombre Clase.metodo)"""
+    def decorador(funcion: Callable) -> Callable:
+        etiqueta = nombre or funcion.__qualname__
+
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            if not _activas:
+                return funcion(*args, **kwargs)
+            with _Tramo(etiqueta, categoria, None):
+                return funcion(*args, **kwargs)
+
+        return envoltura
+    return decorador
+
+
+def trazar_clase(categoria: str = ''):
+    """Decorador de clase: medir todos sus métodos públicos"""
+    def decorador(cls):
+        for nombre, valor in list(vars(cls).items()):
+            if inspect.isfunction(valor) and not nombre.startswith('_'):
+                setattr(cls, nombre, trazar(f"{cls.__name__}.{nombre}", categoria)(valor))
+        return cls
+    return decorador
+
+
+# ========== PERCENTILES ==========
+
+def percentil(valores: List[float], p: float) -> float:
+    """Percentil p (0 a 1) con interpolación lineal"""
+    ordenados = sorted(valores)
+    posicion = (len(ordenados) - 1) * p
+    abajo = int(posicion)
+    arriba = min(abajo + 1, len(ordenados) - 1)
+    return ordenados[abajo] + (ordenados[arriba] - ordenados[abajo]) * (posicion - abajo)
+
+
+def estadisticas(duraciones: Dict[str, List[float]]) -> Dict[str, dict]:
+    """{tramo: {n, p50, p95, total}} en milisegundos"""
+    return {
+        nombre: {
+            'n': len(valores),
+            'p50': percentil(valores, 0.50),
+            'p95': percentil(valores, 0.95),
+            'total': sum(valores),
+        }
+        for nombre, valores in duraciones.items() if valores
+    }
+
+
+def resumen() -> Dict[str, dict]:
+    """Percentiles de todo lo medido en este proceso"""
+    with _lock:
+        copia = {nombre: list(muestras) for nombre, muestras in _duraciones.items()}
+    return estadisticas(copia)
+
+
+def imprimir_estadisticas(datos: Dict[str, dict], titulo: str = "TRAZAS"):
+    print(f"\n⏱️  {titulo}")
+    print(f"   {'Tramo':<42} {'n':>5} {'p50 ms':>9} {'p95 ms':>9} {'total s':>8}")
+    for nombre, d in sorted(datos.items(), key=lambda x: -x[1]['total']):
+        print(f"   {nombre:<42} {d['n']:>5} {d['p50']:>9.1f} {d['p95']:>9.1f} "
+              f"{d['total'] / 1000:>8.2f}")
+
+
+# ========== SESIONES ==========
+
+def iniciar_sesion():
+    """Empezar a guardar los tramos de una sesión"""
+    global _inicio_sesion
+    if not _activas:
+        return
+    with _lock:
+        _eventos.clear()
+        _inicio_sesion = datetime.now()
+
+
+def terminar_sesion(carpeta: str = None) -> Optional[str]:
+    """
+    Guardar la sesión en curso en formato Chrome trace-event
+
+    Returns:
+        Ruta del archivo, o None si no había sesión
+    """
+    global _inicio_sesion
+    with _lock:
+        if _inicio_sesion is None:
+            return None
+        eventos, inicio = list(_eventos), _inicio_sesion
+        hilos = dict(_hilos)
+        _eventos.clear()
+        _inicio_sesion = None
+
+    por_tramo: Dict[str, List[float]] = {}
+    for evento in eventos:
+        por_tramo.setdefault(evento['name'], []).append(evento['dur'] / 1000)
+    datos = estadisticas(por_tramo)
+
+    metadatos = [{'name': 'process_name', 'ph': 'M', 'pid': _PID,
+                  'args': {'name': f"Robot {Config.ROBOT_ID}"}}]
+    metadatos += [{'name': 'thread_name', 'ph': 'M', 'pid': _PID, 'tid': tid,
+                   'args': {'name': nombre}} for tid, nombre in hilos.items()]
+
+    carpeta = carpeta or Config.TRAZAS_FOLDER
+    ruta = os.path.join(carpeta, f"sesion_{inicio.strftime('%Y%m%d_%H%M%S')}.json")
+    try:
+        os.makedirs(carpeta, exist_ok=True)
+        with open(ruta, 'w', encoding='utf-8') as f:
+            json.dump({
+                'traceEvents': metadatos + eventos,
+                'displayTimeUnit': 'ms',
+                'otherData': {'inicio': inicio.isoformat(timespec='seconds'),
+                              'percentiles_ms': datos},
+            }, f, ensure_ascii=False)
+    except OSError as e:
+        print(f"⚠️ No se pudo guardar la traza: {e}")
+        return None
+
+    imprimir_estadisticas(datos, f"TRAZA DE LA SESIÓN ({ruta})")
+    return ruta
+
+
+def leer_traza(ruta: str) -> Dict[str, List[float]]:
+    """Duraciones (ms) por tramo de un archivo guardado"""
+    with open(ruta, 'r', encoding='utf-8') as f:
+        eventos = json.load(f).get('traceEvents', [])
+    duraciones: Dict[str, List[float]] = {}
+    for evento in eventos:
+        if evento.get('ph') == 'X':
+            duraciones.setdefault(evento['name'], []).append(evento['dur'] / 1000)
+    return duraciones
+
+
+def main():
+    rutas = sys.argv[1:]
+    if not rutas and os.path.isdir(Config.TRAZAS_FOLDER):
+        rutas = sorted(
+            os.path.join(Config.TRAZAS_FOLDER, nombre)
+            for nombre in os.listdir(Config.TRAZAS_FOLDER) if nombre.endswith('.json')
+        )
+    if not rutas:
+        print(f"ℹ️ No hay trazas en {Config.TRAZAS_FOLDER}/ (activar con TRAZAS=1)")
+        return
+
+    duraciones: Dict[str, List[float]] = {}
+    for ruta in rutas:
+        try:
+            for nombre, valores in leer_traza(ruta).items():
+                duraciones.setdefault(nombre, []).extend(valores)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ No se pudo leer {ruta}: {e}")
+
+    imprimir_estadisticas(estadisticas(duraciones), f"TRAZAS ({len(rutas)} sesiones)")
+    print()
+
+
+if __name__ == "__main__":
+    main()
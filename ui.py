@@ -6,8 +6,12 @@ import tkinter as tk
 from PIL import Image, ImageTk
 import os
 import time
+import threading
 
+from trazas import trazar_clase
 
+
+@trazar_clase(categoria='ui')
 class InterfazUnificada:
     """
     Interfaz única que se mantiene abierta durante toda la ejecución.
@@ -42,6 +46,9 @@ class InterfazUnificada:
         self.frames_celebration = []
         self.frame_actual_celebration = 0
         self.animando_celebration = False
+        # Se marca al terminar la celebración (ver ritmo.esperar)
+        self.celebracion_terminada = threading.Event()
+        self.celebracion_terminada.set()
         
         # Widgets para mostrar nombre
         self.label_nombre = None
@@ -205,6 +212,7 @@ class InterfazUnificada:
             duracion_segundos: Cuánto tiempo mostrar la celebración (default: 2 segundos)
         """
         print("🎉 ¡CELEBRACIÓN!")
+        self.celebracion_terminada.clear()
         
         # Detener otras animaciones
         self.animando_gif = False
@@ -230,7 +238,7 @@ class InterfazUnificada:
                 self.ventana.update()
                 
                 # Volver a eyes.gif después del tiempo especificado
-                self.ventana.after(int(duracion_segundos * 1000), self.mostrar_eyes)
+                self.ventana.after(int(duracion_segundos * 1000), self._fin_celebracion)
                 return
         
         # Iniciar animación de celebración
@@ -246,7 +254,10 @@ class InterfazUnificada:
     def _fin_celebracion(self):
         """Terminar celebración y volver a eyes.gif"""
         self.animando_celebration = False
-        self.mostrar_eyes()
+        try:
+            self.mostrar_eyes()
+        finally:
+            self.celebracion_terminada.set()
     
     def _cargar_gif(self, ruta_gif, sleeping=False):
         """Cargar frames del GIF"""
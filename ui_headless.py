@@ -0,0 +1,149 @@
+"""
+INTERFAZ SIN PANTALLA
+Los mismos métodos que InterfazUnificada (ui.py) sin Tk: en lugar de dibujar,
+registra cada cambio de estado con su momento. Permite correr el robot en un
+servidor (python main.py --headless), hacer pruebas de carga y latencia del
+flujo (banco_replay.py --headless) y medir aparte lo que cuesta la interfaz
+real (tramos de categoría 'ui' en trazas.py).
+
+La celebración dura lo mismo que en pantalla (o lo que indique
+escala_animaciones) y avisa al terminar con celebracion_terminada.
+"""
+import os
+import json
+import time
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from trazas import trazar_clase
+
+
+@trazar_clase(categoria='ui')
+class InterfazHeadless:
+    """Interfaz que registra transiciones (segundo, evento, detalle) sin dibujar"""
+
+    # Mismos estados que InterfazUnificada
+    ESTADO_EYES = "eyes"
+    ESTADO_NOMBRE = "nombre"
+    ESTADO_EJERCICIO = "ejercicio"
+
+    def __init__(self, escala_animaciones: float = 1.0, ruta_registro: str = None):
+        self.estado_actual = None
+        self.modo_sleeping = False
+        self.escala_animaciones = escala_animaciones
+        self.ruta_registro = ruta_registro
+
+        self.inicio = time.perf_counter()
+        self.transiciones: List[tuple] = []
+        self._lock = threading.Lock()
+        self._temporizador: Optional[threading.Timer] = None
+        self._cerrada = threading.Event()
+
+        # Se marca al terminar la celebración (ver ritmo.esperar)
+        self.celebracion_terminada = threading.Event()
+        self.celebracion_terminada.set()
+
+    def _registrar(self, evento: str, detalle=None):
+        segundo = time.perf_counter() - self.inicio
+        with self._lock:
+            self.transiciones.append((segundo, evento, detalle))
+            if self.ruta_registro:
+                try:
+                    with open(self.ruta_registro, 'a', encoding='utf-8') as f:
+                        f.write(json.dumps({
+                            'fecha': datetime.now().isoformat(timespec='milliseconds'),
+                            'segundo': round(segundo, 4), 'evento': evento, 'detalle': detalle,
+                        }, ensure_ascii=False) + '\n')
+                except OSError as e:
+                    print(f"⚠️ No se pudo registrar la transición: {e}")
+                    self.ruta_registro = None
+
+    def crear(self):
+        if self.ruta_registro:
+            os.makedirs(os.path.dirname(self.ruta_registro) or '.', exist_ok=True)
+        print("🖥️  Interfaz sin pantalla (headless)")
+        self.mostrar_eyes()
+
+    # ========== ESTADOS ==========
+
+    def mostrar_eyes(self):
+        self.modo_sleeping = False
+        self.estado_actual = self.ESTADO_EYES
+        self._registrar('eyes')
+
+    def mostrar_eyes_sleeping(self):
+        if self.modo_sleeping:
+            return
+        self.modo_sleeping = True
+        self.estado_actual = self.ESTADO_EYES
+        self._registrar('eyes_sleeping')
+
+    def mostrar_celebracion(self, duracion_segundos=2):
+        print("🎉 ¡CELEBRACIÓN!")
+        self.celebracion_terminada.clear()
+        self.modo_sleeping = False
+        self._registrar('celebracion', duracion_segundos)
+
+        if self._temporizador is not None:
+            self._temporizador.cancel()
+        self._temporizador = threading.Timer(
+            duracion_segundos * self.escala_animaciones, self._fin_celebracion
+        )
+        self._temporizador.daemon = True
+        self._temporizador.start()
+
+    def _fin_celebracion(self):
+        try:
+            self._registrar('fin_celebracion')
+            self.mostrar_eyes()
+        finally:
+            self.celebracion_terminada.set()
+
+    def mostrar_nombre(self, nombre: str):
+        if self.estado_actual == self.ESTADO_NOMBRE and self.transiciones[-1][2] == nombre:
+            return
+        self.estado_actual = self.ESTADO_NOMBRE
+        self._registrar('nombre', nombre)
+
+    def mostrar_ejercicio(self, palabra: str, ruta_imagen: str = None):
+        self.estado_actual = self.ESTADO_EJERCICIO
+        self._registrar('ejercicio', palabra.upper())
+
+    def mostrar_feedback_ejercicio(self, correcto: bool):
+        if self.estado_actual != self.ESTADO_EJERCICIO:
+            return
+        self._registrar('feedback', 'correcto' if correcto else 'incorrecto')
+
+    # ========== UTILIDADES ==========
+
+    def toggle_fullscreen(self):
+        pass
+
+    def actualizar(self):
+        pass
+
+    def cerrar(self):
+        if self._temporizador is not None:
+            self._temporizador.cancel()
+        self.celebracion_terminada.set()
+        self._cerrada.set()
+
+    def mainloop(self):
+        """Bloquear hasta cerrar() (como el loop de Tk)"""
+        while not self._cerrada.wait(0.5):
+            pass
+
+    def resumen(self) -> Dict[str, dict]:
+        """Por evento: veces y segundos hasta la transición siguiente"""
+        with self._lock:
+            transiciones = list(self.transiciones)
+        fin = time.perf_counter() - self.inicio
+
+        datos: Dict[str, dict] = {}
+        for i, (segundo, evento, _) in enumerate(transiciones):
+            siguiente = transiciones[i + 1][0] if i + 1 < len(transiciones) else fin
+            d = datos.setdefault(evento, {'veces': 0, 'segundos': 0.0})
+            d['veces'] += 1
+            d['segundos'] += siguiente - segundo
+        return datos
@@ -0,0 +1,74 @@
+"""
+VERIFICACIÓN DEL ANÁLISIS ACÚSTICO
+Arma señales sintéticas (una voz armónica de 220 Hz con ruido leve que
+ocupa una parte del archivo, el resto silencio con el mismo ruido) y
+comprueba extraer_caracteristicas:
+
+- que proporcion_voz sigue a la parte con voz, también cuando la voz ocupa
+  todo el archivo (vocal sostenida, la prueba usual de hipernasalidad)
+- que el tono medido es el de la señal
+- que el silencio solo no se toma como voz
+
+Sale con código 1 si algo falla.
+
+Uso:
+    python verificar_analisis_acustico.py
+"""
+import sys
+
+import numpy as np
+
+from analisis_acustico import extraer_caracteristicas
+
+
+FRECUENCIA = 16000
+DURACION = 2.0
+TONO = 220.0
+COBERTURAS = (0.30, 0.50, 0.85, 0.95, 1.00)
+TOLERANCIA_PROPORCION = 0.05
+TOLERANCIA_TONO = 5.0  # Hz
+
+
+def senal_con_voz(cobertura: float, semilla: int = 0) -> np.ndarray:
+    """Voz armónica en la primera 'cobertura' del archivo, ruido leve en todo"""
+    rng = np.random.default_rng(semilla)
+    n = int(DURACION * FRECUENCIA)
+    t = np.arange(n) / FRECUENCIA
+    voz = sum(0.3 / k * np.sin(2 * np.pi * TONO * k * t) for k in range(1, 6))
+    voz[int(cobertura * n):] = 0.0
+    return (voz + 0.002 * rng.standard_normal(n)).astype(np.float32)
+
+
+def main():
+    print("\n" + "="*70)
+    print("🔍 VERIFICACIÓN DEL ANÁLISIS ACÚSTICO")
+    print("="*70 + "\n")
+
+    errores = []
+    for cobertura in COBERTURAS:
+        resultado = extraer_caracteristicas(senal_con_voz(cobertura), FRECUENCIA)
+        proporcion, tono = resultado['proporcion_voz'], resultado['tono_medio']
+        print(f"   🎙️ Voz en {cobertura*100:.0f}% del archivo: proporcion_voz {proporcion:.2f}, "
+              f"tono {tono if tono is None else round(tono, 1)} Hz")
+        if abs(proporcion - cobertura) > TOLERANCIA_PROPORCION:
+            errores.append(f"voz en {cobertura*100:.0f}%: proporcion_voz {proporcion:.2f}")
+        if tono is None or abs(tono - TONO) > TOLERANCIA_TONO:
+            errores.append(f"voz en {cobertura*100:.0f}%: tono {tono} (se esperaban {TONO:.0f} Hz)")
+
+    silencio = extraer_caracteristicas(senal_con_voz(0.0), FRECUENCIA)
+    if silencio['proporcion_voz'] > 0:
+        errores.append(f"silencio tomado como voz ({silencio['proporcion_voz']:.2f})")
+
+    print("\n" + "="*70)
+    if errores:
+        for error in errores:
+            print(f"❌ {error}")
+        print("="*70 + "\n")
+        sys.exit(1)
+
+    print("✅ Voz detectada en toda su extensión, también en vocales sostenidas")
+    print("="*70 + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+VERIFICACIÓN DE MINIATURAS DE GRABACIONES
+Escribe WAV sintéticos en una carpeta temporal y comprueba grabaciones.py:
+
+- que reducir_min_max da lo mismo que un recorrido columna por columna
+  (largos exactos, con relleno y más cortos que la miniatura) y conserva
+  el mínimo y el máximo de la señal
+- que leer_wav mezcla el estéreo a mono
+- que obtener_miniatura guarda la caché por hash y la usa sin volver a leer
+  el audio, y devuelve None si no hay ni caché ni archivo
+- que sin sounddevice el reproductor no falla
+
+Sale con código 1 si algo falla.
+
+Uso:
+    python verificar_grabaciones.py
+"""
+import io
+import os
+import sys
+import time
+import tempfile
+import contextlib
+
+import numpy as np
+import soundfile as sf
+
+from grabaciones import (
+    COLUMNAS_MINIATURA, REPRODUCCION_DISPONIBLE, ReproductorAudio,
+    leer_wav, obtener_miniatura, reducir_min_max,
+)
+
+
+SAMPLE_RATE = 16000
+SEGUNDOS_LARGA = 600
+
+
+def reducir_columna_por_columna(muestras: np.ndarray, columnas: int) -> np.ndarray:
+    """Referencia lenta: mismo relleno con el último valor que reducir_min_max"""
+    por_columna = -(-len(muestras) // columnas)
+    resultado = np.zeros((2, columnas), dtype=np.float32)
+    for columna in range(columnas):
+        bloque = [muestras[min(i, len(muestras) - 1)]
+                  for i in range(columna * por_columna, (columna + 1) * por_columna)]
+        resultado[0, columna] = min(bloque)
+        resultado[1, columna] = max(bloque)
+    return resultado
+
+
+def senal(largo: int, semilla: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(semilla)
+    t = np.arange(largo) / SAMPLE_RATE
+    muestras = 0.5 * np.sin(2 * np.pi * 220 * t) + 0.05 * rng.standard_normal(largo)
+    return np.clip(muestras, -1.0, 1.0).astype(np.float32)
+
+
+def verificar_reduccion(errores: list):
+    for largo, columnas in ((24_000, 240), (24_001, 240), (100, 240), (1, 240), (5_000, 7)):
+        muestras = senal(largo, semilla=largo)
+        muestras[largo // 3] = 0.99
+        miniatura = reducir_min_max(muestras, columnas)
+        referencia = reducir_columna_por_columna(muestras, columnas)
+
+        if miniatura.shape != (2, columnas) or miniatura.dtype != np.float32:
+            errores.append(f"{largo} muestras: forma {miniatura.shape} {miniatura.dtype}")
+        elif not np.array_equal(miniatura, referencia):
+            errores.append(f"{largo} muestras en {columnas} columnas: distinta de la referencia")
+        elif miniatura[0].min() != muestras.min() or miniatura[1].max() != muestras.max():
+            errores.append(f"{largo} muestras: se perdió el mínimo o el máximo")
+    if not errores:
+        print("   ✅ reducir_min_max coincide con la referencia columna por columna")
+
+    vacia = reducir_min_max(np.zeros(0, dtype=np.float32))
+    if vacia.shape != (2, COLUMNAS_MINIATURA) or vacia.any():
+        errores.append("una grabación vacía no da una miniatura en cero")
+
+    larga = senal(SEGUNDOS_LARGA * SAMPLE_RATE)
+    inicio = time.perf_counter()
+    reducir_min_max(larga)
+    print(f"   ⏱️ {SEGUNDOS_LARGA // 60} minutos de audio reducidos en "
+          f"{(time.perf_counter() - inicio) * 1000:.1f} ms")
+
+
+def verificar_cache(carpeta: str, errores: list):
+    izquierda, derecha = senal(8_000, 1), senal(8_000, 2)
+    ruta_wav = os.path.join(carpeta, 'estereo.wav')
+    sf.write(ruta_wav, np.stack([izquierda, derecha], axis=1), SAMPLE_RATE, subtype='FLOAT')
+
+    mono, sample_rate = leer_wav(ruta_wav)
+    if sample_rate != SAMPLE_RATE or not np.allclose(mono, (izquierda + derecha) / 2, atol=1e-6):
+        errores.append("leer_wav no mezcla los canales a mono")
+
+    carpeta_cache = os.path.join(carpeta, 'miniaturas')
+    sha256 = 'ab' + '0' * 62
+    calculada = obtener_miniatura(ruta_wav, sha256, carpeta=carpeta_cache)
+    ruta_cache = os.path.join(carpeta_cache, 'ab', f"{sha256}_{COLUMNAS_MINIATURA}.npy")
+    if calculada is None or not os.path.exists(ruta_cache):
+        errores.append("obtener_miniatura no guardó la caché")
+        return
+
+    # Sin el WAV solo puede salir de la caché
+    os.remove(ruta_wav)
+    desde_cache = obtener_miniatura(ruta_wav, sha256, carpeta=carpeta_cache)
+    if desde_cache is None or not np.array_equal(desde_cache, calculada):
+        errores.append("obtener_miniatura no usó la caché")
+    else:
+        print("   ✅ La miniatura sale de la caché sin leer el audio")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        faltante = obtener_miniatura(ruta_wav, 'cd' + '0' * 62, carpeta=carpeta_cache)
+    if faltante is not None:
+        errores.append("obtener_miniatura devolvió algo sin caché ni archivo")
+
+    sobrantes = [n for _, _, archivos in os.walk(carpeta_cache) for n in archivos if n.endswith('.tmp')]
+    if sobrantes:
+        errores.append(f"quedaron temporales en la caché: {sobrantes}")
+
+
+def verificar_reproductor(errores: list):
+    reproductor = ReproductorAudio()
+    if REPRODUCCION_DISPONIBLE:
+        print("   ℹ️ sounddevice disponible: la reproducción no se prueba sin salida de audio")
+        return
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            reproductor.reproducir(senal(1_000), SAMPLE_RATE)
+            reproductor.detener()
+    except Exception as e:
+        errores.append(f"el reproductor falló sin sounddevice: {e}")
+        return
+    if reproductor.reproduciendo:
+        errores.append("el reproductor dice estar reproduciendo sin sounddevice")
+    else:
+        print("   ✅ Sin sounddevice el reproductor avisa y no falla")
+
+
+def main():
+    print("\n" + "="*70)
+    print("🔍 VERIFICACIÓN DE MINIATURAS DE GRABACIONES")
+    print("="*70 + "\n")
+
+    errores = []
+    verificar_reduccion(errores)
+    with tempfile.TemporaryDirectory() as carpeta:
+        verificar_cache(carpeta, errores)
+    verificar_reproductor(errores)
+
+    print("\n" + "="*70)
+    if errores:
+        for error in errores:
+            print(f"❌ {error}")
+        print("="*70 + "\n")
+        sys.exit(1)
+
+    print("✅ Miniaturas correctas y en caché")
+    print("="*70 + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""
+VERIFICACIÓN DE PLANES DE CONSULTA
+Crea una base de datos sintética grande (100.000 sesiones) y comprueba con
+EXPLAIN QUERY PLAN que ninguna consulta frecuente de Database recorre una
+tabla completa (SCAN). Sale con código 1 si alguna consulta se degrada.
+
+Uso:
+    python verificar_planes_consulta.py [num_sesiones]
+"""
+import io
+import os
+import re
+import sys
+import random
+import sqlite3
+import tempfile
+import contextlib
+from datetime import datetime, timedelta
+
+from database import Database
+from inicializar_bd_mejorado import crear_tablas
+from models import NivelTerapia
+
+
+NUM_SESIONES = 100_000
+NUM_PERSONAS = 2_000
+NUM_EJERCICIOS_POR_NIVEL = 12
+
+PATRON_SCAN = re.compile(r'^SCAN ([\w.]+)(?: VIRTUAL TABLE INDEX \d+:(\S*))?')
+
+# Recorridos aceptados: (tabla) -> motivo
+SCANS_PERMITIDOS = {
+    'main.person_fts_config': "tabla interna de FTS5 con una sola fila",
+    'person_fts_vocab': "vocabulario del índice, solo al corregir errores de escritura",
+}
+
+
+# ========== DATOS SINTÉTICOS ==========
+
+def poblar_datos_sinteticos(db_path: str, num_sesiones: int = NUM_SESIONES) -> dict:
+    """Insertar niveles, ejercicios, personas y sesiones sintéticas"""
+    rnd = random.Random(1234)
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+
+    cursor.executemany(
+        "INSERT INTO level (levelId, name, description) VALUES (?, ?, ?)",
+        [(n.value, n.name, '') for n in NivelTerapia]
+    )
+
+    ejercicio_id = 0
+    for nivel in NivelTerapia:
+        for numero in range(1, NUM_EJERCICIOS_POR_NIVEL + 1):
+            ejercicio_id += 1
+            cursor.execute(
+                "INSERT INTO exercise (exerciseId, type, word, difficulty) VALUES (?, 'palabra', ?, ?)",
+                (ejercicio_id, f"PALABRA{ejercicio_id}", nivel.value)
+            )
+            cursor.execute(
+                "INSERT INTO therapy (levelId, exerciseId, therapy_number) VALUES (?, ?, ?)",
+                (nivel.value, ejercicio_id, numero)
+            )
+
+    cursor.executemany(
+        """
+        INSERT INTO person (personId, name, apellido, age, actual_level, register_date)
+        VALUES (?, ?, ?, ?, ?, ?)
+        """,
+        [
+            (i, f"Nombre{i}", f"Apellido{i % 300}", rnd.randint(3, 12),
+             rnd.randint(1, 4), '2025-01-01 10:00:00')
+            for i in range(1, NUM_PERSONAS + 1)
+        ]
+    )
+
+    inicio = datetime(2024, 1, 1)
+    cursor.executemany(
+        """
+        INSERT INTO sesion (personId, levelId, number, date, correct_exercise, failed_exercise)
+        VALUES (?, ?, ?, ?, ?, ?)
+        """,
+        (
+            (rnd.randint(1, NUM_PERSONAS), rnd.randint(1, 4), 1,
+             (inicio + timedelta(minutes=i * 7)).strftime('%Y-%m-%d %H:%M:%S'),
+             rnd.randint(0, 10), rnd.randint(0, 10))
+            for i in range(num_sesiones)
+        )
+    )
+
+    cursor.executemany(
+        "INSERT INTO observaciones (personId, observacion, terapeuta) VALUES (?, ?, 'Sistema')",
+        [(rnd.randint(1, NUM_PERSONAS), "Observación sintética") for _ in range(num_sesiones // 10)]
+    )
+
+    conn.commit()
+    conn.close()
+
+    return {'person_id': NUM_PERSONAS // 2}
+
+
+# ========== CONSULTAS FRECUENTES ==========
+
+# (nombre, función que ejecuta el método real de Database)
+CONSULTAS_FRECUENTES = [
+    ("obtener_sesiones_por_persona",
+     lambda db, d: db.obtener_sesiones_por_persona(d['person_id'])),
+    ("obtener_ultima_sesion",
+     lambda db, d: db.obtener_ultima_sesion(d['person_id'])),
+    ("buscar_persona_por_nombre",
+     lambda db, d: db.buscar_persona_por_nombre(f"Nombre{d['person_id']}")),
+    ("buscar_persona_por_nombre_apellido",
+     lambda db, d: db.buscar_persona_por_nombre_apellido(
+         f"nombre{d['person_id']}", f"APELLIDO{d['person_id'] % 300}")),
+    ("obtener_personas_pagina (primera)",
+     lambda db, d: db.obtener_personas_pagina(None, 50)),
+    ("obtener_personas_pagina (siguiente)",
+     lambda db, d: db.obtener_personas_pagina(d['person_id'], 50)),
+    ("buscar_personas (prefijo)",
+     lambda db, d: db.buscar_personas(f"nom apellido{d['person_id'] % 300}")),
+    ("buscar_personas (error de escritura)",
+     lambda db, d: db.buscar_personas(f"Nonbre{d['person_id']}")),
+    ("obtener_personas_nuevas",
+     lambda db, d: db.obtener_personas_nuevas(d['person_id'], 500)),
+    ("obtener_ejercicios_por_nivel",
+     lambda db, d: db.obtener_ejercicios_por_nivel(NivelTerapia.INTERMEDIO)),
+    ("obtener_observaciones_persona",
+     lambda db, d: db.obtener_observaciones_persona(d['person_id'])),
+    ("obtener_precision_por_palabra",
+     lambda db, d: db.obtener_precision_por_palabra(d['person_id'])),
+    ("obtener_progreso_persona",
+     lambda db, d: db.obtener_progreso_persona(d['person_id'])),
+    ("contar_sesiones_persona",
+     lambda db, d: db.contar_sesiones_persona(d['person_id'])),
+    ("obtener_audios_persona",
+     lambda db, d: db.obtener_audios_persona(d['person_id'])),
+    ("obtener_audios_sesion",
+     lambda db, d: db.obtener_audios_sesion(d['person_id'], 1)),
+    ("obtener_tendencia_acustica",
+     lambda db, d: db.obtener_tendencia_acustica(d['person_id'])),
+    ("obtener_dominio_palabras",
+     lambda db, d: db.obtener_dominio_palabras(d['person_id'])),
+    ("obtener_historial_resultados",
+     lambda db, d: db.obtener_historial_resultados(d['person_id'])),
+]
+
+
+def _capturar_sentencias(db: Database, funcion, datos) -> list:
+    """Ejecutar un método de Database y capturar el SQL que envía a SQLite"""
+    sentencias = []
+    db.conn.set_trace_callback(sentencias.append)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            funcion(db, datos)
+    finally:
+        db.conn.set_trace_callback(None)
+
+    return [
+        s for s in sentencias
+        if s.lstrip().upper().startswith(('SELECT', 'WITH', 'UPDATE', 'DELETE'))
+    ]
+
+
+def _es_scan_completo(detalle: str) -> bool:
+    """SCAN de una tabla real (no una búsqueda MATCH de FTS5 ni un caso permitido)"""
+    coincidencia = PATRON_SCAN.match(detalle)
+    if not coincidencia:
+        return False
+
+    tabla, indice_virtual = coincidencia.groups()
+    if tabla in SCANS_PERMITIDOS:
+        return False
+    # FTS5 codifica las restricciones MATCH como 'M' en el índice virtual
+    if indice_virtual and 'M' in indice_virtual:
+        return False
+    return True
+
+
+def verificar_planes(db: Database, datos: dict) -> list:
+    """
+    Devuelve la lista de regresiones: (consulta, detalle_del_plan)
+    """
+    regresiones = []
+
+    for nombre, funcion in CONSULTAS_FRECUENTES:
+        sentencias = _capturar_sentencias(db, funcion, datos)
+
+        if not sentencias:
+            print(f"   ⚠️  {nombre}: no ejecutó ninguna consulta")
+            continue
+
+        for sql in sentencias:
+            plan = db.conn.execute(f"EXPLAIN QUERY PLAN {sql}").fetchall()
+            detalles = [fila[3] for fila in plan]
+            scans = [d for d in detalles if _es_scan_completo(d)]
+
+            if scans:
+                print(f"   ❌ {nombre}:")
+                for detalle in detalles:
+                    print(f"        {detalle}")
+                regresiones.extend((nombre, d) for d in scans)
+            else:
+                print(f"   ✅ {nombre}: {' | '.join(detalles)}")
+
+    return regresiones
+
+
+def main():
+    num_sesiones = int(sys.argv[1]) if len(sys.argv) > 1 else NUM_SESIONES
+
+    print("\n" + "="*70)
+    print("🔍 VERIFICACIÓN DE PLANES DE CONSULTA")
+    print("="*70 + "\n")
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        db_path = os.path.join(carpeta, 'sintetica.db')
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            crear_tablas(db_path)
+            Database(db_path).cerrar()  # aplica migraciones
+
+        print(f"📦 Generando {num_sesiones:,} sesiones sintéticas...")
+        datos = poblar_datos_sinteticos(db_path, num_sesiones)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            db = Database(db_path)
+
+        print("📋 Planes de consulta:\n")
+        regresiones = verificar_planes(db, datos)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            db.cerrar()
+
+    print("\n" + "="*70)
+    if regresiones:
+        print(f"❌ {len(regresiones)} consulta(s) recorren tablas completas")
+        print("="*70 + "\n")
+        sys.exit(1)
+
+    print("✅ Ninguna consulta frecuente recorre tablas completas")
+    print("="*70 + "\n")
+
+
+if __name__ == "__main__":
+    main()
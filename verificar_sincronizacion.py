@@ -0,0 +1,285 @@
+"""
+VERIFICACIÓN DE LA SINCRONIZACIÓN
+Crea dos bases de datos de robot en una carpeta temporal, las sincroniza
+contra un mismo almacén central (por HTTP, con token) hasta que no quedan
+cambios y comprueba:
+
+- que homónimos sin DNI no se unen y que ningún registro propio pierde su
+  edad, nivel o fecha de registro
+- que el mismo niño (mismo DNI) queda una sola vez en cada robot
+- que ambos robots terminan con las mismas personas y que cada sesión del
+  almacén es igual a su fila en el robot de origen
+- que una ronda más no envía ni cambia nada y que el registro de cambios
+  queda compactado
+- que vincular() une el historial de dos registros sin DNI
+- que el servidor rechaza pedidos sin token y no escucha fuera de
+  127.0.0.1 sin token
+- que personas_desde entrega por páginas todas las personas de lotes más
+  grandes que la página
+
+Sale con código 1 si algo falla.
+
+Uso:
+    python verificar_sincronizacion.py
+"""
+import io
+import os
+import sys
+import json
+import sqlite3
+import tempfile
+import threading
+import contextlib
+import urllib.error
+from collections import Counter
+
+from database import Database
+from inicializar_bd_mejorado import crear_tablas
+from sincronizacion import (
+    AlmacenCentralHTTP, AlmacenCentralLocal, CAMPOS_PERSONA, CAMPOS_PROTEGIDOS,
+    Sincronizador, crear_servidor, id_global,
+)
+
+
+TOKEN = 'verificacion'
+MAX_RONDAS = 5
+
+# (name, apellido, age, dni, sex, actual_level, register_date)
+PERSONAS = {
+    'robotA': [
+        ('Rubén', 'Valles', 12, None, 'M', 1, '2025-12-30 10:00:00'),
+        ('Rubén', 'Valles', 15, None, 'M', 4, '2026-01-08 10:00:00'),  # homónimo
+        ('María', 'López', 7, '11.111.111', 'F', 2, '2025-11-01 09:00:00'),
+        ('Ana', None, 6, None, 'F', 1, '2025-10-01 09:00:00'),
+    ],
+    'robotB': [
+        ('Rubén', 'Valles', 9, None, 'M', 3, '2025-12-15 10:00:00'),   # otro niño
+        ('María', 'Lopez', 8, '11111111', 'F', 3, '2026-02-01 09:00:00'),  # la misma
+        ('Juan', 'Pérez', 10, '22222222', 'M', 2, '2026-01-20 09:00:00'),
+        ('Ana', None, 6, None, 'F', 1, '2026-03-01 09:00:00'),          # se vincula a mano
+    ],
+}
+SESIONES_POR_PERSONA = 3
+
+# Dos lotes que juntos superan una página de personas_desde
+PERSONAS_POR_LOTE = 300
+LIMITE_PAGINA = 500
+
+
+# ========== DATOS ==========
+
+def crear_robot(carpeta: str, robot_id: str) -> str:
+    db_path = os.path.join(carpeta, f"{robot_id}.db")
+    with contextlib.redirect_stdout(io.StringIO()):
+        crear_tablas(db_path)
+        Database(db_path).cerrar()  # aplica migraciones
+
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.executemany(
+        "INSERT INTO level (levelId, name, description) VALUES (?, ?, '')",
+        [(1, 'INICIAL'), (2, 'BASICO'), (3, 'INTERMEDIO'), (4, 'AVANZADO')]
+    )
+    for persona in PERSONAS[robot_id]:
+        cursor.execute("""
+            INSERT INTO person (name, apellido, age, dni, sex, actual_level, register_date)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, persona)
+        person_id = cursor.lastrowid
+        cursor.executemany("""
+            INSERT INTO sesion (personId, levelId, number, date, correct_exercise, failed_exercise)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, [(person_id, persona[5], n, f"2026-03-{n + 1:02d} 1{n}:00:00", n + 2, 1)
+              for n in range(1, SESIONES_POR_PERSONA + 1)])
+    conn.commit()
+    conn.close()
+    return db_path
+
+
+def leer_personas(db_path: str) -> dict:
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    filas = conn.execute(f"SELECT personId, {', '.join(CAMPOS_PERSONA)} FROM person").fetchall()
+    conn.close()
+    return {fila['personId']: {campo: fila[campo] for campo in CAMPOS_PERSONA} for fila in filas}
+
+
+def sincronizar(robots: dict, url: str) -> list:
+    resumenes = []
+    for robot_id, db_path in robots.items():
+        sincronizador = Sincronizador(AlmacenCentralHTTP(url, token=TOKEN), db_path, robot_id)
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                resumen = sincronizador.sincronizar()
+        finally:
+            sincronizador.cerrar()
+        if resumen['error']:
+            raise RuntimeError(f"{robot_id}: {resumen['error']}")
+        resumenes.append(resumen)
+    return resumenes
+
+
+# ========== COMPROBACIONES ==========
+
+def _sin_protegidos(persona: dict) -> tuple:
+    return tuple(persona[c] for c in CAMPOS_PERSONA if c not in CAMPOS_PROTEGIDOS)
+
+
+def verificar(robots: dict, antes: dict, almacen, errores: list):
+    despues = {robot_id: leer_personas(db_path) for robot_id, db_path in robots.items()}
+
+    for robot_id, personas in antes.items():
+        for person_id, original in personas.items():
+            actual = despues[robot_id].get(person_id)
+            if actual is None:
+                errores.append(f"{robot_id}: desapareció la persona {person_id}")
+                continue
+            cambiados = [c for c in CAMPOS_PROTEGIDOS if actual[c] != original[c]]
+            if cambiados:
+                errores.append(f"{robot_id}: la persona {person_id} ({original['name']}) "
+                               f"cambió {', '.join(cambiados)}")
+
+    # 4 propias + 4 del otro robot - 1 unida por DNI
+    for robot_id, personas in despues.items():
+        esperadas = sum(len(p) for p in PERSONAS.values()) - 1
+        if len(personas) != esperadas:
+            errores.append(f"{robot_id}: {len(personas)} personas (se esperaban {esperadas})")
+        rubenes = sum(1 for p in personas.values() if p['name'] == 'Rubén')
+        if rubenes != 3:
+            errores.append(f"{robot_id}: {rubenes} 'Rubén Valles' (los 3 homónimos deben seguir separados)")
+
+    a, b = (Counter(_sin_protegidos(p) for p in despues[r].values()) for r in robots)
+    if a != b:
+        errores.append(f"los robots terminaron con personas distintas: {(a - b) + (b - a)}")
+
+    # Cada sesión del almacén es igual a su fila en el robot de origen
+    for robot_id, db_path in robots.items():
+        conn = sqlite3.connect(db_path)
+        conn.row_factory = sqlite3.Row
+        sesiones = {fila['sesionId']: dict(fila) for fila in conn.execute("SELECT * FROM sesion")}
+        conn.close()
+        centrales = {
+            gid: json.loads(datos) for gid, datos in almacen._conn.execute(
+                "SELECT globalId, datos FROM registros WHERE tabla = 'sesion' AND robotId = ?",
+                (robot_id,)
+            )
+        }
+        for sesion_id, fila in sesiones.items():
+            if centrales.get(id_global(robot_id, sesion_id)) != fila:
+                errores.append(f"{robot_id}: la sesión {sesion_id} no coincide con el almacén")
+        if len(centrales) != len(sesiones):
+            errores.append(f"{robot_id}: {len(centrales)} sesiones en el almacén, {len(sesiones)} en el robot")
+
+
+def verificar_paginas(carpeta: str, errores: list):
+    almacen = AlmacenCentralLocal(carpeta)
+    try:
+        for robot_id in PERSONAS:
+            almacen.enviar_cambios(robot_id, [{
+                'tabla': 'person', 'id': i, 'version': 1, 'fecha': '2026-03-01 10:00:00',
+                'datos': {'name': f"Niño {i}", 'apellido': robot_id, 'age': 7, 'dni': None,
+                          'sex': None, 'diagnostic_level': 1, 'actual_level': 1,
+                          'register_date': '2026-03-01 10:00:00'},
+            } for i in range(1, PERSONAS_POR_LOTE + 1)])
+
+        entregadas, secuencia, paginas = set(), 0, 0
+        while True:
+            personas, secuencia_nueva = almacen.personas_desde(secuencia, LIMITE_PAGINA)
+            if not personas and secuencia_nueva == secuencia:
+                break
+            entregadas.update(p['globalId'] for p in personas)
+            secuencia, paginas = secuencia_nueva, paginas + 1
+    finally:
+        almacen.cerrar()
+
+    esperadas = PERSONAS_POR_LOTE * len(PERSONAS)
+    if len(entregadas) != esperadas:
+        errores.append(f"personas_desde entregó {len(entregadas)} de {esperadas} personas "
+                       f"en páginas de {LIMITE_PAGINA}")
+    else:
+        print(f"   ✅ {esperadas} personas en {paginas} páginas de {LIMITE_PAGINA}, ninguna perdida")
+
+
+def main():
+    print("\n" + "="*70)
+    print("🔍 VERIFICACIÓN DE LA SINCRONIZACIÓN")
+    print("="*70 + "\n")
+
+    errores = []
+    with tempfile.TemporaryDirectory() as carpeta:
+        verificar_paginas(os.path.join(carpeta, 'paginas'), errores)
+
+        robots = {robot_id: crear_robot(carpeta, robot_id) for robot_id in PERSONAS}
+        antes = {robot_id: leer_personas(db_path) for robot_id, db_path in robots.items()}
+
+        try:
+            crear_servidor(os.path.join(carpeta, 'central'), 0, host='0.0.0.0')
+            errores.append("el servidor aceptó escuchar en 0.0.0.0 sin token")
+        except ValueError:
+            print("   ✅ Sin token el servidor solo escucha en 127.0.0.1")
+
+        servidor = crear_servidor(os.path.join(carpeta, 'central'), 0, token=TOKEN)
+        hilo = threading.Thread(target=servidor.serve_forever, daemon=True)
+        hilo.start()
+        url = f"http://127.0.0.1:{servidor.server_address[1]}"
+        almacen = servidor.RequestHandlerClass.almacen
+
+        try:
+            try:
+                AlmacenCentralHTTP(url).personas_desde(0)
+                errores.append("el servidor respondió un pedido sin token")
+            except urllib.error.HTTPError as e:
+                if e.code == 401:
+                    print("   ✅ Pedido sin token rechazado (401)")
+                else:
+                    errores.append(f"pedido sin token: código {e.code} (se esperaba 401)")
+
+            # Hasta que una ronda completa no traiga nada
+            for ronda in range(1, MAX_RONDAS + 1):
+                resumenes = sincronizar(robots, url)
+                movimiento = sum(r['cambios'] + r['personas_nuevas'] + r['personas_actualizadas']
+                                 for r in resumenes)
+                print(f"   🔄 Ronda {ronda}: {movimiento} cambios y personas")
+                if movimiento == 0:
+                    break
+            else:
+                errores.append(f"la sincronización no se estabilizó en {MAX_RONDAS} rondas")
+
+            verificar(robots, antes, almacen, errores)
+
+            for robot_id, db_path in robots.items():
+                conn = sqlite3.connect(db_path)
+                pendientes = conn.execute("SELECT COUNT(*) FROM registro_cambios").fetchone()[0]
+                conn.close()
+                if pendientes:
+                    errores.append(f"{robot_id}: {pendientes} cambios sin compactar")
+
+            # Vínculo confirmado entre las dos 'Ana' sin DNI
+            ana_a, ana_b = id_global('robotA', 4), id_global('robotB', 4)
+            separadas = len(almacen.sesiones_persona(ana_a))
+            almacen.vincular(ana_a, ana_b)
+            unidas = len(almacen.sesiones_persona(ana_a))
+            if separadas >= unidas:
+                errores.append(f"vincular no unió el historial ({separadas} -> {unidas} sesiones)")
+            else:
+                print(f"   ✅ Vínculo confirmado: historial de {separadas} -> {unidas} sesiones")
+            sincronizar(robots, url)
+            verificar(robots, antes, almacen, errores)
+        finally:
+            servidor.shutdown()
+            servidor.server_close()
+            almacen.cerrar()
+
+    print("\n" + "="*70)
+    if errores:
+        for error in dict.fromkeys(errores):
+            print(f"❌ {error}")
+        print("="*70 + "\n")
+        sys.exit(1)
+
+    print("✅ Robots y almacén central coinciden, sin uniones por nombre")
+    print("="*70 + "\n")
+
+
+if __name__ == "__main__":
+    main()